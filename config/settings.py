@@ -108,6 +108,25 @@ DATABASES = {
 }
 
 
+# Cache
+# 限流（core.utils.rate_limit）等跨 worker 共享的状态依赖共享缓存：生产必须设置 REDIS_URL
+# （如 redis://127.0.0.1:6379/1），未设置时回退进程内 LocMem，每个 gunicorn worker 各自计数（启动时告警）
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -2,9 +2,11 @@
 # purpose: Django Admin 注册 AI 相关模型，便于运维查看与手工操作
 from __future__ import annotations
 from django.contrib import admin
-from core.models.ai_billing import AiTenantTokenAccount, AiTokenTransaction
+from core.models.ai_billing import AiTenantTokenAccount, AiTokenTransaction, AiTokenLease
 from core.models.ai_logging import AiChatSession, AiMessage, AiRun, AiCallLog
-from core.models.ai_settings import AiTenantDefaultModel, AiModelPreference
+from core.models.ai_settings import AiTenantDefaultModel, AiModelPreference, AiModelRoute
+from core.models.ai_batch import AiBatchJob, AiBatchItem
+from core.ai.model_prefs import invalidate_model_prefs
 
 
 @admin.register(AiTenantTokenAccount)
@@ -21,6 +23,12 @@ class AiTokenTransactionAdmin(admin.ModelAdmin):
     date_hierarchy = "created_at"
 
 
+@admin.register(AiTokenLease)
+class AiTokenLeaseAdmin(admin.ModelAdmin):
+    list_display = ("tenant_id", "holder", "tokens", "expires_at", "updated_at")
+    search_fields = ("tenant_id", "holder")
+
+
 @admin.register(AiChatSession)
 class AiChatSessionAdmin(admin.ModelAdmin):
     list_display = ("id", "tenant_id", "user_id", "agent", "title", "status", "updated_at")
@@ -49,15 +57,55 @@ class AiCallLogAdmin(admin.ModelAdmin):
     date_hierarchy = "created_at"
 
 
+@admin.register(AiBatchJob)
+class AiBatchJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "tenant_id", "agent", "title", "status", "priority", "total", "done", "failed", "created_at")
+    search_fields = ("tenant_id", "title")
+    list_filter = ("status",)
+    date_hierarchy = "created_at"
+
+
+@admin.register(AiBatchItem)
+class AiBatchItemAdmin(admin.ModelAdmin):
+    list_display = ("job", "idx", "custom_id", "status", "attempts", "tokens", "provider", "updated_at")
+    search_fields = ("custom_id", "job__tenant_id")
+    list_filter = ("status",)
+
+
+class _ModelPrefInvalidateMixin:
+    """后台修改模型偏好后使解析缓存失效（绕过 set_user_model/set_tenant_default_model 的写入）。"""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_model_prefs(obj.tenant_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_model_prefs(obj.tenant_id)
+
+    def delete_queryset(self, request, queryset):
+        tenants = set(queryset.values_list("tenant_id", flat=True))
+        super().delete_queryset(request, queryset)
+        for t in tenants:
+            invalidate_model_prefs(t)
+
+
 @admin.register(AiTenantDefaultModel)
-class AiTenantDefaultModelAdmin(admin.ModelAdmin):
+class AiTenantDefaultModelAdmin(_ModelPrefInvalidateMixin, admin.ModelAdmin):
     list_display = ("tenant_id", "provider_key", "model_name", "is_active", "updated_at")
     search_fields = ("tenant_id", "provider_key", "model_name")
     list_filter = ("is_active",)
 
 
 @admin.register(AiModelPreference)
-class AiModelPreferenceAdmin(admin.ModelAdmin):
+class AiModelPreferenceAdmin(_ModelPrefInvalidateMixin, admin.ModelAdmin):
     list_display = ("tenant_id", "user_id", "provider_key", "model_name", "is_active", "updated_at")
     search_fields = ("tenant_id", "user_id", "provider_key", "model_name")
-    list_filter = ("is_active",)
\ No newline at end of file
+    list_filter = ("is_active",)
+
+
+@admin.register(AiModelRoute)
+class AiModelRouteAdmin(_ModelPrefInvalidateMixin, admin.ModelAdmin):
+    list_display = ("tenant_id", "agent", "tier", "provider_key", "model_name", "is_active", "updated_at")
+    search_fields = ("tenant_id", "agent", "provider_key", "model_name")
+    list_filter = ("tier", "is_active")
@@ -57,4 +57,44 @@ def apply_output_filters(*, tenant_id: str, text: str) -> Dict[str, Any]:
     return out
 
 
-__all__ = ["apply_output_filters", "redact", "validate_med_claims", "AuditIssue"]
+# 邮箱/号码/证件号的组成字符：流式切分时不在这类连续字符中间断开
+_PII_CHAR = re.compile(r"[A-Za-z0-9._%+@\-]")
+_PHONE_PREFIX = re.compile(r"\+?86[- ]?$")
+
+
+class StreamRedactor:
+    """流式增量脱敏：已确认不会再与后续分片组成 PII 的前缀才脱敏输出，末尾片段暂存。"""
+
+    hold = 8  # 末尾至少暂存的字符数
+
+    def __init__(self) -> None:
+        self._buf = ""
+        self.text = ""  # 已输出的脱敏全文
+
+    def feed(self, delta: str) -> str:
+        self._buf += delta or ""
+        cut = self._safe_cut(len(self._buf) - self.hold)
+        if cut <= 0:
+            return ""
+        out = redact(self._buf[:cut])
+        self._buf = self._buf[cut:]
+        self.text += out
+        return out
+
+    def _safe_cut(self, cut: int) -> int:
+        buf = self._buf
+        while cut > 0 and _PII_CHAR.match(buf[cut - 1]) and _PII_CHAR.match(buf[cut]):
+            cut -= 1
+        m = _PHONE_PREFIX.search(buf, 0, max(0, cut))
+        if m and m.start() < cut and (buf[cut:cut + 1] or " ") in " -0123456789":
+            return self._safe_cut(m.start())
+        return cut
+
+    def flush(self) -> str:
+        out = redact(self._buf)
+        self._buf = ""
+        self.text += out
+        return out
+
+
+__all__ = ["apply_output_filters", "redact", "validate_med_claims", "AuditIssue", "StreamRedactor"]
@@ -0,0 +1,256 @@
+# file: core/ai/batch.py
+# purpose: 离线 LLM 批处理：submit() 把多条提示词挂在一个作业下；run() 调度器按作业优先级领取条目，
+#          按供应商并发上限（每个供应商一个线程池）经 Orchestrator(priority="batch") 调用，结果/进度写回 AiBatchItem/AiBatchJob；
+#          交互优先：批处理调用只使用租户限流桶 batch_reserve 以上的额度，被限流时条目退回待处理并稍后重试（不计失败次数）；
+#          支持取消（未开始的条目不再执行）与失败条目重试；常驻消费用 `manage.py ai_batch_run`
+#          领取时记 claimed_at；running 超过 lease_s 的条目（调度进程崩溃遗留）由调度循环退回待处理并计一次尝试
+#          供应商并发按路由后的实际供应商（含租户路由覆盖）计
+# 配置：settings.AI_BATCH = {"concurrency": {"*": 2}, "max_attempts": 3, "claim_size": 20, "backoff_ms": 500,
+#                            "lease_s": 600}   # lease_s 须大于单次调用的最长耗时
+from __future__ import annotations
+import logging
+import time
+from datetime import timedelta
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, List, Optional, Union
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from core.models.ai_batch import AiBatchItem, AiBatchJob
+from core.ai.orchestrator import Orchestrator
+
+logger = logging.getLogger(__name__)
+
+_DEFAULTS: Dict[str, Any] = {"concurrency": {"*": 2}, "max_attempts": 3, "claim_size": 20, "backoff_ms": 500,
+                             "lease_s": 600}
+_ACTIVE = ("queued", "running")
+
+
+def _conf() -> Dict[str, Any]:
+    return {**_DEFAULTS, **(getattr(settings, "AI_BATCH", None) or {})}
+
+
+def _concurrency(provider: str) -> int:
+    conc = _conf()["concurrency"] or {}
+    return max(1, int(conc.get(provider, conc.get("*", 2))))
+
+
+# -------- 作业管理 --------
+
+def submit(*, tenant_id: str, prompts: Iterable[Union[str, Dict[str, Any]]], agent: str = "batch", title: str = "",
+           priority: int = 0, max_attempts: Optional[int] = None, created_by: str = "") -> AiBatchJob:
+    """创建作业：prompts 元素为字符串或 {"id": 业务键, "prompt": 文本}。"""
+    rows = []
+    for p in prompts:
+        if isinstance(p, dict):
+            rows.append((str(p.get("id") or "")[:128], str(p.get("prompt") or "")))
+        else:
+            rows.append(("", str(p)))
+    rows = [r for r in rows if r[1].strip()]
+    if not rows:
+        raise ValueError("prompts is empty")
+    with transaction.atomic():
+        job = AiBatchJob.objects.create(tenant_id=tenant_id, agent=agent or "batch", title=title[:255], priority=int(priority),
+                                        max_attempts=max(1, int(max_attempts or _conf()["max_attempts"])),
+                                        total=len(rows), created_by=created_by or "")
+        AiBatchItem.objects.bulk_create([AiBatchItem(job=job, idx=i, custom_id=cid, prompt=text)
+                                         for i, (cid, text) in enumerate(rows)], batch_size=500)
+    return job
+
+
+def cancel(job: AiBatchJob) -> int:
+    """取消作业：未开始的条目标记为 cancelled（执行中的条目完成后照常写回）。返回取消的条目数。"""
+    with transaction.atomic():
+        n = AiBatchItem.objects.filter(job=job, status="pending").update(status="cancelled")
+        AiBatchJob.objects.filter(id=job.id, status__in=_ACTIVE).update(status="cancelled", finished_at=timezone.now())
+    job.refresh_from_db()
+    return n
+
+
+def retry_failed(job: AiBatchJob) -> int:
+    """失败条目重置为待处理（尝试次数清零），作业重新入队。返回重试的条目数。"""
+    with transaction.atomic():
+        n = AiBatchItem.objects.filter(job=job, status="failed").update(status="pending", attempts=0, error="")
+        if n:
+            AiBatchJob.objects.filter(id=job.id).update(status="queued", failed=F("failed") - n, finished_at=None)
+    job.refresh_from_db()
+    return n
+
+
+def progress(job: AiBatchJob) -> Dict[str, Any]:
+    counts = dict(AiBatchItem.objects.filter(job=job).values_list("status").annotate(n=Count("id")))
+    return {
+        "job_id": job.id, "status": job.status, "title": job.title, "priority": job.priority, "total": job.total,
+        "done": job.done, "failed": job.failed, "tokens_spent": job.tokens_spent,
+        "pending": counts.get("pending", 0), "running": counts.get("running", 0), "cancelled": counts.get("cancelled", 0),
+        "progress": round((job.done + job.failed) / job.total, 4) if job.total else 1.0,
+    }
+
+
+# -------- 调度 --------
+
+def _claim(item_id: int) -> bool:
+    """条件更新抢占条目（多个调度进程并存时不重复执行）。"""
+    return AiBatchItem.objects.filter(id=item_id, status="pending").update(status="running",
+                                                                          claimed_at=timezone.now()) == 1
+
+
+def requeue_stale() -> int:
+    """running 超过 lease_s 的条目退回待处理并计一次尝试（尝试用尽记为失败）。返回处理的条目数。"""
+    cutoff = timezone.now() - timedelta(seconds=int(_conf()["lease_s"]))
+    stale = Q(status="running") & (Q(claimed_at__lt=cutoff) | Q(claimed_at__isnull=True))
+    n = 0
+    for row in AiBatchItem.objects.filter(stale).values("id", "job_id", "attempts", "job__max_attempts"):
+        final = row["attempts"] + 1 >= row["job__max_attempts"]
+        with transaction.atomic():
+            if not AiBatchItem.objects.filter(stale, id=row["id"]).update(
+                    status="failed" if final else "pending", attempts=F("attempts") + 1, claimed_at=None,
+                    error="claim lease expired"):
+                continue  # 已被其他调度进程处理
+            if final:
+                AiBatchJob.objects.filter(id=row["job_id"]).update(failed=F("failed") + 1)
+        logger.warning("batch item %s requeued after claim lease expired", row["id"])
+        if final:
+            _finish_if_complete(row["job_id"])
+        n += 1
+    return n
+
+
+def _next_items(job_id: Optional[int], limit: int) -> List[Dict[str, Any]]:
+    qs = AiBatchItem.objects.filter(status="pending", job__status__in=_ACTIVE)
+    if job_id:
+        qs = qs.filter(job_id=job_id)
+    return list(qs.order_by("-job__priority", "job__created_at", "idx")
+                .values("id", "job_id", "job__tenant_id", "job__agent")[:limit])
+
+
+def _finish_if_complete(job_id: int) -> None:
+    if not AiBatchItem.objects.filter(job_id=job_id, status__in=["pending", "running"]).exists():
+        AiBatchJob.objects.filter(id=job_id, status__in=_ACTIVE).update(status="done", finished_at=timezone.now())
+
+
+def process_item(item_id: int, *, threaded: bool = False) -> str:
+    """执行单个已领取的条目，返回结果状态：done/failed/pending（被限流或可重试）/cancelled。"""
+    try:
+        item = AiBatchItem.objects.select_related("job").get(id=item_id)
+        job = item.job
+        if job.status == "cancelled":
+            AiBatchItem.objects.filter(id=item_id).update(status="cancelled")
+            return "cancelled"
+        if job.status == "queued":
+            AiBatchJob.objects.filter(id=job.id, status="queued").update(status="running")
+        o = Orchestrator(tenant_id=job.tenant_id, agent=job.agent, priority="batch")
+        try:
+            res = o.chat_once(session=None, user_message=item.prompt, cache=False)
+            if "provider" not in res:  # 预授权未通过（余额不足等）
+                raise RuntimeError(res.get("content") or "authorization failed")
+        except RuntimeError as e:
+            if "rate limited" in str(e):  # 让位于交互请求：退回待处理，不计尝试次数
+                AiBatchItem.objects.filter(id=item_id).update(status="pending")
+                return "pending"
+            return _fail(item, job, e)
+        except Exception as e:
+            return _fail(item, job, e)
+        spent = int(res.get("spent") or 0)
+        with transaction.atomic():
+            AiBatchItem.objects.filter(id=item_id).update(
+                status="done", result=res.get("content") or "", tokens=spent, provider=res.get("provider") or "",
+                model=res.get("model") or "", error="", attempts=F("attempts") + 1)
+            AiBatchJob.objects.filter(id=job.id).update(done=F("done") + 1, tokens_spent=F("tokens_spent") + spent)
+        _finish_if_complete(job.id)
+        return "done"
+    finally:
+        if threaded:
+            close_old_connections()
+
+
+def _fail(item: AiBatchItem, job: AiBatchJob, e: Exception) -> str:
+    attempts = item.attempts + 1
+    final = attempts >= job.max_attempts
+    with transaction.atomic():
+        AiBatchItem.objects.filter(id=item.id).update(status="failed" if final else "pending", attempts=attempts,
+                                                      error=f"{type(e).__name__}: {e}"[:500])
+        if final:
+            AiBatchJob.objects.filter(id=job.id).update(failed=F("failed") + 1)
+    logger.warning("batch item %s failed (attempt %s)", item.id, attempts, exc_info=not final)
+    if final:
+        _finish_if_complete(job.id)
+    return "failed" if final else "pending"
+
+
+def _provider_for(tenant_id: str, agent: str, cache: Dict[tuple, str]) -> str:
+    key = (tenant_id, agent)
+    if key not in cache:
+        cache[key] = Orchestrator(tenant_id=tenant_id, agent=agent)._select("").provider  # 供应商不随提示词规模变化
+    return cache[key]
+
+
+def _tally(stats: Dict[str, int], outcome: str) -> bool:
+    """累计结果；返回是否有条目因限流退回（需要退避）。"""
+    key = "deferred" if outcome == "pending" else outcome
+    stats[key] = stats.get(key, 0) + 1
+    return outcome == "pending"
+
+
+def run(*, job_id: Optional[int] = None, max_items: Optional[int] = None, idle_exit: bool = True,
+        idle_sleep: float = 2.0) -> Dict[str, int]:
+    """调度循环：领取条目 → 投递到所属供应商的线程池（容量即并发上限；上限为 1 时在当前线程执行）→ 汇总结果。
+    idle_exit=True 时没有待处理条目即返回（管理命令 --once / 测试）；被限流退回的条目经 backoff_ms 后再领取。"""
+    c = _conf()
+    backoff = float(c["backoff_ms"]) / 1000.0
+    pools: Dict[str, ThreadPoolExecutor] = {}
+    inflight: Dict[Future, str] = {}
+    providers: Dict[tuple, str] = {}
+    stats = {"done": 0, "failed": 0, "deferred": 0, "cancelled": 0}
+    started = 0
+    sweep_every = max(1.0, int(c["lease_s"]) / 4)
+    next_sweep = 0.0
+    try:
+        while True:
+            if time.monotonic() >= next_sweep:
+                requeue_stale()
+                next_sweep = time.monotonic() + sweep_every
+            busy: Dict[str, int] = {}
+            for prov in inflight.values():
+                busy[prov] = busy.get(prov, 0) + 1
+            room = max_items is None or started < max_items
+            rows = _next_items(job_id, int(c["claim_size"])) if room else []
+            deferred = False
+            for row in rows:
+                if max_items is not None and started >= max_items:
+                    break
+                prov = _provider_for(row["job__tenant_id"], row["job__agent"], providers)
+                conc = _concurrency(prov)
+                if busy.get(prov, 0) >= conc or not _claim(row["id"]):
+                    continue
+                started += 1
+                if conc == 1:
+                    deferred |= _tally(stats, process_item(row["id"]))
+                    continue
+                pool = pools.get(prov)
+                if pool is None:
+                    pool = pools[prov] = ThreadPoolExecutor(max_workers=conc, thread_name_prefix=f"batch-{prov}")
+                inflight[pool.submit(process_item, row["id"], threaded=True)] = prov
+                busy[prov] = busy.get(prov, 0) + 1
+            if inflight:
+                finished, _ = wait(list(inflight), timeout=idle_sleep, return_when=FIRST_COMPLETED)
+                for f in finished:
+                    inflight.pop(f)
+                    try:
+                        deferred |= _tally(stats, f.result())
+                    except Exception:
+                        logger.warning("batch worker crashed", exc_info=True)
+                        stats["failed"] += 1
+            elif not rows:
+                if idle_exit or not room:
+                    break
+                time.sleep(idle_sleep)
+                continue
+            if deferred:
+                time.sleep(backoff)
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+    return stats
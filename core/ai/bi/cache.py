@@ -1,10 +1,12 @@
 # file: core/ai/bi/cache.py
-# purpose: 只读查询的简易缓存（Django cache），用于降低热点查询压力
+# purpose: 只读查询的简易缓存（Django cache），用于降低热点查询压力；
+#          未命中时经 singleflight 合并并发的相同查询（跨 worker 亦然），只执行一次 SQL
 from __future__ import annotations
 import hashlib
 import json
 from typing import Any, Dict, Tuple
 from django.core.cache import cache
+from core.utils import singleflight
 
 
 def _key_for(tenant_id: str, sql: str, params: Any) -> str:
@@ -17,6 +19,11 @@ def get_or_set(*, tenant_id: str, sql: str, params: Any, ttl: int, compute) -> T
     val = cache.get(key)
     if val is not None:
         return val, True
-    data = compute()
-    cache.set(key, data, timeout=max(1, int(ttl)))
-    return data, False
+
+    def _fill():
+        data = compute()
+        cache.set(key, data, timeout=max(1, int(ttl)))
+        return data
+
+    data, shared = singleflight.do(key, _fill)  # 共享他人刚算出的结果也视为命中
+    return data, shared
@@ -1,5 +1,6 @@
 # file: core/ai/billing.py
 # purpose: 计费与余额控制（软/硬阈值预警；授权-结算两段式；入账流水）
+#          AI_TOKEN_LEASE 启用时授权/结算走进程内租约（core.ai.token_lease），免去每次调用的行锁与流水写入
 #          向后兼容旧接口：InsufficientTokens、ensure_can_consume、deduct_tokens、get_or_create_account、topup_tokens
 from __future__ import annotations
 from dataclasses import dataclass, asdict
@@ -8,10 +9,10 @@ from contextlib import contextmanager
 from django.db import transaction
 from django.db.models import F
 from django.utils import timezone
-from django.conf import settings
 import logging
 
 from core.models.ai_billing import AiTenantTokenAccount, AiTokenTransaction
+from core.ai import billing_alerts, token_lease
 
 logger = logging.getLogger(__name__)
 
@@ -100,9 +101,14 @@ def get_balance(*, tenant_id: str) -> Dict[str, Any]:
 
 # ---- Authorization & Settlement --------------------------------------------
 
-def begin_authorize(*, tenant_id: str, estimate_tokens: int, reason: str = "llm_estimate") -> AuthorizationResult:
-    """预授权：校验余额是否可覆盖预计 tokens；低于 soft_limit 仅预警，不阻断。"""
+def begin_authorize(*, tenant_id: str, estimate_tokens: int, reason: str = "llm_estimate",
+                    run_id: Optional[str] = None) -> AuthorizationResult:
+    """预授权：校验余额是否可覆盖预计 tokens；低于 soft_limit 仅预警，不阻断。
+    租约模式下在本地租约内授权；传入 run_id 时预估额度被占用直至 finalize_or_rollback(run_id=...)。"""
     est = _int_tokens(estimate_tokens)
+    if token_lease.enabled():
+        allowed, why, snap = token_lease.authorize(tenant_id=tenant_id, estimate_tokens=est, run_id=run_id)
+        return AuthorizationResult(allowed=allowed, reason=why, tenant_id=tenant_id, estimate_tokens=est, snapshot=snap)
     with _account_lock(tenant_id) as acct:
         if getattr(acct, "status", "active") != "active":
             raise AccountSuspended("Account is not active")
@@ -151,6 +157,8 @@ def ensure_can_consume(*, tenant_id: str, estimate_tokens: int, reason: str = "l
 def finalize_or_rollback(*, tenant_id: str, run_id: Optional[str], actual_tokens: int, success: bool, reason: str = "llm_usage") -> Dict[str, Any]:
     """结算：成功则按实际 tokens 扣费并记流水；失败则跳过（可扩展最小扣费策略）。"""
     used = _int_tokens(actual_tokens)
+    if token_lease.enabled():
+        return token_lease.settle(tenant_id=tenant_id, run_id=run_id, actual_tokens=used, success=success, reason=reason)
     if not success or used <= 0:
         return {"deducted": 0, "skipped": True}
     with _account_lock(tenant_id) as acct:
@@ -193,7 +201,9 @@ def topup(*, tenant_id: str, tokens: int, reason: str = "manual_topup") -> Dict[
     with transaction.atomic():
         AiTenantTokenAccount.objects.filter(id=acct.id).update(token_balance=F("token_balance") + add, updated_at=_now())
         tx = AiTokenTransaction.objects.create(tenant_id=tenant_id, change=add, reason=reason, related_run_id="")
-    acct.refresh_from_db(fields=["token_balance"])  # type: ignore
+    acct.refresh_from_db(fields=["token_balance", "soft_limit"])  # type: ignore
+    if int(acct.token_balance) >= int(getattr(acct, "soft_limit", 0) or 0):
+        billing_alerts.reset_tenant(tenant_id)
     return {"added": add, "transaction_id": tx.id, "balance": int(acct.token_balance)}
 
 
@@ -203,29 +213,9 @@ def topup_tokens(*, tenant_id: str, tokens: int, reason: str = "manual_topup") -
 
 
 def maybe_alert_low_balance(*, tenant_id: str, balance: int, soft_limit: int) -> None:
-    """低余额预警：优先走信号或邮件；未配置则写日志。
-    settings 中可配置：AI_BILLING_NOTIFY_EMAILS = {tenant_id: ["ops@example.com"]}
-    """
-    emails = {}
-    try:
-        emails = getattr(settings, "AI_BILLING_NOTIFY_EMAILS", {}) or {}
-    except Exception:
-        emails = {}
-    recipients = emails.get(tenant_id) or emails.get("*") or []
-    msg = f"[AI Billing] Tenant {tenant_id} low balance: {balance} < soft_limit {soft_limit}"
-    if recipients:
-        try:
-            from django.core.mail import send_mail
-            send_mail(
-                subject="AI 余额预警",
-                message=msg,
-                from_email=getattr(settings, "DEFAULT_FROM_EMAIL", None),
-                recipient_list=recipients,
-                fail_silently=True,
-            )
-        except Exception:
-            logger.warning("send low balance email failed", exc_info=True)
-    logger.warning(msg)
+    """低余额预警：仅做内存去重/升级判断并入队，不在计费路径上做任何 I/O；
+    落库与邮件投递由 core.ai.billing_alerts 的后台线程完成（收件人：AI_BILLING_NOTIFY_EMAILS）。"""
+    billing_alerts.maybe_enqueue(tenant_id=tenant_id, balance=balance, soft_limit=soft_limit)
 
 
 __all__ = [
@@ -0,0 +1,180 @@
+# file: core/ai/billing_alerts.py
+# purpose: 低余额预警状态机：按租户去重窗口 + 阈值分档升级；计费热路径只做内存判断并入队，
+#          后台线程落库（AiBillingAlertState 跨进程去重、AiAlertOutbox 发件箱）并投递邮件；
+#          投递失败的发件箱记录由 `manage.py billing_alerts_dispatch` 重试
+# 配置：settings.AI_BILLING_ALERTS = {"dedupe_s": 3600, "levels": [1.0, 0.5, 0.2, 0.0], "worker": True, "max_attempts": 5}
+#       levels 为 soft_limit 的倍数：余额低于 soft_limit × levels[i] 即越过第 i+1 档（更低档位立即升级告警）
+#       收件人沿用 AI_BILLING_NOTIFY_EMAILS = {tenant_id: [...], "*": [...]}
+from __future__ import annotations
+import logging
+import queue
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from core.models.ai_billing import AiAlertOutbox, AiBillingAlertState
+
+logger = logging.getLogger(__name__)
+
+_DEFAULTS: Dict[str, Any] = {"dedupe_s": 3600, "levels": [1.0, 0.5, 0.2, 0.0], "worker": True, "max_attempts": 5}
+
+_lock = threading.Lock()
+_mem: Dict[str, Tuple[int, float]] = {}  # tenant → (level, 上次入队 monotonic)
+_queue: "queue.Queue[Tuple[str, int, int, int]]" = queue.Queue(maxsize=10000)
+_worker: Optional[threading.Thread] = None
+
+
+def _conf() -> Dict[str, Any]:
+    return {**_DEFAULTS, **(getattr(settings, "AI_BILLING_ALERTS", None) or {})}
+
+
+def level_for(balance: int, soft_limit: int) -> int:
+    """余额所处档位：0=不低于 soft_limit；越低档位越高。"""
+    return sum(1 for f in _conf()["levels"] if balance < soft_limit * float(f))
+
+
+def maybe_enqueue(*, tenant_id: str, balance: int, soft_limit: int) -> bool:
+    """热路径入口（无 I/O）：档位升高或去重窗口已过时入队，返回是否入队；档位回落只更新内存状态。"""
+    level = level_for(int(balance), int(soft_limit))
+    now = time.monotonic()
+    window = float(_conf()["dedupe_s"])
+    with _lock:
+        prev_level, prev_ts = _mem.get(tenant_id, (0, 0.0))
+        if level <= 0:
+            _mem.pop(tenant_id, None)
+            return False
+        if level <= prev_level and now - prev_ts < window:
+            if level < prev_level:
+                _mem[tenant_id] = (level, prev_ts)
+            return False
+        _mem[tenant_id] = (level, now)
+    try:
+        _queue.put_nowait((tenant_id, int(balance), int(soft_limit), level))
+    except queue.Full:  # 投递积压时宁可丢弃也不阻塞计费
+        return False
+    if _conf()["worker"]:
+        _ensure_worker()
+    return True
+
+
+def reset_tenant(tenant_id: str) -> None:
+    """余额恢复（如充值）后清除预警状态，下次跌破阈值重新告警。"""
+    with _lock:
+        _mem.pop(tenant_id, None)
+    AiBillingAlertState.objects.filter(tenant_id=tenant_id).update(level=0)
+
+
+def _recipients(tenant_id: str) -> List[str]:
+    emails = getattr(settings, "AI_BILLING_NOTIFY_EMAILS", {}) or {}
+    return list(emails.get(tenant_id) or emails.get("*") or [])
+
+
+def _record(tenant_id: str, balance: int, soft_limit: int, level: int) -> Optional[AiAlertOutbox]:
+    """以数据库状态做跨进程去重；需要告警时写入发件箱并返回该记录。"""
+    now = timezone.now()
+    window = timedelta(seconds=float(_conf()["dedupe_s"]))
+    with transaction.atomic():
+        AiBillingAlertState.objects.get_or_create(tenant_id=tenant_id)
+        st = AiBillingAlertState.objects.select_for_update().get(tenant_id=tenant_id)
+        due = level > st.level or st.last_alert_at is None or now - st.last_alert_at >= window
+        st.last_balance = balance
+        if not due:
+            st.level = min(st.level, level)
+            st.save(update_fields=["level", "last_balance", "updated_at"])
+            return None
+        st.level, st.last_alert_at = level, now
+        st.save(update_fields=["level", "last_balance", "last_alert_at", "updated_at"])
+        return AiAlertOutbox.objects.create(
+            tenant_id=tenant_id, kind="low_balance", level=level, subject=f"AI 余额预警（第 {level} 档）",
+            body=f"[AI Billing] Tenant {tenant_id} low balance: {balance} < soft_limit {soft_limit} (level {level})",
+            recipients=_recipients(tenant_id),
+        )
+
+
+def deliver(item: AiAlertOutbox) -> bool:
+    """投递单条发件箱记录并更新状态；无收件人时只写日志（skipped）。"""
+    logger.warning(item.body)
+    item.attempts += 1
+    if not item.recipients:
+        item.status = "skipped"
+    else:
+        try:
+            from django.core.mail import send_mail
+            send_mail(subject=item.subject, message=item.body, from_email=getattr(settings, "DEFAULT_FROM_EMAIL", None),
+                      recipient_list=list(item.recipients), fail_silently=False)
+            item.status, item.sent_at, item.last_error = "sent", timezone.now(), ""
+        except Exception as e:
+            item.status, item.last_error = "failed", str(e)[:500]
+            logger.warning("send low balance email failed", exc_info=True)
+    item.save(update_fields=["status", "attempts", "sent_at", "last_error"])
+    return item.status != "failed"
+
+
+def _process(entry: Tuple[str, int, int, int]) -> int:
+    try:
+        item = _record(*entry)
+        if item is None:
+            return 0
+        deliver(item)
+        return 1
+    except Exception:
+        logger.warning("billing alert processing failed", exc_info=True)
+        return 0
+
+
+def drain(max_items: Optional[int] = None) -> int:
+    """处理内存队列：落库去重 → 写发件箱 → 投递。返回写入发件箱的条数。"""
+    n = done = 0
+    while max_items is None or done < max_items:
+        try:
+            entry = _queue.get_nowait()
+        except queue.Empty:
+            break
+        done += 1
+        n += _process(entry)
+    return n
+
+
+def dispatch_pending(limit: int = 100) -> int:
+    """重试待发/失败的发件箱记录（管理命令调用）。返回成功条数。"""
+    ok = 0
+    qs = AiAlertOutbox.objects.filter(status__in=["pending", "failed"], attempts__lt=int(_conf()["max_attempts"]))
+    for item in qs.order_by("created_at")[: max(1, int(limit))]:
+        ok += int(deliver(item))
+    return ok
+
+
+def _run() -> None:
+    while True:
+        entry = _queue.get()
+        close_old_connections()
+        try:
+            _process(entry)
+            drain()
+        finally:
+            close_old_connections()
+
+
+def _ensure_worker() -> None:
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="billing-alerts", daemon=True)
+            _worker.start()
+
+
+def clear_local() -> None:
+    """清空内存状态与队列（测试用）。"""
+    with _lock:
+        _mem.clear()
+    while not _queue.empty():
+        try:
+            _queue.get_nowait()
+        except queue.Empty:
+            break
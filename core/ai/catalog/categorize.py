@@ -0,0 +1,202 @@
+# file: core/ai/catalog/categorize.py
+# purpose: 目录级商品 AI 自动分类批处理：按 token 预算把商品打包进提示词，经 Orchestrator 有界并发调用，
+#          容错解析模型输出，bulk_update 写回 Product.category_l1~l3；每个波次结束写检查点（AiCategorizeJob.cursor），可中断续跑
+#          调用 LLM 前先查跨租户分类知识库（core.ai.catalog.knowledge），只有未知商品才进入提示词
+# 配置：settings.AI_CATEGORIZE = {"prompt_budget": 1500, "max_items": 40, "concurrency": 4, "retries": 3}
+from __future__ import annotations
+import json
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Product
+from core.models.ai_catalog import AiCategorizeJob
+from core.ai.llm.providers.base import _estimate_tokens
+from core.ai.orchestrator import Orchestrator
+from core.ai.catalog import knowledge
+
+logger = logging.getLogger(__name__)
+
+_DEFAULTS: Dict[str, Any] = {"prompt_budget": 1500, "max_items": 40, "concurrency": 4, "retries": 3}
+_FIELDS = ("category_l1", "category_l2", "category_l3")
+_MAX_LEN = 100  # Product.category_l* 的 max_length
+
+_HEADER = (
+    "你是医药零售商品分类专家。请为下列每个商品给出三级标准分类（大类/中类/小类）。\n"
+    "只输出 JSON 数组，不要任何解释：[{\"id\": 商品ID, \"l1\": \"大类\", \"l2\": \"中类\", \"l3\": \"小类\"}, ...]\n"
+    "商品（ID | 名称 | 规格 | 剂型 | 生产企业）：\n"
+)
+_HEADER_TOKENS = _estimate_tokens(_HEADER)
+
+
+def _conf() -> Dict[str, Any]:
+    return {**_DEFAULTS, **(getattr(settings, "AI_CATEGORIZE", None) or {})}
+
+
+def _line(p: Product) -> str:
+    return " | ".join([str(p.id), p.name or "", p.specification or "", p.dosage_form or "", p.manufacturer or ""])
+
+
+def pack_batches(products: Iterable[Product], *, budget: int, max_items: int) -> List[List[Product]]:
+    """按提示词 token 预算与条数上限切批；单个超长商品独占一批。"""
+    batches: List[List[Product]] = []
+    cur: List[Product] = []
+    used = _HEADER_TOKENS
+    for p in products:
+        t = _estimate_tokens(_line(p)) + 1
+        if cur and (used + t > budget or len(cur) >= max_items):
+            batches.append(cur)
+            cur, used = [], _HEADER_TOKENS
+        cur.append(p)
+        used += t
+    if cur:
+        batches.append(cur)
+    return batches
+
+
+def build_prompt(batch: List[Product]) -> str:
+    return _HEADER + "\n".join(_line(p) for p in batch)
+
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.S)
+_OBJ = re.compile(r"\{[^{}]*\}")
+
+
+def parse_result(text: str, ids: Iterable[int]) -> Dict[int, Dict[str, str]]:
+    """容错解析：支持代码块包裹、数组前后有说明文字、单个对象损坏（逐对象回退）；
+    键名兼容 l1/category_l1；只接受本批内的 id，分类截断到字段长度。"""
+    wanted = {int(i) for i in ids}
+    text = text or ""
+    m = _FENCE.search(text)
+    if m:
+        text = m.group(1)
+    items: List[Any] = []
+    start, end = text.find("["), text.rfind("]")
+    if start >= 0 and end > start:
+        try:
+            items = json.loads(text[start:end + 1])
+        except ValueError:
+            items = []
+    if not items:
+        for frag in _OBJ.findall(text):
+            try:
+                items.append(json.loads(frag))
+            except ValueError:
+                continue
+    out: Dict[int, Dict[str, str]] = {}
+    for it in items if isinstance(items, list) else []:
+        if not isinstance(it, dict):
+            continue
+        try:
+            pid = int(it.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if pid not in wanted:
+            continue
+        cats = {}
+        for i, f in enumerate(_FIELDS, start=1):
+            v = it.get(f"l{i}", it.get(f))
+            cats[f] = str(v).strip()[:_MAX_LEN] if v not in (None, "") else ""
+        if cats["category_l1"]:
+            out[pid] = cats
+    return out
+
+
+def _pending(enterprise_id: int):
+    return Product.objects.filter(enterprise_id=enterprise_id).filter(Q(category_l1__isnull=True) | Q(category_l1=""))
+
+
+def create_job(enterprise_id: int) -> AiCategorizeJob:
+    """为企业创建分类作业（tenant_id 即企业主键字符串）。"""
+    return AiCategorizeJob.objects.create(tenant_id=str(enterprise_id), enterprise_id=enterprise_id,
+                                          total=_pending(enterprise_id).count())
+
+
+def _run_batch(tenant_id: str, batch: List[Product], threaded: bool) -> Dict[str, Any]:
+    o = Orchestrator(tenant_id=tenant_id, agent="categorize", output="json")
+    prompt = build_prompt(batch)
+    try:
+        for attempt in range(int(_conf()["retries"]) + 1):
+            try:
+                res = o.chat_once(session=None, user_message=prompt, cache=False)
+                break
+            except RuntimeError as e:  # 租户限流：指数退避后重试
+                if "rate limited" not in str(e) or attempt >= int(_conf()["retries"]):
+                    raise
+                time.sleep(min(8.0, 2.0 ** attempt))
+        return {"parsed": parse_result(res.get("content") or "", [p.id for p in batch]), "spent": int(res.get("spent") or 0)}
+    except Exception as e:
+        logger.warning("categorize batch failed", exc_info=True)
+        return {"parsed": {}, "spent": 0, "error": str(e)[:500]}
+    finally:
+        if threaded:
+            close_old_connections()
+
+
+def run_job(job: AiCategorizeJob, *, max_waves: Optional[int] = None, concurrency: Optional[int] = None) -> AiCategorizeJob:
+    """推进作业：每个波次取 id > cursor 的未分类商品（concurrency × max_items 个），切批并发调用，
+    bulk_update 写回后保存检查点。max_waves 限制本次推进的波次数（视图内小步推进）；全部完成后 status=done。"""
+    c = _conf()
+    conc = max(1, int(concurrency or c["concurrency"]))
+    max_items = max(1, int(c["max_items"]))
+    job.status = "running"
+    job.save(update_fields=["status", "updated_at"])
+    waves = 0
+    pool = ThreadPoolExecutor(max_workers=conc, thread_name_prefix="categorize") if conc > 1 else None
+    try:
+        while max_waves is None or waves < max_waves:
+            wave = list(_pending(job.enterprise_id).filter(id__gt=job.cursor).order_by("id")
+                        .only("id", "name", "specification", "dosage_form", "manufacturer", "standard_product_code",
+                              "approval_number", "medicare_code", *_FIELDS)[: conc * max_items])
+            if not wave:
+                job.status, job.finished_at = "done", timezone.now()
+                break
+            known = knowledge.lookup_many(wave)
+            changed: List[Product] = []
+            for p in wave:
+                if p.id in known:
+                    for f, v in known[p.id].items():
+                        setattr(p, f, v or None)
+                    changed.append(p)
+            job.from_knowledge += len(known)
+            batches = pack_batches([p for p in wave if p.id not in known], budget=int(c["prompt_budget"]), max_items=max_items)
+            if pool is not None:
+                results = list(pool.map(lambda b: _run_batch(job.tenant_id, b, True), batches))
+            else:
+                results = [_run_batch(job.tenant_id, b, False) for b in batches]
+            for batch, r in zip(batches, results):
+                parsed = r["parsed"]
+                for p in batch:
+                    cats = parsed.get(p.id)
+                    if cats:
+                        for f, v in cats.items():
+                            setattr(p, f, v or None)
+                        changed.append(p)
+                job.failed += len(batch) - sum(1 for p in batch if p.id in parsed)
+                job.tokens_spent += r["spent"]
+                if r.get("error"):
+                    job.last_error = r["error"]
+            if changed:
+                Product.objects.bulk_update(changed, list(_FIELDS), batch_size=500)
+            job.cursor = wave[-1].id
+            job.processed += len(wave)
+            job.updated += len(changed)
+            job.batches += len(batches)
+            job.save()
+            waves += 1
+        else:
+            job.status = "paused"
+    except Exception as e:
+        job.status, job.last_error = "failed", str(e)[:500]
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+        job.save()
+    return job
@@ -0,0 +1,237 @@
+# file: core/ai/catalog/knowledge.py
+# purpose: 跨租户商品分类知识库：从已确认的分类（企业同步自带的标准分类）学习，写入 AiCategoryKnowledge；
+#          进程内索引按 本位码 → 批准文号 → 医保编码 精确查找，未命中时按规范化 名称+规格+厂家 做近邻匹配；
+#          自动分类作业在调用 LLM 之前先查本索引，只有未知商品才走 LLM
+# 配置：settings.AI_CATEGORY_KNOWLEDGE = {"enabled": True, "min_score": 0.85, "ttl_s": 600}
+from __future__ import annotations
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+
+from core.models.ai_catalog import AiCategoryKnowledge
+
+logger = logging.getLogger(__name__)
+
+_DEFAULTS: Dict[str, Any] = {"enabled": True, "min_score": 0.85, "ttl_s": 600}
+_ID_FIELDS = (("std", "standard_product_code"), ("approval", "approval_number"), ("medicare", "medicare_code"))
+_CATS = ("category_l1", "category_l2", "category_l3")
+_VERSION_KEY = "ai:catknow:ver"
+_MAX_CANDIDATES = 50
+
+Cats = Tuple[str, str, str]
+
+
+def _conf() -> Dict[str, Any]:
+    return {**_DEFAULTS, **(getattr(settings, "AI_CATEGORY_KNOWLEDGE", None) or {})}
+
+
+# -------- 规范化 --------
+
+_NON_WORD = re.compile(r"[^\w*.]+")
+_PAREN = re.compile(r"[(\[【][^)\]】]*[)\]】]")  # 括注多为包装/规格说明（NFKC 后全角括号已转半角）
+_TIMES = re.compile(r"(?<=\w)\s*[x×]\s*(?=\d)")  # 0.25g×24 / 10mgx12 → *
+_MFR_SUFFIX = re.compile(r"(股份有限公司|有限责任公司|有限公司|公司|集团)$")
+
+
+def norm_id(v: Any) -> str:
+    """国家标识：全角转半角、大写、去空白与连字符。"""
+    return re.sub(r"[\s\-_]+", "", unicodedata.normalize("NFKC", str(v or ""))).upper()
+
+
+def norm_name(v: Any) -> str:
+    return _NON_WORD.sub("", _PAREN.sub("", unicodedata.normalize("NFKC", str(v or "")).lower()))
+
+
+def norm_spec(v: Any) -> str:
+    s = unicodedata.normalize("NFKC", str(v or "")).lower()
+    return _NON_WORD.sub("", _TIMES.sub("*", s))
+
+
+def norm_manufacturer(v: Any) -> str:
+    return _MFR_SUFFIX.sub("", norm_name(v))
+
+
+def _bigrams(s: str) -> FrozenSet[str]:
+    return frozenset(s[i:i + 2] for i in range(len(s) - 1)) if len(s) > 1 else frozenset([s]) if s else frozenset()
+
+
+def _name_key(name: str, spec: str, mfr: str) -> str:
+    return f"{name}|{spec}|{mfr}"[:255]
+
+
+# -------- 进程内索引 --------
+
+class _Index:
+    """标识精确索引 + 名称二元组倒排索引（近邻候选）。"""
+
+    def __init__(self):
+        self.ids: Dict[Tuple[str, str], Cats] = {}
+        self.names: List[Tuple[FrozenSet[str], str, str, Cats]] = []
+        self.inverted: Dict[str, List[int]] = defaultdict(list)
+
+    def add(self, key_type: str, key: str, cats: Cats, name: str, spec: str, mfr: str) -> None:
+        if key_type != "name":
+            self.ids[(key_type, key)] = cats
+            return
+        i = len(self.names)
+        bg = _bigrams(name)
+        self.names.append((bg, spec, mfr, cats))
+        for g in bg:
+            self.inverted[g].append(i)
+
+    def nearest(self, name: str, spec: str, mfr: str) -> Tuple[Optional[Cats], float]:
+        """得分 = 0.7 × 名称二元组 Jaccard + 0.2 × 规格一致 + 0.1 × 厂家一致。"""
+        bg = _bigrams(name)
+        if not bg:
+            return None, 0.0
+        shared = Counter(i for g in bg for i in self.inverted.get(g, ()))
+        best: Tuple[Optional[Cats], float] = (None, 0.0)
+        for i, n in shared.most_common(_MAX_CANDIDATES):
+            cbg, cspec, cmfr, cats = self.names[i]
+            score = 0.7 * n / len(bg | cbg) + 0.2 * (spec == cspec and bool(spec)) + 0.1 * (mfr == cmfr and bool(mfr))
+            if score > best[1]:
+                best = (cats, score)
+        return best
+
+
+_lock = threading.Lock()
+_index: Optional[_Index] = None
+_loaded: Tuple[int, float] = (-1, 0.0)  # (版本号, 加载时间 monotonic)
+
+
+def _version() -> int:
+    return int(cache.get(_VERSION_KEY) or 0)
+
+
+def _bump() -> None:
+    if not cache.add(_VERSION_KEY, 1, timeout=None):
+        try:
+            cache.incr(_VERSION_KEY)
+        except ValueError:
+            cache.set(_VERSION_KEY, 1, timeout=None)
+
+
+def get_index() -> _Index:
+    """版本号变化（有新知识写入）或超过 ttl_s 时整表重建索引。"""
+    global _index, _loaded
+    ver = _version()
+    if _index is not None and _loaded[0] == ver and time.monotonic() - _loaded[1] < float(_conf()["ttl_s"]):
+        return _index
+    with _lock:
+        if _index is None or _loaded[0] != ver or time.monotonic() - _loaded[1] >= float(_conf()["ttl_s"]):
+            idx = _Index()
+            rows = AiCategoryKnowledge.objects.values_list(
+                "key_type", "key", "category_l1", "category_l2", "category_l3", "norm_name", "norm_spec", "norm_manufacturer")
+            for kt, key, c1, c2, c3, n, s, m in rows.iterator(chunk_size=5000):
+                idx.add(kt, key, (c1, c2, c3), n, s, m)
+            _index, _loaded = idx, (ver, time.monotonic())
+    return _index  # type: ignore[return-value]
+
+
+def lookup(product: Any, *, index: Optional[_Index] = None) -> Tuple[Optional[Cats], str]:
+    """单个商品查分类：返回 (分类三元组, 命中方式 std/approval/medicare/name)；未命中为 (None, "")。"""
+    idx = index or get_index()
+    for key_type, field in _ID_FIELDS:
+        key = norm_id(getattr(product, field, None))
+        if key and (key_type, key) in idx.ids:
+            return idx.ids[(key_type, key)], key_type
+    cats, score = idx.nearest(norm_name(product.name), norm_spec(getattr(product, "specification", None)),
+                              norm_manufacturer(getattr(product, "manufacturer", None)))
+    if cats and score >= float(_conf()["min_score"]):
+        return cats, "name"
+    return None, ""
+
+
+def lookup_many(products: Iterable[Any]) -> Dict[int, Dict[str, str]]:
+    """批量查找：{product.id: {category_l1, category_l2, category_l3}}；知识库关闭时为空。"""
+    if not _conf()["enabled"]:
+        return {}
+    idx = get_index()
+    out: Dict[int, Dict[str, str]] = {}
+    for p in products:
+        cats, _ = lookup(p, index=idx)
+        if cats:
+            out[p.id] = dict(zip(_CATS, cats))
+    return out
+
+
+# -------- 学习 --------
+
+def learn_from_products(products: Iterable[Any], *, tenant_id: str = "") -> int:
+    """用已确认分类的商品更新知识库：同分类累加票数，不同分类抵消一票，票数耗尽时才改为新分类。返回写入的键数。"""
+    entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for p in products:
+        if not (p.category_l1 or "").strip():
+            continue
+        cats = {f: (getattr(p, f) or "").strip()[:100] for f in _CATS}
+        n, s, m = norm_name(p.name), norm_spec(p.specification), norm_manufacturer(p.manufacturer)
+        base = {**cats, "norm_name": n[:255], "norm_spec": s[:255], "norm_manufacturer": m[:255]}
+        for key_type, field in _ID_FIELDS:
+            key = norm_id(getattr(p, field, None))
+            if key:
+                entries[(key_type, key[:255])] = base
+        if n:
+            entries[("name", _name_key(n, s, m))] = base
+    if not entries:
+        return 0
+    by_type: Dict[str, List[str]] = defaultdict(list)
+    for kt, key in entries:
+        by_type[kt].append(key)
+    existing: Dict[Tuple[str, str], AiCategoryKnowledge] = {}
+    for kt, keys in by_type.items():
+        for o in AiCategoryKnowledge.objects.filter(key_type=kt, key__in=keys):
+            existing[(o.key_type, o.key)] = o
+    to_update, to_create = [], []
+    for (kt, key), e in entries.items():
+        o = existing.get((kt, key))
+        if o is None:
+            to_create.append(AiCategoryKnowledge(key_type=kt, key=key, source_tenant_id=tenant_id, **e))
+            continue
+        if all(getattr(o, f) == e[f] for f in _CATS):
+            o.votes += 1
+        elif o.votes > 1:  # 不同分类先抵消一票：只有多数确认的分类被推翻时才替换
+            o.votes -= 1
+            to_update.append(o)
+            continue
+        else:
+            o.votes = 1
+        for f, v in e.items():
+            setattr(o, f, v)
+        o.source_tenant_id = tenant_id or o.source_tenant_id
+        to_update.append(o)
+    if to_create:
+        AiCategoryKnowledge.objects.bulk_create(to_create, ignore_conflicts=True, batch_size=500)
+    if to_update:
+        AiCategoryKnowledge.objects.bulk_update(to_update, [*_CATS, "norm_name", "norm_spec", "norm_manufacturer", "votes",
+                                                            "source_tenant_id"], batch_size=500)
+    _bump()
+    return len(entries)
+
+
+def learn_after_sync(enterprise_id: int, items: List[Dict[str, Any]]) -> int:
+    """商品同步成功后学习：只取本批载荷中自带 category_l1 的商品（视为企业确认的分类，不含 AI 写入的分类）。"""
+    from core.models import Product
+
+    source_ids = {str(it.get("source_product_id")) for it in items
+                  if isinstance(it, dict) and it.get("source_product_id") and (it.get("category_l1") or "").strip()}
+    if not source_ids:
+        return 0
+    try:
+        qs = Product.objects.filter(enterprise_id=enterprise_id, source_product_id__in=source_ids)
+        return learn_from_products(qs, tenant_id=str(enterprise_id))
+    except Exception:
+        logger.warning("category knowledge learning failed", exc_info=True)
+        return 0
+
+
+def reset() -> None:
+    """丢弃进程内索引（测试用）。"""
+    global _index, _loaded
+    with _lock:
+        _index, _loaded = None, (-1, 0.0)
@@ -0,0 +1,166 @@
+# file: core/ai/kpi/allocation.py
+# purpose: 组织级 KPI 目标分解：一次分组查询取全部门店/员工历史，企业总目标按历史占比自上而下分配到门店→员工，
+#          门店内按星期权重拆到日；整套计划批量写入 AiKpiTarget
+from __future__ import annotations
+from collections import defaultdict
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from django.db import transaction
+from django.db.models import Sum
+from core.models import Sale  # 需包含字段：tenant_id, biz_date, store_id, employee_id, total_amount
+from core.models.ai_kpi import AiKpiTarget
+from .targets import Period, _daterange, _shift_period, _yoy_period
+
+_MIN_STORE_DAYS = 14  # 门店有销售的天数少于该值时，星期权重回落到企业级
+
+
+def _base_period(period: Period, mode: str) -> Period:
+    return _yoy_period(period) if mode == "yoy" else _shift_period(period, days=period.days)
+
+
+def fetch_org_baseline(tenant_id: str, base: Period) -> List[Tuple[Any, Any, date, float]]:
+    """一次分组查询：(store_id, employee_id, biz_date) → 销售额。"""
+    qs = (Sale.objects.filter(tenant_id=tenant_id, biz_date__gte=base.start, biz_date__lte=base.end)
+          .values("store_id", "employee_id", "biz_date")
+          .annotate(amount=Sum("total_amount"))
+          .values_list("store_id", "employee_id", "biz_date", "amount"))
+    return [(s, e, d, float(a or 0.0)) for s, e, d, a in qs]
+
+
+# -------- 纯计算 --------
+
+def _split(total: float, weights: List[float]) -> List[float]:
+    """按权重拆分并保留 2 位小数，尾差并入权重最大项，保证合计精确等于 total。"""
+    if not weights:
+        return []
+    s = sum(weights)
+    ws = [w / s for w in weights] if s > 0 else [1.0 / len(weights)] * len(weights)
+    parts = [round(total * w, 2) for w in ws]
+    diff = round(total - sum(parts), 2)
+    if diff:
+        i = max(range(len(ws)), key=lambda k: ws[k])
+        parts[i] = round(parts[i] + diff, 2)
+    return parts
+
+
+def _dow_weights(day_amounts: Dict[date, float], base_days: List[date]) -> List[float]:
+    """星期权重：该星期几的日均 / 全期日均；无数据时全 1。"""
+    cnt = [0] * 7
+    for d in base_days:
+        cnt[d.weekday()] += 1
+    sums = [0.0] * 7
+    for d, a in day_amounts.items():
+        sums[d.weekday()] += a
+    avg = sum(sums) / max(1, len(base_days))
+    if avg <= 0:
+        return [1.0] * 7
+    return [(sums[w] / cnt[w] / avg) if cnt[w] else 1.0 for w in range(7)]
+
+
+def allocate(rows: Iterable[Tuple[Any, Any, date, float]], *, period: Period, base: Period, goal_lift_pct: float = 10.0,
+             include_employees: bool = True) -> Dict[str, Any]:
+    """企业 → 门店 → 员工 自上而下分配。
+    - 门店目标 = 企业目标 × 门店历史占比；员工目标 = 门店目标 × 员工在店内历史占比（无员工的销售不再下分）
+    - 门店按日拆分使用门店星期权重（数据不足回落企业级），员工沿用所属门店的日拆分形状
+    """
+    base_days = _daterange(base.start, base.end)
+    days = _daterange(period.start, period.end)
+    ent_day: Dict[date, float] = defaultdict(float)
+    store_day: Dict[Any, Dict[date, float]] = defaultdict(lambda: defaultdict(float))
+    emp_base: Dict[Any, Dict[Any, float]] = defaultdict(lambda: defaultdict(float))
+    for sid, eid, d, amt in rows:
+        ent_day[d] += amt
+        store_day[sid][d] += amt
+        if eid is not None:
+            emp_base[sid][eid] += amt
+
+    lift = max(-90.0, float(goal_lift_pct))
+    ent_base = sum(ent_day.values())
+    ent_target = round(ent_base * (1.0 + lift / 100.0), 2)
+    ent_w = _dow_weights(ent_day, base_days)
+    ent_daily = _split(ent_target, [ent_w[d.weekday()] for d in days])
+
+    stores: List[Dict[str, Any]] = []
+    employees: List[Dict[str, Any]] = []
+    store_ids = [s for s in store_day if s is not None]
+    store_bases = [sum(store_day[s].values()) for s in store_ids]
+    for sid, s_base, s_target in zip(store_ids, store_bases, _split(ent_target, store_bases)):
+        sd = store_day[sid]
+        w = _dow_weights(sd, base_days) if sum(1 for a in sd.values() if a > 0) >= _MIN_STORE_DAYS else ent_w
+        day_w = [w[d.weekday()] for d in days]
+        stores.append({
+            "store_id": sid,
+            "baseline": round(s_base, 2),
+            "target": s_target,
+            "share": round(s_base / ent_base, 6) if ent_base > 0 else 0.0,
+            "daily": [{"date": d, "target": t} for d, t in zip(days, _split(s_target, day_w))],
+        })
+        if not include_employees or not emp_base.get(sid):
+            continue
+        eids = list(emp_base[sid].keys())
+        e_bases = [emp_base[sid][e] for e in eids]
+        # 员工只分配其历史占比对应部分（未绑定员工的销售额留在门店层）
+        e_targets = [round(s_target * b / s_base, 2) if s_base > 0 else 0.0 for b in e_bases]
+        for eid, e_base, e_target in zip(eids, e_bases, e_targets):
+            employees.append({
+                "store_id": sid,
+                "employee_id": eid,
+                "baseline": round(e_base, 2),
+                "target": e_target,
+                "share": round(e_base / s_base, 6) if s_base > 0 else 0.0,
+                "daily": [{"date": d, "target": t} for d, t in zip(days, _split(e_target, day_w))],
+            })
+
+    return {
+        "period": {"start": period.start, "end": period.end, "days": period.days},
+        "base_period": {"start": base.start, "end": base.end},
+        "lift_pct": lift,
+        "enterprise": {
+            "baseline": round(ent_base, 2),
+            "target": ent_target,
+            "daily": [{"date": d, "target": t} for d, t in zip(days, ent_daily)],
+        },
+        "stores": stores,
+        "employees": employees,
+    }
+
+
+# -------- 持久化 --------
+
+def _daily_json(daily: List[Dict]) -> List[Dict]:
+    return [{"date": str(r["date"]), "target": r["target"]} for r in daily]
+
+
+def save_plan(tenant_id: str, plan: Dict[str, Any]) -> int:
+    """整套计划替换写入（同租户同周期先删后批量插入）；返回写入行数。"""
+    p = plan["period"]
+    lift = plan["lift_pct"]
+    objs = [AiKpiTarget(tenant_id=tenant_id, level="enterprise", period_start=p["start"], period_end=p["end"],
+                        baseline=plan["enterprise"]["baseline"], target=plan["enterprise"]["target"], share=1.0,
+                        lift_pct=lift, daily=_daily_json(plan["enterprise"]["daily"]))]
+    for s in plan["stores"]:
+        objs.append(AiKpiTarget(tenant_id=tenant_id, level="store", store_id=str(s["store_id"]), period_start=p["start"],
+                                period_end=p["end"], baseline=s["baseline"], target=s["target"], share=s["share"],
+                                lift_pct=lift, daily=_daily_json(s["daily"])))
+    for e in plan["employees"]:
+        objs.append(AiKpiTarget(tenant_id=tenant_id, level="employee", store_id=str(e["store_id"]),
+                                employee_id=str(e["employee_id"]), period_start=p["start"], period_end=p["end"],
+                                baseline=e["baseline"], target=e["target"], share=e["share"], lift_pct=lift,
+                                daily=_daily_json(e["daily"])))
+    with transaction.atomic():
+        AiKpiTarget.objects.filter(tenant_id=tenant_id, period_start=p["start"], period_end=p["end"]).delete()
+        AiKpiTarget.objects.bulk_create(objs, batch_size=1000)
+    return len(objs)
+
+
+def make_org_targets(*, tenant_id: str, period: Period, goal_lift_pct: float = 10.0, baseline_mode: str = "last_period",
+                     include_employees: bool = True, persist: bool = True,
+                     rows_override: Optional[List[Tuple[Any, Any, date, float]]] = None) -> Dict[str, Any]:
+    """生成并（可选）保存整个组织的目标计划；rows_override 可传入 (store_id, employee_id, date, amount) 历史。"""
+    base = _base_period(period, baseline_mode)
+    rows = rows_override if rows_override is not None else fetch_org_baseline(tenant_id, base)
+    plan = allocate(rows, period=period, base=base, goal_lift_pct=goal_lift_pct, include_employees=include_employees)
+    plan["baseline_mode"] = baseline_mode
+    if persist:
+        plan["saved"] = save_plan(tenant_id, plan)
+    return plan
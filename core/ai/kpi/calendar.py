@@ -0,0 +1,154 @@
+# file: core/ai/kpi/calendar.py
+# purpose: 经营日历：本地法定节假日表 + 春节窗口 + 按星期对齐的同比/环比日期映射；
+#          每年的映射表首次使用时整体预计算并缓存（lru_cache），请求时只做字典查找
+from __future__ import annotations
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 国务院办公厅公布的放假安排（含调休后的连续放假日，不含调休上班日）；每年公布后在此追加
+_HOLIDAYS: Dict[int, Dict[str, Tuple[str, str]]] = {
+    2019: {"元旦": ("2018-12-30", "2019-01-01"), "春节": ("2019-02-04", "2019-02-10"), "清明": ("2019-04-05", "2019-04-07"),
+           "劳动节": ("2019-05-01", "2019-05-04"), "端午": ("2019-06-07", "2019-06-09"), "中秋": ("2019-09-13", "2019-09-15"),
+           "国庆": ("2019-10-01", "2019-10-07")},
+    2020: {"元旦": ("2020-01-01", "2020-01-01"), "春节": ("2020-01-24", "2020-02-02"), "清明": ("2020-04-04", "2020-04-06"),
+           "劳动节": ("2020-05-01", "2020-05-05"), "端午": ("2020-06-25", "2020-06-27"), "国庆": ("2020-10-01", "2020-10-08")},
+    2021: {"元旦": ("2021-01-01", "2021-01-03"), "春节": ("2021-02-11", "2021-02-17"), "清明": ("2021-04-03", "2021-04-05"),
+           "劳动节": ("2021-05-01", "2021-05-05"), "端午": ("2021-06-12", "2021-06-14"), "中秋": ("2021-09-19", "2021-09-21"),
+           "国庆": ("2021-10-01", "2021-10-07")},
+    2022: {"元旦": ("2022-01-01", "2022-01-03"), "春节": ("2022-01-31", "2022-02-06"), "清明": ("2022-04-03", "2022-04-05"),
+           "劳动节": ("2022-04-30", "2022-05-04"), "端午": ("2022-06-03", "2022-06-05"), "中秋": ("2022-09-10", "2022-09-12"),
+           "国庆": ("2022-10-01", "2022-10-07")},
+    2023: {"元旦": ("2022-12-31", "2023-01-02"), "春节": ("2023-01-21", "2023-01-27"), "清明": ("2023-04-05", "2023-04-05"),
+           "劳动节": ("2023-04-29", "2023-05-03"), "端午": ("2023-06-22", "2023-06-24"), "国庆": ("2023-09-29", "2023-10-06")},
+    2024: {"元旦": ("2024-01-01", "2024-01-01"), "春节": ("2024-02-10", "2024-02-17"), "清明": ("2024-04-04", "2024-04-06"),
+           "劳动节": ("2024-05-01", "2024-05-05"), "端午": ("2024-06-08", "2024-06-10"), "中秋": ("2024-09-15", "2024-09-17"),
+           "国庆": ("2024-10-01", "2024-10-07")},
+    2025: {"元旦": ("2025-01-01", "2025-01-01"), "春节": ("2025-01-28", "2025-02-04"), "清明": ("2025-04-04", "2025-04-06"),
+           "劳动节": ("2025-05-01", "2025-05-05"), "端午": ("2025-05-31", "2025-06-02"), "国庆": ("2025-10-01", "2025-10-08")},
+    2026: {"元旦": ("2026-01-01", "2026-01-03"), "春节": ("2026-02-15", "2026-02-23"), "清明": ("2026-04-04", "2026-04-06"),
+           "劳动节": ("2026-05-01", "2026-05-05"), "端午": ("2026-06-19", "2026-06-21"), "中秋": ("2026-09-25", "2026-09-27"),
+           "国庆": ("2026-10-01", "2026-10-07")},
+}
+
+# 农历正月初一（公历）
+_SPRING_FESTIVAL: Dict[int, date] = {
+    2018: date(2018, 2, 16), 2019: date(2019, 2, 5), 2020: date(2020, 1, 25), 2021: date(2021, 2, 12),
+    2022: date(2022, 2, 1), 2023: date(2023, 1, 22), 2024: date(2024, 2, 10), 2025: date(2025, 1, 29),
+    2026: date(2026, 2, 17), 2027: date(2027, 2, 6), 2028: date(2028, 1, 26),
+}
+
+# 春节前备货/节后恢复期：按与正月初一的相对天数对齐（含法定假期之外的日子）
+_FESTIVAL_WINDOW = (-21, 15)
+_WEEK = 7
+_YOY_SHIFT = 364  # 52 周，保持星期几一致
+
+
+def _d(s: str) -> date:
+    return date.fromisoformat(s)
+
+
+@lru_cache(maxsize=1)
+def _holiday_index() -> Dict[date, Tuple[str, int, int]]:
+    """日期 → (节日名, 所属年份, 假期第几天)。"""
+    out: Dict[date, Tuple[str, int, int]] = {}
+    for year, items in _HOLIDAYS.items():
+        for name, (s, e) in items.items():
+            d0, d1 = _d(s), _d(e)
+            for k in range((d1 - d0).days + 1):
+                out[d0 + timedelta(days=k)] = (name, year, k)
+    return out
+
+
+def holiday_of(d: date) -> Optional[Tuple[str, int, int]]:
+    """返回 (节日名, 所属年份, 假期第几天)；非法定假日返回 None。"""
+    return _holiday_index().get(d)
+
+
+def _festival(d: date) -> Optional[Tuple[int, int]]:
+    """春节窗口内返回 (春节所属年份, 与正月初一的相对天数)。"""
+    for y in (d.year, d.year + 1):
+        sf = _SPRING_FESTIVAL.get(y)
+        if sf is None:
+            continue
+        off = (d - sf).days
+        if _FESTIVAL_WINDOW[0] <= off <= _FESTIVAL_WINDOW[1]:
+            return y, off
+    return None
+
+
+def festival_offset(d: date) -> Optional[int]:
+    """若处于春节窗口内，返回与正月初一的相对天数。"""
+    hit = _festival(d)
+    return hit[1] if hit else None
+
+
+def is_special(d: date) -> bool:
+    """法定节假日或春节窗口内的日子（销售形态与平日不同）。"""
+    return d in _holiday_index() or _festival(d) is not None
+
+
+def _holiday_days(name: str, year: int) -> List[date]:
+    item = _HOLIDAYS.get(year, {}).get(name)
+    if not item:
+        return []
+    d0, d1 = _d(item[0]), _d(item[1])
+    return [d0 + timedelta(days=k) for k in range((d1 - d0).days + 1)]
+
+
+def _nearest_plain(d: date, *, step: int = _WEEK, max_steps: int = 8) -> date:
+    """从 d 起按整周前后寻找最近的非特殊日（保持星期几不变）。"""
+    if not is_special(d):
+        return d
+    for i in range(1, max_steps + 1):
+        for cand in (d - timedelta(days=step * i), d + timedelta(days=step * i)):
+            if not is_special(cand):
+                return cand
+    return d
+
+
+def _align_one(d: date) -> date:
+    """单日同比对齐：春节窗口 → 去年正月初一同相对天；其他法定节假日 → 去年同一节日的同序号日；其余 → 52 周前的同星期非特殊日。"""
+    fest = _festival(d)
+    if fest:
+        prev = _SPRING_FESTIVAL.get(fest[0] - 1)
+        if prev is not None:
+            return prev + timedelta(days=fest[1])
+    hol = holiday_of(d)
+    if hol:
+        name, year, k = hol
+        last = _holiday_days(name, year - 1)
+        if last:
+            return last[min(k, len(last) - 1)]
+    return _nearest_plain(d - timedelta(days=_YOY_SHIFT))
+
+
+@lru_cache(maxsize=32)
+def yoy_map(year: int) -> Dict[date, date]:
+    """预计算某年每一天的同比对齐日期（首次调用后常驻内存）。"""
+    d0 = date(year, 1, 1)
+    n = (date(year + 1, 1, 1) - d0).days
+    return {d0 + timedelta(days=i): _align_one(d0 + timedelta(days=i)) for i in range(n)}
+
+
+def align_yoy(d: date) -> date:
+    """同比对齐日期（正确处理 2 月 29 日：落到 52 周前的同星期日）。"""
+    return yoy_map(d.year)[d]
+
+
+def align_last_period(dates: Iterable[date], *, period_days: int) -> Dict[date, date]:
+    """环比对齐：整体前移 ceil(天数/7) 周保证星期一致；目标日为节假日时取去年同一节日，
+    前移后落在节假日/春节窗口的平日改取最近的同星期非特殊日。"""
+    shift = timedelta(days=_WEEK * max(1, -(-int(period_days) // _WEEK)))
+    out: Dict[date, date] = {}
+    for d in dates:
+        out[d] = align_yoy(d) if is_special(d) else _nearest_plain(d - shift)
+    return out
+
+
+def baseline_dates(start: date, end: date, *, mode: str = "last_period") -> Dict[date, date]:
+    """目标期每一天 → 对应的历史基线日期。mode: last_period | yoy"""
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    if mode == "yoy":
+        return {d: align_yoy(d) for d in days}
+    return align_last_period(days, period_days=len(days))
@@ -0,0 +1,153 @@
+# file: core/ai/kpi/counters.py
+# purpose: KPI 累计计数器：销售同步时按 门店×营业日 原子递增（F 表达式），复盘/门店进度直接读计数器；
+#          提供从原始销售重建计数器并报告偏差的对账函数
+# 上线：读路径仅在租户完成历史回填（backfill，`kpi_counters_reconcile --backfill`）后切换到计数器，此前仍读原始销售；
+#       同步与回填都先锁租户状态行（lock_tenant），同一租户的计数器写入串行，重放批次不会重复累加
+from __future__ import annotations
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from core.models import Sale  # 实际字段：enterprise, store, sale_time, quantity, total_amount
+from core.models.ai_kpi import AiKpiCounter, AiKpiCounterState
+
+Key = Tuple[str, date]  # (store_id, biz_date)
+_ZERO = Decimal(0)
+
+
+def _biz_date(dt) -> date:
+    """同步入参里的 sale_time 可能仍是字符串（保存前未做类型转换）。"""
+    if isinstance(dt, str):
+        dt = parse_datetime(dt) or datetime.combine(parse_date(dt[:10]), datetime.min.time())
+    return timezone.localdate(dt) if timezone.is_aware(dt) else dt.date()
+
+
+# -------- 写入 --------
+
+def lock_tenant(tenant_id: str) -> AiKpiCounterState:
+    """锁定租户状态行（须在事务内调用），串行化同一租户的计数器写入。"""
+    AiKpiCounterState.objects.get_or_create(tenant_id=tenant_id)
+    return AiKpiCounterState.objects.select_for_update().get(tenant_id=tenant_id)
+
+
+def sale_deltas(sales: Iterable[Any]) -> Dict[Key, List[Any]]:
+    """把一批 Sale 实例汇总为 {(store_id, biz_date): [amount, qty, lines]}。"""
+    out: Dict[Key, List[Any]] = defaultdict(lambda: [_ZERO, _ZERO, 0])
+    for s in sales:
+        d = out[(str(s.store_id), _biz_date(s.sale_time))]
+        d[0] += Decimal(str(s.total_amount or 0))
+        d[1] += Decimal(str(s.quantity or 0))
+        d[2] += 1
+    return out
+
+
+def apply_deltas(tenant_id: str, deltas: Dict[Key, List[Any]]) -> None:
+    """原子递增：先确保计数行存在（忽略冲突），再逐键 UPDATE ... SET amount = amount + x。
+    键数 = 本批涉及的 门店×日，通常远小于明细行数。"""
+    if not deltas:
+        return
+    with transaction.atomic():
+        AiKpiCounter.objects.bulk_create(
+            [AiKpiCounter(tenant_id=tenant_id, store_id=sid, biz_date=d) for sid, d in deltas],
+            ignore_conflicts=True,
+        )
+        for (sid, d), (amount, qty, lines) in deltas.items():
+            AiKpiCounter.objects.filter(tenant_id=tenant_id, store_id=sid, biz_date=d).update(
+                amount=F("amount") + amount, qty=F("qty") + qty, lines=F("lines") + lines, updated_at=timezone.now(),
+            )
+
+
+def record_sales(tenant_id: str, sales: Iterable[Any]) -> None:
+    """同步路径调用：只应传入本次真正新增的销售明细（调用方持有 lock_tenant 锁并在同一事务内判定）。"""
+    apply_deltas(tenant_id, sale_deltas(sales))
+
+
+# -------- 读取 --------
+
+def has_counters(tenant_id: str) -> bool:
+    """计数器是否可用：仅以回填标记为准（同步产生的计数行不代表历史销售已计入）。"""
+    return AiKpiCounterState.objects.filter(tenant_id=tenant_id, backfilled_at__isnull=False).exists()
+
+
+def daily_totals(tenant_id: str, start: date, end: date, *, store_id: Any = None) -> Dict[date, float]:
+    """按日读取累计销售额（可限定门店）。"""
+    qs = AiKpiCounter.objects.filter(tenant_id=tenant_id, biz_date__gte=start, biz_date__lte=end)
+    if store_id is not None:
+        qs = qs.filter(store_id=str(store_id))
+    return {r["biz_date"]: float(r["v"] or 0) for r in qs.values("biz_date").annotate(v=Sum("amount"))}
+
+
+def store_totals(tenant_id: str, start: date, end: date) -> Dict[str, float]:
+    """按门店读取区间累计销售额。"""
+    qs = AiKpiCounter.objects.filter(tenant_id=tenant_id, biz_date__gte=start, biz_date__lte=end)
+    return {r["store_id"]: float(r["v"] or 0) for r in qs.values("store_id").annotate(v=Sum("amount"))}
+
+
+# -------- 对账 --------
+
+def _raw_totals(enterprise_id: Any, start: Optional[date], end: Optional[date]) -> Dict[Key, List[Any]]:
+    qs = Sale.objects.filter(enterprise_id=enterprise_id)
+    if start:
+        qs = qs.filter(sale_time__date__gte=start)
+    if end:
+        qs = qs.filter(sale_time__date__lte=end)
+    rows = (qs.annotate(d=TruncDate("sale_time")).values("store_id", "d")
+            .annotate(a=Sum("total_amount"), q=Sum("quantity"), n=Count("id")))
+    return {(str(r["store_id"]), r["d"]): [r["a"] or _ZERO, r["q"] or _ZERO, r["n"]] for r in rows}
+
+
+def reconcile(enterprise_id: Any, *, start: Optional[date] = None, end: Optional[date] = None,
+              fix: bool = False) -> Dict[str, Any]:
+    """从原始销售重算 门店×日 累计并与计数器比对；fix=True 时以原始数据覆盖计数器（含删除多余行）。"""
+    tenant_id = str(enterprise_id)
+    raw = _raw_totals(enterprise_id, start, end)
+    cqs = AiKpiCounter.objects.filter(tenant_id=tenant_id)
+    if start:
+        cqs = cqs.filter(biz_date__gte=start)
+    if end:
+        cqs = cqs.filter(biz_date__lte=end)
+    cur = {(c.store_id, c.biz_date): c for c in cqs}
+
+    drift: List[Dict[str, Any]] = []
+    for key in set(raw) | set(cur):
+        a, q, n = raw.get(key, (_ZERO, _ZERO, 0))
+        c = cur.get(key)
+        ca, cq, cn = (c.amount, c.qty, c.lines) if c else (_ZERO, _ZERO, 0)
+        if (a, q, n) != (ca, cq, cn):
+            drift.append({"store_id": key[0], "biz_date": key[1], "amount": float(a), "counter_amount": float(ca),
+                          "lines": n, "counter_lines": cn})
+
+    if fix and drift:
+        with transaction.atomic():
+            stale = [cur[k].pk for k in cur if k not in raw]
+            if stale:
+                AiKpiCounter.objects.filter(pk__in=stale).delete()
+            upd, new = [], []
+            for key, (a, q, n) in raw.items():
+                c = cur.get(key)
+                if c is None:
+                    new.append(AiKpiCounter(tenant_id=tenant_id, store_id=key[0], biz_date=key[1], amount=a, qty=q, lines=n))
+                elif (c.amount, c.qty, c.lines) != (a, q, n):
+                    c.amount, c.qty, c.lines = a, q, n
+                    upd.append(c)
+            AiKpiCounter.objects.bulk_create(new, batch_size=1000)
+            AiKpiCounter.objects.bulk_update(upd, ["amount", "qty", "lines"], batch_size=1000)
+
+    return {"checked": len(set(raw) | set(cur)), "drift": sorted(drift, key=lambda r: (r["biz_date"], r["store_id"])),
+            "fixed": bool(fix and drift)}
+
+
+def backfill(enterprise_id: Any) -> Dict[str, Any]:
+    """以原始销售全量重建该租户计数器并打上回填标记；持租户锁执行，期间的同步写入排队等待。"""
+    tenant_id = str(enterprise_id)
+    with transaction.atomic():
+        state = lock_tenant(tenant_id)
+        res = reconcile(enterprise_id, fix=True)
+        state.backfilled_at = timezone.now()
+        state.save(update_fields=["backfilled_at", "updated_at"])
+    return res
@@ -1,5 +1,5 @@
 # file: core/ai/kpi/review.py
-# purpose: KPI 复盘：对比实际 vs 目标，输出差额与进度状态
+# purpose: KPI 复盘：对比实际 vs 目标，输出差额与进度状态；实际值优先读 门店×日 累计计数器（常数级读取）
 from __future__ import annotations
 from dataclasses import dataclass
 from datetime import date, datetime
@@ -7,6 +7,7 @@ from typing import Dict, List, Optional
 from django.db.models import Sum
 from core.models import Sale
 from .targets import Period, _daterange
+from .counters import daily_totals, has_counters
 
 
 @dataclass
@@ -23,6 +24,10 @@ _DEF_TRACK_TOLERANCE = 0.05  # 允许 5% 偏差内视为达标
 
 
 def _fetch_actuals(tenant_id: str, period: Period) -> Dict[date, float]:
+    if has_counters(tenant_id):
+        data = daily_totals(tenant_id, period.start, period.end)
+        return {d: float(data.get(d, 0.0)) for d in _daterange(period.start, period.end)}
+    # 尚未建立计数器的租户：回落到明细聚合
     qs = (
         Sale.objects.filter(tenant_id=tenant_id, biz_date__gte=period.start, biz_date__lte=period.end)
         .values("biz_date")
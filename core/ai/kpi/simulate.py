@@ -0,0 +1,235 @@
+# file: core/ai/kpi/simulate.py
+# purpose: KPI 情景模拟（what-if）：一次性把各门店历史日销售/毛利/品类结构载入数组，
+#          对批量情景（客流/客单/毛利率/品类增幅）做向量化计算，输出门店与企业层级的目标达成概率
+from __future__ import annotations
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from math import erf, sqrt
+from typing import Any, Dict, List, Optional
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import Coalesce
+
+try:
+    import numpy as np  # 可选依赖；若缺失则回退纯 Python 计算
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+from core.models import Sale  # 需包含字段：tenant_id, biz_date, store_id, product_id, total_amount, total_cost_amount, gross_profit_amount
+from core.models.ai_kpi import AiKpiTarget
+from .targets import Period
+from .counters import has_counters, store_totals
+
+_MAX_SCENARIOS = 1000
+_DEF_CATEGORY_FIELD = "product__category_l1"
+
+
+@dataclass
+class Baseline:
+    """门店维度的历史基线（按 store_ids 顺序对齐）。"""
+    store_ids: List[Any]
+    mean: List[float]                       # 日均销售额
+    std: List[float]                        # 日销售额标准差
+    margin_rate: List[float]                # 毛利率
+    categories: List[str] = field(default_factory=list)
+    cat_share: List[List[float]] = field(default_factory=list)  # [门店][品类] 销售占比
+
+
+@dataclass
+class Scenario:
+    name: str
+    traffic_pct: float = 0.0
+    basket_pct: float = 0.0
+    margin_pct: float = 0.0                 # 毛利率相对变化（%）
+    category_pct: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_payload(cls, p: Dict[str, Any], idx: int) -> "Scenario":
+        return cls(
+            name=str(p.get("name") or f"s{idx + 1}"),
+            traffic_pct=float(p.get("traffic_pct") or 0.0),
+            basket_pct=float(p.get("basket_pct") or 0.0),
+            margin_pct=float(p.get("margin_pct") or 0.0),
+            category_pct={str(k): float(v or 0.0) for k, v in (p.get("category_pct") or {}).items()},
+        )
+
+
+# -------- 基线读取（两次分组查询） --------
+
+def load_baseline(tenant_id: str, *, start: date, end: date, category_field: str = _DEF_CATEGORY_FIELD) -> Baseline:
+    """读取 [start, end] 的门店日销售/毛利与门店品类结构；无销售日按 0 计。"""
+    n = (end - start).days + 1
+    profit = Coalesce(
+        F("gross_profit_amount"),
+        ExpressionWrapper(F("total_amount") - Coalesce(F("total_cost_amount"), F("total_amount")),
+                          output_field=DecimalField(max_digits=18, decimal_places=4)),
+    )
+    qs = Sale.objects.filter(tenant_id=tenant_id, biz_date__gte=start, biz_date__lte=end)
+    s1: Dict[Any, float] = defaultdict(float)
+    s2: Dict[Any, float] = defaultdict(float)
+    gp: Dict[Any, float] = defaultdict(float)
+    for sid, amt, mg in (qs.values("store_id", "biz_date").annotate(a=Sum("total_amount"), m=Sum(profit))
+                         .values_list("store_id", "a", "m")):
+        a = float(amt or 0.0)
+        s1[sid] += a
+        s2[sid] += a * a
+        gp[sid] += float(mg or 0.0)
+    store_ids = sorted(s1, key=str)
+    mean = [s1[s] / n for s in store_ids]
+    std = [sqrt(max(0.0, s2[s] / n - m * m)) for s, m in zip(store_ids, mean)]
+    margin = [gp[s] / s1[s] if s1[s] > 0 else 0.0 for s in store_ids]
+
+    cat_amt: Dict[Any, Dict[str, float]] = defaultdict(dict)
+    cats = set()
+    for sid, cat, amt in (qs.values("store_id", category_field).annotate(a=Sum("total_amount"))
+                          .values_list("store_id", category_field, "a")):
+        c = str(cat or "")
+        cats.add(c)
+        cat_amt[sid][c] = float(amt or 0.0)
+    categories = sorted(cats)
+    share = []
+    for s in store_ids:
+        tot = sum(cat_amt[s].values())
+        share.append([cat_amt[s].get(c, 0.0) / tot if tot > 0 else 0.0 for c in categories])
+    return Baseline(store_ids=store_ids, mean=mean, std=std, margin_rate=margin, categories=categories, cat_share=share)
+
+
+def load_targets(tenant_id: str, period: Period) -> Dict[str, float]:
+    """读取组织计划中该周期的门店目标（见 allocation.save_plan）。"""
+    qs = AiKpiTarget.objects.filter(tenant_id=tenant_id, level="store", period_start=period.start, period_end=period.end)
+    return {sid: float(t) for sid, t in qs.values_list("store_id", "target")}
+
+
+def load_actuals(tenant_id: str, start: date, end: date) -> Dict[str, float]:
+    """周期内已发生的门店销售（优先读计数器）。"""
+    if end < start:
+        return {}
+    if has_counters(tenant_id):
+        return store_totals(tenant_id, start, end)
+    qs = (Sale.objects.filter(tenant_id=tenant_id, biz_date__gte=start, biz_date__lte=end)
+          .values("store_id").annotate(a=Sum("total_amount")).values_list("store_id", "a"))
+    return {str(s): float(a or 0.0) for s, a in qs}
+
+
+# -------- 向量化计算 --------
+
+def _norm_cdf_np(x):
+    """标准正态分布函数（Abramowitz-Stegun 7.1.26 近似 erf，误差 < 1.5e-7）。"""
+    z = np.abs(x) / sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    y = 1.0 - (((((1.061405429 * t - 1.453152027) * t) + 1.421413741) * t - 0.284496736) * t + 0.254829592) * t * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * y)
+
+
+def _norm_cdf(x: float) -> float:
+    return 0.5 * (1.0 + erf(x / sqrt(2.0)))
+
+
+def _simulate_np(b: Baseline, scs: List[Scenario], target: List[float], actual: List[float], remaining: int) -> Dict[str, Any]:
+    mean, std, mr = np.asarray(b.mean), np.asarray(b.std), np.asarray(b.margin_rate)
+    tgt, act = np.asarray(target), np.asarray(actual)
+    base_mult = np.asarray([(1 + s.traffic_pct / 100.0) * (1 + s.basket_pct / 100.0) for s in scs])      # (K,)
+    if b.categories:
+        cm = np.asarray([[1 + s.category_pct.get(c, 0.0) / 100.0 for c in b.categories] for s in scs])  # (K,C)
+        share = np.asarray(b.cat_share)                                                                  # (S,C)
+        has_mix = share.sum(axis=1) > 0
+        cat_mult = np.where(has_mix[None, :], cm @ share.T, 1.0)                                         # (K,S)
+    else:
+        cat_mult = np.ones((len(scs), len(b.store_ids)))
+    m = base_mult[:, None] * cat_mult                                                                     # (K,S)
+    mu = act[None, :] + m * mean[None, :] * remaining
+    sd = m * std[None, :] * sqrt(max(0, remaining))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        zs = np.where(sd > 0, (mu - tgt[None, :]) / sd, np.where(mu >= tgt[None, :], np.inf, -np.inf))
+    p = _norm_cdf_np(np.nan_to_num(zs, posinf=40.0, neginf=-40.0))
+    margin_mult = np.asarray([1 + s.margin_pct / 100.0 for s in scs])
+    gp = (m * mean[None, :] * remaining * mr[None, :]).sum(axis=1) * margin_mult
+    mu_e, sd_e, t_e = mu.sum(axis=1), np.sqrt((sd ** 2).sum(axis=1)), tgt.sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ze = np.where(sd_e > 0, (mu_e - t_e) / sd_e, np.where(mu_e >= t_e, 40.0, -40.0))
+    return {"store_prob": p.tolist(), "mu": mu.tolist(), "mu_e": mu_e.tolist(), "p_e": _norm_cdf_np(ze).tolist(),
+            "mult": m.mean(axis=1).tolist() if m.size else [1.0] * len(scs), "gp": gp.tolist()}
+
+
+def _simulate_py(b: Baseline, scs: List[Scenario], target: List[float], actual: List[float], remaining: int) -> Dict[str, Any]:
+    out: Dict[str, List[Any]] = {"store_prob": [], "mu": [], "mu_e": [], "p_e": [], "mult": [], "gp": []}
+    t_e = sum(target)
+    for s in scs:
+        base = (1 + s.traffic_pct / 100.0) * (1 + s.basket_pct / 100.0)
+        cm = [1 + s.category_pct.get(c, 0.0) / 100.0 for c in b.categories]
+        probs, mus, ms, var_e, gp = [], [], [], 0.0, 0.0
+        for i in range(len(b.store_ids)):
+            share = b.cat_share[i] if b.cat_share else []
+            mix = sum(w * c for w, c in zip(share, cm)) if share and sum(share) > 0 else 1.0
+            m = base * mix
+            mu = actual[i] + m * b.mean[i] * remaining
+            sd = m * b.std[i] * sqrt(max(0, remaining))
+            p = _norm_cdf((mu - target[i]) / sd) if sd > 0 else (1.0 if mu >= target[i] else 0.0)
+            probs.append(p)
+            mus.append(mu)
+            ms.append(m)
+            var_e += sd * sd
+            gp += m * b.mean[i] * remaining * b.margin_rate[i]
+        mu_e = sum(mus)
+        sd_e = sqrt(var_e)
+        out["store_prob"].append(probs)
+        out["mu"].append(mus)
+        out["mu_e"].append(mu_e)
+        out["p_e"].append(_norm_cdf((mu_e - t_e) / sd_e) if sd_e > 0 else (1.0 if mu_e >= t_e else 0.0))
+        out["mult"].append(sum(ms) / len(ms) if ms else 1.0)
+        out["gp"].append(gp * (1 + s.margin_pct / 100.0))
+    return out
+
+
+def simulate(baseline: Baseline, scenarios: List[Scenario], *, targets: Dict[str, float], remaining_days: int,
+             actuals: Optional[Dict[str, float]] = None, with_stores: bool = False, use_numpy: bool = True) -> Dict[str, Any]:
+    """对全部情景×门店一次性计算：投影销售 = 已发生 + 倍数×日均×剩余天数；达成概率按正态近似。"""
+    keys = [str(s) for s in baseline.store_ids]
+    tgt = [float(targets.get(k, 0.0)) for k in keys]
+    act = [float((actuals or {}).get(k, 0.0)) for k in keys]
+    engine = "numpy" if (use_numpy and np is not None) else "python"
+    fn = _simulate_np if engine == "numpy" else _simulate_py
+    r = fn(baseline, scenarios, tgt, act, max(0, int(remaining_days)))
+    items: List[Dict[str, Any]] = []
+    for k, s in enumerate(scenarios):
+        probs = r["store_prob"][k]
+        item = {
+            "name": s.name,
+            "sales_multiplier": round(float(r["mult"][k]), 4),
+            "projected_sales": round(float(r["mu_e"][k]), 2),
+            "target": round(sum(tgt), 2),
+            "attain_prob": round(float(r["p_e"][k]), 4),
+            "expected_stores_hit": round(float(sum(probs)), 2),
+            "projected_margin": round(float(r["gp"][k]), 2),
+        }
+        if with_stores:
+            item["stores"] = [{"store_id": sid, "target": round(t, 2), "projected": round(float(mu), 2), "attain_prob": round(float(p), 4)}
+                              for sid, t, mu, p in zip(keys, tgt, r["mu"][k], probs)]
+        items.append(item)
+    return {"engine": engine, "store_count": len(keys), "scenarios": items}
+
+
+def run_simulation(*, tenant_id: str, period: Period, scenarios: List[Dict[str, Any]], targets: Optional[Dict[str, float]] = None,
+                   lookback_days: int = 56, lift_pct: float = 10.0, with_stores: bool = False,
+                   today: Optional[date] = None) -> Dict[str, Any]:
+    """载入基线/目标/已发生一次，评估全部情景。
+    目标优先级：入参 targets > 组织计划（AiKpiTarget）> 基线×天数×(1+lift_pct)。"""
+    if not scenarios:
+        raise ValueError("scenarios required")
+    if len(scenarios) > _MAX_SCENARIOS:
+        raise ValueError(f"too many scenarios (max {_MAX_SCENARIOS})")
+    today = today or date.today()
+    hist_end = min(today, period.start) - timedelta(days=1)
+    base = load_baseline(tenant_id, start=hist_end - timedelta(days=max(7, int(lookback_days)) - 1), end=hist_end)
+    scs = [Scenario.from_payload(p, i) for i, p in enumerate(scenarios)]
+
+    elapsed_end = min(period.end, today - timedelta(days=1))
+    actuals = load_actuals(tenant_id, period.start, elapsed_end)
+    remaining = (period.end - max(period.start, today)).days + 1 if period.end >= today else 0
+
+    tmap = {str(k): float(v) for k, v in (targets or {}).items()} or load_targets(tenant_id, period)
+    if not tmap:
+        tmap = {str(s): m * period.days * (1 + float(lift_pct) / 100.0) for s, m in zip(base.store_ids, base.mean)}
+    res = simulate(base, scs, targets=tmap, remaining_days=remaining, actuals=actuals, with_stores=with_stores)
+    res.update({"period": {"start": period.start, "end": period.end, "days": period.days}, "remaining_days": remaining})
+    return res
@@ -1,11 +1,13 @@
 # file: core/ai/kpi/targets.py
-# purpose: KPI 目标拟定：基于历史（同比/上一周期）与目标增幅，生成总目标与按日拆分
+# purpose: KPI 目标拟定：基于历史（同比/上一周期）与目标增幅，生成总目标与按日拆分；
+#          基线日期经 calendar 按星期/节假日对齐
 from __future__ import annotations
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from django.db.models import Sum
 from core.models import Sale  # 需包含字段：tenant_id, biz_date(date), total_amount(numeric)
+from .calendar import baseline_dates
 
 
 @dataclass
@@ -58,19 +60,24 @@ def _shift_period(period: Period, *, days: int) -> Period:
 
 
 def _yoy_period(period: Period) -> Period:
-    return Period(start=period.start.replace(year=period.start.year - 1), end=period.end.replace(year=period.end.year - 1))
+    """去年同期：整体前移 52 周（星期几一致，且不会在 2 月 29 日出错）。"""
+    return _shift_period(period, days=364)
 
 
 def fetch_baseline(tenant_id: str, period: Period, *, mode: str = "last_period") -> Dict[date, float]:
     """mode: last_period | yoy
-    - last_period: 取紧邻上一段等长区间
-    - yoy: 取去年同期
+    - last_period: 取上一段等长区间（按整周前移，节假日取去年同一节日）
+    - yoy: 取去年同期（按星期对齐，节假日/春节窗口对齐到去年同一节日）
+    返回以目标期日期为键的基线销售额。
     """
-    if mode == "yoy":
-        p = _yoy_period(period)
-    else:
-        p = _shift_period(period, days=period.days)
-    return _fetch_sales_daily(tenant_id, p)
+    mapping = baseline_dates(period.start, period.end, mode=mode)
+    qs = (
+        Sale.objects.filter(tenant_id=tenant_id, biz_date__in=set(mapping.values()))
+        .values("biz_date")
+        .annotate(amount=Sum("total_amount"))
+    )
+    amounts = {r["biz_date"]: float(r.get("amount") or 0.0) for r in qs}
+    return {d: amounts.get(b, 0.0) for d, b in sorted(mapping.items())}
 
 
 # -------- target plan --------
@@ -94,7 +101,7 @@ def make_targets(*, tenant_id: str, period: Period, goal_lift_pct: float = 10.0,
         base = {d: float(base_map.get(d, 0.0)) for d in _daterange(period.start, period.end)}
     else:
         base = fetch_baseline(tenant_id, period, mode=baseline_mode)
-        # 若结果与目标期天数不一致，按日期对齐填零
+        # 基线已按目标日期对齐，缺失日期填零
         base = {d: float(base.get(d, 0.0)) for d in _daterange(period.start, period.end)}
 
     total_base = sum(base.values())
@@ -0,0 +1,150 @@
+# file: core/ai/llm/http.py
+# purpose: LLM/Embedding 供应商共享 HTTP 客户端：按 provider 复用 requests.Session（连接池 + keep-alive），
+#          池大小/超时可配置；记录新建连接与复用次数到 Prometheus 指标；
+#          异步路径（apost）按 provider×事件循环 复用 httpx.AsyncClient（弱引用事件循环；循环结束时
+#          经 shutdown_asyncgens 关闭其客户端，WSGI 下 async_to_sync 每次新建的循环不会累积连接），未安装 httpx 时回退线程池
+# 配置：settings.AI_HTTP_POOL = {"pool_connections": 4, "pool_maxsize": 16, "connect_timeout": 5, "read_timeout": 30,
+#                               "async_max_connections": 200, "providers": {"gpt": {"pool_maxsize": 32}}}
+from __future__ import annotations
+import asyncio
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from core.observability.metrics import REGISTRY
+
+try:
+    import httpx  # 可选依赖：原生异步 HTTP 客户端
+except Exception:  # pragma: no cover
+    httpx = None  # type: ignore
+
+_DEFAULTS: Dict[str, Any] = {"pool_connections": 4, "pool_maxsize": 16, "connect_timeout": 5.0, "read_timeout": 30.0,
+                             "async_max_connections": 200}
+
+HTTP_CONN_TOTAL = "ai_llm_http_connections_total"  # labels: provider, kind=new|reused
+
+_lock = threading.Lock()
+_sessions: Dict[str, requests.Session] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+
+def _conf(provider: str) -> Dict[str, Any]:
+    raw = getattr(settings, "AI_HTTP_POOL", None) or {}
+    per = (raw.get("providers") or {}).get(provider) or {}
+    return {**_DEFAULTS, **{k: v for k, v in raw.items() if k != "providers"}, **per}
+
+
+def session_for(provider: str) -> requests.Session:
+    """取 provider 专属的共享 Session（线程安全地懒创建；requests.Session 的连接池可跨线程复用）。"""
+    s = _sessions.get(provider)
+    if s is not None:
+        return s
+    with _lock:
+        s = _sessions.get(provider)
+        if s is None:
+            c = _conf(provider)
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=int(c["pool_connections"]), pool_maxsize=int(c["pool_maxsize"]),
+                                  max_retries=0, pool_block=False)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _sessions[provider] = s
+    return s
+
+
+def default_timeout(provider: str, read_timeout: float | None = None) -> Tuple[float, float]:
+    """(连接超时, 读取超时)；read_timeout 为适配器自身的超时设置时优先。"""
+    c = _conf(provider)
+    return float(c["connect_timeout"]), float(read_timeout if read_timeout is not None else c["read_timeout"])
+
+
+def _counts(session: requests.Session) -> Tuple[int, int]:
+    """(请求数, 新建连接数)：汇总该 Session 下所有 urllib3 连接池。"""
+    req = conn = 0
+    for adapter in {id(a): a for a in session.adapters.values()}.values():
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            p = pools.get(key)
+            if p is not None:
+                req += int(getattr(p, "num_requests", 0))
+                conn += int(getattr(p, "num_connections", 0))
+    return req, conn
+
+
+def post(provider: str, url: str, *, timeout: float | None = None, **kw) -> requests.Response:
+    """经共享连接池发送 POST；timeout 视为读取超时（连接超时取配置）。参数与 requests.post 相同。
+    并发时新建/复用的归类为近似值（按前后连接数差判断）。"""
+    s = session_for(provider)
+    before = _counts(s)[1]
+    r = s.post(url, timeout=default_timeout(provider, timeout), **kw)
+    kind = "new" if _counts(s)[1] > before else "reused"
+    REGISTRY.counter_inc(HTTP_CONN_TOTAL, {"provider": provider, "kind": kind})
+    return r
+
+
+class _LoopClients:
+    """单个事件循环的客户端表；hook 为登记在该循环上的异步生成器（循环结束时关闭客户端）。"""
+
+    def __init__(self):
+        self.clients: Dict[str, Any] = {}
+        self.hook: Any = None
+
+
+async def _close_on_shutdown(entry: _LoopClients) -> AsyncIterator[None]:
+    try:
+        yield
+    finally:
+        for c in list(entry.clients.values()):
+            if not c.is_closed:
+                await c.aclose()
+        entry.clients.clear()
+        entry.hook = None  # 生成器经 finalizer 强引用事件循环：断开后循环才能被回收、弱引用表项随之移除
+
+
+async def async_client_for(provider: str):
+    """当前事件循环内 provider 专属的 httpx.AsyncClient（AsyncClient 不能跨事件循环使用）。"""
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        entry = _async_clients[loop] = _LoopClients()
+        entry.hook = _close_on_shutdown(entry)
+        await entry.hook.asend(None)  # 首次迭代时由事件循环登记，shutdown_asyncgens 时 aclose
+    c = entry.clients.get(provider)
+    if c is None or c.is_closed:
+        conf = _conf(provider)
+        limits = httpx.Limits(max_connections=int(conf["async_max_connections"]),
+                              max_keepalive_connections=int(conf["pool_maxsize"]))
+        c = entry.clients[provider] = httpx.AsyncClient(limits=limits)
+    return c
+
+
+async def apost(provider: str, url: str, *, timeout: float | None = None, **kw):
+    """异步 POST：返回对象具备 raise_for_status()/json()；未安装 httpx 时在线程池中走同步连接池。"""
+    if httpx is None:
+        return await sync_to_async(post, thread_sensitive=False)(provider, url, timeout=timeout, **kw)
+    connect, read = default_timeout(provider, timeout)
+    client = await async_client_for(provider)
+    r = await client.post(url, timeout=httpx.Timeout(read, connect=connect), **kw)
+    REGISTRY.counter_inc(HTTP_CONN_TOTAL, {"provider": provider, "kind": "async"})
+    return r
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """各 provider 连接池统计：requests=经池发出的请求数，connections=新建连接数，reused=复用次数。"""
+    out: Dict[str, Dict[str, int]] = {}
+    for provider, s in list(_sessions.items()):
+        req, conn = _counts(s)
+        out[provider] = {"requests": req, "connections": conn, "reused": max(0, req - conn)}
+    return out
+
+
+def reset() -> None:
+    """关闭并丢弃所有共享 Session（测试/配置变更后使用）。"""
+    with _lock:
+        for s in _sessions.values():
+            s.close()
+        _sessions.clear()
+        _async_clients.clear()  # 所属事件循环可能已关闭，直接丢弃
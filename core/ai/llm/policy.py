@@ -0,0 +1,154 @@
+# file: core/ai/llm/policy.py
+# purpose: 成本/复杂度感知的模型路由：在解析出的有效模型（model_prefs）之上，按 agent、提示词规模、输出结构选择档位
+#          light / standard / flagship，再经注册表（registry.tier_model）映射为同一供应商的型号；
+#          优先级：用户显式偏好 > 租户路由覆盖（AiModelRoute，按 agent 或 "*"）> 全局规则（首条命中）> 原模型；
+#          每条路由（agent×档位×型号）的实测延迟与 token 记入指标与进程内滚动统计，用于调整规则
+# 配置：settings.AI_MODEL_ROUTING = {"enabled": False, "default_tier": "standard", "rules": [...],
+#                                   "tiers": {"light": {"gpt": "gpt-4o-mini"}}, "window": 200}
+#       规则字段（均可选，全部满足即命中）：agent（str|list）、output（text/json/sql）、min_tokens、max_tokens、tier
+from __future__ import annotations
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from django.conf import settings
+
+from core.ai.llm.registry import has_provider, get_provider_meta, tier_model
+from core.ai.model_prefs import get_tenant_routes
+from core.observability.metrics import REGISTRY
+
+_DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"agent": ["bi-nl2sql", "categorize"], "max_tokens": 4000, "tier": "light"},  # 结构化意图抽取/归类
+    {"agent": "session_summary", "tier": "light"},
+    {"output": "json", "max_tokens": 1500, "tier": "light"},
+    {"min_tokens": 12000, "tier": "flagship"},  # 超长上下文
+]
+_DEFAULTS: Dict[str, Any] = {"enabled": False, "default_tier": "standard", "rules": _DEFAULT_RULES, "tiers": {},
+                             "window": 200}
+
+ROUTE_TOTAL = "ai_model_route_total"            # labels: agent, tier, source
+ROUTE_LATENCY = "ai_model_route_latency_seconds"  # labels: agent, tier, model
+ROUTE_TOKENS = "ai_model_route_tokens_total"      # labels: agent, tier, model
+_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32)
+
+
+def _conf() -> Dict[str, Any]:
+    return {**_DEFAULTS, **(getattr(settings, "AI_MODEL_ROUTING", None) or {})}
+
+
+@dataclass(frozen=True)
+class Route:
+    """路由结果；source = user | tenant | policy | default。"""
+    provider: str
+    model: Optional[str]
+    tier: str
+    source: str
+
+
+def _matches(rule: Dict[str, Any], agent: str, tokens: int, output: str) -> bool:
+    want = rule.get("agent")
+    if want and agent not in ([want] if isinstance(want, str) else want):
+        return False
+    if rule.get("output") and rule["output"] != output:
+        return False
+    if rule.get("min_tokens") is not None and tokens < int(rule["min_tokens"]):
+        return False
+    if rule.get("max_tokens") is not None and tokens > int(rule["max_tokens"]):
+        return False
+    return True
+
+
+def classify(agent: str, tokens: int, output: str = "text") -> str:
+    """按全局规则给出档位（首条命中，否则 default_tier）。"""
+    c = _conf()
+    for rule in c["rules"] or []:
+        if _matches(rule, agent, tokens, output):
+            return str(rule.get("tier") or c["default_tier"])
+    return str(c["default_tier"])
+
+
+def _model_for(provider: str, tier: str, model: Optional[str]) -> Optional[str]:
+    """档位型号：settings.tiers 覆盖 > 注册表推荐；standard 或未登记时沿用原模型。"""
+    if tier == "standard":
+        return model
+    conf = (_conf()["tiers"] or {}).get(tier) or {}
+    return conf.get(provider) or tier_model(provider, tier) or model
+
+
+def route(*, tenant_id: str, agent: str, tokens: int, output: str, provider: str, model: Optional[str],
+          source: str) -> Route:
+    """在有效模型 (provider, model, source) 基础上决定本次调用的型号。"""
+    if source == "user":  # 用户显式选了模型：不替换
+        return _count(agent, Route(provider, model, "standard", "user"))
+    routes = get_tenant_routes(tenant_id)
+    ov = routes.get(agent) or routes.get("*")
+    if ov:
+        tier, p, m = ov
+        if p and has_provider(p):
+            return _count(agent, Route(p, m or get_provider_meta(p).default_model, tier or "custom", "tenant"))
+        if tier:
+            return _count(agent, Route(provider, _model_for(provider, tier, model), tier, "tenant"))
+    if not _conf()["enabled"]:
+        return Route(provider, model, "standard", "default")
+    tier = classify(agent, tokens, output)
+    return _count(agent, Route(provider, _model_for(provider, tier, model), tier, "policy"))
+
+
+def _count(agent: str, r: Route) -> Route:
+    REGISTRY.counter_inc(ROUTE_TOTAL, {"agent": agent, "tier": r.tier, "source": r.source})
+    return r
+
+
+# -------- 实测统计 --------
+
+class _Stats:
+    def __init__(self, window: int):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.tokens: Deque[int] = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+
+
+_lock = threading.Lock()
+_stats: Dict[Tuple[str, str, str], _Stats] = {}
+
+
+def record(*, agent: str, tier: str, model: Optional[str], latency_ms: float, tokens: int, ok: bool) -> None:
+    """记录一次路由调用的实测延迟与 token（成功调用计入分位统计）。"""
+    labels = {"agent": agent, "tier": tier, "model": model or ""}
+    key = (agent, tier, model or "")
+    with _lock:
+        s = _stats.get(key)
+        if s is None:
+            s = _stats[key] = _Stats(int(_conf()["window"]))
+        s.calls += 1
+        if ok:
+            s.latencies.append(float(latency_ms))
+            s.tokens.append(int(tokens))
+        else:
+            s.errors += 1
+    if ok:
+        REGISTRY.histogram_observe(ROUTE_LATENCY, float(latency_ms) / 1000.0, buckets=_BUCKETS, labels=labels)
+        REGISTRY.counter_inc(ROUTE_TOKENS, labels, value=float(tokens))
+
+
+def _quantile(xs: List[float], q: float) -> Optional[float]:
+    return xs[min(len(xs) - 1, int(q * len(xs)))] if xs else None
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """各 agent:tier:model 的 p50/p90 延迟与平均 token（运维调参用）。"""
+    out: Dict[str, Dict[str, Any]] = {}
+    with _lock:
+        items = [(k, sorted(s.latencies), list(s.tokens), s.calls, s.errors) for k, s in _stats.items()]
+    for (agent, tier, model), lat, toks, calls, errors in items:
+        out[f"{agent}:{tier}:{model}"] = {"p50_ms": _quantile(lat, 0.5), "p90_ms": _quantile(lat, 0.9),
+                                          "samples": len(lat), "calls": calls, "errors": errors,
+                                          "avg_tokens": round(sum(toks) / len(toks), 1) if toks else None}
+    return out
+
+
+def reset() -> None:
+    """清空统计（测试/配置变更后使用）。"""
+    with _lock:
+        _stats.clear()
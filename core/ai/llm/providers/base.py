@@ -1,10 +1,15 @@
 # file: core/ai/llm/providers/base.py
-# purpose: LLM 适配器基类与标准返回结构；子类仅需实现 `_chat_impl()` 完成实际 HTTP 调用。
+# purpose: LLM 适配器基类与标准返回结构；子类仅需实现 `_chat_impl()` 完成实际 HTTP 调用；
+#          可选实现 `_stream_impl()` 支持流式输出（未实现时回退为一次性返回）；
+#          可选实现 `_achat_impl()` 原生异步调用（未实现时在线程池中执行 `_chat_impl()`）；
+#          `astream_chat()` 为流式的异步入口（在线程池中逐块拉取同步流，供 ASGI 下逐块下发）。
 
 from __future__ import annotations
+import json
 import time
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+from asgiref.sync import sync_to_async
 
 
 def _estimate_tokens(text: str) -> int:
@@ -30,11 +35,11 @@ class BaseAdapter:
     provider: str = "base"     # 供应商标识（例如 gemini/deepseek/zhipu）
     default_model: str = ""     # 默认模型名（子类覆盖）
 
-    def __init__(self, *, api_key: Optional[str] = None, model: Optional[str] = None, timeout: float = 30.0):
+    def __init__(self, *, api_key: Optional[str] = None, model: Optional[str] = None, timeout: Optional[float] = None):
         """初始化适配器实例。
         :param api_key: 供应商 API Key（可从环境变量读取）
         :param model: 模型名称；为空则使用 default_model
-        :param timeout: HTTP 超时时间（秒）
+        :param timeout: HTTP 读取超时（秒）；为空时取 settings.AI_HTTP_POOL 配置（默认 30）
         """
         self.api_key = api_key
         self.model = model or self.default_model
@@ -43,7 +48,15 @@ class BaseAdapter:
     def chat(self, prompt: str) -> ChatResult:
         """单轮对话统一入口：调用 `_chat_impl()`，并做 usage 回退估算与耗时统计。"""
         t0 = time.perf_counter()
-        data = self._chat_impl(prompt)
+        return self._result(prompt, self._chat_impl(prompt), t0)
+
+    async def achat(self, prompt: str) -> ChatResult:
+        """异步单轮对话入口：调用 `_achat_impl()`，返回与 chat() 相同的结构。"""
+        t0 = time.perf_counter()
+        return self._result(prompt, await self._achat_impl(prompt), t0)
+
+    @staticmethod
+    def _result(prompt: str, data: Dict[str, Any], t0: float) -> ChatResult:
         content = data.get("content") or ""
         # usage 回退估算，避免供应商未返回 tokens 时无法扣费
         ti = int(data.get("tokens_in") or 0) or _estimate_tokens(prompt)
@@ -51,6 +64,85 @@ class BaseAdapter:
         data.setdefault("latency_ms", int((time.perf_counter() - t0) * 1000))
         return ChatResult(content=content, tokens_in=ti, tokens_out=to, raw=data)
 
+    async def _achat_impl(self, prompt: str) -> Dict[str, Any]:
+        """子类可覆盖为原生异步 HTTP；默认在线程池中执行同步实现（不占用事件循环）。"""
+        return await sync_to_async(self._chat_impl, thread_sensitive=False)(prompt)
+
     def _chat_impl(self, prompt: str) -> Dict[str, Any]:  # pragma: no cover
         """子类实现：实际 HTTP 调用并返回字典 {content, tokens_in?, tokens_out?, raw}。"""
         raise NotImplementedError
+
+    def stream_chat(self, prompt: str) -> Iterator[Dict[str, Any]]:
+        """流式对话统一入口：逐段产出 {"delta": str}，最后产出
+        {"done": True, "content", "tokens_in", "tokens_out", "raw"}（usage 缺失时同样回退估算）。"""
+        t0 = time.perf_counter()
+        parts = []
+        usage: Dict[str, Any] = {}
+        for ev in self._stream_impl(prompt):
+            if ev.get("delta"):
+                parts.append(ev["delta"])
+                yield {"delta": ev["delta"]}
+            if ev.get("usage"):
+                usage = ev["usage"]
+        content = "".join(parts)
+        ti = int(usage.get("tokens_in") or 0) or _estimate_tokens(prompt)
+        to = int(usage.get("tokens_out") or 0) or _estimate_tokens(content)
+        yield {"done": True, "content": content, "tokens_in": ti, "tokens_out": to,
+               "raw": {"usage": usage, "latency_ms": int((time.perf_counter() - t0) * 1000)}}
+
+    async def astream_chat(self, prompt: str) -> AsyncIterator[Dict[str, Any]]:
+        """异步流式入口：事件结构同 stream_chat()；每块在线程池中拉取，阻塞读不占用事件循环。"""
+        it = self.stream_chat(prompt)
+        pull = sync_to_async(next, thread_sensitive=False)
+        try:
+            while True:
+                ev = await pull(it, None)
+                if ev is None:
+                    break
+                yield ev
+        finally:  # 客户端断开时关闭底层同步流（释放 HTTP 连接）
+            await sync_to_async(it.close, thread_sensitive=False)()
+
+    def _stream_impl(self, prompt: str) -> Iterator[Dict[str, Any]]:
+        """子类可覆盖：产出 {"delta": str} 与可选的 {"usage": {tokens_in, tokens_out}}；默认整段返回。"""
+        data = self._chat_impl(prompt)
+        yield {"delta": data.get("content") or ""}
+        yield {"usage": {"tokens_in": data.get("tokens_in"), "tokens_out": data.get("tokens_out")}}
+
+
+def parse_openai_chat(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """OpenAI 兼容 /chat/completions 响应 → {content, tokens_in, tokens_out, raw}。"""
+    choice = (obj.get("choices") or [{}])[0]
+    usage = obj.get("usage") or {}
+    return {
+        "content": (choice.get("message") or {}).get("content", ""),
+        "tokens_in": int(usage.get("prompt_tokens") or 0),
+        "tokens_out": int(usage.get("completion_tokens") or 0),
+        "raw": obj,
+    }
+
+
+def iter_sse_json(resp) -> Iterator[Dict[str, Any]]:
+    """解析 SSE 响应体中的 `data:` 行为 JSON；遇到 [DONE] 结束。"""
+    for line in resp.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        try:
+            yield json.loads(data)
+        except ValueError:
+            continue
+
+
+def iter_openai_stream(resp) -> Iterator[Dict[str, Any]]:
+    """OpenAI 兼容流（GPT/DeepSeek/智谱）：choices[0].delta.content 为增量，usage 通常在最后一块。"""
+    for obj in iter_sse_json(resp):
+        choice = (obj.get("choices") or [{}])[0]
+        delta = (choice.get("delta") or {}).get("content")
+        if delta:
+            yield {"delta": delta}
+        usage = obj.get("usage")
+        if usage:
+            yield {"usage": {"tokens_in": usage.get("prompt_tokens"), "tokens_out": usage.get("completion_tokens")}}
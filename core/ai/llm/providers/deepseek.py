@@ -3,9 +3,9 @@
 
 from __future__ import annotations
 import os
-import requests
-from typing import Any, Dict
-from .base import BaseAdapter
+from typing import Any, Dict, Iterator
+from .. import http as llm_http
+from .base import BaseAdapter, iter_openai_stream, parse_openai_chat
 
 
 class DeepSeekAdapter(BaseAdapter):
@@ -19,24 +19,34 @@ class DeepSeekAdapter(BaseAdapter):
         super().__init__(api_key=kw.get("api_key") or os.getenv("DEEPSEEK_API_KEY"), model=kw.get("model"))
         self.base = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
 
-    def _chat_impl(self, prompt: str) -> Dict[str, Any]:
-        """调用 DeepSeek API 并返回标准化结构。"""
+    def _request(self, prompt: str, *, stream: bool = False):
+        """组装 (url, headers, payload)；同步/流式/异步三条路径共用。"""
         if not self.api_key:
             raise ValueError("DEEPSEEK_API_KEY is required")
         url = f"{self.base}/chat/completions"
         headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
-        payload = {"model": self.model, "messages": [{"role": "user", "content": prompt}], "temperature": 0.2}
-        r = requests.post(url, headers=headers, json=payload, timeout=self.timeout)
-        r.raise_for_status()
-        obj = r.json()
-        choice = (obj.get("choices") or [{}])[0]
-        msg = (choice.get("message") or {}).get("content", "")
-        usage = obj.get("usage") or {}
-        return {
-            "content": msg,
-            "tokens_in": int(usage.get("prompt_tokens") or 0),
-            "tokens_out": int(usage.get("completion_tokens") or 0),
-            "raw": obj,
-        }
+        payload: Dict[str, Any] = {"model": self.model, "messages": [{"role": "user", "content": prompt}], "temperature": 0.2}
+        if stream:
+            payload.update({"stream": True, "stream_options": {"include_usage": True}})
+        return url, headers, payload
 
+    def _chat_impl(self, prompt: str) -> Dict[str, Any]:
+        """同步调用并返回标准化结构。"""
+        url, headers, payload = self._request(prompt)
+        r = llm_http.post(self.provider, url, headers=headers, json=payload, timeout=self.timeout)
+        r.raise_for_status()
+        return parse_openai_chat(r.json())
 
+    async def _achat_impl(self, prompt: str) -> Dict[str, Any]:
+        """异步调用（httpx.AsyncClient 连接池；未安装 httpx 时回退线程池）。"""
+        url, headers, payload = self._request(prompt)
+        r = await llm_http.apost(self.provider, url, headers=headers, json=payload, timeout=self.timeout)
+        r.raise_for_status()
+        return parse_openai_chat(r.json())
+
+    def _stream_impl(self, prompt: str) -> Iterator[Dict[str, Any]]:
+        """stream=True 调用，逐块产出增量文本与最终 usage。"""
+        url, headers, payload = self._request(prompt, stream=True)
+        with llm_http.post(self.provider, url, headers=headers, json=payload, timeout=self.timeout, stream=True) as r:
+            r.raise_for_status()
+            yield from iter_openai_stream(r)
@@ -3,9 +3,9 @@
 
 from __future__ import annotations
 import os
-import requests
-from typing import Any, Dict
-from .base import BaseAdapter
+from typing import Any, Dict, Iterator
+from .. import http as llm_http
+from .base import BaseAdapter, iter_sse_json
 
 
 class GeminiAdapter(BaseAdapter):
@@ -19,15 +19,18 @@ class GeminiAdapter(BaseAdapter):
         super().__init__(api_key=kw.get("api_key") or os.getenv("GEMINI_API_KEY"), model=kw.get("model"))
         self.base = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com")
 
-    def _chat_impl(self, prompt: str) -> Dict[str, Any]:
-        """调用 Gemini 的 HTTP API 并返回标准化结构。"""
+    def _request(self, prompt: str, *, stream: bool = False):
+        """组装 (url, payload)；同步/流式/异步三条路径共用。"""
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY is required")
-        url = f"{self.base}/v1beta/models/{self.model}:generateContent?key={self.api_key}"
-        payload = {"contents": [{"parts": [{"text": prompt}]}]}
-        r = requests.post(url, json=payload, timeout=self.timeout)
-        r.raise_for_status()
-        obj = r.json()
+        if stream:
+            url = f"{self.base}/v1beta/models/{self.model}:streamGenerateContent?alt=sse&key={self.api_key}"
+        else:
+            url = f"{self.base}/v1beta/models/{self.model}:generateContent?key={self.api_key}"
+        return url, {"contents": [{"parts": [{"text": prompt}]}]}
+
+    @staticmethod
+    def _parse(obj: Dict[str, Any]) -> Dict[str, Any]:
         # 文本抽取
         text = ""
         try:
@@ -44,4 +47,31 @@ class GeminiAdapter(BaseAdapter):
             "raw": obj,
         }
 
+    def _chat_impl(self, prompt: str) -> Dict[str, Any]:
+        """调用 Gemini 的 HTTP API 并返回标准化结构。"""
+        url, payload = self._request(prompt)
+        r = llm_http.post(self.provider, url, json=payload, timeout=self.timeout)
+        r.raise_for_status()
+        return self._parse(r.json())
+
+    async def _achat_impl(self, prompt: str) -> Dict[str, Any]:
+        """异步调用（httpx.AsyncClient 连接池；未安装 httpx 时回退线程池）。"""
+        url, payload = self._request(prompt)
+        r = await llm_http.apost(self.provider, url, json=payload, timeout=self.timeout)
+        r.raise_for_status()
+        return self._parse(r.json())
 
+    def _stream_impl(self, prompt: str) -> Iterator[Dict[str, Any]]:
+        """调用 streamGenerateContent（alt=sse），逐块产出文本；usageMetadata 以最后一块为准。"""
+        url, payload = self._request(prompt, stream=True)
+        usage: Dict[str, Any] = {}
+        with llm_http.post(self.provider, url, json=payload, timeout=self.timeout, stream=True) as r:
+            r.raise_for_status()
+            for obj in iter_sse_json(r):
+                cands = obj.get("candidates") or [{}]
+                parts = (cands[0].get("content") or {}).get("parts") or []
+                text = "".join(p.get("text", "") for p in parts)
+                if text:
+                    yield {"delta": text}
+                usage = obj.get("usageMetadata") or usage
+        yield {"usage": {"tokens_in": usage.get("promptTokenCount"), "tokens_out": usage.get("candidatesTokenCount")}}
@@ -1,9 +1,13 @@
 # file: core/ai/llm/providers/mock.py
 # purpose: 本地开发/测试使用的 Mock 适配器；不依赖外部网络，按字符数估算 tokens
 # 用途：作为回退 provider（provider_key = "mock"），在无 API Key 或离线模式下可用
+# 压测：settings.AI_MOCK_LATENCY_MS 注入固定延迟（同步 sleep / 异步 await asyncio.sleep）
 
 from __future__ import annotations
-from typing import Any, Dict
+import asyncio
+import time
+from typing import Any, Dict, Iterator
+from django.conf import settings
 from .base import BaseAdapter, _estimate_tokens
 
 
@@ -13,8 +17,24 @@ class MockAdapter(BaseAdapter):
     provider = "mock"
     default_model = "mock-echo"
 
+    @staticmethod
+    def _latency() -> float:
+        return max(0.0, float(getattr(settings, "AI_MOCK_LATENCY_MS", 0) or 0)) / 1000.0
+
     def _chat_impl(self, prompt: str) -> Dict[str, Any]:
         """返回简单回显内容，并按字符长度估算 tokens。"""
+        if self._latency():
+            time.sleep(self._latency())
+        return self._echo(prompt)
+
+    async def _achat_impl(self, prompt: str) -> Dict[str, Any]:
+        """异步版本：延迟期间不占用线程。"""
+        if self._latency():
+            await asyncio.sleep(self._latency())
+        return self._echo(prompt)
+
+    @staticmethod
+    def _echo(prompt: str) -> Dict[str, Any]:
         content = f"[mock] echo: {prompt[:2000]}"
         ti = _estimate_tokens(prompt)
         to = _estimate_tokens(content)
@@ -25,3 +45,8 @@ class MockAdapter(BaseAdapter):
             "raw": {"mock": True},
         }
 
+    def _stream_impl(self, prompt: str) -> Iterator[Dict[str, Any]]:
+        """按固定长度切块回显，模拟流式增量。"""
+        content = self._echo(prompt)["content"]
+        for i in range(0, len(content), 16):
+            yield {"delta": content[i:i + 16]}
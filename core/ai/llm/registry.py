@@ -5,6 +5,7 @@
 #  - has_provider / get_provider_meta: 校验与读取元信息
 #  - list_providers: 供前端/接口列出可用 Provider
 #  - get_adapter_class: 懒加载返回对应的适配器类（避免循环依赖）
+#  - tier_model: 按档位（light/flagship）取该供应商的推荐型号，供路由策略（core/ai/llm/policy.py）使用
 
 from __future__ import annotations
 from dataclasses import dataclass, asdict
@@ -21,6 +22,7 @@ class ProviderMeta:
     api_key_env: Optional[str] = None  # API Key 的环境变量名（如 OPENAI_API_KEY）
     base_url_env: Optional[str] = None # 可选的 Base URL 环境变量名
     notes: Optional[str] = None        # 备注（用于文档）
+    tier_models: tuple[tuple[str, str], ...] = ()  # 档位 → 型号（如 ("light", "gpt-4o-mini")）；standard 即解析出的模型
 
     def to_dict(self) -> Dict:
         """转换成 dict，供接口返回。"""
@@ -78,6 +80,7 @@ _REGISTRY: Dict[str, ProviderMeta] = {
         api_key_env="OPENAI_API_KEY",
         base_url_env="OPENAI_BASE_URL",
         notes="默认驱动，适配 /v1/chat/completions 接口。",
+        tier_models=(("light", "gpt-4o-mini"), ("flagship", "gpt-4o")),
     ),
     "gemini": ProviderMeta(
         key="gemini",
@@ -87,6 +90,7 @@ _REGISTRY: Dict[str, ProviderMeta] = {
         api_key_env="GEMINI_API_KEY",
         base_url_env="GEMINI_BASE_URL",
         notes="generateContent API。",
+        tier_models=(("light", "gemini-1.5-flash-latest"), ("flagship", "gemini-1.5-pro-latest")),
     ),
     "deepseek": ProviderMeta(
         key="deepseek",
@@ -96,6 +100,7 @@ _REGISTRY: Dict[str, ProviderMeta] = {
         api_key_env="DEEPSEEK_API_KEY",
         base_url_env="DEEPSEEK_BASE_URL",
         notes="OpenAI 兼容 /chat/completions。",
+        tier_models=(("light", "deepseek-chat"),),
     ),
     "zhipu": ProviderMeta(
         key="zhipu",
@@ -105,6 +110,7 @@ _REGISTRY: Dict[str, ProviderMeta] = {
         api_key_env="ZHIPU_API_KEY",
         base_url_env="ZHIPU_BASE_URL",
         notes="/api/paas/v4/chat/completions。",
+        tier_models=(("light", "glm-4-flash"), ("flagship", "glm-4-plus")),
     ),
     "mock": ProviderMeta(
         key="mock",
@@ -133,6 +139,12 @@ def list_providers() -> List[Dict]:
     return [m.to_dict() for m in _REGISTRY.values()]
 
 
+def tier_model(key: str, tier: str) -> Optional[str]:
+    """该供应商在指定档位的推荐型号；未登记时返回 None（调用方沿用原模型）。"""
+    meta = _REGISTRY.get(key)
+    return dict(meta.tier_models).get(tier) if meta else None
+
+
 def get_adapter_class(key: str):
     """懒加载返回适配器类，避免模块级循环依赖。
     返回类（非实例），调用方可直接 `cls(...).chat(...)`。
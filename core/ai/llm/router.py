@@ -0,0 +1,254 @@
+# file: core/ai/llm/router.py
+# purpose: 多供应商延迟感知路由：按 provider×model 维护滚动延迟分位与错误率；
+#          主供应商超过其 p90 仍未返回时向备用供应商发出对冲请求，取先返回者、取消落后者；
+#          熔断器跳过错误率过高的供应商（冷却期后放行试探，成功即恢复）
+# 配置：settings.AI_LLM_ROUTER = {"enabled": True, "secondary": {"gpt": "deepseek", "*": "zhipu:glm-4-flash"},
+#                                "hedge_quantile": 0.9, "min_samples": 20, "hedge_after_ms": 3000, "window": 200,
+#                                "breaker": {"error_rate": 0.5, "min_calls": 10, "cooldown_s": 30}, "max_workers": 32}
+# 计费：只返回胜出调用的结果，调用方仅按它结算；落后者（同步路径无法中断的线程）结果直接丢弃
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from django.conf import settings
+from core.observability.metrics import REGISTRY
+
+Key = Tuple[str, Optional[str]]  # (provider, model)
+
+_DEFAULTS: Dict[str, Any] = {"enabled": False, "secondary": {}, "hedge_quantile": 0.9, "min_samples": 20,
+                             "hedge_after_ms": 3000, "window": 200, "max_workers": 32,
+                             "breaker": {"error_rate": 0.5, "min_calls": 10, "cooldown_s": 30}}
+
+ROUTE_TOTAL = "ai_llm_route_total"            # labels: provider, role=primary|hedge|failover
+BREAKER_SKIP_TOTAL = "ai_llm_breaker_skip_total"  # labels: provider
+
+_lock = threading.Lock()
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _conf() -> Dict[str, Any]:
+    raw = getattr(settings, "AI_LLM_ROUTER", None) or {}
+    return {**_DEFAULTS, **raw, "breaker": {**_DEFAULTS["breaker"], **(raw.get("breaker") or {})}}
+
+
+def enabled() -> bool:
+    return bool(_conf()["enabled"])
+
+
+class _Stats:
+    """单个 provider×model 的滚动窗口：成功调用的延迟（毫秒）与最近调用结果；附带熔断状态。"""
+
+    def __init__(self, window: int):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.open_until = 0.0
+        self.lock = threading.Lock()
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self.lock:
+            xs = sorted(self.latencies)
+        if not xs:
+            return None
+        return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+    def error_rate(self) -> float:
+        with self.lock:
+            n = len(self.outcomes)
+            return (n - sum(self.outcomes)) / n if n else 0.0
+
+
+_stats: Dict[Key, _Stats] = {}
+
+
+def _get(key: Key) -> _Stats:
+    s = _stats.get(key)
+    if s is None:
+        with _lock:
+            s = _stats.setdefault(key, _Stats(int(_conf()["window"])))
+    return s
+
+
+def record(key: Key, latency_ms: Optional[float], ok: bool) -> None:
+    """记录一次调用结果并推进熔断状态：
+    - 闭合：窗口内调用数 ≥ min_calls 且错误率 ≥ 阈值 → 打开 cooldown_s 秒；
+    - 冷却期结束后（半开）：首个成功即闭合并清空窗口，失败则再打开一个冷却期。"""
+    b = _conf()["breaker"]
+    s = _get(key)
+    now = time.monotonic()
+    with s.lock:
+        if ok and latency_ms is not None:
+            s.latencies.append(float(latency_ms))
+        if s.open_until and now >= s.open_until:
+            if ok:
+                s.open_until = 0.0
+                s.outcomes.clear()
+            else:
+                s.open_until = now + float(b["cooldown_s"])
+            return
+        s.outcomes.append(bool(ok))
+        n = len(s.outcomes)
+        if not s.open_until and n >= int(b["min_calls"]) and (n - sum(s.outcomes)) / n >= float(b["error_rate"]):
+            s.open_until = now + float(b["cooldown_s"])
+            s.outcomes.clear()
+
+
+def is_open(key: Key) -> bool:
+    """熔断器是否处于打开状态（冷却期内）。"""
+    s = _stats.get(key)
+    return bool(s and s.open_until > time.monotonic())
+
+
+def hedge_delay(key: Key) -> float:
+    """发出对冲请求前等待的秒数：样本足够时取该供应商的延迟分位（默认 p90），否则取 hedge_after_ms。"""
+    c = _conf()
+    s = _stats.get(key)
+    if s is not None and len(s.latencies) >= int(c["min_samples"]):
+        return float(s.quantile(float(c["hedge_quantile"]))) / 1000.0
+    return float(c["hedge_after_ms"]) / 1000.0
+
+
+def _parse(spec: Any) -> Optional[Key]:
+    if not spec:
+        return None
+    if isinstance(spec, (list, tuple)):
+        return str(spec[0]), (spec[1] if len(spec) > 1 else None)
+    provider, _, model = str(spec).partition(":")
+    return provider.strip(), (model.strip() or None)
+
+
+def plan(provider: str, model: Optional[str]) -> List[Key]:
+    """候选列表 [主, 备?]：未启用时只有主供应商；熔断打开的候选被跳过（全部打开时仍尝试主供应商）。"""
+    primary: Key = (provider, model)
+    c = _conf()
+    if not c["enabled"]:
+        return [primary]
+    sec_map = c["secondary"] or {}
+    sec = _parse(sec_map.get(provider, sec_map.get("*")))
+    cands = [primary] + ([sec] if sec and sec != primary else [])
+    healthy = [k for k in cands if not is_open(k)]
+    for k in cands:
+        if k not in healthy:
+            REGISTRY.counter_inc(BREAKER_SKIP_TOTAL, {"provider": k[0]})
+    return healthy or [primary]
+
+
+@dataclass
+class Routed:
+    """路由结果：胜出调用的返回值及其 provider/model；role = primary | hedge | failover。"""
+    result: Any
+    provider: str
+    model: Optional[str]
+    role: str
+
+
+def _timed(key: Key, call: Callable[[str, Optional[str]], Any]) -> Any:
+    t0 = time.perf_counter()
+    try:
+        res = call(*key)
+    except Exception:
+        record(key, None, False)
+        raise
+    record(key, (time.perf_counter() - t0) * 1000, True)
+    return res
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=int(_conf()["max_workers"]), thread_name_prefix="llm-hedge")
+    return _pool
+
+
+def _done(key: Key, role: str, result: Any) -> Routed:
+    REGISTRY.counter_inc(ROUTE_TOTAL, {"provider": key[0], "role": role})
+    return Routed(result=result, provider=key[0], model=key[1], role=role)
+
+
+def chat(candidates: List[Key], call: Callable[[str, Optional[str]], Any]) -> Routed:
+    """同步路由：call(provider, model) 为实际调用。
+    主供应商在 hedge_delay 内未返回 → 并行发出备用请求；主供应商先失败 → 立即转备用。
+    先成功者胜出；落后者若尚未开始则取消，已在运行的线程无法中断，其结果被丢弃且不计费。"""
+    primary = candidates[0]
+    if len(candidates) == 1:
+        return _done(primary, "primary", _timed(primary, call))
+    secondary = candidates[1]
+    pool = _executor()
+    futs = {pool.submit(_timed, primary, call): primary}
+    done, _ = wait(futs, timeout=hedge_delay(primary))
+    role = "failover" if done else "hedge"
+    if done and next(iter(done)).exception() is None:
+        return _done(primary, "primary", next(iter(done)).result())
+    futs[pool.submit(_timed, secondary, call)] = secondary
+    pending = set(futs)
+    first_err: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for f in done:
+            if f.exception() is None:
+                for p in pending:
+                    p.cancel()
+                key = futs[f]
+                return _done(key, "primary" if key == primary else role, f.result())
+            first_err = first_err or f.exception()
+    raise first_err  # type: ignore[misc]
+
+
+async def _atimed(key: Key, call: Callable[[str, Optional[str]], Awaitable[Any]]) -> Any:
+    t0 = time.perf_counter()
+    try:
+        res = await call(*key)
+    except Exception:  # 被取消（CancelledError）时不记录：落后者的耗时不代表供应商真实延迟
+        record(key, None, False)
+        raise
+    record(key, (time.perf_counter() - t0) * 1000, True)
+    return res
+
+
+async def achat(candidates: List[Key], call: Callable[[str, Optional[str]], Awaitable[Any]]) -> Routed:
+    """异步路由：语义同 chat()；落后者的任务会被 cancel，连接随之释放。"""
+    primary = candidates[0]
+    if len(candidates) == 1:
+        return _done(primary, "primary", await _atimed(primary, call))
+    secondary = candidates[1]
+    t1 = asyncio.ensure_future(_atimed(primary, call))
+    tasks = {t1: primary}
+    done, _ = await asyncio.wait({t1}, timeout=hedge_delay(primary))
+    role = "failover" if done else "hedge"
+    if done and t1.exception() is None:
+        return _done(primary, "primary", t1.result())
+    tasks[asyncio.ensure_future(_atimed(secondary, call))] = secondary
+    pending = set(tasks)
+    first_err: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                if t.exception() is None:
+                    key = tasks[t]
+                    return _done(key, "primary" if key == primary else role, t.result())
+                first_err = first_err or t.exception()
+        raise first_err  # type: ignore[misc]
+    finally:
+        for t in pending:
+            t.cancel()
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """各 provider:model 的滚动统计（运维排障用）。"""
+    out: Dict[str, Dict[str, Any]] = {}
+    for (provider, model), s in list(_stats.items()):
+        out[f"{provider}:{model or ''}"] = {"p50_ms": s.quantile(0.5), "p90_ms": s.quantile(0.9), "samples": len(s.latencies),
+                                            "error_rate": round(s.error_rate(), 4), "open": is_open((provider, model))}
+    return out
+
+
+def reset() -> None:
+    """清空统计与熔断状态（测试/配置变更后使用）。"""
+    with _lock:
+        _stats.clear()
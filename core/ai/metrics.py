@@ -4,6 +4,7 @@ from __future__ import annotations
 from datetime import datetime, date, timedelta
 from typing import Optional, Dict, Any, List
 from django.db.models import Sum, Count, Avg
+from django.utils import timezone
 from core.models.ai_billing import AiTokenTransaction
 from core.models.ai_logging import AiCallLog, AiRun
 
@@ -28,7 +29,7 @@ def usage_summary(tenant_id: str, start: Optional[str | datetime | date], end: O
     e = _to_dt(end)
     if not s and not e:
         # 默认统计近7天
-        e = datetime.utcnow()
+        e = timezone.now()
         s = e - timedelta(days=7)
     q_call = AiCallLog.objects.filter(run__tenant_id=tenant_id)
     q_tx = AiTokenTransaction.objects.filter(tenant_id=tenant_id)
@@ -70,7 +71,7 @@ def usage_by_provider(tenant_id: str, start: Optional[str | datetime | date], en
     s = _to_dt(start)
     e = _to_dt(end)
     if not s and not e:
-        e = datetime.utcnow()
+        e = timezone.now()
         s = e - timedelta(days=7)
     base = AiCallLog.objects.filter(run__tenant_id=tenant_id)
     if s:
@@ -136,7 +137,7 @@ def latency_percentiles(tenant_id: str, start: Optional[str | datetime | date],
     s = _to_dt(start)
     e = _to_dt(end)
     if not s and not e:
-        e = datetime.utcnow()
+        e = timezone.now()
         s = e - timedelta(days=7)
     base = AiCallLog.objects.filter(run__tenant_id=tenant_id)
     if s:
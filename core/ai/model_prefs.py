@@ -1,8 +1,15 @@
 # file: core/ai/model_prefs.py
 # purpose: 模型偏好存取与解析（用户 > 租户 > 环境 > 回退）；为 Orchestrator 提供 get_effective_model()
+#          以及租户按 agent 的路由覆盖（AiModelRoute，供 core/ai/llm/policy.py 使用）
+# 缓存：用户/租户两级的解析结果按 (tenant, user) 缓存（进程内 + Django cache），
+#       set_user_model/set_tenant_default_model/set_tenant_route 递增租户版本号使其失效；批处理可用 preload_model_prefs() 批量预热
+# 配置：settings.AI_MODEL_PREF_CACHE = {"ttl": 300, "max_entries": 4096}；ttl=0 关闭缓存
 from __future__ import annotations
+import threading
 from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Tuple
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
 
 from core.ai.llm.registry import (
@@ -14,6 +21,7 @@ from core.ai.llm.registry import (
 from core.models.ai_settings import (
     AiTenantDefaultModel,
     AiModelPreference,
+    AiModelRoute,
 )
 
 
@@ -31,6 +39,143 @@ class EffectiveModel:
         return asdict(self)
 
 
+# ---------------------------
+# Resolution cache
+# ---------------------------
+
+_DEFAULTS: Dict[str, Any] = {"ttl": 300, "max_entries": 4096}
+_MISS = object()
+_lock = threading.Lock()
+# (tenant, user, version) → (provider, model_name, source) | None（None 表示用户/租户均未配置）
+_local: Dict[Tuple[str, str, int], Optional[Tuple[str, str, str]]] = {}
+
+
+def _conf() -> Dict[str, Any]:
+    return {**_DEFAULTS, **(getattr(settings, "AI_MODEL_PREF_CACHE", None) or {})}
+
+
+def _version_key(tenant_id: str) -> str:
+    return f"ai:mp:ver:{tenant_id}"
+
+
+def _version(tenant_id: str) -> int:
+    return int(cache.get(_version_key(tenant_id)) or 0)
+
+
+def invalidate_model_prefs(tenant_id: str) -> None:
+    """递增租户版本号：该租户下所有 (tenant, user) 的缓存结果失效（旧版本条目随 TTL 过期）。"""
+    key = _version_key(tenant_id)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:  # 并发下键恰好被淘汰
+            cache.set(key, 1, timeout=None)
+
+
+def _invalidate_now_and_on_commit(tenant_id: str) -> None:
+    # 立即失效保证同一请求内可读到新值；提交后再失效一次，防止并发读者在提交前回填旧值
+    invalidate_model_prefs(tenant_id)
+    transaction.on_commit(lambda: invalidate_model_prefs(tenant_id))
+
+
+def _remember(key: Tuple[str, str, int], value: Optional[Tuple[str, str, str]]) -> None:
+    with _lock:
+        if len(_local) >= int(_conf()["max_entries"]):
+            _local.clear()
+        _local[key] = value
+
+
+def _choice_from(up, tp) -> Optional[Tuple[str, str, str]]:
+    """由用户偏好行/租户默认行得到 (provider, model_name, source)；均不可用时为 None。"""
+    if up is not None and up.is_active and has_provider(up.provider_key):
+        return up.provider_key, up.model_name or get_provider_meta(up.provider_key).default_model, "user"
+    if tp is not None and tp.is_active and has_provider(tp.provider_key):
+        return tp.provider_key, tp.model_name or get_provider_meta(tp.provider_key).default_model, "tenant"
+    return None
+
+
+def _load_choice(tenant_id: str, user_id: Optional[str]) -> Optional[Tuple[str, str, str]]:
+    up = AiModelPreference.objects.filter(tenant_id=tenant_id, user_id=user_id, is_active=True).first() if user_id else None
+    tp = None
+    if _choice_from(up, None) is None:
+        tp = AiTenantDefaultModel.objects.filter(tenant_id=tenant_id, is_active=True).first()
+    return _choice_from(up, tp)
+
+
+def _cached_choice(tenant_id: str, user_id: Optional[str]) -> Optional[Tuple[str, str, str]]:
+    ttl = int(_conf()["ttl"] or 0)
+    if ttl <= 0:
+        return _load_choice(tenant_id, user_id)
+    ver = _version(tenant_id)
+    key = (tenant_id, user_id or "", ver)
+    hit = _local.get(key, _MISS)
+    if hit is not _MISS:
+        return hit  # type: ignore[return-value]
+    ckey = f"ai:mp:{tenant_id}:{ver}:{user_id or ''}"
+    val = cache.get(ckey, _MISS)
+    if val is _MISS:
+        val = _load_choice(tenant_id, user_id)
+        cache.set(ckey, val, ttl)
+    val = tuple(val) if val else None
+    _remember(key, val)
+    return val
+
+
+def preload_model_prefs(tenant_ids: Iterable[str], user_ids: Iterable[str] = ()) -> int:
+    """批量预热：两次查询取出这些租户的默认模型与（指定用户的）用户偏好，写入缓存。
+    返回预热的 (tenant, user) 条目数（含 user=None 的租户级条目）。"""
+    ttl = int(_conf()["ttl"] or 0)
+    tenants = list(dict.fromkeys(str(t) for t in tenant_ids))
+    if ttl <= 0 or not tenants:
+        return 0
+    users = list(dict.fromkeys(str(u) for u in user_ids))
+    tps = {o.tenant_id: o for o in AiTenantDefaultModel.objects.filter(tenant_id__in=tenants, is_active=True)}
+    ups: Dict[Tuple[str, str], Any] = {}
+    if users:
+        for o in AiModelPreference.objects.filter(tenant_id__in=tenants, user_id__in=users, is_active=True):
+            ups[(o.tenant_id, o.user_id)] = o
+    entries: Dict[str, Any] = {}
+    n = 0
+    for t in tenants:
+        ver = _version(t)
+        for u in [None, *users]:
+            val = _choice_from(ups.get((t, u)) if u else None, tps.get(t))
+            entries[f"ai:mp:{t}:{ver}:{u or ''}"] = val
+            _remember((t, u or "", ver), val)
+            n += 1
+    cache.set_many(entries, ttl)
+    return n
+
+
+def get_tenant_routes(tenant_id: str) -> Dict[str, Tuple[str, str, str]]:
+    """租户的路由覆盖 {agent: (tier, provider, model_name)}（与偏好共用版本号缓存）。"""
+    def load() -> Dict[str, Tuple[str, str, str]]:
+        return {r.agent: (r.tier, r.provider_key, r.model_name)
+                for r in AiModelRoute.objects.filter(tenant_id=tenant_id, is_active=True)}
+
+    ttl = int(_conf()["ttl"] or 0)
+    if ttl <= 0:
+        return load()
+    ver = _version(tenant_id)
+    key = (tenant_id, "\x00routes", ver)
+    hit = _local.get(key, _MISS)
+    if hit is not _MISS:
+        return hit  # type: ignore[return-value]
+    ckey = f"ai:mp:routes:{tenant_id}:{ver}"
+    val = cache.get(ckey, _MISS)
+    if val is _MISS:
+        val = load()
+        cache.set(ckey, val, ttl)
+    _remember(key, val)  # type: ignore[arg-type]
+    return val
+
+
+def clear_local_model_prefs() -> None:
+    """清空进程内缓存（测试用）。"""
+    with _lock:
+        _local.clear()
+
+
 # ---------------------------
 # CRUD APIs
 # ---------------------------
@@ -49,6 +194,7 @@ def set_user_model(*, tenant_id: str, user_id: str, provider: str, model_name: O
             "is_active": is_active,
         },
     )
+    _invalidate_now_and_on_commit(tenant_id)
     return {
         "tenant_id": obj.tenant_id,
         "user_id": obj.user_id,
@@ -85,6 +231,7 @@ def set_tenant_default_model(*, tenant_id: str, provider: str, model_name: Optio
             "is_active": is_active,
         },
     )
+    _invalidate_now_and_on_commit(tenant_id)
     return {
         "tenant_id": obj.tenant_id,
         "provider": obj.provider_key,
@@ -105,6 +252,53 @@ def get_tenant_default_model(*, tenant_id: str) -> Optional[Dict[str, Any]]:
     }
 
 
+_TIERS = ("light", "standard", "flagship")
+
+
+@transaction.atomic
+def set_tenant_route(*, tenant_id: str, agent: str = "*", tier: Optional[str] = None, provider: Optional[str] = None,
+                     model_name: Optional[str] = None, is_active: bool = True) -> Dict[str, Any]:
+    """设置租户对某 agent 的路由：tier（light/standard/flagship）或 provider[/model_name] 二选一。"""
+    key = ""
+    if provider:
+        key = normalize_provider_key(provider) or ""
+        if not has_provider(key):
+            raise InvalidProvider(f"Unknown provider: {provider}")
+    if tier and tier not in _TIERS:
+        raise ValueError(f"Unknown tier: {tier}")
+    if not key and not tier:
+        raise ValueError("tier or provider is required")
+    obj, _ = AiModelRoute.objects.update_or_create(
+        tenant_id=tenant_id,
+        agent=agent or "*",
+        defaults={"tier": "" if key else tier, "provider_key": key, "model_name": model_name or "", "is_active": is_active},
+    )
+    _invalidate_now_and_on_commit(tenant_id)
+    return _route_dict(obj)
+
+
+def _route_dict(obj: AiModelRoute) -> Dict[str, Any]:
+    return {
+        "tenant_id": obj.tenant_id,
+        "agent": obj.agent,
+        "tier": obj.tier or None,
+        "provider": obj.provider_key or None,
+        "model_name": obj.model_name or None,
+        "is_active": obj.is_active,
+    }
+
+
+def list_tenant_routes(*, tenant_id: str) -> list[dict]:
+    return [_route_dict(o) for o in AiModelRoute.objects.filter(tenant_id=tenant_id).order_by("agent")]
+
+
+@transaction.atomic
+def delete_tenant_route(*, tenant_id: str, agent: str) -> bool:
+    n, _ = AiModelRoute.objects.filter(tenant_id=tenant_id, agent=agent).delete()
+    _invalidate_now_and_on_commit(tenant_id)
+    return bool(n)
+
+
 # ---------------------------
 # Resolution
 # ---------------------------
@@ -115,18 +309,10 @@ def get_effective_model(*, tenant_id: str, user_id: Optional[str] = None, env_pr
     - fallback_provider: 最终回退（默认 mock）。
     返回 EffectiveModel(provider, model_name, source)
     """
-    # 1) 用户级偏好
-    if user_id:
-        up = AiModelPreference.objects.filter(tenant_id=tenant_id, user_id=user_id, is_active=True).first()
-        if up and has_provider(up.provider_key):
-            model = up.model_name or get_provider_meta(up.provider_key).default_model
-            return EffectiveModel(provider=up.provider_key, model_name=model, source="user")
-
-    # 2) 租户默认
-    tp = AiTenantDefaultModel.objects.filter(tenant_id=tenant_id, is_active=True).first()
-    if tp and has_provider(tp.provider_key):
-        model = tp.model_name or get_provider_meta(tp.provider_key).default_model
-        return EffectiveModel(provider=tp.provider_key, model_name=model, source="tenant")
+    # 1) 用户级偏好 / 2) 租户默认（带缓存）
+    choice = _cached_choice(tenant_id, user_id)
+    if choice:
+        return EffectiveModel(provider=choice[0], model_name=choice[1], source=choice[2])
 
     # 3) 环境默认
     key = normalize_provider_key(env_provider) if env_provider else None
@@ -152,5 +338,7 @@ __all__ = [
     "set_tenant_default_model",
     "get_tenant_default_model",
     "get_effective_model",
+    "preload_model_prefs",
+    "invalidate_model_prefs",
     "list_supported_providers",
 ]
@@ -6,6 +6,7 @@ from django.http import HttpRequest
 from core.views.utils import ok, fail, get_json
 from core.ai.ops.anomaly_rules import detect_anomalies
 from core.ai.orchestrator import Orchestrator
+from core.ai import prompt_data
 
 
 _DEFAULT_RULES = [
@@ -30,13 +31,12 @@ class OpsAnomalyView(View):
 
             if with_commentary:
                 # 给出摘要与建议
-                sample = items[:20]
                 prompt = (
                     "你是运营分析专家。根据以下异常命中，输出：\n"
                     "1) 核心问题要点（不超过 3 条）\n"
                     "2) 可能原因假设（不超过 3 条）\n"
                     "3) 三条可执行动作建议（可落地）\n"
-                    f"异常样本: {sample}\n"
+                    f"异常样本:\n{prompt_data.encode_rows(items)}\n"
                 )
                 o = Orchestrator(tenant_id=tenant_id, agent="ops")
                 ans = o.chat_once(session=None, user_message=prompt)
@@ -1,5 +1,6 @@
 # file: core/ai/ops/anomaly_rules.py
-# purpose: 异常检测规则实现（销量骤降、缺货、价格异常）；统一 detect_anomalies 入口
+# purpose: 异常检测规则实现（销量骤降、缺货、价格异常）；统一 detect_anomalies 入口；
+#          销量骤降的基线剔除节假日/春节窗口，节假日当天与去年同一节日对比
 from __future__ import annotations
 from collections import defaultdict
 from dataclasses import dataclass
@@ -9,6 +10,7 @@ from django.db.models import Sum
 
 # 这些模型来自你的业务域（在日结里已用过）
 from core.models import Sale, InventorySnapshot  # 假定存在以下字段：见各函数注释
+from core.ai.kpi.calendar import align_yoy, is_special
 
 
 @dataclass
@@ -88,24 +90,50 @@ def _group_key(rec: dict, group_by: Iterable[str]) -> tuple:
     return tuple(rec.get(g) for g in group_by)
 
 
+def _plain_lookback(last_day: date, lookback: int, *, max_scan: int = 60) -> List[date]:
+    """从最后一天往前取 lookback 个非节假日/非春节窗口的日子（最多回看 max_scan 天）。"""
+    out: List[date] = []
+    for i in range(1, max_scan + 1):
+        d = last_day - timedelta(days=i)
+        if not is_special(d):
+            out.append(d)
+            if len(out) >= lookback:
+                break
+    return out
+
+
 def detect_sales_drop(*, tenant_id: str, start: date, end: date, rule: Rule) -> List[dict]:
-    rows = fetch_sales_daily(tenant_id=tenant_id, start=start, end=end, group_by=rule.group_by)
+    last_day = end
+    plain_days = _plain_lookback(last_day, rule.lookback)
+    fetch_start = min([start, *plain_days])
+    rows = fetch_sales_daily(tenant_id=tenant_id, start=fetch_start, end=end, group_by=rule.group_by)
     # 按 group_by 分桶
     buckets: Dict[tuple, Dict[date, dict]] = defaultdict(dict)
     for r in rows:
         buckets[_group_key(r, rule.group_by)][r["biz_date"]] = r
-    last_day = end
+    # 最后一天是节假日：与去年同一节日的对齐日比较（平日均值会造成大量误报）
+    yoy_series: Dict[tuple, dict] = {}
+    if is_special(last_day):
+        yd = align_yoy(last_day)
+        for r in fetch_sales_daily(tenant_id=tenant_id, start=yd, end=yd, group_by=rule.group_by):
+            if r["biz_date"] == yd:
+                yoy_series[_group_key(r, rule.group_by)] = r
     res: List[dict] = []
     for gk, series in buckets.items():
         # 最近一天
         last = series.get(last_day)
         if not last:
             continue
-        # 回看窗口（不含最后一天）
-        lb_days = [last_day - timedelta(days=i) for i in range(1, rule.lookback + 1)]
-        base_vals = [series[d]["amount"] for d in lb_days if d in series]
-        if len(base_vals) < max(3, rule.lookback // 2):
-            continue  # 样本不足
+        if gk in yoy_series:
+            base_vals, basis = [yoy_series[gk]["amount"]], "yoy"
+        else:
+            # 回看窗口（不含最后一天，剔除节假日）；非节假日样本不足时退回连续窗口
+            base_vals, basis = [series[d]["amount"] for d in plain_days if d in series], "lookback"
+            if len(base_vals) < max(3, rule.lookback // 2):
+                lb_days = [last_day - timedelta(days=i) for i in range(1, rule.lookback + 1)]
+                base_vals = [series[d]["amount"] for d in lb_days if d in series]
+            if len(base_vals) < max(3, rule.lookback // 2):
+                continue  # 样本不足
         base_avg = (sum(float(x or 0.0) for x in base_vals) / len(base_vals)) if base_vals else 0.0
         today_amt = float(last.get("amount") or 0.0)
         if base_avg <= 0:
@@ -119,6 +147,7 @@ def detect_sales_drop(*, tenant_id: str, start: date, end: date, rule: Rule) ->
                 "base_avg": round(base_avg, 2),
                 "today": round(today_amt, 2),
                 "drop_pct": round(drop_pct, 2),
+                "baseline": basis,
                 "severity": "high" if drop_pct >= 50 else "medium",
             })
     return res
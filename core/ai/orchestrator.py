@@ -1,12 +1,22 @@
 # file: core/ai/orchestrator.py
 # purpose: 统一多供应商调度器（更新版）：加入 GPTAdapter 与 MockAdapter；选择模型 → 预授权 → 调用 → 审计 → 结算
+#          可选响应缓存（core.ai.response_cache）：命中时跳过限流与调用，按配置比例计费，返回 cached=True
 # 兼容现有调用：chat_once(session, user_message) → {content, trace_id, spent, provider, model}
+# 流式调用：stream_once(session, user_message) → 迭代 {"type": "delta"|"done"|"error", ...}
+# 异步流式：async for ev in astream_once(session, user_message) → 事件同 stream_once（ASGI 下逐块下发，不整段缓冲）
+# 异步调用：await achat_once(session, user_message) → 与 chat_once 相同
+# 多供应商路由（core.ai.llm.router，AI_LLM_ROUTER 启用时）：对冲/熔断，provider/model 与计费均以胜出调用为准
+# 会话记忆（core.ai.session_memory）：传入 session 时提示词带上滚动摘要 + 最近轮次，成功后落库本轮消息
+# 运行日志（core.ai.run_log）：每次调用的 AiRun/AiCallLog 入内存队列，由后台线程批量落库
+# 请求合并（core.utils.singleflight）：无会话的相同提示词并发调用只请求一次，跟随者共享结果且不计费
+# 模型路由（core.ai.llm.policy）：按 agent/提示词规模/输出结构（output=text|json|sql）选择档位型号，实测延迟与 token 按路由统计
 
 from __future__ import annotations
+import logging
 import os
 import uuid
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, Iterator, Optional, Tuple
 
 from core.ai.llm.providers import (
     GPTAdapter,
@@ -16,9 +26,16 @@ from core.ai.llm.providers import (
     ZhipuAdapter,
 )
 from core.ai.model_prefs import get_effective_model  # 解析用户/租户/环境的有效模型
-from core.ai.audit import apply_output_filters  # 输出脱敏与宣称审计
+from core.ai.audit import apply_output_filters, StreamRedactor, validate_med_claims  # 输出脱敏与宣称审计
+from core.ai.llm.providers.base import _estimate_tokens
 from core.ai.billing import begin_authorize, finalize_or_rollback  # 预授权/结算
 from core.utils.rate_limit import rate_limiter
+from core.utils import singleflight
+from core.ai import response_cache
+from core.ai.llm import router as llm_router
+from core.ai.llm import policy as model_policy
+from core.ai import run_log, session_memory
+from asgiref.sync import sync_to_async
 
 
 _ADAPTERS = {
@@ -28,61 +45,167 @@ _ADAPTERS = {
     "deepseek": DeepSeekAdapter,
     "zhipu": ZhipuAdapter,
 }
+_ADAPTER_CACHE: Dict[Tuple[str, Optional[str]], Any] = {}
+logger = logging.getLogger(__name__)
 
 
 class Orchestrator:
     """多供应商调度器：一次完整 AI 请求生命周期的编排。"""
 
-    def __init__(self, *, tenant_id: str, user_id: Optional[str] = None, agent: str = "chat"):
+    def __init__(self, *, tenant_id: str, user_id: Optional[str] = None, agent: str = "chat", priority: str = "interactive",
+                 output: str = "text"):
         self.tenant_id = tenant_id
         self.user_id = user_id
         self.agent = agent
+        self.priority = priority  # interactive / batch（离线批处理只用限流余量，见 core.utils.rate_limit）
+        self.output = output  # 期望的输出结构 text / json / sql（参与模型路由）
 
     def _pick_adapter(self, provider_key: str, model_name: Optional[str]):
-        """根据 provider_key 选择适配器类并实例化；若未知提供商则抛出 KeyError。"""
+        """根据 provider_key 选择适配器类；同一 (provider, model) 复用实例（HTTP 连接池在 llm.http 中按 provider 共享）。
+        若未知提供商则抛出 KeyError。"""
         cls = _ADAPTERS.get(provider_key)
         if not cls:
             raise KeyError(provider_key)
-        return cls(model=model_name)
+        key = (provider_key, model_name)
+        inst = _ADAPTER_CACHE.get(key)
+        if inst is None or type(inst) is not cls:
+            inst = _ADAPTER_CACHE[key] = cls(model=model_name)
+        return inst
 
-    def chat_once(self, *, session: Optional[str], user_message: str) -> Dict[str, Any]:
-        """单轮对话：限流 → 选型 → 预授权 → 请求 → 审计 → 结算 → 返回。"""
-        if not rate_limiter.is_allowed(self.tenant_id, cost=1.0):
-            raise RuntimeError("rate limited")
+    def _serve_cached(self, hit: Dict[str, Any], *, provider_key: str) -> Dict[str, Any]:
+        """缓存命中：默认不计费；配置了 bill_fraction 时按原花费比例直接结算。"""
+        trace_id = uuid.uuid4().hex
+        spent = int(round(int(hit.get("spent") or 0) * response_cache.bill_fraction()))
+        if spent > 0:
+            try:
+                finalize_or_rollback(tenant_id=self.tenant_id, run_id=trace_id, actual_tokens=spent, success=True,
+                                     reason=f"llm_{provider_key}_cached")
+            except Exception:
+                spent = 0
+        return {**hit, "trace_id": trace_id, "spent": spent, "cached": True, "latency_ms": 0}
 
+    def _effective(self):
         env_provider = os.getenv("LLM_PROVIDER")
-        em = get_effective_model(tenant_id=self.tenant_id, user_id=self.user_id, env_provider=env_provider, fallback_provider="mock")
-        provider_key, model_name = em.provider, em.model_name
+        return get_effective_model(tenant_id=self.tenant_id, user_id=self.user_id, env_provider=env_provider, fallback_provider="mock")
 
-        adapter = self._pick_adapter(provider_key, model_name)
+    def _resolve_model(self) -> Tuple[str, Optional[str]]:
+        em = self._effective()
+        return em.provider, em.model_name
 
-        estimate = max(32, len(user_message) // 2)
-        auth = begin_authorize(tenant_id=self.tenant_id, estimate_tokens=estimate)
-        if not auth.allowed:
-            return {"content": f"余额不足：{auth.reason}", "spent": 0, "trace_id": uuid.uuid4().hex}
+    def _select(self, prompt: str) -> model_policy.Route:
+        """有效模型 + 路由策略 → 本次调用的 provider/model/档位。"""
+        em = self._effective()
+        return model_policy.route(tenant_id=self.tenant_id, agent=self.agent, tokens=_estimate_tokens(prompt),
+                                  output=self.output, provider=em.provider, model=em.model_name, source=em.source)
+
+    def _cache_slot(self, *, session, cache: Optional[bool], provider_key: str, model_name: Optional[str],
+                    user_message: str) -> Tuple[str, int]:
+        """返回 (缓存键, TTL)；不走缓存时为 ("", 0)。"""
+        ttl = response_cache.ttl_for(self.agent) if (cache is True or (cache is None and session is None)) else 0
+        if ttl <= 0:
+            return "", 0
+        return response_cache.make_key(tenant_id=self.tenant_id, provider=provider_key, model=model_name, prompt=user_message), ttl
+
+    def _result(self, res, *, trace_id: str, t0: float, provider_key: str, model_name: Optional[str]) -> Dict[str, Any]:
+        """输出审计（脱敏）并组装返回结构。"""
+        filt = apply_output_filters(tenant_id=self.tenant_id, text=res.content)
+        return {
+            "content": filt.get("text") or res.content,
+            "trace_id": trace_id,
+            "spent": int(res.tokens_in + res.tokens_out),
+            "provider": provider_key,
+            "model": model_name,
+            "latency_ms": int((time.perf_counter() - t0) * 1000),
+            "cached": False,
+        }
+
+    def _remember(self, session, user_message: str, reply: str, tokens_in: int = 0, tokens_out: int = 0) -> None:
+        """记录本轮会话消息；失败只记日志，不影响已生成的回复。"""
+        if session is None:
+            return
+        try:
+            session_memory.record_turn(tenant_id=self.tenant_id, session=session, user_message=user_message, reply=reply,
+                                       tokens_in=tokens_in, tokens_out=tokens_out)
+        except Exception:
+            logger.warning("session memory record failed", exc_info=True)
+
+    def _log_run(self, *, trace_id: str, session, provider_key: str, model_name: Optional[str], t0: float, tier: str,
+                 tokens_in: int = 0, tokens_out: int = 0, error: str = "", message: str = "", content: str = "") -> None:
+        """登记运行日志（仅入队，不触库）并记录路由实测。"""
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+        run_log.enqueue(trace_id=trace_id, tenant_id=self.tenant_id, agent=self.agent,
+                        session_id=session_memory.session_id(session), provider=provider_key, model=model_name,
+                        tokens_in=tokens_in, tokens_out=tokens_out, latency_ms=latency_ms,
+                        error=error, message=message, content=content)
+        model_policy.record(agent=self.agent, tier=tier, model=model_name, latency_ms=latency_ms,
+                            tokens=int(tokens_in + tokens_out), ok=not error)
+
+    def _flight_key(self, provider_key: str, model_name: Optional[str], prompt: str) -> str:
+        return "llm:" + response_cache.make_key(tenant_id=self.tenant_id, provider=provider_key, model=model_name, prompt=prompt)
+
+    @staticmethod
+    def _coalesced(out: Dict[str, Any]) -> Dict[str, Any]:
+        """跟随者拿到的共享结果：独立 trace_id，不重复计费。"""
+        return {**out, "trace_id": uuid.uuid4().hex, "spent": 0, "coalesced": True}
+
+    def chat_once(self, *, session: Optional[str], user_message: str, cache: Optional[bool] = None) -> Dict[str, Any]:
+        """单轮对话：选型 →（缓存）→ 限流 → 预授权 → 请求 → 审计 → 结算 → 返回。
+        cache=None 时无会话请求按 agent 配置的 TTL 缓存；False 强制不走缓存。"""
+        prompt = session_memory.build_prompt(tenant_id=self.tenant_id, session=session, user_message=user_message)
+        r = self._select(prompt)
+        provider_key, model_name = r.provider, r.model
+        cache_key, ttl = self._cache_slot(session=session, cache=cache, provider_key=provider_key, model_name=model_name,
+                                          user_message=prompt)
+        if cache_key:
+            hit = response_cache.get(cache_key)
+            if hit is not None:
+                return self._serve_cached(hit, provider_key=provider_key)
+
+        call = dict(session=session, user_message=user_message, prompt=prompt, provider_key=provider_key,
+                    model_name=model_name, tier=r.tier, cache_key=cache_key, ttl=ttl)
+        if session is not None:  # 会话调用带各自上下文且会落库消息，不合并
+            return self._chat_call(**call)
+        out, shared = singleflight.do(self._flight_key(provider_key, model_name, prompt), lambda: self._chat_call(**call))
+        return self._coalesced(out) if shared else out
 
+    def _chat_call(self, *, session, user_message: str, prompt: str, provider_key: str, model_name: Optional[str],
+                   tier: str, cache_key: str, ttl: int) -> Dict[str, Any]:
+        """chat_once 缓存未命中后的部分：限流 → 预授权 → 请求 → 审计 → 结算。"""
+        if not rate_limiter.is_allowed(self.tenant_id, cost=rate_limiter.cost_for(_estimate_tokens(prompt)),
+                                       priority=self.priority):
+            raise RuntimeError("rate limited")
+
+        route = llm_router.plan(provider_key, model_name)
+        for p, m in route:  # 未知 provider 在预授权前即抛出 KeyError
+            self._pick_adapter(p, m)
+
+        estimate = max(32, len(prompt) // 2)
         trace_id = uuid.uuid4().hex
+        auth = begin_authorize(tenant_id=self.tenant_id, estimate_tokens=estimate, run_id=trace_id)
+        if not auth.allowed:
+            return {"content": f"余额不足：{auth.reason}", "spent": 0, "trace_id": trace_id}
+
         t0 = time.perf_counter()
         ok = False
         tokens_in = tokens_out = 0
-        content = ""
-        raw: Dict[str, Any] = {}
+        err = content = ""
         try:
-            res = adapter.chat(user_message)
+            won = llm_router.chat(route, lambda p, m: self._pick_adapter(p, m).chat(prompt))
+            res, provider_key, model_name = won.result, won.provider, won.model
             tokens_in, tokens_out = res.tokens_in, res.tokens_out
-            filt = apply_output_filters(tenant_id=self.tenant_id, text=res.content)
-            content = filt.get("text") or res.content
-            raw = res.raw
-            ok = True
-            return {
-                "content": content,
-                "trace_id": trace_id,
-                "spent": int(tokens_in + tokens_out),
-                "provider": provider_key,
-                "model": model_name,
-                "latency_ms": int((time.perf_counter() - t0) * 1000),
-            }
+            out = self._result(res, trace_id=trace_id, t0=t0, provider_key=provider_key, model_name=model_name)
+            ok, content = True, out["content"]
+            self._remember(session, user_message, out["content"], tokens_in, tokens_out)
+            if cache_key:
+                response_cache.put(cache_key, {k: out[k] for k in ("content", "spent", "provider", "model")}, ttl)
+            return out
+        except Exception as e:
+            err = f"{type(e).__name__}: {e}"
+            raise
         finally:
+            self._log_run(trace_id=trace_id, session=session, provider_key=provider_key, model_name=model_name, t0=t0,
+                          tier=tier, tokens_in=tokens_in, tokens_out=tokens_out, error=err, message=user_message,
+                          content=content)
             try:
                 finalize_or_rollback(
                     tenant_id=self.tenant_id,
@@ -93,3 +216,216 @@ class Orchestrator:
                 )
             except Exception:
                 pass
+
+    async def achat_once(self, *, session: Optional[str], user_message: str, cache: Optional[bool] = None) -> Dict[str, Any]:
+        """chat_once 的原生异步版本（ASGI 部署）：等待 LLM 期间不占用线程；ORM/缓存/计费经 sync_to_async。
+        返回结构与 chat_once 相同。"""
+        prompt = await sync_to_async(session_memory.build_prompt)(tenant_id=self.tenant_id, session=session,
+                                                                  user_message=user_message)
+        r = await sync_to_async(self._select)(prompt)
+        provider_key, model_name = r.provider, r.model
+        cache_key, ttl = self._cache_slot(session=session, cache=cache, provider_key=provider_key, model_name=model_name,
+                                          user_message=prompt)
+        if cache_key:
+            hit = await sync_to_async(response_cache.get)(cache_key)
+            if hit is not None:
+                return await sync_to_async(self._serve_cached)(hit, provider_key=provider_key)
+
+        call = dict(session=session, user_message=user_message, prompt=prompt, provider_key=provider_key,
+                    model_name=model_name, tier=r.tier, cache_key=cache_key, ttl=ttl)
+        if session is not None:
+            return await self._achat_call(**call)
+        out, shared = await singleflight.ado(self._flight_key(provider_key, model_name, prompt),
+                                             lambda: self._achat_call(**call))
+        return self._coalesced(out) if shared else out
+
+    async def _achat_call(self, *, session, user_message: str, prompt: str, provider_key: str, model_name: Optional[str],
+                          tier: str, cache_key: str, ttl: int) -> Dict[str, Any]:
+        """achat_once 缓存未命中后的部分。"""
+        cost = rate_limiter.cost_for(_estimate_tokens(prompt))
+        if not await sync_to_async(rate_limiter.is_allowed)(self.tenant_id, cost=cost, priority=self.priority):
+            raise RuntimeError("rate limited")
+
+        route = llm_router.plan(provider_key, model_name)
+        for p, m in route:  # 未知 provider 在预授权前即抛出 KeyError
+            self._pick_adapter(p, m)
+        trace_id = uuid.uuid4().hex
+        auth = await sync_to_async(begin_authorize)(tenant_id=self.tenant_id, estimate_tokens=max(32, len(prompt) // 2),
+                                                    run_id=trace_id)
+        if not auth.allowed:
+            return {"content": f"余额不足：{auth.reason}", "spent": 0, "trace_id": trace_id}
+
+        t0 = time.perf_counter()
+        ok = False
+        tokens = 0
+        res = None
+        err = content = ""
+        try:
+            won = await llm_router.achat(route, lambda p, m: self._pick_adapter(p, m).achat(prompt))
+            res, provider_key, model_name = won.result, won.provider, won.model
+            tokens = int(res.tokens_in + res.tokens_out)
+            out = self._result(res, trace_id=trace_id, t0=t0, provider_key=provider_key, model_name=model_name)
+            ok, content = True, out["content"]
+            if session is not None:
+                await sync_to_async(self._remember)(session, user_message, out["content"], res.tokens_in, res.tokens_out)
+            if cache_key:
+                await sync_to_async(response_cache.put)(cache_key, {k: out[k] for k in ("content", "spent", "provider", "model")}, ttl)
+            return out
+        except Exception as e:
+            err = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._log_run(trace_id=trace_id, session=session, provider_key=provider_key, model_name=model_name, t0=t0,
+                          tier=tier, tokens_in=res.tokens_in if res else 0, tokens_out=res.tokens_out if res else 0, error=err,
+                          message=user_message, content=content)
+            try:
+                await sync_to_async(finalize_or_rollback)(
+                    tenant_id=self.tenant_id, run_id=trace_id, actual_tokens=tokens, success=ok, reason=f"llm_{provider_key}",
+                )
+            except Exception:
+                pass
+
+    def stream_once(self, *, session: Optional[str], user_message: str, cache: Optional[bool] = None) -> Iterator[Dict[str, Any]]:
+        """流式单轮对话：逐段产出 {"type": "delta", "content"}，最后产出 {"type": "done", trace_id, spent, ...}。
+        - 脱敏随流增量进行（StreamRedactor），医疗宣称审计在全文结束后附在 done 事件中
+        - 结算以供应商最终 usage 为准；客户端中途断开时按已生成内容估算扣费"""
+        turn = self._stream_open(session=session, user_message=user_message, cache=cache)
+        if turn.early is not None:
+            yield from turn.early
+            return
+        try:
+            for ev in turn.adapter.stream_chat(turn.prompt):
+                out = turn.feed(ev)
+                if out:
+                    yield out
+            yield from self._stream_done(turn, session=session, user_message=user_message)
+        finally:
+            self._stream_close(turn, session=session, user_message=user_message)
+
+    async def astream_once(self, *, session: Optional[str], user_message: str,
+                           cache: Optional[bool] = None) -> AsyncIterator[Dict[str, Any]]:
+        """stream_once 的异步版本（ASGI 下使用）：ORM/缓存/计费在 sync_to_async 中执行，
+        供应商流经 adapter.astream_chat() 逐块拉取，每个增量到达即下发，不会被整段缓冲。"""
+        turn = await sync_to_async(self._stream_open)(session=session, user_message=user_message, cache=cache)
+        if turn.early is not None:
+            for ev in turn.early:
+                yield ev
+            return
+        try:
+            async for ev in turn.adapter.astream_chat(turn.prompt):
+                out = turn.feed(ev)
+                if out:
+                    yield out
+            for out in await sync_to_async(self._stream_done)(turn, session=session, user_message=user_message):
+                yield out
+        finally:
+            await sync_to_async(self._stream_close)(turn, session=session, user_message=user_message)
+
+    def _stream_open(self, *, session, user_message: str, cache: Optional[bool]) -> "_StreamTurn":
+        """流式前置步骤：拼装提示词、选路、查缓存、限流与预授权；命中缓存或余额不足时 turn.early 即全部事件。"""
+        prompt = session_memory.build_prompt(tenant_id=self.tenant_id, session=session, user_message=user_message)
+        r = self._select(prompt)
+        provider_key, model_name = r.provider, r.model
+        cache_key, ttl = self._cache_slot(session=session, cache=cache, provider_key=provider_key, model_name=model_name,
+                                          user_message=prompt)
+        turn = _StreamTurn(prompt=prompt, route=r, provider_key=provider_key, model_name=model_name,
+                           cache_key=cache_key, ttl=ttl)
+        if cache_key:
+            hit = response_cache.get(cache_key)
+            if hit is not None:
+                out = self._serve_cached(hit, provider_key=provider_key)
+                turn.early = [{"type": "delta", "content": out.pop("content", "")}, {"type": "done", **out}]
+                return turn
+
+        if not rate_limiter.is_allowed(self.tenant_id, cost=rate_limiter.cost_for(_estimate_tokens(prompt)),
+                                       priority=self.priority):
+            raise RuntimeError("rate limited")
+
+        # 流式输出无法在中途切换供应商：只做熔断跳过，不对冲
+        turn.provider_key, turn.model_name = llm_router.plan(provider_key, model_name)[0]
+        turn.adapter = self._pick_adapter(turn.provider_key, turn.model_name)
+        turn.trace_id = uuid.uuid4().hex
+        auth = begin_authorize(tenant_id=self.tenant_id, estimate_tokens=max(32, len(prompt) // 2), run_id=turn.trace_id)
+        if not auth.allowed:
+            turn.early = [{"type": "error", "message": f"余额不足：{auth.reason}", "spent": 0}]
+            return turn
+        turn.t0 = time.perf_counter()
+        return turn
+
+    def _stream_done(self, turn: "_StreamTurn", *, session, user_message: str) -> list:
+        """流正常结束：冲刷脱敏尾部、审计全文、写缓存与会话记忆，返回剩余事件（尾部增量 + done）。"""
+        events = []
+        tail = turn.redactor.flush()
+        if tail:
+            events.append({"type": "delta", "content": tail})
+        content = turn.redactor.text
+        final = turn.final
+        issues = [i.__dict__ for i in validate_med_claims(content)]
+        done: Dict[str, Any] = {
+            "trace_id": turn.trace_id,
+            "spent": int(final.get("tokens_in", 0) + final.get("tokens_out", 0)),
+            "provider": turn.provider_key,
+            "model": turn.model_name,
+            "latency_ms": int((time.perf_counter() - turn.t0) * 1000),
+            "cached": False,
+            "issues": issues,
+        }
+        if issues:
+            done["disclaimer"] = "以上内容仅供参考，非医疗建议，请咨询专业医生。"
+        if turn.cache_key:
+            response_cache.put(turn.cache_key, {"content": content, "spent": done["spent"], "provider": turn.provider_key,
+                                                "model": turn.model_name}, turn.ttl)
+        self._remember(session, user_message, content, int(final.get("tokens_in", 0)), int(final.get("tokens_out", 0)))
+        events.append({"type": "done", **done})
+        return events
+
+    def _stream_close(self, turn: "_StreamTurn", *, session, user_message: str) -> None:
+        """流结束（含中断/异常）：按 usage 结算，缺失时按已生成内容估算；写运行日志。"""
+        final = turn.final
+        if final:
+            used = int(final.get("tokens_in", 0) + final.get("tokens_out", 0))
+        else:  # 中断或异常：已生成部分仍按估算结算
+            used = _estimate_tokens(turn.prompt) + _estimate_tokens("".join(turn.raw_parts)) if turn.raw_parts else 0
+        try:
+            finalize_or_rollback(
+                tenant_id=self.tenant_id,
+                run_id=turn.trace_id,
+                actual_tokens=used,
+                success=used > 0,
+                reason=f"llm_{turn.provider_key}",
+            )
+        except Exception:
+            pass
+        self._log_run(trace_id=turn.trace_id, session=session, provider_key=turn.provider_key,
+                      model_name=turn.model_name, t0=turn.t0, tier=turn.route.tier,
+                      tokens_in=int(final.get("tokens_in", 0)), tokens_out=int(final.get("tokens_out", 0)),
+                      error="" if final else "stream interrupted", message=user_message,
+                      content=turn.redactor.text)
+
+
+class _StreamTurn:
+    """一次流式对话的状态（同步/异步两条流共用）；feed() 只做内存中的增量脱敏，不触发 IO。"""
+
+    def __init__(self, *, prompt: str, route, provider_key: str, model_name: Optional[str], cache_key, ttl) -> None:
+        self.prompt = prompt
+        self.route = route
+        self.provider_key = provider_key
+        self.model_name = model_name
+        self.cache_key = cache_key
+        self.ttl = ttl
+        self.early: Optional[list] = None  # 无需调用供应商时直接下发的事件
+        self.adapter = None
+        self.trace_id = ""
+        self.t0 = 0.0
+        self.redactor = StreamRedactor()
+        self.raw_parts: list = []
+        self.final: Dict[str, Any] = {}
+
+    def feed(self, ev: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """处理适配器的一个流事件；返回可下发的脱敏增量事件（暂存中则为 None）。"""
+        if ev.get("done"):
+            self.final = ev
+            return None
+        self.raw_parts.append(ev["delta"])
+        safe = self.redactor.feed(ev["delta"])
+        return {"type": "delta", "content": safe} if safe else None
@@ -0,0 +1,161 @@
+# file: core/ai/prompt_data.py
+# purpose: 提示词数据编码：把查询结果/指标等结构化数据渲染为紧凑文本，替代 str(rows) 的 Python repr
+#          （重复键名、Decimal('…')、datetime.datetime(…) 会让 token 膨胀数倍）。
+#          行集 → 表头 + 竖线分隔行；数值按位数取整；全空列删除、各行相同的列提到表前；
+#          超出 token 预算时先减少行数（不少于 min_rows），再删除最宽的非首列（文本列先于数值列），最后截断；
+#          表尾注明总行数与省略的列
+# 配置：settings.AI_PROMPT_DATA = {"budget_tokens": 800, "max_rows": 20, "min_rows": 5, "digits": 2, "max_cell_chars": 40}
+# 基准：python scripts/dev/bench_prompt_data.py
+from __future__ import annotations
+import json
+import math
+import re
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from django.conf import settings
+
+from core.ai.llm.providers.base import _estimate_tokens
+
+_DEFAULTS: Dict[str, Any] = {"budget_tokens": 800, "max_rows": 20, "min_rows": 5, "digits": 2, "max_cell_chars": 40}
+_WS = re.compile(r"\s+")
+
+
+def _conf() -> Dict[str, Any]:
+    return {**_DEFAULTS, **(getattr(settings, "AI_PROMPT_DATA", None) or {})}
+
+
+def _num(x: float, digits: int) -> str:
+    """≥1000 取整；小于 1（比率类）多保留一位；其余保留 digits 位小数。均去掉末尾 0。NaN 视为空值，无穷记为 ∞。"""
+    if math.isnan(x):
+        return ""
+    if math.isinf(x):
+        return "∞" if x > 0 else "-∞"
+    if abs(x) >= 1000:
+        return str(int(round(x)))
+    s = f"{x:.{digits + 1 if abs(x) < 1 else digits}f}".rstrip("0").rstrip(".")
+    return "0" if s in ("", "-0") else s
+
+
+def fmt_value(v: Any, *, digits: Optional[int] = None, max_chars: Optional[int] = None) -> str:
+    """单个值的紧凑表示。"""
+    c = _conf()
+    digits = int(c["digits"] if digits is None else digits)
+    max_chars = int(c["max_cell_chars"] if max_chars is None else max_chars)
+    if v is None:
+        return ""
+    if isinstance(v, bool):
+        return "是" if v else "否"
+    if isinstance(v, int):
+        return str(v)
+    if isinstance(v, (float, Decimal)):
+        return _num(float(v), digits)
+    if isinstance(v, datetime):
+        return v.date().isoformat() if v.time() == time(0) else v.strftime("%Y-%m-%d %H:%M")
+    if isinstance(v, date):
+        return v.isoformat()
+    if isinstance(v, (list, tuple, set)):
+        s = ",".join(fmt_value(x, digits=digits, max_chars=max_chars) for x in v)
+        return _clip("[" + s + "]", max_chars * 4)
+    if isinstance(v, dict):
+        s = json.dumps(v, ensure_ascii=False, separators=(",", ":"), default=str)
+        return _clip(s, max_chars * 4)
+    return _clip(_WS.sub(" ", str(v)).strip().replace("|", "/"), max_chars)
+
+
+def _clip(s: str, n: int) -> str:
+    return s if len(s) <= n else s[: max(1, n - 1)] + "…"
+
+
+def _columns(rows: Sequence[Dict[str, Any]]) -> List[str]:
+    seen: Dict[str, None] = {}
+    for r in rows:
+        for k in r:
+            seen.setdefault(str(k), None)
+    return list(seen)
+
+
+def _render(cols: List[str], cells: List[List[str]], keep: List[int], n: int, const: List[Tuple[str, str]],
+            total: int, dropped: List[str]) -> str:
+    lines = []
+    if const:
+        lines.append("共同值: " + "; ".join(f"{k}={v}" for k, v in const))
+    lines.append("|".join(cols[j] for j in keep))
+    lines.extend("|".join(row[j] for j in keep) for row in cells[:n])
+    if n < total or dropped:
+        note = f"（共 {total} 行，展示 {n} 行"
+        if dropped:
+            note += "；省略列: " + ",".join(dropped)
+        lines.append(note + "）")
+    return "\n".join(lines)
+
+
+def encode_rows(rows: Iterable[Any], *, budget_tokens: Optional[int] = None, max_rows: Optional[int] = None,
+                columns: Optional[Sequence[str]] = None) -> str:
+    """行集（dict 列表）→ 表头 + 竖线分隔的行，控制在 budget_tokens 以内。"""
+    c = _conf()
+    budget = int(budget_tokens or c["budget_tokens"])
+    rows = [r if isinstance(r, dict) else {"value": r} for r in rows]
+    total = len(rows)
+    if not rows:
+        return "（无数据）"
+    cols = list(columns) if columns else _columns(rows)
+    shown = rows[: int(max_rows or c["max_rows"])]
+    cells = [[fmt_value(r.get(k)) for k in cols] for r in shown]
+    numeric = {j for j, k in enumerate(cols)
+               if all(isinstance(r.get(k), (int, float, Decimal)) and not isinstance(r.get(k), bool)
+                      for r in shown if r.get(k) is not None)}
+
+    keep: List[int] = []
+    const: List[Tuple[str, str]] = []
+    for j, k in enumerate(cols):
+        vals = {row[j] for row in cells}
+        if vals == {""}:
+            continue  # 全空列
+        if len(cells) > 1 and len(vals) == 1:
+            const.append((k, cells[0][j]))
+        else:
+            keep.append(j)
+    if not keep:  # 只有一行或全部为常量列：仍按表格展示
+        keep, const = [j for j, k in enumerate(cols) if any(row[j] for row in cells)], []
+
+    n, dropped = len(cells), []
+    min_rows = int(c["min_rows"])
+    while True:
+        text = _render(cols, cells, keep, n, const, total, dropped)
+        if _estimate_tokens(text) <= budget:
+            return text
+        if n > min_rows:
+            n = max(min_rows, n * 2 // 3)
+        elif len(keep) > 1:
+            widest = max(keep[1:], key=lambda j: (j not in numeric, sum(len(row[j]) for row in cells[:n])))
+            keep.remove(widest)
+            dropped.append(cols[widest])
+        else:
+            return _clip(text, int(budget * 2.2))
+
+
+def encode(data: Any, *, budget_tokens: Optional[int] = None, max_rows: Optional[int] = None) -> str:
+    """通用入口：dict 的标量字段渲染为 k=v，其中的行集字段各自渲染为表格（平分剩余预算）；行集直接渲染为表格。"""
+    budget = int(budget_tokens or _conf()["budget_tokens"])
+    if isinstance(data, (list, tuple)):
+        if data and all(isinstance(x, dict) for x in data):
+            return encode_rows(data, budget_tokens=budget, max_rows=max_rows)
+        return fmt_value(data)
+    if not isinstance(data, dict):
+        return fmt_value(data)
+    scalars: List[str] = []
+    tables: List[Tuple[str, Sequence[Dict[str, Any]]]] = []
+    for k, v in data.items():
+        if isinstance(v, (list, tuple)) and v and all(isinstance(x, dict) for x in v):
+            tables.append((str(k), v))
+        elif isinstance(v, dict) and v and not any(isinstance(x, (dict, list, tuple)) for x in v.values()):
+            scalars.extend(f"{k}.{k2}={fmt_value(v2)}" for k2, v2 in v.items())
+        else:
+            scalars.append(f"{k}={fmt_value(v)}")
+    parts = ["; ".join(scalars)] if scalars else []
+    if tables:
+        rest = budget - _estimate_tokens(parts[0] if parts else "")
+        per = max(64, rest // len(tables))
+        parts.extend(f"[{k}]\n" + encode_rows(v, budget_tokens=per, max_rows=max_rows) for k, v in tables)
+    return "\n".join(parts)
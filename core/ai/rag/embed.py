@@ -6,10 +6,12 @@ import os
 import math
 import hashlib
 
-try:  # 可选：网络调用
+try:  # 可选：网络调用（经共享连接池）
     import requests  # type: ignore
+    from core.ai.llm import http as llm_http
 except Exception:  # pragma: no cover
     requests = None  # type: ignore
+    llm_http = None  # type: ignore
 
 
 class BaseEmbedder:
@@ -77,7 +79,7 @@ class GptEmbedder(BaseEmbedder):
         url = f"{self.base_url}/v1/embeddings"
         headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
         payload = {"model": self.default_model, "input": texts}
-        r = requests.post(url, headers=headers, json=payload, timeout=self.timeout)
+        r = llm_http.post(self.key, url, headers=headers, json=payload, timeout=self.timeout)
         if r.status_code >= 400:
             # 出错回退
             return LocalHashEmbedder().batch_embed(texts)
@@ -0,0 +1,81 @@
+# file: core/ai/response_cache.py
+# purpose: LLM 精确提示词响应缓存：键 = 租户 + 供应商 + 模型 + 提示词哈希；进程内有界 LRU 在前，Django cache 在后；
+#          按 agent 配置 TTL（未配置的 agent 不缓存，即默认关闭）
+from __future__ import annotations
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+
+# settings.AI_RESPONSE_CACHE 示例：
+# {"enabled": True, "ttl": {"bi": 600, "ops": 1800, "rag": 900}, "default_ttl": 0, "max_entries": 512, "bill_fraction": 0.0}
+_DEFAULTS: Dict[str, Any] = {"enabled": False, "ttl": {}, "default_ttl": 0, "max_entries": 512, "bill_fraction": 0.0}
+
+_lock = threading.Lock()
+_lru: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+
+def _conf() -> Dict[str, Any]:
+    return {**_DEFAULTS, **(getattr(settings, "AI_RESPONSE_CACHE", None) or {})}
+
+
+def ttl_for(agent: str) -> int:
+    """agent 的缓存秒数；总开关关闭或未配置时为 0。"""
+    c = _conf()
+    if not c["enabled"]:
+        return 0
+    return max(0, int((c["ttl"] or {}).get(agent, c["default_ttl"]) or 0))
+
+
+def bill_fraction() -> float:
+    """命中缓存时按原花费的多少比例计费（0 表示不计费）。"""
+    return min(1.0, max(0.0, float(_conf()["bill_fraction"] or 0.0)))
+
+
+def make_key(*, tenant_id: str, provider: str, model: Optional[str], prompt: str) -> str:
+    h = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return f"ai:resp:{tenant_id}:{provider}:{model or ''}:{h}"
+
+
+def get(key: str) -> Optional[Dict[str, Any]]:
+    """先查进程内 LRU（过期即丢弃），未命中再查 Django cache 并回填 LRU。"""
+    now = time.monotonic()
+    with _lock:
+        hit = _lru.get(key)
+        if hit is not None:
+            if hit[0] > now:
+                _lru.move_to_end(key)
+                return hit[1]
+            del _lru[key]
+    val = cache.get(key)
+    if val is None:
+        return None
+    _remember(key, val.get("value"), float(val.get("expires_at", 0)) - time.time())
+    return val.get("value")
+
+
+def put(key: str, value: Dict[str, Any], ttl: int) -> None:
+    if ttl <= 0:
+        return
+    cache.set(key, {"value": value, "expires_at": time.time() + ttl}, timeout=ttl)
+    _remember(key, value, ttl)
+
+
+def _remember(key: str, value: Optional[Dict[str, Any]], ttl: float) -> None:
+    if value is None or ttl <= 0:
+        return
+    cap = max(1, int(_conf()["max_entries"]))
+    with _lock:
+        _lru[key] = (time.monotonic() + ttl, value)
+        _lru.move_to_end(key)
+        while len(_lru) > cap:
+            _lru.popitem(last=False)
+
+
+def clear_local() -> None:
+    """清空进程内 LRU（测试/配置变更后使用）。"""
+    with _lock:
+        _lru.clear()
@@ -0,0 +1,157 @@
+# file: core/ai/run_log.py
+# purpose: AiRun / AiCallLog 写后落库（write-behind）：编排器热路径只把运行与调用记录放入内存队列，
+#          后台线程攒够 batch 条或距上次落库超过 interval_ms 时批量插入；进程退出（atexit）时刷盘；
+#          队列满时丢弃并计数（ai_run_log_dropped_total），不阻塞调用
+# 配置：settings.AI_RUN_LOG = {"enabled": True, "batch": 200, "interval_ms": 1000, "max_queue": 10000, "worker": True}
+from __future__ import annotations
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from core.models.ai_logging import AiCallLog, AiRun
+from core.observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+_DEFAULTS: Dict[str, Any] = {"enabled": True, "batch": 200, "interval_ms": 1000, "max_queue": 10000, "worker": True}
+_TEXT_MAX = 1000  # inputs/outputs 中保留的文本长度
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_queue: Optional["queue.Queue[Dict[str, Any]]"] = None
+_worker: Optional[threading.Thread] = None
+
+
+def _conf() -> Dict[str, Any]:
+    return {**_DEFAULTS, **(getattr(settings, "AI_RUN_LOG", None) or {})}
+
+
+def _q() -> "queue.Queue[Dict[str, Any]]":
+    global _queue
+    if _queue is None:
+        with _lock:
+            if _queue is None:
+                _queue = queue.Queue(maxsize=max(1, int(_conf()["max_queue"])))
+    return _queue
+
+
+def enqueue(*, trace_id: str, tenant_id: str, agent: str, session_id: Optional[int] = None, provider: str = "",
+            model: Optional[str] = None, tokens_in: int = 0, tokens_out: int = 0, latency_ms: int = 0,
+            error: str = "", message: str = "", content: str = "", extra: Optional[Dict[str, Any]] = None) -> bool:
+    """热路径入口（无 I/O）：登记一次运行及其供应商调用；队列满时丢弃并返回 False。"""
+    if not _conf()["enabled"]:
+        return False
+    rec = {
+        "run": {"trace_id": trace_id, "tenant_id": tenant_id, "agent": agent, "session_id": session_id,
+                "inputs": {"message": (message or "")[:_TEXT_MAX]},
+                "outputs": {"content": (content or "")[:_TEXT_MAX], "ok": not error, **(extra or {})},
+                "latency_ms": int(latency_ms)},
+        "call": {"provider": provider or "", "model": model or "", "tokens_in": int(tokens_in),
+                 "tokens_out": int(tokens_out), "latency_ms": int(latency_ms), "error": (error or "")[:255]},
+    }
+    try:
+        _q().put_nowait(rec)
+    except queue.Full:
+        REGISTRY.counter_inc("ai_run_log_dropped_total", {"reason": "queue_full"})
+        return False
+    if _conf()["worker"]:
+        _ensure_worker()
+    return True
+
+
+def _insert(records: List[Dict[str, Any]]) -> None:
+    with transaction.atomic():
+        runs = AiRun.objects.bulk_create([AiRun(**r["run"]) for r in records])
+        ids = {run.trace_id: run.id for run in runs}
+        if any(v is None for v in ids.values()):  # MySQL 等后端 bulk_create 不回填主键：按 trace_id（唯一）回查
+            ids = dict(AiRun.objects.filter(trace_id__in=list(ids)).values_list("trace_id", "id"))
+        AiCallLog.objects.bulk_create([AiCallLog(run_id=ids[r["run"]["trace_id"]], **r["call"]) for r in records])
+
+
+def _write(records: List[Dict[str, Any]]) -> int:
+    """批量插入；整批失败（如会话已删除、trace_id 重复）时逐条重试，仍失败的丢弃计数。"""
+    if not records:
+        return 0
+    try:
+        _insert(records)
+        return len(records)
+    except Exception:
+        logger.warning("run log batch insert failed, retrying one by one", exc_info=True)
+    ok = 0
+    for r in records:
+        try:
+            _insert([r])
+            ok += 1
+        except Exception:
+            REGISTRY.counter_inc("ai_run_log_dropped_total", {"reason": "insert_failed"})
+    return ok
+
+
+def flush(max_items: Optional[int] = None) -> int:
+    """把队列中的记录按 batch 分批落库；返回写入的运行条数。"""
+    batch = max(1, int(_conf()["batch"]))
+    written = taken = 0
+    with _flush_lock:
+        while max_items is None or taken < max_items:
+            buf: List[Dict[str, Any]] = []
+            while len(buf) < batch and (max_items is None or taken < max_items):
+                try:
+                    buf.append(_q().get_nowait())
+                except queue.Empty:
+                    break
+                taken += 1
+            if not buf:
+                break
+            written += _write(buf)
+    return written
+
+
+def _run() -> None:
+    """后台刷盘：满 batch 条立即落库，否则最多等待 interval_ms。"""
+    while True:
+        c = _conf()
+        interval = max(0.01, float(c["interval_ms"]) / 1000.0)
+        batch = max(1, int(c["batch"]))
+        deadline = time.monotonic() + interval
+        while _q().qsize() < batch and time.monotonic() < deadline:
+            time.sleep(min(0.05, interval))
+        close_old_connections()
+        try:
+            flush(max_items=batch)
+        except Exception:
+            logger.warning("run log flush failed", exc_info=True)
+        finally:
+            close_old_connections()
+
+
+def _ensure_worker() -> None:
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="ai-run-log", daemon=True)
+            _worker.start()
+
+
+def shutdown() -> None:
+    """进程退出时刷盘。"""
+    try:
+        flush()
+    except Exception:  # pragma: no cover - 退出阶段数据库可能已不可用
+        logger.warning("run log shutdown flush failed", exc_info=True)
+
+
+def clear_local() -> None:
+    """丢弃内存队列（测试用；不会写库）；下次入队按当前 max_queue 重建。"""
+    global _queue
+    with _lock:
+        _queue = None
+
+
+atexit.register(shutdown)
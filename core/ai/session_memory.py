@@ -0,0 +1,140 @@
+# file: core/ai/session_memory.py
+# purpose: 会话记忆：上下文 = 滚动摘要 + 最近若干轮原文；每轮结束一次 bulk_create 落库 user/assistant 两条 AiMessage，
+#          并增量更新缓存中的上下文（命中时每轮 0 次查询，未命中时 2 次）；未摘要部分超出 token 预算或轮数上限时
+#          才把较早的轮次并入摘要（基于旧摘要增量重算），摘要写回 AiChatSession.summary/summary_upto
+# 配置：settings.AI_SESSION_MEMORY = {"enabled": True, "max_turns": 8, "keep_turns": 4, "budget_tokens": 1500,
+#                                     "summary_tokens": 300, "ttl_s": 3600}
+from __future__ import annotations
+import logging
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.ai.llm.providers.base import _estimate_tokens
+from core.models.ai_logging import AiChatSession, AiMessage
+
+logger = logging.getLogger(__name__)
+
+_DEFAULTS: Dict[str, Any] = {"enabled": True, "max_turns": 8, "keep_turns": 4, "budget_tokens": 1500,
+                             "summary_tokens": 300, "ttl_s": 3600}
+_ROLES = {"user": "用户", "assistant": "助手"}
+_SUMMARY_PROMPT = (
+    "请把以下对话压缩为不超过 {n} 字的中文摘要，保留用户的目标、关键事实、数字与未决问题，不要添加新信息。\n"
+    "{old}对话：\n{turns}\n摘要："
+)
+
+
+def _conf() -> Dict[str, Any]:
+    return {**_DEFAULTS, **(getattr(settings, "AI_SESSION_MEMORY", None) or {})}
+
+
+def session_id(session: Any) -> Optional[int]:
+    """session 可为 AiChatSession 实例或其主键；无法识别时返回 None（不启用记忆）。"""
+    if session is None:
+        return None
+    if isinstance(session, AiChatSession):
+        return session.id
+    try:
+        return int(session)
+    except (TypeError, ValueError):
+        return None
+
+
+def _key(tenant_id: str, sid: int) -> str:
+    return f"ai:sess:ctx:{tenant_id}:{sid}"
+
+
+def _load(tenant_id: str, sid: int) -> Optional[Dict[str, Any]]:
+    """读取会话上下文：优先缓存；未命中时读会话摘要与其后的未摘要消息（2 次查询）并回填缓存。"""
+    ctx = cache.get(_key(tenant_id, sid))
+    if ctx is not None:
+        return ctx
+    row = AiChatSession.objects.filter(id=sid, tenant_id=tenant_id).values("summary", "summary_upto").first()
+    if row is None:
+        return None
+    c = _conf()
+    limit = 2 * max(int(c["max_turns"]), 1)
+    msgs = list(AiMessage.objects.filter(session_id=sid, id__gt=row["summary_upto"], role__in=list(_ROLES))
+                .order_by("-id").values_list("id", "role", "content")[:limit])
+    ctx = {"summary": row["summary"], "upto": row["summary_upto"],
+           "turns": [[i, r, t, _estimate_tokens(t)] for i, r, t in reversed(msgs)]}
+    cache.set(_key(tenant_id, sid), ctx, int(c["ttl_s"]))
+    return ctx
+
+
+def _render(turns: List[List[Any]]) -> str:
+    return "\n".join(f"{_ROLES.get(r, r)}：{t}" for _, r, t, _ in turns)
+
+
+def build_prompt(*, tenant_id: str, session: Any, user_message: str) -> str:
+    """组装带上下文的提示词；无会话、会话不存在或关闭记忆时原样返回 user_message。"""
+    sid = session_id(session)
+    if sid is None or not _conf()["enabled"]:
+        return user_message
+    ctx = _load(tenant_id, sid)
+    if not ctx or not (ctx["summary"] or ctx["turns"]):
+        return user_message
+    parts = []
+    if ctx["summary"]:
+        parts.append(f"【对话摘要】\n{ctx['summary']}")
+    if ctx["turns"]:
+        parts.append(f"【最近对话】\n{_render(ctx['turns'])}")
+    parts.append(f"【当前问题】\n{user_message}")
+    return "\n\n".join(parts)
+
+
+def _summarize(tenant_id: str, old: str, turns: List[List[Any]], max_tokens: int) -> str:
+    """基于旧摘要 + 被挤出的轮次增量生成新摘要；LLM 失败时退化为截断拼接。"""
+    n = max(50, int(max_tokens * 2.2))
+    prompt = _SUMMARY_PROMPT.format(n=n, old=f"已有摘要：\n{old}\n" if old else "", turns=_render(turns))
+    try:
+        from core.ai.orchestrator import Orchestrator
+        text = (Orchestrator(tenant_id=tenant_id, agent="session_summary")
+                .chat_once(session=None, user_message=prompt).get("content") or "").strip()
+    except Exception:
+        logger.warning("session summary failed", exc_info=True)
+        text = ""
+    if not text:
+        text = "\n".join(filter(None, [old, _render(turns)]))
+    return text[-n:]
+
+
+def record_turn(*, tenant_id: str, session: Any, user_message: str, reply: str,
+                tokens_in: int = 0, tokens_out: int = 0) -> None:
+    """一轮结束：bulk_create 两条消息 → 追加到缓存上下文 → 超出预算/轮数时把较早轮次并入摘要。"""
+    sid = session_id(session)
+    if sid is None or not _conf()["enabled"]:
+        return
+    ctx = _load(tenant_id, sid)
+    if ctx is None:
+        return
+    c = _conf()
+    msgs = AiMessage.objects.bulk_create([
+        AiMessage(session_id=sid, role="user", content=user_message, tokens_in=int(tokens_in)),
+        AiMessage(session_id=sid, role="assistant", content=reply, tokens_out=int(tokens_out)),
+    ])
+    if any(m.id is None for m in msgs):  # MySQL 等后端 bulk_create 不回填主键：同一会话的轮次串行写入，取最新两条
+        for m, mid in zip(msgs, sorted(AiMessage.objects.filter(session_id=sid).order_by("-id")
+                                       .values_list("id", flat=True)[:len(msgs)])):
+            m.id = mid
+    ctx["turns"].extend([m.id, m.role, m.content, _estimate_tokens(m.content)] for m in msgs)
+    fields: Dict[str, Any] = {"updated_at": timezone.now()}
+    used = _estimate_tokens(ctx["summary"]) + sum(t[3] for t in ctx["turns"])
+    if used > int(c["budget_tokens"]) or len(ctx["turns"]) > 2 * int(c["max_turns"]):
+        keep = 2 * max(0, int(c["keep_turns"]))
+        cut = max(0, len(ctx["turns"]) - keep)
+        folded, ctx["turns"] = ctx["turns"][:cut], ctx["turns"][cut:]
+        if folded:
+            ctx["summary"] = _summarize(tenant_id, ctx["summary"], folded, int(c["summary_tokens"]))
+            ctx["upto"] = folded[-1][0]
+            fields.update(summary=ctx["summary"], summary_upto=ctx["upto"])
+    AiChatSession.objects.filter(id=sid).update(**fields)
+    cache.set(_key(tenant_id, sid), ctx, int(c["ttl_s"]))
+
+
+def forget(*, tenant_id: str, session: Any) -> None:
+    """丢弃缓存的上下文（会话被编辑/删除消息后调用）。"""
+    sid = session_id(session)
+    if sid is not None:
+        cache.delete(_key(tenant_id, sid))
@@ -0,0 +1,12 @@
+# file: core/ai/strategy/common.py
+# purpose: 策略模块共用的小工具（租户 → 企业主键映射等）
+from __future__ import annotations
+from typing import Optional
+
+
+def enterprise_id(tenant_id: str) -> Optional[int]:
+    """销售/采购/库存表按企业隔离：tenant_id 即企业主键（字符串形式）；无法解析时返回 None。"""
+    try:
+        return int(tenant_id)
+    except (TypeError, ValueError):
+        return None
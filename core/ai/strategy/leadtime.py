@@ -0,0 +1,166 @@
+# file: core/ai/strategy/leadtime.py
+# purpose: 供应商×SKU 提前期分布/下单节奏/经济订货量（EOQ）：由采购记录与库存快照批量聚合计算，
+#          写入缓存表 AiSupplierLeadTime（采购同步后刷新），供补货策略按 SKU 取提前期均值与波动
+from __future__ import annotations
+from collections import defaultdict
+from datetime import date, timedelta
+from math import sqrt
+from statistics import mean, pstdev
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+from django.conf import settings
+from django.db import connection
+from django.db.models import Min, Sum
+from django.utils import timezone
+
+from core.models import Purchase, InventorySnapshot
+from core.models.ai_supply import AiSupplierLeadTime
+from .common import enterprise_id
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[Any, Any]  # (supplier_id, product_id)
+
+_DEF_WINDOW_DAYS = 365
+_MAX_LEAD_DAYS = 180          # 超过该值的样本视为批号复用/数据异常，丢弃
+_DEF_ORDER_COST = 50.0        # 单次下单固定成本（元），settings.AI_EOQ_ORDER_COST 可覆盖
+_DEF_HOLDING_RATE = 0.2       # 年持有成本率（占单价），settings.AI_EOQ_HOLDING_RATE 可覆盖
+
+
+# -------- 数据读取（批量） --------
+
+def _fetch(ent_id: int, since: date, product_ids: Optional[List[Any]]) -> Tuple[List[tuple], List[tuple], Dict[Tuple[Any, str], date]]:
+    """三次聚合：订单（供应商×SKU×采购日）/ 批号（供应商×SKU×采购日×批号）/ 批号首次入库日期。"""
+    pqs = Purchase.objects.filter(enterprise_id=ent_id, purchase_date__gte=since)
+    if product_ids:
+        pqs = pqs.filter(product_id__in=product_ids)
+    orders = list(pqs.values("supplier_id", "product_id", "purchase_date")
+                  .annotate(q=Sum("quantity"), amt=Sum("total_amount"))
+                  .values_list("supplier_id", "product_id", "purchase_date", "q", "amt"))
+    batches = list(pqs.filter(batch_number__isnull=False).exclude(batch_number="")
+                   .values_list("supplier_id", "product_id", "purchase_date", "batch_number").distinct())
+    iqs = InventorySnapshot.objects.filter(enterprise_id=ent_id, snapshot_date__gte=since, batch_number__isnull=False)
+    if product_ids:
+        iqs = iqs.filter(product_id__in=product_ids)
+    first_seen = {(pid, bn): d for pid, bn, d in
+                  iqs.values("product_id", "batch_number").annotate(d=Min("snapshot_date")).values_list("product_id", "batch_number", "d")}
+    return orders, batches, first_seen
+
+
+# -------- 计算（纯内存） --------
+
+def _p90(xs: List[float]) -> float:
+    s = sorted(xs)
+    return float(s[min(len(s) - 1, int(round(0.9 * (len(s) - 1))))])
+
+
+def calc_eoq(annual_demand: float, unit_price: float, *, order_cost: float = _DEF_ORDER_COST,
+             holding_rate: float = _DEF_HOLDING_RATE) -> float:
+    """经济订货量 EOQ = sqrt(2·D·S / H)，H = 持有成本率 × 单价。"""
+    h = float(holding_rate or 0.0) * float(unit_price or 0.0)
+    if annual_demand <= 0 or h <= 0:
+        return 0.0
+    return sqrt(2.0 * float(annual_demand) * float(order_cost or 0.0) / h)
+
+
+def compute_stats(orders: Iterable[tuple], batches: Iterable[tuple], first_seen: Dict[Tuple[Any, str], date], *,
+                  window_days: int, order_cost: float = _DEF_ORDER_COST, holding_rate: float = _DEF_HOLDING_RATE,
+                  max_lead_days: int = _MAX_LEAD_DAYS) -> Dict[Key, Dict[str, Any]]:
+    """由订单与批号首次入库日期计算 供应商×SKU 统计。
+    - orders: (supplier_id, product_id, purchase_date, qty, amount)
+    - batches: (supplier_id, product_id, purchase_date, batch_number)
+    """
+    by_key: Dict[Key, List[Tuple[date, float, float]]] = defaultdict(list)
+    for sup, pid, d, q, amt in orders:
+        by_key[(sup, pid)].append((d, float(q or 0.0), float(amt or 0.0)))
+    leads: Dict[Key, List[float]] = defaultdict(list)
+    for sup, pid, d, bn in batches:
+        seen = first_seen.get((pid, bn))
+        if seen is None:
+            continue
+        lt = (seen - d).days
+        if 0 <= lt <= max_lead_days:
+            leads[(sup, pid)].append(float(lt))
+
+    years = max(1, int(window_days)) / 365.0
+    out: Dict[Key, Dict[str, Any]] = {}
+    for key, rows in by_key.items():
+        rows.sort(key=lambda r: r[0])
+        qty = sum(r[1] for r in rows)
+        amt = sum(r[2] for r in rows)
+        gaps = [(rows[i][0] - rows[i - 1][0]).days for i in range(1, len(rows))]
+        lt = leads.get(key, [])
+        price = amt / qty if qty > 0 else 0.0
+        demand = qty / years
+        out[key] = {
+            "orders": len(rows),
+            "samples": len(lt),
+            "lead_time_mean": round(mean(lt), 4) if lt else None,
+            "lead_time_std": round(pstdev(lt), 4) if len(lt) > 1 else (0.0 if lt else None),
+            "lead_time_p90": _p90(lt) if lt else None,
+            "cadence_days": round(mean(gaps), 4) if gaps else None,
+            "order_qty_mean": round(qty / len(rows), 4),
+            "unit_price_avg": round(price, 4),
+            "annual_demand": round(demand, 4),
+            "eoq": round(calc_eoq(demand, price, order_cost=order_cost, holding_rate=holding_rate), 2),
+            "last_purchase_date": rows[-1][0],
+        }
+    return out
+
+
+# -------- 缓存表读写 --------
+
+_FIELDS = ["orders", "samples", "lead_time_mean", "lead_time_std", "lead_time_p90", "cadence_days", "order_qty_mean",
+           "unit_price_avg", "annual_demand", "eoq", "last_purchase_date", "updated_at"]
+
+
+def refresh_lead_times(*, tenant_id: str, product_ids: Optional[List[Any]] = None,
+                       window_days: int = _DEF_WINDOW_DAYS) -> int:
+    """重算并 upsert 到 AiSupplierLeadTime；product_ids 为空则刷新全部 SKU。返回写入行数。"""
+    ent_id = enterprise_id(tenant_id)
+    if ent_id is None:
+        return 0
+    since = date.today() - timedelta(days=max(1, int(window_days)))
+    orders, batches, first_seen = _fetch(ent_id, since, product_ids)
+    stats = compute_stats(
+        orders, batches, first_seen, window_days=window_days,
+        order_cost=float(getattr(settings, "AI_EOQ_ORDER_COST", _DEF_ORDER_COST)),
+        holding_rate=float(getattr(settings, "AI_EOQ_HOLDING_RATE", _DEF_HOLDING_RATE)),
+    )
+    now = timezone.now()
+    objs = [AiSupplierLeadTime(tenant_id=str(tenant_id), supplier_id=sup, product_id=pid, updated_at=now, **st)
+            for (sup, pid), st in stats.items()]
+    _upsert(objs)
+    return len(objs)
+
+
+def _upsert(objs: List[AiSupplierLeadTime]) -> None:
+    """按 (tenant_id, supplier_id, product_id) 唯一键 upsert；MySQL 的 ON DUPLICATE KEY UPDATE 不接受冲突目标列。"""
+    if not objs:
+        return
+    target = {"unique_fields": ["tenant_id", "supplier_id", "product_id"]} \
+        if connection.features.supports_update_conflicts_with_target else {}
+    AiSupplierLeadTime.objects.bulk_create(objs, batch_size=1000, update_conflicts=True, update_fields=_FIELDS, **target)
+
+
+def refresh_after_sync(*, tenant_id: str, product_ids: List[Any]) -> None:
+    """采购同步后的刷新钩子：仅重算本批涉及的 SKU；失败只记录日志，不影响同步结果。"""
+    if not product_ids:
+        return
+    try:
+        refresh_lead_times(tenant_id=tenant_id, product_ids=list(set(product_ids)))
+    except Exception:  # pragma: no cover
+        logger.exception("refresh lead times failed: tenant=%s", tenant_id)
+
+
+def get_lead_times(*, tenant_id: str, product_ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+    """按 SKU 取主供应商（最近采购、次数多者优先）的提前期统计；一次查询。"""
+    if not product_ids:
+        return {}
+    qs = (AiSupplierLeadTime.objects.filter(tenant_id=str(tenant_id), product_id__in=product_ids)
+          .order_by("product_id", "-last_purchase_date", "-orders")
+          .values("product_id", "supplier_id", *_FIELDS[:-1]))
+    out: Dict[Any, Dict[str, Any]] = {}
+    for r in qs:
+        out.setdefault(r["product_id"], r)
+    return out
@@ -1,72 +1,139 @@
 # file: core/ai/strategy/promo.py
 # purpose: 促销策略服务（挑选候选 SKU 与促销力度建议）；基于销量骤降与库存情况的简单启发
+#          近窗/基线窗与当前库存在一次聚合查询内完成，排序与 top_k（含按门店分组 top_k）下推到数据库
+#          rank_by="roi" 时结合历史促销效果（uplift.analyze_uplift，带缓存）按期望 ROI 重排
 from __future__ import annotations
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from datetime import date, timedelta
-from django.db.models import Sum
+from django.db.models import Case, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value, When, Window
+from django.db.models.functions import Cast, Coalesce, RowNumber
+
+from .common import enterprise_id
+from .uplift import analyze_uplift, expected_roi
 
 try:
-    from core.models import Sale, InventorySnapshot, Product  # 假定字段：见下文注释
+    from core.models import Sale, InventorySnapshot, Product  # 实际字段：见 _candidate_queryset 注释
 except Exception:  # pragma: no cover
     Sale = None  # type: ignore
     InventorySnapshot = None  # type: ignore
     Product = None  # type: ignore
 
 
-def suggest_promotions(*, tenant_id: str, top_k: int = 20, lookback: int = 14) -> List[Dict[str, Any]]:
-    """返回促销候选（销量下滑且库存较高）。"""
-    if Sale is None or InventorySnapshot is None:
-        return []
+_MIN_DROP_PCT = 25.0  # 下滑幅度阈值（%），低于该值不作为候选
+_MAX_TOP_K = 100
+_ROI_POOL = 3  # 按 ROI 排序时先按降幅取 top_k×3 作为候选池
+
+
+def _suggest_discount(drop_pct: float) -> float:
+    """按下滑幅度映射建议折扣。"""
+    if drop_pct >= 60:
+        return 0.2
+    if drop_pct >= 40:
+        return 0.15
+    return 0.1
+
+
+def _candidate_queryset(*, ent_id: int, lookback: int, store_id: Any = None, per_store: bool = False,
+                        min_drop_pct: float = _MIN_DROP_PCT):
+    """构造候选查询（单次 Sale 聚合 + 最新库存相关子查询）。
+    字段：Sale(enterprise, store, product, sale_time, total_amount)，InventorySnapshot(enterprise, product, store, snapshot_date, quantity)。
+    - per_store=True：按 (store_id, product_id) 分组，库存取该门店的最近快照
+    - store_id：仅统计单个门店
+    - 库存取最近快照日各批号数量之和；降幅与库存条件在聚合后判定（HAVING），库存子查询每组只算一次
+    """
     end = date.today()
     mid = end - timedelta(days=max(3, lookback // 2))
     start = end - timedelta(days=lookback)
-    # 近半窗口销量
-    recent = (Sale.objects
-              .filter(tenant_id=tenant_id, biz_date__gt=mid, biz_date__lte=end)
-              .values("product_id").annotate(amount=Sum("total_amount")))
-    recent_map = {r["product_id"]: float(r.get("amount") or 0.0) for r in recent}
-    # 前半窗口基线
-    base = (Sale.objects
-            .filter(tenant_id=tenant_id, biz_date__gte=start, biz_date__lte=mid)
-            .values("product_id").annotate(amount=Sum("total_amount")))
-    base_map = {r["product_id"]: float(r.get("amount") or 0.0) for r in base}
-
-    # 库存：取最近快照
-    inv_map: Dict[Any, float] = {}
-    try:
-        qs = (InventorySnapshot.objects
-              .filter(tenant_id=tenant_id)
-              .values("product_id", "snapshot_time", "qty")
-              .order_by("product_id", "-snapshot_time"))
-        seen = set()
-        for r in qs:
-            pid = r["product_id"]
-            if pid in seen:
-                continue
-            seen.add(pid)
-            inv_map[pid] = float(r.get("qty") or 0.0)
-    except Exception:
-        pass
-
-    # 组装候选
-    cand: List[Dict[str, Any]] = []
-    for pid, base_amt in base_map.items():
-        cur = recent_map.get(pid, 0.0)
-        drop = (base_amt - cur)
-        drop_pct = (drop / base_amt * 100.0) if base_amt > 0 else 0.0
-        if drop_pct >= 25.0 and inv_map.get(pid, 0.0) > 0:
-            cand.append({"product_id": pid, "drop_pct": round(drop_pct, 2), "inventory": inv_map.get(pid, 0.0)})
-    # 选 top_k
-    cand.sort(key=lambda x: x["drop_pct"], reverse=True)
-    out = cand[: max(1, min(top_k, 100))]
-
-    # 可选：附上建议折扣（简单按下滑幅度映射）
-    for it in out:
-        pct = it["drop_pct"]
-        if pct >= 60:
-            it["suggest_discount"] = 0.2
-        elif pct >= 40:
-            it["suggest_discount"] = 0.15
-        else:
-            it["suggest_discount"] = 0.1
-    return out
\ No newline at end of file
+
+    dims = ["store_id", "product_id"] if per_store else ["product_id"]
+    qs = Sale.objects.filter(enterprise_id=ent_id, sale_time__date__gte=start, sale_time__date__lte=end)
+    if store_id is not None:
+        qs = qs.filter(store_id=store_id)
+
+    # 最近快照数量（按商品；分门店时按 门店+商品）
+    def snapshots(ref):
+        inv = InventorySnapshot.objects.filter(enterprise_id=ent_id, product_id=ref("product_id"))
+        if per_store:
+            inv = inv.filter(store_id=ref("store_id"))
+        elif store_id is not None:
+            inv = inv.filter(store_id=store_id)
+        return inv
+
+    latest_day = Subquery(snapshots(lambda f: OuterRef(OuterRef(f))).order_by("-snapshot_date").values("snapshot_date")[:1])
+    latest_qty = Subquery(snapshots(OuterRef).filter(snapshot_date=latest_day).values("product_id")
+                          .annotate(q=Sum("quantity")).values("q")[:1])
+
+    zero = Value(0.0, output_field=FloatField())
+    recent = Q(sale_time__date__gt=mid)
+    qs = (qs.values(*dims)
+          .annotate(
+              recent_amount=Coalesce(Cast(Sum("total_amount", filter=recent), FloatField()), zero),
+              base_amount=Coalesce(Cast(Sum("total_amount", filter=~recent), FloatField()), zero),
+              inventory=Coalesce(Cast(latest_qty, FloatField()), zero),
+          )
+          .annotate(drop_pct=Case(
+              When(base_amount__gt=0, then=(F("base_amount") - F("recent_amount")) * 100.0 / F("base_amount")),
+              default=zero,
+              output_field=FloatField(),
+          ))
+          # 与降幅合成一个含聚合的条件：整体落在 HAVING（单独 filter(inventory__gt=0) 会进 WHERE，按销售行逐行求子查询）
+          .annotate(candidate=Case(When(Q(drop_pct__gte=float(min_drop_pct)) & Q(inventory__gt=0), then=Value(1)),
+                                   default=Value(0), output_field=IntegerField()))
+          .filter(candidate=1))
+    return qs
+
+
+def suggest_promotions(*, tenant_id: str, top_k: int = 20, lookback: int = 14, store_id: Optional[Any] = None,
+                       per_store: bool = False, rank_by: str = "drop", uplift_lookback: int = 90) -> List[Dict[str, Any]]:
+    """返回促销候选（销量下滑且库存较高）。
+    - store_id：只看某个门店
+    - per_store：按门店分别给出 top_k（门店内按降幅排名，由数据库窗口函数完成）
+    - rank_by："drop"（按降幅）或 "roi"（按历史促销期望 ROI；无历史促销的排在后面）
+    """
+    ent_id = enterprise_id(tenant_id)
+    if Sale is None or InventorySnapshot is None or ent_id is None:
+        return []
+    k = max(1, min(int(top_k), _MAX_TOP_K))
+    by_roi = rank_by == "roi"
+    pool = k * _ROI_POOL if by_roi else k
+    qs = _candidate_queryset(ent_id=ent_id, lookback=lookback, store_id=store_id, per_store=per_store)
+    if per_store:
+        qs = (qs.annotate(rank=Window(RowNumber(), partition_by=[F("store_id")], order_by=F("drop_pct").desc()))
+              .filter(rank__lte=pool)
+              .order_by("store_id", "rank"))
+    else:
+        qs = qs.order_by("-drop_pct")[:pool]
+
+    out: List[Dict[str, Any]] = []
+    for r in qs:
+        pct = round(float(r.get("drop_pct") or 0.0), 2)
+        item: Dict[str, Any] = {"product_id": r["product_id"], "drop_pct": pct, "inventory": float(r.get("inventory") or 0.0)}
+        if per_store:
+            item["store_id"] = r["store_id"]
+        elif store_id is not None:
+            item["store_id"] = store_id
+        # 可选：附上建议折扣（简单按下滑幅度映射）
+        item["suggest_discount"] = _suggest_discount(pct)
+        out.append(item)
+    if by_roi:
+        out = _rank_by_roi(out, tenant_id=tenant_id, store_id=store_id, k=k, lookback_days=uplift_lookback)
+    return out
+
+
+def _rank_by_roi(items: List[Dict[str, Any]], *, tenant_id: str, store_id: Any, k: int,
+                 lookback_days: int) -> List[Dict[str, Any]]:
+    """附上历史期望 ROI 并重排（分门店时门店内各取 top_k）。"""
+    index = analyze_uplift(tenant_id=tenant_id, lookback_days=lookback_days, store_id=store_id)
+    for it in items:
+        it["expected_roi"] = expected_roi(index, it["product_id"], it.get("store_id"))
+    items.sort(key=lambda it: (str(it.get("store_id", "")), it["expected_roi"] is None,
+                               -(it["expected_roi"] or 0.0), -it["drop_pct"]))
+    out: List[Dict[str, Any]] = []
+    taken: Dict[Any, int] = {}
+    for it in items:
+        sid = it.get("store_id")
+        if taken.get(sid, 0) >= k:
+            continue
+        taken[sid] = taken.get(sid, 0) + 1
+        out.append(it)
+    return out
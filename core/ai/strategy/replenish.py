@@ -1,5 +1,6 @@
 # file: core/ai/strategy/replenish.py
 # purpose: 补货策略服务（安全库存与再订货点）；基于近 N 天销量（qty）估算
+#          有供应商提前期统计（leadtime.get_lead_times）时按 SKU 使用其提前期均值/波动与 EOQ
 from __future__ import annotations
 from typing import Any, Dict, List, Tuple
 from datetime import date, timedelta
@@ -14,6 +15,7 @@ except Exception:  # pragma: no cover
     Product = None  # type: ignore
 
 from core.ai.tools.inventory_tool import calc_safety_stock, calc_reorder_point
+from .leadtime import get_lead_times
 
 
 def _daily_qty_series(tenant_id: str, product_ids: List[Any], days: int) -> Dict[Any, List[float]]:
@@ -57,10 +59,13 @@ def _latest_inventory(tenant_id: str, product_ids: List[Any]) -> Dict[Any, float
 
 
 def suggest_replenishment(*, tenant_id: str, product_ids: List[Any], lookback_days: int = 28, leadtime_days: float = 7.0,
-                          service_level: float = 0.95) -> List[Dict[str, Any]]:
-    """给出补货建议（包含安全库存/再订货点与当前状态）。"""
+                          service_level: float = 0.95, use_supplier_leadtime: bool = True) -> List[Dict[str, Any]]:
+    """给出补货建议（包含安全库存/再订货点与当前状态）。
+    - use_supplier_leadtime：优先使用缓存表中的 SKU 提前期（均值/标准差）与 EOQ；无统计时回落到 leadtime_days
+    """
     series = _daily_qty_series(tenant_id, product_ids, lookback_days)
     inv = _latest_inventory(tenant_id, product_ids)
+    lts = get_lead_times(tenant_id=tenant_id, product_ids=product_ids) if use_supplier_leadtime else {}
 
     res: List[Dict[str, Any]] = []
     for pid in product_ids:
@@ -71,17 +76,26 @@ def suggest_replenishment(*, tenant_id: str, product_ids: List[Any], lookback_da
         else:
             d_mean = 0.0
             d_sigma = 0.0
-        ss = calc_safety_stock(d_sigma, leadtime_days, service_level=service_level)
-        rop = calc_reorder_point(d_mean, leadtime_days, ss)
+        lt = lts.get(pid) or {}
+        lt_mean = float(leadtime_days if lt.get("lead_time_mean") is None else lt["lead_time_mean"])  # 实测 0 天为有效值
+        lt_sigma = float(lt.get("lead_time_std") or 0.0)
+        eoq = float(lt.get("eoq") or 0.0)
+        ss = calc_safety_stock(d_sigma, lt_mean, service_level=service_level, daily_demand_mean=d_mean, leadtime_sigma=lt_sigma)
+        rop = calc_reorder_point(d_mean, lt_mean, ss)
         on_hand = float(inv.get(pid, 0.0))
         need = max(0.0, rop - on_hand)
         res.append({
             "product_id": pid,
             "daily_mean": round(d_mean, 4),
             "daily_sigma": round(d_sigma, 4),
+            "leadtime_days": round(lt_mean, 2),
+            "leadtime_sigma": round(lt_sigma, 2),
+            "supplier_id": lt.get("supplier_id"),
             "safety_stock": round(ss, 2),
             "reorder_point": round(rop, 2),
             "on_hand": round(on_hand, 2),
-            "suggest_qty": round(need, 0),
+            "eoq": round(eoq, 0),
+            # 需要补货时至少订一个 EOQ
+            "suggest_qty": round(max(need, eoq), 0) if need > 0 else 0.0,
         })
     return res
\ No newline at end of file
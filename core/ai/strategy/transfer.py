@@ -0,0 +1,232 @@
+# file: core/ai/strategy/transfer.py
+# purpose: 门店间调拨建议：按 门店×SKU 的当前库存与再订货点计算富余/缺口，先调拨再采购；
+#          需求与库存各一次批量查询，匹配为按 SKU 的贪心（缺口按紧急度、调出方按调拨成本）
+from __future__ import annotations
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from math import sqrt
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+
+try:
+    from core.models import Sale, InventorySnapshot  # 实际字段：Sale(enterprise,store,product,sale_time,quantity)，InventorySnapshot(enterprise,store,product,snapshot_date,batch_number,quantity)
+except Exception:  # pragma: no cover
+    Sale = None  # type: ignore
+    InventorySnapshot = None  # type: ignore
+
+from core.ai.tools.inventory_tool import calc_safety_stock, calc_reorder_point
+from .common import enterprise_id
+
+
+Key = Tuple[Any, Any]  # (store_id, product_id)
+
+
+@dataclass
+class StockPosition:
+    """单个 门店×SKU 的库存位置。"""
+    store_id: Any
+    product_id: Any
+    on_hand: float
+    daily_mean: float
+    reorder_point: float
+    target: float  # 补到的目标水位 = 再订货点 + 一个复核周期的需求
+
+    @property
+    def deficit(self) -> float:
+        return max(0.0, self.target - self.on_hand) if self.on_hand < self.reorder_point else 0.0
+
+    @property
+    def surplus(self) -> float:
+        return max(0.0, self.on_hand - self.target)
+
+    @property
+    def cover_days(self) -> float:
+        return self.on_hand / self.daily_mean if self.daily_mean > 0 else float("inf")
+
+
+# -------- 数据读取（批量） --------
+
+def _demand_stats(tenant_id: str, *, days: int, product_ids: Optional[List[Any]] = None,
+                  store_ids: Optional[List[Any]] = None) -> Dict[Key, Tuple[float, float]]:
+    """一次聚合得到每个 门店×SKU 的日均销量与标准差（无销售日按 0 计）。"""
+    ent_id = enterprise_id(tenant_id)
+    if Sale is None or ent_id is None:
+        return {}
+    end = date.today()
+    start = end - timedelta(days=max(1, int(days)))
+    n = (end - start).days + 1
+    qs = Sale.objects.filter(enterprise_id=ent_id, sale_time__date__gte=start, sale_time__date__lte=end)
+    if product_ids:
+        qs = qs.filter(product_id__in=product_ids)
+    if store_ids:
+        qs = qs.filter(store_id__in=store_ids)
+    s1: Dict[Key, float] = defaultdict(float)
+    s2: Dict[Key, float] = defaultdict(float)
+    daily = (qs.annotate(biz_date=TruncDate("sale_time")).values("store_id", "product_id", "biz_date")
+             .annotate(units=Sum("quantity")).values_list("store_id", "product_id", "units"))
+    for r in daily:
+        q = float(r[2] or 0.0)
+        s1[(r[0], r[1])] += q
+        s2[(r[0], r[1])] += q * q
+    out: Dict[Key, Tuple[float, float]] = {}
+    for k, total in s1.items():
+        m = total / n
+        out[k] = (m, sqrt(max(0.0, s2[k] / n - m * m)))
+    return out
+
+
+def _latest_inventory(tenant_id: str, *, product_ids: Optional[List[Any]] = None, store_ids: Optional[List[Any]] = None,
+                      within_days: int = 7) -> Dict[Key, float]:
+    """取每个 门店×SKU 的最近库存：最近快照日各批号数量之和（仅扫描近 within_days 天快照）。"""
+    ent_id = enterprise_id(tenant_id)
+    if InventorySnapshot is None or ent_id is None:
+        return {}
+    since = date.today() - timedelta(days=max(1, int(within_days)))
+    qs = InventorySnapshot.objects.filter(enterprise_id=ent_id, snapshot_date__gte=since)
+    if product_ids:
+        qs = qs.filter(product_id__in=product_ids)
+    if store_ids:
+        qs = qs.filter(store_id__in=store_ids)
+    out: Dict[Key, float] = {}
+    rows = (qs.values("store_id", "product_id", "snapshot_date").annotate(q=Sum("quantity"))
+            .order_by("store_id", "product_id", "-snapshot_date").values_list("store_id", "product_id", "q"))
+    for sid, pid, q in rows:
+        out.setdefault((sid, pid), float(q or 0.0))
+    return out
+
+
+def build_positions(demand: Dict[Key, Tuple[float, float]], inventory: Dict[Key, float], *, leadtime_days: float = 7.0,
+                    service_level: float = 0.95, review_days: float = 7.0) -> List[StockPosition]:
+    """由需求统计与库存构造库存位置（再订货点沿用 inventory_tool）。"""
+    out: List[StockPosition] = []
+    for key in set(demand) | set(inventory):
+        d_mean, d_sigma = demand.get(key, (0.0, 0.0))
+        ss = calc_safety_stock(d_sigma, leadtime_days, service_level=service_level)
+        rop = calc_reorder_point(d_mean, leadtime_days, ss)
+        out.append(StockPosition(store_id=key[0], product_id=key[1], on_hand=float(inventory.get(key, 0.0)),
+                                 daily_mean=d_mean, reorder_point=rop, target=rop + d_mean * max(0.0, float(review_days))))
+    return out
+
+
+# -------- 匹配（纯内存） --------
+
+def _cost_lookup(costs: Optional[Iterable[dict]]) -> Dict[Tuple[Any, Any], float]:
+    """[{"from":1,"to":2,"cost":3.5}, ...] → {(1,2): 3.5}。"""
+    out: Dict[Tuple[Any, Any], float] = {}
+    for c in costs or []:
+        out[(c["from"], c["to"])] = float(c.get("cost") or 0.0)
+    return out
+
+
+def _neighbors(cost: Dict[Tuple[Any, Any], float]) -> Dict[Any, List[Tuple[float, Any]]]:
+    """每个调入门店的显式调出门店列表（按成本升序），全局只排序一次。"""
+    out: Dict[Any, List[Tuple[float, Any]]] = defaultdict(list)
+    for (src, dst), c in cost.items():
+        out[dst].append((c, src))
+    for lst in out.values():
+        lst.sort(key=lambda x: x[0])
+    return out
+
+
+def _sources(dst: Any, heap: List[Tuple[float, Any]], surplus: Dict[Any, float], explicit: List[Tuple[float, Any]],
+             default_cost: Optional[float], min_qty: float) -> Iterable[Tuple[float, Any]]:
+    """按成本顺序产出调出门店：显式成本 ≤ 默认成本的近邻 → 默认成本门店（按富余从大到小，堆） → 其余显式近邻。"""
+    priced = {src for _, src in explicit}
+    for c, src in explicit:
+        if default_cost is not None and c > default_cost:
+            break
+        if src != dst and surplus.get(src, 0.0) >= min_qty:
+            yield c, src
+    if default_cost is not None:
+        popped: Dict[Any, None] = {}
+        try:
+            while heap:
+                neg, src = heapq.heappop(heap)
+                if src in popped:
+                    continue
+                avail = surplus.get(src, 0.0)
+                if -neg != avail:  # 过期条目（富余已被部分消耗）：按当前值重新入堆（惰性删除）
+                    if avail >= min_qty:
+                        heapq.heappush(heap, (-avail, src))
+                    continue
+                popped[src] = None
+                if src == dst or src in priced or avail < min_qty:
+                    continue
+                yield default_cost, src
+        finally:
+            # 调用方提前结束时也要把弹出的门店按最新富余放回堆
+            for src in popped:
+                if surplus.get(src, 0.0) >= min_qty:
+                    heapq.heappush(heap, (-surplus[src], src))
+        for c, src in explicit:
+            if c > default_cost and src != dst and surplus.get(src, 0.0) >= min_qty:
+                yield c, src
+
+
+def plan_transfers(positions: List[StockPosition], *, costs: Optional[Iterable[dict]] = None,
+                   default_cost: Optional[float] = 1.0, min_qty: float = 1.0,
+                   max_sources: int = 5) -> Dict[str, Any]:
+    """按 SKU 贪心匹配富余与缺口。
+    - 缺口按可覆盖天数升序（越紧急越先满足）
+    - 调出门店按调拨成本升序；同为默认成本时优先富余多的门店；单个缺口最多从 max_sources 家门店调入
+    - 未在 costs 中的门店对使用 default_cost；default_cost=None 表示只允许 costs 中列出的门店对
+    门店近邻全局排序一次，默认成本门店用最大堆取，单 SKU 约 O((D+S)·log S)。
+    """
+    cost = _cost_lookup(costs)
+    nbrs = _neighbors(cost)
+    by_sku: Dict[Any, List[StockPosition]] = defaultdict(list)
+    for p in positions:
+        by_sku[p.product_id].append(p)
+
+    transfers: List[Dict[str, Any]] = []
+    to_purchase: List[Dict[str, Any]] = []
+    for pid, plist in by_sku.items():
+        needs = sorted((p for p in plist if p.deficit > 0), key=lambda p: p.cover_days)
+        if not needs:
+            continue
+        surplus = {p.store_id: p.surplus for p in plist if p.surplus >= min_qty}
+        heap = [(-v, k) for k, v in surplus.items()]
+        heapq.heapify(heap)
+        for dst in needs:
+            remaining = dst.deficit
+            used = 0
+            srcs = _sources(dst.store_id, heap, surplus, nbrs.get(dst.store_id, []), default_cost, min_qty)
+            try:
+                for c, src in srcs:
+                    qty = float(int(min(remaining, surplus[src])))
+                    if qty < min_qty:
+                        continue
+                    transfers.append({"product_id": pid, "from_store": src, "to_store": dst.store_id, "qty": qty,
+                                      "cost": round(c * qty, 4)})
+                    surplus[src] -= qty
+                    remaining -= qty
+                    used += 1
+                    if remaining < min_qty or used >= max(1, int(max_sources)):
+                        break
+            finally:
+                srcs.close()
+            if remaining >= min_qty:
+                to_purchase.append({"product_id": pid, "store_id": dst.store_id, "qty": round(remaining, 0)})
+    return {
+        "transfers": transfers,
+        "to_purchase": to_purchase,
+        "transfer_qty": round(sum(t["qty"] for t in transfers), 2),
+        "transfer_cost": round(sum(t["cost"] for t in transfers), 4),
+    }
+
+
+def suggest_transfers(*, tenant_id: str, product_ids: Optional[List[Any]] = None, store_ids: Optional[List[Any]] = None,
+                      lookback_days: int = 28, leadtime_days: float = 7.0, service_level: float = 0.95,
+                      review_days: float = 7.0, costs: Optional[Iterable[dict]] = None, default_cost: Optional[float] = 1.0,
+                      min_qty: float = 1.0, max_sources: int = 5) -> Dict[str, Any]:
+    """给出门店间调拨建议与调拨后仍需采购的缺口。"""
+    demand = _demand_stats(tenant_id, days=lookback_days, product_ids=product_ids, store_ids=store_ids)
+    inventory = _latest_inventory(tenant_id, product_ids=product_ids, store_ids=store_ids)
+    positions = build_positions(demand, inventory, leadtime_days=leadtime_days, service_level=service_level,
+                                review_days=review_days)
+    plan = plan_transfers(positions, costs=costs, default_cost=default_cost, min_qty=min_qty, max_sources=max_sources)
+    plan["positions"] = len(positions)
+    return plan
@@ -0,0 +1,258 @@
+# file: core/ai/strategy/uplift.py
+# purpose: 历史促销效果分析（uplift）：按 SKU×门店识别历史促销期，计算增量销量、毛利影响与同品类光环/蚕食效应；
+#          一次 Sale 聚合 + 一次 Product 分类读取，其余在内存批量计算；结果写入 Django cache 供促销建议按 ROI 排序
+from __future__ import annotations
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+from django.core.cache import cache
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+try:
+    from core.models import Sale, Product  # 实际字段：Sale(enterprise,store,product,sale_time,quantity,total_amount,list_price,actual_price,discount_amount,total_cost_amount,gross_profit_amount)
+except Exception:  # pragma: no cover
+    Sale = None  # type: ignore
+    Product = None  # type: ignore
+
+from .common import enterprise_id
+
+_DEF_TTL = 6 * 3600            # 缓存 6 小时（历史促销效果变化很慢）
+_DEF_PROMO_SHARE = 0.5         # 当天促销数量占比 ≥ 50% 视为促销日
+_DEF_MIN_DEPTH = 0.05          # 实收低于应收 5% 以上视为促销行
+_DEF_CATEGORY_FIELD = "category_l2"
+
+
+@dataclass
+class PromoPeriod:
+    """一次历史促销期（同一 SKU×门店 连续促销日）。"""
+    product_id: Any
+    store_id: Any
+    start: date
+    end: date
+    days: int
+    units: float
+    incremental_units: float
+    margin_impact: float
+    discount_cost: float
+    halo_units: float             # >0 光环（带动同品类），<0 蚕食
+    halo_margin: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# -------- 数据读取（批量） --------
+
+def _promo_q(min_depth: float) -> Q:
+    """促销行判定：有折扣金额，或实收单价明显低于应收单价。"""
+    return Q(discount_amount__gt=0) | Q(actual_price__lt=F("list_price") * (1.0 - float(min_depth)))
+
+
+def fetch_daily_rows(*, tenant_id: str, start: date, end: date, store_id: Any = None,
+                     min_depth: float = _DEF_MIN_DEPTH) -> List[dict]:
+    """按 (product_id, store_id, 销售日) 一次聚合：总量/促销量/金额/折扣/毛利。"""
+    ent_id = enterprise_id(tenant_id)
+    if Sale is None or ent_id is None:
+        return []
+    profit = Coalesce(
+        F("gross_profit_amount"),
+        ExpressionWrapper(F("total_amount") - Coalesce(F("total_cost_amount"), F("total_amount")),
+                          output_field=DecimalField(max_digits=18, decimal_places=4)),
+    )
+    qs = Sale.objects.filter(enterprise_id=ent_id, sale_time__date__gte=start, sale_time__date__lte=end)
+    if store_id is not None:
+        qs = qs.filter(store_id=store_id)
+    qs = (qs.annotate(biz_date=TruncDate("sale_time"))
+          .values("product_id", "store_id", "biz_date")
+          .annotate(units=Sum("quantity"),
+                    promo_units=Sum("quantity", filter=_promo_q(min_depth)),
+                    amount=Sum("total_amount"),
+                    discount=Sum("discount_amount"),
+                    margin=Sum(profit)))
+    return [
+        {
+            "product_id": r["product_id"],
+            "store_id": r["store_id"],
+            "biz_date": r["biz_date"],
+            "qty": float(r.get("units") or 0.0),
+            "promo_qty": float(r.get("promo_units") or 0.0),
+            "amount": float(r.get("amount") or 0.0),
+            "discount": float(r.get("discount") or 0.0),
+            "margin": float(r.get("margin") or 0.0),
+        }
+        for r in qs
+    ]
+
+
+def fetch_categories(product_ids: Iterable[Any], *, field: str = _DEF_CATEGORY_FIELD) -> Dict[Any, Optional[str]]:
+    """批量读取商品所属品类（用于兄弟 SKU 的光环/蚕食计算）。"""
+    ids = list({p for p in product_ids if p is not None})
+    if Product is None or not ids:
+        return {}
+    return {r["id"]: r.get(field) for r in Product.objects.filter(id__in=ids).values("id", field)}
+
+
+# -------- 计算（纯内存） --------
+
+def _runs(days: List[date], *, max_gap: int = 1) -> List[Tuple[date, date]]:
+    """把有序日期切分为连续区间（允许 max_gap 天空档）。"""
+    out: List[Tuple[date, date]] = []
+    for d in days:
+        if out and (d - out[-1][1]).days <= max_gap + 1:
+            out[-1] = (out[-1][0], d)
+        else:
+            out.append((d, d))
+    return out
+
+
+def compute_uplift(rows: List[dict], categories: Dict[Any, Optional[str]], *, start: date, end: date,
+                   promo_share: float = _DEF_PROMO_SHARE, min_promo_days: int = 1) -> List[PromoPeriod]:
+    """识别历史促销期并计算效果。
+    - 基线：同 SKU×门店 非促销日（含无销售日，按 0 计）的日均销量/毛利
+    - 兄弟 SKU：同门店同品类其他商品；其基线为本 SKU 非促销日的日均合计
+    """
+    all_days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    n_days = len(all_days)
+    series: Dict[Tuple[Any, Any], Dict[date, dict]] = defaultdict(dict)
+    cat_day_qty: Dict[Tuple[Any, Any], Dict[date, float]] = defaultdict(lambda: defaultdict(float))
+    cat_day_margin: Dict[Tuple[Any, Any], Dict[date, float]] = defaultdict(lambda: defaultdict(float))
+    for r in rows:
+        key = (r["product_id"], r["store_id"])
+        series[key][r["biz_date"]] = r
+        cat = categories.get(r["product_id"])
+        if cat:
+            cat_day_qty[(r["store_id"], cat)][r["biz_date"]] += r["qty"]
+            cat_day_margin[(r["store_id"], cat)][r["biz_date"]] += r["margin"]
+
+    periods: List[PromoPeriod] = []
+    for (pid, sid), ser in series.items():
+        promo_days = sorted(d for d, r in ser.items() if r["qty"] > 0 and r["promo_qty"] / r["qty"] >= promo_share)
+        if not promo_days:
+            continue
+        promo_set = set(promo_days)
+        base_n = n_days - len(promo_set)
+        if base_n <= 0:
+            continue  # 全程促销，无基线可比
+        base_qty = sum(r["qty"] for d, r in ser.items() if d not in promo_set) / base_n
+        base_margin = sum(r["margin"] for d, r in ser.items() if d not in promo_set) / base_n
+
+        cat = categories.get(pid)
+        sib_qty = cat_day_qty.get((sid, cat)) if cat else None
+        sib_margin = cat_day_margin.get((sid, cat)) if cat else None
+
+        def _sib(d: date, src: Optional[Dict[date, float]], field: str) -> float:
+            if not src:
+                return 0.0
+            own = ser.get(d)
+            return src.get(d, 0.0) - (own[field] if own else 0.0)
+
+        sib_base_qty = sib_base_margin = 0.0
+        if sib_qty:
+            sib_base_qty = sum(_sib(d, sib_qty, "qty") for d in all_days if d not in promo_set) / base_n
+            sib_base_margin = sum(_sib(d, sib_margin, "margin") for d in all_days if d not in promo_set) / base_n
+
+        for p0, p1 in _runs(promo_days):
+            span = [p0 + timedelta(days=i) for i in range((p1 - p0).days + 1)]
+            if len(span) < min_promo_days:
+                continue
+            units = sum(ser[d]["qty"] for d in span if d in ser)
+            margin = sum(ser[d]["margin"] for d in span if d in ser)
+            discount = sum(ser[d]["discount"] for d in span if d in ser)
+            halo_units = halo_margin = 0.0
+            if sib_qty:
+                halo_units = sum(_sib(d, sib_qty, "qty") for d in span) - sib_base_qty * len(span)
+                halo_margin = sum(_sib(d, sib_margin, "margin") for d in span) - sib_base_margin * len(span)
+            periods.append(PromoPeriod(
+                product_id=pid,
+                store_id=sid,
+                start=p0,
+                end=p1,
+                days=len(span),
+                units=round(units, 4),
+                incremental_units=round(units - base_qty * len(span), 4),
+                margin_impact=round(margin - base_margin * len(span), 4),
+                discount_cost=round(discount, 4),
+                halo_units=round(halo_units, 4),
+                halo_margin=round(halo_margin, 4),
+            ))
+    return periods
+
+
+def summarize(periods: List[PromoPeriod], *, by_store: bool = True) -> Dict[Any, Dict[str, Any]]:
+    """把促销期汇总为每个 SKU×门店（或 SKU）的期望效果与 ROI。
+    ROI = (自身毛利增量 + 兄弟 SKU 毛利增量) / 折扣投入。"""
+    acc: Dict[Any, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for p in periods:
+        key = (p.product_id, p.store_id) if by_store else p.product_id
+        a = acc[key]
+        a["periods"] += 1
+        a["promo_days"] += p.days
+        a["incremental_units"] += p.incremental_units
+        a["margin_impact"] += p.margin_impact
+        a["discount_cost"] += p.discount_cost
+        a["halo_units"] += p.halo_units
+        a["halo_margin"] += p.halo_margin
+    out: Dict[Any, Dict[str, Any]] = {}
+    for key, a in acc.items():
+        net = a["margin_impact"] + a["halo_margin"]
+        days = a["promo_days"] or 1.0
+        out[key] = {
+            "periods": int(a["periods"]),
+            "promo_days": int(a["promo_days"]),
+            "incremental_units_per_day": round(a["incremental_units"] / days, 4),
+            "margin_impact": round(a["margin_impact"], 2),
+            "halo_units": round(a["halo_units"], 4),
+            "halo_margin": round(a["halo_margin"], 2),
+            "discount_cost": round(a["discount_cost"], 2),
+            "expected_roi": round(net / a["discount_cost"], 4) if a["discount_cost"] > 0 else None,
+        }
+    return out
+
+
+# -------- 对外入口（带缓存） --------
+
+def _cache_key(tenant_id: str, params: Dict[str, Any]) -> str:
+    payload = json.dumps({"t": tenant_id, **params}, sort_keys=True, default=str)
+    return "strategy:uplift:" + hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+def analyze_uplift(*, tenant_id: str, lookback_days: int = 90, store_id: Any = None,
+                   category_field: str = _DEF_CATEGORY_FIELD, min_depth: float = _DEF_MIN_DEPTH,
+                   promo_share: float = _DEF_PROMO_SHARE, ttl: int = _DEF_TTL, refresh: bool = False) -> Dict[str, Any]:
+    """分析近 lookback_days 天的历史促销效果；结果缓存 ttl 秒。
+    返回：{"periods":[...], "by_sku_store":{"pid:sid": {...}}, "by_sku":{"pid": {...}}, "cached": bool}
+    """
+    params = {"lb": int(lookback_days), "s": store_id, "cf": category_field, "md": min_depth, "ps": promo_share, "d": str(date.today())}
+    key = _cache_key(tenant_id, params)
+    if not refresh:
+        hit = cache.get(key)
+        if hit is not None:
+            return {**hit, "cached": True}
+
+    end = date.today()
+    start = end - timedelta(days=max(7, int(lookback_days)))
+    rows = fetch_daily_rows(tenant_id=tenant_id, start=start, end=end, store_id=store_id, min_depth=min_depth)
+    cats = fetch_categories((r["product_id"] for r in rows), field=category_field)
+    periods = compute_uplift(rows, cats, start=start, end=end, promo_share=promo_share)
+    data = {
+        "window": {"start": start, "end": end},
+        "periods": [p.to_dict() for p in periods],
+        "by_sku_store": {f"{k[0]}:{k[1]}": v for k, v in summarize(periods, by_store=True).items()},
+        "by_sku": {str(k): v for k, v in summarize(periods, by_store=False).items()},
+    }
+    cache.set(key, data, timeout=max(1, int(ttl)))
+    return {**data, "cached": False}
+
+
+def expected_roi(index: Dict[str, Any], product_id: Any, store_id: Any = None) -> Optional[float]:
+    """从 analyze_uplift 结果中取某 SKU（可选门店）的期望 ROI；无历史促销返回 None。"""
+    if store_id is not None:
+        hit = (index.get("by_sku_store") or {}).get(f"{product_id}:{store_id}")
+        if hit:
+            return hit.get("expected_roi")
+    hit = (index.get("by_sku") or {}).get(str(product_id))
+    return hit.get("expected_roi") if hit else None
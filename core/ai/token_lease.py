@@ -0,0 +1,240 @@
+# file: core/ai/token_lease.py
+# purpose: 租约式额度预留：每个工作进程以一次行锁从租户账户租用一块额度（AiTokenLease），
+#          调用的预授权/结算在本地租约内完成，用量按批（条数/时间间隔）一次性扣减余额并记一条流水；
+#          剩余额度在续租、进程退出（atexit）时归还，进程崩溃时随租约过期自动释放；
+#          有未入账用量时挂一个后台定时器，在 settle_interval_s 内（且早于本地租约过期）入账并续租，
+#          空闲进程的用量不会滞留到租约过期后（其他进程据此重新租用额度会越过 hard_limit）
+# 硬阈值：余额 - 全部有效租约 - hard_limit ≥ 0 始终成立，因此各进程合计用量不会越过 hard_limit
+# 配置：settings.AI_TOKEN_LEASE = {"enabled": True, "block": 20000, "ttl_s": 60, "settle_every": 50, "settle_interval_s": 5}
+# 注意：账户停用/余额调整在当前租约内最迟 ttl_s 秒后生效
+from __future__ import annotations
+import atexit
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+import logging
+
+from core.models.ai_billing import AiTenantTokenAccount, AiTokenLease, AiTokenTransaction
+
+logger = logging.getLogger(__name__)
+
+_DEFAULTS: Dict[str, Any] = {"enabled": False, "block": 20000, "ttl_s": 60, "settle_every": 50, "settle_interval_s": 5}
+
+HOLDER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+_MAX_RUN_IDS = 200  # 批量流水 meta 中保留的 run_id 上限
+
+
+def _conf() -> Dict[str, Any]:
+    return {**_DEFAULTS, **(getattr(settings, "AI_TOKEN_LEASE", None) or {})}
+
+
+def enabled() -> bool:
+    return bool(_conf()["enabled"])
+
+
+class _Lease:
+    """进程内租约：remaining=可授权额度，holds=已授权未结算的预估，used=已结算未入账的用量。"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.remaining = 0
+        self.holds: Dict[str, int] = {}
+        self.used = 0
+        self.runs = 0
+        self.run_ids: List[str] = []
+        self.reasons: Dict[str, int] = {}
+        self.expires = 0.0       # time.monotonic()；早于库内 expires_at，避免使用已被视为归还的额度
+        self.last_flush = time.monotonic()
+        self.timer: Optional[Any] = None  # 待入账用量的定时入账器
+
+    def held(self) -> int:
+        return self.remaining + sum(self.holds.values())
+
+
+_lock = threading.Lock()
+_leases: Dict[str, _Lease] = {}
+
+
+def _lease(tenant_id: str) -> _Lease:
+    ls = _leases.get(tenant_id)
+    if ls is None:
+        with _lock:
+            ls = _leases.setdefault(tenant_id, _Lease())
+    return ls
+
+
+def active_leased(tenant_id: str, *, exclude_holder: Optional[str] = None) -> int:
+    """租户当前有效租约合计（其他调用可用额度 = 余额 - 该值 - hard_limit）。"""
+    qs = AiTokenLease.objects.filter(tenant_id=tenant_id, expires_at__gt=timezone.now())
+    if exclude_holder:
+        qs = qs.exclude(holder=exclude_holder)
+    return int(qs.aggregate(s=Sum("tokens"))["s"] or 0)
+
+
+def _sync(tenant_id: str, ls: _Lease, *, want: int) -> int:
+    """一次行锁内完成：入账已结算用量 → 归还/续租 → 申请至多 want 的新额度。返回新获额度。
+    调用方需持有 ls.lock。want=0 且无未结算预估时删除租约（归还剩余额度）。"""
+    from core.ai.billing import AccountSuspended, InsufficientBalance, maybe_alert_low_balance
+
+    c = _conf()
+    now = timezone.now()
+    with transaction.atomic():
+        acct = AiTenantTokenAccount.objects.select_for_update().filter(tenant_id=tenant_id).first()
+        if not acct:
+            raise InsufficientBalance("Token account not found for tenant")
+        AiTokenLease.objects.filter(tenant_id=tenant_id, expires_at__lte=now).delete()
+        balance = int(acct.token_balance)
+        if ls.used:
+            AiTenantTokenAccount.objects.filter(id=acct.id).update(token_balance=F("token_balance") - ls.used, updated_at=now)
+            AiTokenTransaction.objects.create(
+                tenant_id=tenant_id, change=-ls.used, reason="llm_usage_batch", related_run_id="",
+                meta={"runs": ls.runs, "run_ids": ls.run_ids, "reasons": ls.reasons, "holder": HOLDER},
+            )
+            balance -= ls.used
+        # 本进程可持有的上限；租约曾过期时额度可能已被其他进程租走，此时收缩本地剩余额度
+        room = balance - active_leased(tenant_id, exclude_holder=HOLDER) - int(getattr(acct, "hard_limit", 0) or 0)
+        if ls.held() > room:
+            ls.remaining = max(0, room - sum(ls.holds.values()))
+        grant = 0
+        if want > 0:
+            if getattr(acct, "status", "active") != "active":
+                raise AccountSuspended("Account is not active")
+            grant = max(0, min(int(want), room - ls.held()))
+        keep = ls.held() + grant
+        if keep > 0:
+            AiTokenLease.objects.update_or_create(
+                tenant_id=tenant_id, holder=HOLDER,
+                defaults={"tokens": keep, "expires_at": now + timedelta(seconds=int(c["ttl_s"]))},
+            )
+        else:
+            AiTokenLease.objects.filter(tenant_id=tenant_id, holder=HOLDER).delete()
+        soft = int(getattr(acct, "soft_limit", 0) or 0)
+    flushed = ls.used
+    ls.used, ls.runs, ls.run_ids, ls.reasons = 0, 0, [], {}
+    ls.remaining += grant
+    ls.expires = time.monotonic() + max(1.0, int(c["ttl_s"]) * 0.8) if keep > 0 else 0.0
+    ls.last_flush = time.monotonic()
+    if flushed and balance < soft:
+        try:
+            maybe_alert_low_balance(tenant_id=tenant_id, balance=balance, soft_limit=soft)
+        except Exception:
+            logger.warning("low balance alert failed", exc_info=True)
+    return grant
+
+
+def authorize(*, tenant_id: str, estimate_tokens: int, run_id: Optional[str] = None) -> Tuple[bool, str, Dict[str, Any]]:
+    """在本地租约内预授权；额度不足或租约将过期时续租一次（单次行锁）。
+    给出 run_id 时预估额度被占用，直到 settle() 释放；返回 (allowed, reason, snapshot)。"""
+    est = max(0, int(estimate_tokens))
+    ls = _lease(tenant_id)
+    with ls.lock:
+        if ls.remaining < est or time.monotonic() >= ls.expires:
+            _sync(tenant_id, ls, want=max(int(_conf()["block"]), est) - ls.remaining)
+        snap = {"lease_remaining": ls.remaining, "lease_holder": HOLDER}
+        if ls.remaining < est:
+            return False, f"lease exhausted: {ls.remaining} < {est} (balance would drop below hard_limit)", snap
+        if run_id:
+            ls.remaining -= est
+            ls.holds[run_id] = ls.holds.get(run_id, 0) + est
+        return True, "ok", snap
+
+
+def settle(*, tenant_id: str, run_id: Optional[str], actual_tokens: int, success: bool, reason: str = "llm_usage") -> Dict[str, Any]:
+    """释放预估并按实际用量记账（本地累计，按批入账）；用量超出租约时同步补租，补不足则抛 InsufficientBalance。"""
+    from core.ai.billing import InsufficientBalance
+
+    used = max(0, int(actual_tokens))
+    c = _conf()
+    ls = _lease(tenant_id)
+    with ls.lock:
+        ls.remaining += ls.holds.pop(run_id, 0) if run_id else 0
+        if not success or used <= 0:
+            return {"deducted": 0, "skipped": True}
+        if ls.remaining < used or time.monotonic() >= ls.expires:
+            _sync(tenant_id, ls, want=max(int(c["block"]), used) - ls.remaining)
+            if ls.remaining < used:
+                raise InsufficientBalance(f"finalize would drop below hard_limit: lease {ls.remaining} < {used}")
+        ls.remaining -= used
+        ls.used += used
+        ls.runs += 1
+        if run_id and len(ls.run_ids) < _MAX_RUN_IDS:
+            ls.run_ids.append(run_id)
+        ls.reasons[reason] = ls.reasons.get(reason, 0) + used
+        due = ls.runs >= int(c["settle_every"]) or time.monotonic() - ls.last_flush >= float(c["settle_interval_s"])
+        if due:
+            _sync(tenant_id, ls, want=0)
+        elif ls.timer is None:
+            delay = min(float(c["settle_interval_s"]), max(0.0, ls.expires - time.monotonic()))
+            ls.timer = _timer(delay, lambda: _on_timer(tenant_id))
+        return {"deducted": used, "batched": not due, "lease_remaining": ls.remaining}
+
+
+def _timer(delay: float, fn) -> Any:
+    """后台线程延时执行 fn；结束后关闭该线程的数据库连接。"""
+    from django.db import connection
+
+    def run():
+        try:
+            fn()
+        finally:
+            connection.close()
+
+    t = threading.Timer(delay, run)
+    t.daemon = True
+    t.start()
+    return t
+
+
+def _on_timer(tenant_id: str) -> None:
+    """定时入账：空闲进程在租约过期前把未结算用量入账（同时续租剩余额度）。"""
+    ls = _leases.get(tenant_id)
+    if ls is not None:
+        ls.timer = None
+    try:
+        flush(tenant_id)
+    except Exception:
+        logger.warning("token lease timed flush failed", exc_info=True)
+
+
+def flush(tenant_id: Optional[str] = None, *, release: bool = False) -> int:
+    """立即入账未结算用量；release=True 时同时归还剩余额度（不含已授权未结算的预估）。返回入账 tokens。"""
+    total = 0
+    for t in ([tenant_id] if tenant_id else list(_leases.keys())):
+        ls = _leases.get(t)
+        if ls is None:
+            continue
+        with ls.lock:
+            if not ls.used and not release:
+                continue
+            total += ls.used
+            if release:
+                ls.remaining = 0
+            _sync(t, ls, want=0)
+    return total
+
+
+def release_all() -> None:
+    """进程退出时入账并归还全部租约。"""
+    try:
+        flush(release=True)
+    except Exception:  # pragma: no cover - 退出阶段数据库可能已不可用；租约到期后自动释放
+        logger.warning("token lease release failed", exc_info=True)
+
+
+def reset() -> None:
+    """丢弃进程内租约状态（测试用；不会写库）。"""
+    with _lock:
+        for ls in _leases.values():
+            getattr(ls.timer, "cancel", lambda: None)()
+        _leases.clear()
+
+
+atexit.register(release_all)
@@ -21,9 +21,15 @@ def z_for_service_level(service_level: float) -> float:
     return _Z_TABLE[nearest]
 
 
-def calc_safety_stock(daily_demand_sigma: float, leadtime_days: float, *, service_level: float = 0.95) -> float:
+def calc_safety_stock(daily_demand_sigma: float, leadtime_days: float, *, service_level: float = 0.95,
+                      daily_demand_mean: float = 0.0, leadtime_sigma: float = 0.0) -> float:
+    """安全库存 = z·σ；需求与提前期均有波动时 σ = sqrt(L·σd² + d²·σL²)（leadtime_sigma=0 时退化为 σd·sqrt(L)）。"""
     z = z_for_service_level(service_level)
-    return max(0.0, z * float(daily_demand_sigma or 0.0) * sqrt(max(0.0, float(leadtime_days or 0.0))))
+    lt = max(0.0, float(leadtime_days or 0.0))
+    sd = float(daily_demand_sigma or 0.0)
+    d = float(daily_demand_mean or 0.0)
+    sl = max(0.0, float(leadtime_sigma or 0.0))
+    return max(0.0, z * sqrt(lt * sd * sd + d * d * sl * sl))
 
 
 def calc_reorder_point(daily_demand_mean: float, leadtime_days: float, safety_stock: float) -> float:
@@ -5,7 +5,7 @@ import re
 from contextlib import closing
 from typing import Any, Dict, Iterable, List, Tuple
 from django.db import connection
-from core.ai.bi.schema import ALLOWED_VIEWS
+from core.ai.bi import schema as bi_schema
 from core.ai.bi.cache import get_or_set
 
 # 危险关键字拦截（防止非只读）
@@ -31,7 +31,7 @@ def guard(sql: str) -> Tuple[bool, str]:
             return False, "subquery in FROM/JOIN is not allowed"
         # 取裸标识（去 schema 前缀）
         view = token.split(".")[-1]
-        if view not in ALLOWED_VIEWS.values():
+        if view not in bi_schema.ALLOWED_VIEWS.values():  # 调用时读取（配置/测试可替换白名单）
             return False, f"view '{view}' is not in whitelist"
     return True, "ok"
 
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.core import checks
+        from core.utils.rate_limit import check_shared_cache
+
+        checks.register(check_shared_cache, checks.Tags.caches)
@@ -0,0 +1,21 @@
+# file: core/management/commands/ai_batch_run.py
+# purpose: 离线 LLM 批处理调度进程：按作业优先级与供应商并发上限消费 AiBatchItem（交互请求优先，见 core.ai.batch）
+from __future__ import annotations
+from django.core.management.base import BaseCommand
+
+from core.ai.batch import run
+
+
+class Command(BaseCommand):
+    help = "Drain queued LLM batch jobs at the configured per-provider concurrency"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--job", type=int, default=None, help="Only process this job id")
+        parser.add_argument("--max-items", type=int, default=None, help="Stop after starting N items")
+        parser.add_argument("--once", action="store_true", help="Exit when no pending items are left (default: keep polling)")
+
+    def handle(self, *args, **opts):
+        stats = run(job_id=opts.get("job"), max_items=opts.get("max_items"), idle_exit=bool(opts.get("once")))
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: done={stats['done']} failed={stats['failed']} deferred={stats['deferred']} cancelled={stats['cancelled']}"
+        ))
@@ -0,0 +1,37 @@
+# file: core/management/commands/ai_categorize.py
+# purpose: 商品目录 AI 自动分类批处理：为企业创建作业或续跑已有作业，直至全部完成（可随时中断，按检查点续跑）
+from __future__ import annotations
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models.ai_catalog import AiCategorizeJob
+from core.ai.catalog.categorize import create_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Categorize uncategorized products with the LLM in token-budgeted batches (resumable)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--enterprise", type=int, default=None, help="Enterprise id (creates a new job)")
+        parser.add_argument("--job", type=int, default=None, help="Resume an existing job id")
+        parser.add_argument("--restart", action="store_true", help="Reset the job cursor to retry failed products")
+        parser.add_argument("--concurrency", type=int, default=None, help="Concurrent LLM calls (default: settings)")
+        parser.add_argument("--waves", type=int, default=None, help="Stop after N waves (default: run to completion)")
+
+    def handle(self, *args, **opts):
+        if opts.get("job"):
+            job = AiCategorizeJob.objects.filter(id=opts["job"]).first()
+            if not job:
+                raise CommandError(f"job {opts['job']} not found")
+            if opts.get("restart"):
+                job.cursor = 0
+        elif opts.get("enterprise"):
+            job = create_job(opts["enterprise"])
+        else:
+            raise CommandError("--enterprise or --job is required")
+        self.stdout.write(f"job={job.id} enterprise={job.enterprise_id} total={job.total} cursor={job.cursor}")
+        run_job(job, max_waves=opts.get("waves"), concurrency=opts.get("concurrency"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: job={job.id} status={job.status} processed={job.processed} updated={job.updated} "
+            f"from_knowledge={job.from_knowledge} "
+            f"failed={job.failed} batches={job.batches} tokens={job.tokens_spent}"
+        ))
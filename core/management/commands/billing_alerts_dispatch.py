@@ -0,0 +1,17 @@
+# file: core/management/commands/billing_alerts_dispatch.py
+# purpose: 重试投递低余额预警发件箱（AiAlertOutbox）中待发/失败的记录；建议由 cron 每分钟执行
+from __future__ import annotations
+from django.core.management.base import BaseCommand
+
+from core.ai.billing_alerts import dispatch_pending
+
+
+class Command(BaseCommand):
+    help = "Deliver pending/failed billing alert outbox entries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100, help="Max entries per run")
+
+    def handle(self, *args, **opts):
+        ok = dispatch_pending(limit=int(opts["limit"]))
+        self.stdout.write(self.style.SUCCESS(f"Delivered {ok} alert(s)"))
@@ -0,0 +1,50 @@
+# file: core/management/commands/kpi_counters_reconcile.py
+# purpose: 从原始销售重算 门店×日 KPI 计数器并报告偏差；--fix 时以原始数据修正计数器；
+#          --backfill 全量回填并打上回填标记（上线步骤：未回填的租户读路径仍走原始销售）
+from __future__ import annotations
+from datetime import date
+from django.core.management.base import BaseCommand
+
+from core.models import Enterprise
+from core.ai.kpi.counters import backfill, has_counters, reconcile
+
+
+class Command(BaseCommand):
+    help = "Rebuild KPI sale counters from raw sales and report drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--enterprise", type=int, default=None, help="Enterprise id (default: all)")
+        parser.add_argument("--start", type=str, default=None, help="YYYY-MM-DD")
+        parser.add_argument("--end", type=str, default=None, help="YYYY-MM-DD")
+        parser.add_argument("--fix", action="store_true", help="Overwrite counters with rebuilt values")
+        parser.add_argument("--backfill", action="store_true",
+                            help="Rebuild all history and mark counters ready for reads (skips tenants already backfilled)")
+        parser.add_argument("--show", type=int, default=20, help="Max drift rows to print per enterprise")
+
+    def handle(self, *args, **opts):
+        start = date.fromisoformat(opts["start"]) if opts.get("start") else None
+        end = date.fromisoformat(opts["end"]) if opts.get("end") else None
+        ids = [opts["enterprise"]] if opts.get("enterprise") else list(Enterprise.objects.values_list("id", flat=True))
+        total_drift = 0
+        if opts.get("backfill"):
+            done = 0
+            for eid in ids:
+                if has_counters(str(eid)):
+                    continue
+                res = backfill(eid)
+                done += 1
+                self.stdout.write(f"enterprise={eid} backfilled checked={res['checked']} drift={len(res['drift'])}")
+            self.stdout.write(self.style.SUCCESS(f"Done: backfilled={done}, skipped={len(ids) - done}"))
+            return
+        for eid in ids:
+            res = reconcile(eid, start=start, end=end, fix=bool(opts.get("fix")))
+            n = len(res["drift"])
+            total_drift += n
+            self.stdout.write(f"enterprise={eid} checked={res['checked']} drift={n} fixed={res['fixed']}")
+            for r in res["drift"][: max(0, int(opts["show"]))]:
+                self.stdout.write(
+                    f"  {r['biz_date']} store={r['store_id']} amount={r['amount']} counter={r['counter_amount']} "
+                    f"lines={r['lines']} counter_lines={r['counter_lines']}"
+                )
+        style = self.style.SUCCESS if total_drift == 0 or opts.get("fix") else self.style.WARNING
+        self.stdout.write(style(f"Done: enterprises={len(ids)}, drift_rows={total_drift}"))
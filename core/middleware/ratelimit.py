@@ -1,11 +1,12 @@
 # file: core/middleware/ratelimit.py
 # purpose: 简易限流中间件（按租户/用户）。默认限制：租户 60 req/60s，用户 30 req/60s。仅对 /api/ai/ 路径生效。
+#          底层为共享限流引擎（core.utils.rate_limit）：多 worker 共用额度，两个维度一次判定；大请求体按估算 token 加权
 from __future__ import annotations
-import time
+import math
 from typing import Callable
 from django.http import JsonResponse, HttpRequest
-from django.core.cache import cache
 from django.conf import settings
+from core.utils.rate_limit import Limit, rate_limiter, shared_limiter
 
 
 class RateLimitMiddleware:
@@ -34,26 +35,21 @@ class RateLimitMiddleware:
             return self.get_response(request)
         tenant_id = request.headers.get("X-Tenant-Id") or getattr(request, "tenant_id", None) or "_"
         user_id = getattr(request, "user_id", None) or request.headers.get("X-User-Id") or "_"
-        now = int(time.time())
-        bucket = now // self.window
-        # 租户维度
-        tkey = f"ai:rl:t:{tenant_id}:{bucket}"
-        tcount = cache.get(tkey) or 0
-        if tcount >= self.tenant_limit:
-            return self._reject(self.tenant_limit, 0)
-        cache.add(tkey, 0, timeout=self.window)
-        cache.incr(tkey)
-        # 用户维度
-        ukey = f"ai:rl:u:{tenant_id}:{user_id}:{bucket}"
-        ucount = cache.get(ukey) or 0
-        if ucount >= self.user_limit:
-            return self._reject(self.user_limit, 0)
-        cache.add(ukey, 0, timeout=self.window)
-        rem = max(0, self.user_limit - ucount - 1)
+        window = max(1, self.window)
+        limits = [
+            Limit(f"ai:rl:t:{tenant_id}", self.tenant_limit, self.tenant_limit / window),
+            Limit(f"ai:rl:u:{tenant_id}:{user_id}", self.user_limit, self.user_limit / window),
+        ]
+        try:
+            size = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            size = 0
+        d = shared_limiter.acquire(limits, rate_limiter.cost_for(int(size / 2.2)))
+        if not d.allowed:
+            return self._reject(min(self.tenant_limit, self.user_limit), int(math.ceil(d.retry_after)))
         resp = self.get_response(request)
         if hasattr(resp, "__setitem__"):
-            resp["X-RateLimit-Remaining"] = str(rem)
-        cache.incr(ukey)
+            resp["X-RateLimit-Remaining"] = str(int(d.remaining))
         return resp
 
     @staticmethod
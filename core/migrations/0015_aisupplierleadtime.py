@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_opsalertchannel_opsalertrule_opsincident'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AiSupplierLeadTime',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(db_index=True, max_length=64)),
+                ('supplier_id', models.BigIntegerField()),
+                ('product_id', models.BigIntegerField()),
+                ('orders', models.IntegerField(default=0, help_text='统计窗口内的采购次数')),
+                ('samples', models.IntegerField(default=0, help_text='可计算提前期的批次数')),
+                ('lead_time_mean', models.FloatField(blank=True, null=True)),
+                ('lead_time_std', models.FloatField(blank=True, null=True)),
+                ('lead_time_p90', models.FloatField(blank=True, null=True)),
+                ('cadence_days', models.FloatField(blank=True, null=True)),
+                ('order_qty_mean', models.FloatField(default=0.0)),
+                ('unit_price_avg', models.FloatField(default=0.0)),
+                ('annual_demand', models.FloatField(default=0.0)),
+                ('eoq', models.FloatField(default=0.0)),
+                ('last_purchase_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'ai_supplier_lead_time',
+                'indexes': [models.Index(fields=['tenant_id', 'product_id'], name='ai_supplier_tenant__6e338a_idx')],
+                'unique_together': {('tenant_id', 'supplier_id', 'product_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_aisupplierleadtime'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AiKpiTarget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(db_index=True, max_length=64)),
+                ('level', models.CharField(help_text='enterprise|store|employee', max_length=16)),
+                ('store_id', models.CharField(blank=True, default='', max_length=64)),
+                ('employee_id', models.CharField(blank=True, default='', max_length=64)),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField()),
+                ('baseline', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('target', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('share', models.FloatField(default=0.0, help_text='占上一层级目标的比例')),
+                ('lift_pct', models.FloatField(default=0.0)),
+                ('daily', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'ai_kpi_target',
+                'indexes': [models.Index(fields=['tenant_id', 'store_id', 'period_start'], name='ai_kpi_targ_tenant__149f7d_idx')],
+                'unique_together': {('tenant_id', 'period_start', 'period_end', 'level', 'store_id', 'employee_id')},
+            },
+        ),
+    ]
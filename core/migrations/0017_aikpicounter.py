@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_aikpitarget'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AiKpiCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(max_length=64)),
+                ('store_id', models.CharField(max_length=64)),
+                ('biz_date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=4, default=0, max_digits=18)),
+                ('qty', models.DecimalField(decimal_places=4, default=0, max_digits=18)),
+                ('lines', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'ai_kpi_counter',
+                'indexes': [models.Index(fields=['tenant_id', 'biz_date'], name='ai_kpi_coun_tenant__a5d585_idx')],
+                'unique_together': {('tenant_id', 'store_id', 'biz_date')},
+            },
+        ),
+    ]
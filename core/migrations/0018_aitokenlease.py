@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_aikpicounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AiTokenLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(db_index=True, max_length=64)),
+                ('holder', models.CharField(max_length=128)),
+                ('tokens', models.BigIntegerField(default=0)),
+                ('expires_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'ai_token_lease',
+                'indexes': [models.Index(fields=['tenant_id', 'expires_at'], name='ai_token_le_tenant__09ade4_idx')],
+                'unique_together': {('tenant_id', 'holder')},
+            },
+        ),
+    ]
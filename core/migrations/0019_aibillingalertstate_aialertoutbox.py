@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_aitokenlease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AiBillingAlertState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(max_length=64, unique=True)),
+                ('level', models.IntegerField(default=0)),
+                ('last_balance', models.BigIntegerField(default=0)),
+                ('last_alert_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'ai_billing_alert_state',
+            },
+        ),
+        migrations.CreateModel(
+            name='AiAlertOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(db_index=True, max_length=64)),
+                ('kind', models.CharField(default='low_balance', max_length=32)),
+                ('level', models.IntegerField(default=1)),
+                ('subject', models.CharField(max_length=200)),
+                ('body', models.TextField(blank=True, default='')),
+                ('recipients', models.JSONField(blank=True, default=list)),
+                ('status', models.CharField(default='pending', max_length=16)),
+                ('attempts', models.IntegerField(default=0)),
+                ('last_error', models.CharField(blank=True, default='', max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'ai_alert_outbox',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='ai_alert_ou_status_f19358_idx')],
+            },
+        ),
+    ]
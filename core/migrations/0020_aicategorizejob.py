@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_aibillingalertstate_aialertoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AiCategorizeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(db_index=True, max_length=64)),
+                ('enterprise_id', models.BigIntegerField()),
+                ('status', models.CharField(default='pending', max_length=16)),
+                ('cursor', models.BigIntegerField(default=0)),
+                ('total', models.IntegerField(default=0, help_text='创建时待分类商品数')),
+                ('processed', models.IntegerField(default=0)),
+                ('updated', models.IntegerField(default=0)),
+                ('failed', models.IntegerField(default=0)),
+                ('batches', models.IntegerField(default=0)),
+                ('tokens_spent', models.BigIntegerField(default=0)),
+                ('last_error', models.CharField(blank=True, default='', max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'ai_categorize_job',
+                'indexes': [models.Index(fields=['tenant_id', 'created_at'], name='ai_categori_tenant__2bf164_idx')],
+            },
+        ),
+    ]
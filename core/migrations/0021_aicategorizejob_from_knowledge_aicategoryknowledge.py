@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_aicategorizejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aicategorizejob',
+            name='from_knowledge',
+            field=models.IntegerField(default=0, help_text='命中分类知识库、无需调用 LLM 的商品数'),
+        ),
+        migrations.CreateModel(
+            name='AiCategoryKnowledge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key_type', models.CharField(max_length=16)),
+                ('key', models.CharField(max_length=255)),
+                ('category_l1', models.CharField(max_length=100)),
+                ('category_l2', models.CharField(blank=True, default='', max_length=100)),
+                ('category_l3', models.CharField(blank=True, default='', max_length=100)),
+                ('norm_name', models.CharField(blank=True, default='', max_length=255)),
+                ('norm_spec', models.CharField(blank=True, default='', max_length=255)),
+                ('norm_manufacturer', models.CharField(blank=True, default='', max_length=255)),
+                ('votes', models.IntegerField(default=1, help_text='确认该分类的次数（不同租户/同步批次）')),
+                ('source_tenant_id', models.CharField(blank=True, default='', max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'ai_category_knowledge',
+                'unique_together': {('key_type', 'key')},
+            },
+        ),
+    ]
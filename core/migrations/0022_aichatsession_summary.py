@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_aicategorizejob_from_knowledge_aicategoryknowledge'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aichatsession',
+            name='summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='aichatsession',
+            name='summary_upto',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_aichatsession_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AiBatchJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(db_index=True, max_length=64)),
+                ('agent', models.CharField(default='batch', max_length=64)),
+                ('title', models.CharField(blank=True, default='', max_length=255)),
+                ('status', models.CharField(default='queued', max_length=16)),
+                ('priority', models.IntegerField(default=0)),
+                ('max_attempts', models.IntegerField(default=3)),
+                ('total', models.IntegerField(default=0)),
+                ('done', models.IntegerField(default=0)),
+                ('failed', models.IntegerField(default=0)),
+                ('tokens_spent', models.BigIntegerField(default=0)),
+                ('created_by', models.CharField(blank=True, default='', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'ai_batch_job',
+                'indexes': [models.Index(fields=['status', 'priority', 'created_at'], name='ai_batch_jo_status_5d96b8_idx'), models.Index(fields=['tenant_id', 'created_at'], name='ai_batch_jo_tenant__445cd9_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AiBatchItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idx', models.IntegerField()),
+                ('custom_id', models.CharField(blank=True, default='', max_length=128)),
+                ('prompt', models.TextField()),
+                ('status', models.CharField(default='pending', max_length=16)),
+                ('attempts', models.IntegerField(default=0)),
+                ('result', models.TextField(blank=True, default='')),
+                ('tokens', models.IntegerField(default=0)),
+                ('provider', models.CharField(blank=True, default='', max_length=64)),
+                ('model', models.CharField(blank=True, default='', max_length=128)),
+                ('error', models.CharField(blank=True, default='', max_length=500)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='core.aibatchjob')),
+            ],
+            options={
+                'db_table': 'ai_batch_item',
+                'indexes': [models.Index(fields=['job', 'status', 'idx'], name='ai_batch_it_job_id_f02185_idx')],
+                'unique_together': {('job', 'idx')},
+            },
+        ),
+    ]
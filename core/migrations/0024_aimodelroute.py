@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_aibatchjob_aibatchitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AiModelRoute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(db_index=True, max_length=64)),
+                ('agent', models.CharField(default='*', max_length=64)),
+                ('tier', models.CharField(blank=True, default='', max_length=16)),
+                ('provider_key', models.CharField(blank=True, choices=[('gpt5', 'GPT-5'), ('gemini', 'Gemini'), ('deepseek', 'DeepSeek'), ('zhipu', 'Zhipu'), ('mock', 'Mock')], default='', max_length=32)),
+                ('model_name', models.CharField(blank=True, default='', max_length=128)),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'ai_model_route',
+                'unique_together': {('tenant_id', 'agent')},
+            },
+        ),
+    ]
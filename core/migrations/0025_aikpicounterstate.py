@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_aimodelroute'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AiKpiCounterState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(max_length=64, unique=True)),
+                ('backfilled_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'ai_kpi_counter_state',
+            },
+        ),
+    ]
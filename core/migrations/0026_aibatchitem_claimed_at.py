@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_aikpicounterstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aibatchitem',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='aibatchitem',
+            index=models.Index(fields=['status', 'claimed_at'], name='ai_batch_it_status_a2b40d_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# file: core/models/ai_batch.py
+# purpose: 离线 LLM 批处理作业：一个作业下挂多条提示词（AiBatchItem），由 core.ai.batch 调度器按供应商并发消费，
+#          结果与进度落库，支持取消与失败重试
+from __future__ import annotations
+from django.db import models
+
+
+class AiBatchJob(models.Model):
+    """批处理作业。priority 越大越先调度（同优先级按创建时间）；计数随条目完成原子累加。"""
+    tenant_id = models.CharField(max_length=64, db_index=True)
+    agent = models.CharField(max_length=64, default="batch")
+    title = models.CharField(max_length=255, blank=True, default="")
+    status = models.CharField(max_length=16, default="queued")  # queued/running/done/cancelled
+    priority = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    total = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    tokens_spent = models.BigIntegerField(default=0)
+    created_by = models.CharField(max_length=64, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "ai_batch_job"
+        indexes = [models.Index(fields=["status", "priority", "created_at"]),
+                   models.Index(fields=["tenant_id", "created_at"])]
+
+
+class AiBatchItem(models.Model):
+    job = models.ForeignKey(AiBatchJob, on_delete=models.CASCADE, related_name="items")
+    idx = models.IntegerField()
+    custom_id = models.CharField(max_length=128, blank=True, default="")  # 调用方自带的业务键
+    prompt = models.TextField()
+    status = models.CharField(max_length=16, default="pending")  # pending/running/done/failed/cancelled
+    attempts = models.IntegerField(default=0)
+    result = models.TextField(blank=True, default="")
+    tokens = models.IntegerField(default=0)
+    provider = models.CharField(max_length=64, blank=True, default="")
+    model = models.CharField(max_length=128, blank=True, default="")
+    error = models.CharField(max_length=500, blank=True, default="")
+    claimed_at = models.DateTimeField(null=True, blank=True)  # 领取时间；running 超过 lease_s 视为调度进程已崩溃
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "ai_batch_item"
+        unique_together = ("job", "idx")
+        indexes = [models.Index(fields=["job", "status", "idx"]), models.Index(fields=["status", "claimed_at"])]
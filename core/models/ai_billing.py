@@ -28,4 +28,50 @@ class AiTokenTransaction(models.Model):
 
     class Meta:
         db_table = "ai_token_transaction"
-        indexes = [models.Index(fields=["tenant_id", "created_at"])]
\ No newline at end of file
+        indexes = [models.Index(fields=["tenant_id", "created_at"])]
+
+
+class AiTokenLease(models.Model):
+    """工作进程从租户账户租用的额度块：余额 - 有效租约合计 - hard_limit 为其他进程/调用可用额度；过期即视为归还。"""
+    tenant_id = models.CharField(max_length=64, db_index=True)
+    holder = models.CharField(max_length=128)  # 主机名:进程号:随机串
+    tokens = models.BigIntegerField(default=0)  # 尚未归还的租用额度（含未结算用量）
+    expires_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "ai_token_lease"
+        unique_together = ("tenant_id", "holder")
+        indexes = [models.Index(fields=["tenant_id", "expires_at"])]
+
+
+class AiBillingAlertState(models.Model):
+    """租户低余额预警状态：当前告警级别与上次告警时间（跨进程去重/升级判断）。"""
+    tenant_id = models.CharField(max_length=64, unique=True)
+    level = models.IntegerField(default=0)  # 0=正常；n=已越过第 n 档阈值
+    last_balance = models.BigIntegerField(default=0)
+    last_alert_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "ai_billing_alert_state"
+
+
+class AiAlertOutbox(models.Model):
+    """告警发件箱：计费热路径之外异步投递；失败行由 billing_alerts_dispatch 命令重试。"""
+    tenant_id = models.CharField(max_length=64, db_index=True)
+    kind = models.CharField(max_length=32, default="low_balance")
+    level = models.IntegerField(default=1)
+    subject = models.CharField(max_length=200)
+    body = models.TextField(blank=True, default="")
+    recipients = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=16, default="pending")  # pending/sent/failed/skipped
+    attempts = models.IntegerField(default=0)
+    last_error = models.CharField(max_length=500, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "ai_alert_outbox"
+        indexes = [models.Index(fields=["status", "created_at"])]
@@ -0,0 +1,52 @@
+# file: core/models/ai_catalog.py
+# purpose: 商品目录 AI 批处理任务：自动分类作业的进度检查点（游标 + 计数），支持中断后续跑；
+#          跨租户分类知识库（按本位码/批准文号/医保编码/规范化名称复用已确认的分类）
+from __future__ import annotations
+from django.db import models
+
+
+class AiCategorizeJob(models.Model):
+    """商品自动分类作业（由 core.ai.catalog.categorize.run_job 推进）。
+    - cursor：已完成波次中最大的商品 id；续跑从 id > cursor 的未分类商品开始
+    - 失败批次的商品保持未分类，restart（cursor 归零）后会被再次处理
+    """
+    tenant_id = models.CharField(max_length=64, db_index=True)
+    enterprise_id = models.BigIntegerField()
+    status = models.CharField(max_length=16, default="pending")  # pending/running/paused/done/failed
+    cursor = models.BigIntegerField(default=0)
+    total = models.IntegerField(default=0, help_text="创建时待分类商品数")
+    processed = models.IntegerField(default=0)
+    updated = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    batches = models.IntegerField(default=0)
+    from_knowledge = models.IntegerField(default=0, help_text="命中分类知识库、无需调用 LLM 的商品数")
+    tokens_spent = models.BigIntegerField(default=0)
+    last_error = models.CharField(max_length=500, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "ai_categorize_job"
+        indexes = [models.Index(fields=["tenant_id", "created_at"])]
+
+
+class AiCategoryKnowledge(models.Model):
+    """跨租户商品分类知识：由已确认的分类（企业同步自带的标准分类）学习而来，按国家标识或规范化名称索引。
+    key_type：std=商品本位码，approval=批准文号，medicare=医保编码，name=规范化 名称|规格|厂家
+    """
+    key_type = models.CharField(max_length=16)
+    key = models.CharField(max_length=255)
+    category_l1 = models.CharField(max_length=100)
+    category_l2 = models.CharField(max_length=100, blank=True, default="")
+    category_l3 = models.CharField(max_length=100, blank=True, default="")
+    norm_name = models.CharField(max_length=255, blank=True, default="")
+    norm_spec = models.CharField(max_length=255, blank=True, default="")
+    norm_manufacturer = models.CharField(max_length=255, blank=True, default="")
+    votes = models.IntegerField(default=1, help_text="确认该分类的次数（不同租户/同步批次）")
+    source_tenant_id = models.CharField(max_length=64, blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "ai_category_knowledge"
+        unique_together = ("key_type", "key")
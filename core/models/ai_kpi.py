@@ -0,0 +1,66 @@
+# file: core/models/ai_kpi.py
+# purpose: KPI 相关 ORM 模型：组织级（企业/门店/员工）目标计划持久化；门店×日 销售累计计数器
+from __future__ import annotations
+from django.db import models
+from django.utils import timezone
+
+
+class AiKpiTarget(models.Model):
+    """一条 KPI 目标（企业/门店/员工任一层级）及其按日拆分。
+    - level: enterprise|store|employee；企业级 store_id/employee_id 为空串，门店级 employee_id 为空串
+    - daily: [{"date":"YYYY-MM-DD","target":123.4}, ...]
+    """
+    tenant_id = models.CharField(max_length=64, db_index=True)
+    level = models.CharField(max_length=16, help_text="enterprise|store|employee")
+    store_id = models.CharField(max_length=64, blank=True, default="")
+    employee_id = models.CharField(max_length=64, blank=True, default="")
+    period_start = models.DateField()
+    period_end = models.DateField()
+    baseline = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    target = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    share = models.FloatField(default=0.0, help_text="占上一层级目标的比例")
+    lift_pct = models.FloatField(default=0.0)
+    daily = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "ai_kpi_target"
+        unique_together = ("tenant_id", "period_start", "period_end", "level", "store_id", "employee_id")
+        indexes = [models.Index(fields=["tenant_id", "store_id", "period_start"])]
+
+    def __str__(self) -> str:
+        """返回层级与对象标识。"""
+        return f"KpiTarget<{self.level}:{self.store_id}:{self.employee_id}>"
+
+
+class AiKpiCounter(models.Model):
+    """门店×营业日 的销售累计（由销售同步路径原子递增，kpi_counters_reconcile 可重建）。
+    - tenant_id: 企业主键字符串；store_id: 门店主键字符串
+    """
+    tenant_id = models.CharField(max_length=64)
+    store_id = models.CharField(max_length=64)
+    biz_date = models.DateField()
+    amount = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+    qty = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+    lines = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "ai_kpi_counter"
+        unique_together = ("tenant_id", "store_id", "biz_date")
+        indexes = [models.Index(fields=["tenant_id", "biz_date"])]
+
+    def __str__(self) -> str:
+        """返回门店与日期。"""
+        return f"KpiCounter<{self.store_id}:{self.biz_date}>"
+
+
+class AiKpiCounterState(models.Model):
+    """租户计数器状态：backfilled_at 非空表示历史销售已回填，读路径才切换到计数器；
+    同时作为该租户计数器写入（同步/回填）的行锁。"""
+    tenant_id = models.CharField(max_length=64, unique=True)
+    backfilled_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "ai_kpi_counter_state"
@@ -10,6 +10,8 @@ class AiChatSession(models.Model):
     agent = models.CharField(max_length=64, default="default")
     title = models.CharField(max_length=255, blank=True, default="")
     status = models.CharField(max_length=16, default="open")  # open/closed
+    summary = models.TextField(blank=True, default="")  # 滚动摘要（覆盖 id ≤ summary_upto 的消息）
+    summary_upto = models.BigIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -1,5 +1,5 @@
 # file: core/models/ai_settings.py
-# purpose: 用户与租户的全局模型偏好设置（Provider/型号），用于按租户/用户生效
+# purpose: 用户与租户的全局模型偏好设置（Provider/型号），用于按租户/用户生效；租户按 agent 的路由覆盖
 from __future__ import annotations
 from django.db import models
 
@@ -36,4 +36,19 @@ class AiModelPreference(models.Model):
     class Meta:
         db_table = "ai_model_preference"
         unique_together = ("tenant_id", "user_id")
-        indexes = [models.Index(fields=["tenant_id", "user_id"])]
\ No newline at end of file
+        indexes = [models.Index(fields=["tenant_id", "user_id"])]
+
+class AiModelRoute(models.Model):
+    """租户级路由覆盖：按 agent（"*" 为全部）指定档位，或直接指定 Provider/型号；优先于全局路由规则。"""
+    tenant_id = models.CharField(max_length=64, db_index=True)
+    agent = models.CharField(max_length=64, default="*")
+    tier = models.CharField(max_length=16, blank=True, default="")  # light/standard/flagship
+    provider_key = models.CharField(max_length=32, choices=PROVIDERS, blank=True, default="")
+    model_name = models.CharField(max_length=128, blank=True, default="")
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "ai_model_route"
+        unique_together = ("tenant_id", "agent")
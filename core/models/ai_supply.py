@@ -0,0 +1,37 @@
+# file: core/models/ai_supply.py
+# purpose: 供应侧 AI 缓存表：供应商×SKU 的到货提前期分布、下单节奏与经济订货量（采购同步后刷新）
+from __future__ import annotations
+from django.db import models
+from django.utils import timezone
+
+
+class AiSupplierLeadTime(models.Model):
+    """供应商×SKU 的提前期统计（由 core.ai.strategy.leadtime.refresh_lead_times 写入）。
+    - lead_time_*：采购日期 → 批号首次出现在库存快照的天数
+    - cadence_days：相邻两次采购的平均间隔
+    - eoq：经济订货量 sqrt(2·D·S/H)
+    """
+    tenant_id = models.CharField(max_length=64, db_index=True)
+    supplier_id = models.BigIntegerField()
+    product_id = models.BigIntegerField()
+    orders = models.IntegerField(default=0, help_text="统计窗口内的采购次数")
+    samples = models.IntegerField(default=0, help_text="可计算提前期的批次数")
+    lead_time_mean = models.FloatField(null=True, blank=True)
+    lead_time_std = models.FloatField(null=True, blank=True)
+    lead_time_p90 = models.FloatField(null=True, blank=True)
+    cadence_days = models.FloatField(null=True, blank=True)
+    order_qty_mean = models.FloatField(default=0.0)
+    unit_price_avg = models.FloatField(default=0.0)
+    annual_demand = models.FloatField(default=0.0)
+    eoq = models.FloatField(default=0.0)
+    last_purchase_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "ai_supplier_lead_time"
+        unique_together = ("tenant_id", "supplier_id", "product_id")
+        indexes = [models.Index(fields=["tenant_id", "product_id"])]
+
+    def __str__(self) -> str:
+        """返回供应商×SKU 标识。"""
+        return f"LeadTime<{self.supplier_id}:{self.product_id}>"
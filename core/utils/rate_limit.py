@@ -1,47 +1,200 @@
 # file: core/utils/rate_limit.py
-# purpose: 轻量级限速器（进程内内存版），提供按租户令牌桶；已在中间件层有更强限流时，此工具可选用在批量任务中。
+# purpose: 跨进程共享的限流引擎（基于 Django 缓存）：gunicorn 多 worker 共用同一份额度；
+#          Redis 后端（Django RedisCache / django-redis）用 Lua 脚本做原子令牌桶，多个维度一次往返同时判定与扣减；
+#          其他后端退化为按窗口的加权计数（incr 先加后判，超限回滚），热路径同样只有一次往返
+#          成本按估算 token 加权：cost_for(tokens) = max(1, tokens / tokens_per_unit)
+#          优先级：priority="batch" 的调用须在扣减后仍保留 capacity × batch_reserve 的余量，额度紧张时让位于交互请求
+#          缓存须为跨进程共享后端（settings.REDIS_URL → RedisCache）；LocMem/Dummy 时系统检查（core.W001）与首次使用时告警
+# 配置：settings.AI_RATE_LIMIT = {"tenant_limit": 60, "user_limit": 30, "window": 60,          # 中间件（请求/窗口）
+#                                 "llm_capacity": 30, "llm_refill_rate": 0.5,                 # 编排器（令牌桶）
+#                                 "tokens_per_unit": 1000, "batch_reserve": 0.5, "cache_alias": "default"}
 
 from __future__ import annotations
+import logging
+import math
 import time
-from typing import Dict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
 
+logger = logging.getLogger(__name__)
 
-class TokenBucket:
-    """令牌桶实现：capacity/ refill_rate（每秒产生多少令牌）。"""
+_DEFAULTS: Dict[str, Any] = {"tenant_limit": 60, "user_limit": 30, "window": 60, "llm_capacity": 30,
+                             "llm_refill_rate": 0.5, "tokens_per_unit": 1000, "batch_reserve": 0.5, "cache_alias": "default"}
+_SCALE = 1000  # 计数后端以千分之一令牌为单位（incr 只支持整数）
 
-    def __init__(self, capacity: int, refill_rate: float):
-        self.capacity = max(1, int(capacity))
-        self.refill_rate = max(0.1, float(refill_rate))
-        self.tokens = float(self.capacity)
-        self.updated = time.monotonic()
+# KEYS = 各维度桶；ARGV = [cost, cap1, rate1, reserve1, cap2, rate2, reserve2, ...]
+# 先按 Redis 服务器时间回填全部桶，全部足额（扣减后不低于 reserve）才统一扣减；返回 {allowed, 最小剩余, 需等待秒数}
+_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local allowed, wait, remaining = 1, 0, nil
+local level = {}
+for i, key in ipairs(KEYS) do
+  local cap, rate, reserve = tonumber(ARGV[3 * i - 1]), tonumber(ARGV[3 * i]), tonumber(ARGV[3 * i + 1])
+  local v = redis.call('HMGET', key, 'tokens', 'ts')
+  local tokens = tonumber(v[1]) or cap
+  local ts = tonumber(v[2]) or now
+  tokens = math.min(cap, tokens + math.max(0, now - ts) * rate)
+  level[i] = tokens
+  if tokens - cost < reserve then
+    allowed = 0
+    wait = math.max(wait, (cost + reserve - tokens) / rate)
+  end
+end
+for i, key in ipairs(KEYS) do
+  local cap, rate = tonumber(ARGV[3 * i - 1]), tonumber(ARGV[3 * i])
+  local tokens = level[i]
+  if allowed == 1 then tokens = tokens - cost end
+  redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+  redis.call('PEXPIRE', key, math.ceil(cap / rate * 1000) + 1000)
+  if remaining == nil or tokens < remaining then remaining = tokens end
+end
+return {allowed, tostring(remaining), tostring(wait)}
+"""
 
-    def allow(self, cost: float = 1.0) -> bool:
-        """尝试消费令牌，成功返回 True。"""
-        now = time.monotonic()
-        # 回填
-        delta = now - self.updated
-        self.updated = now
-        self.tokens = min(self.capacity, self.tokens + delta * self.refill_rate)
-        if self.tokens >= cost:
-            self.tokens -= cost
-            return True
-        return False
+
+def _conf() -> Dict[str, Any]:
+    return {**_DEFAULTS, **(getattr(settings, "AI_RATE_LIMIT", None) or {})}
+
+
+_LOCAL_BACKENDS = ("LocMemCache", "DummyCache")
+_warned: set = set()
+
+
+def shared_backend_problem(alias: Optional[str] = None) -> Optional[str]:
+    """限流缓存不是跨进程共享的后端时返回说明，否则 None。"""
+    alias = alias or _conf()["cache_alias"]
+    name = type(caches[alias]).__name__
+    if name in _LOCAL_BACKENDS:
+        return (f"rate limit cache '{alias}' uses {name}: limits are per process, "
+                f"each worker allows the full quota; set REDIS_URL or AI_RATE_LIMIT['cache_alias'] to a shared cache")
+    return None
+
+
+def check_shared_cache(app_configs=None, **kwargs) -> List[checks.CheckMessage]:
+    """系统检查（runserver/migrate/check 时输出）。"""
+    problem = shared_backend_problem()
+    return [checks.Warning(problem, id="core.W001")] if problem else []
+
+
+@dataclass(frozen=True)
+class Limit:
+    """一个限流维度：容量 capacity，每秒回填 refill_rate 个令牌；扣减后须至少剩 reserve 个。"""
+    key: str
+    capacity: float
+    refill_rate: float
+    reserve: float = 0.0
+
+
+@dataclass
+class Decision:
+    allowed: bool
+    remaining: float
+    retry_after: float
+
+
+class SharedRateLimiter:
+    """共享限流引擎：acquire() 对多个维度原子地判定并扣减同一 cost。"""
+
+    def __init__(self, alias: Optional[str] = None):
+        self.alias = alias
+        self._scripts: Dict[int, Any] = {}
+
+    def _cache(self):
+        alias = self.alias or _conf()["cache_alias"]
+        if alias not in _warned:  # gunicorn 不跑系统检查：worker 首次使用时再告警一次
+            _warned.add(alias)
+            problem = shared_backend_problem(alias)
+            if problem:
+                logger.warning(problem)
+        return caches[alias]
+
+    def _redis(self, be) -> Any:
+        """取底层 redis 客户端；非 Redis 后端返回 None。"""
+        inner = getattr(be, "_cache", None)
+        if inner is not None and hasattr(inner, "get_client"):  # django.core.cache.backends.redis
+            return inner.get_client(None, write=True)
+        client = getattr(be, "client", None)
+        if client is not None and hasattr(client, "get_client"):  # django-redis
+            return client.get_client(write=True)
+        return None
+
+    def acquire(self, limits: Sequence[Limit], cost: float = 1.0) -> Decision:
+        limits = [lim for lim in limits if lim.capacity > 0 and lim.refill_rate > 0]
+        if not limits:
+            return Decision(True, float("inf"), 0.0)
+        cost = max(0.0, float(cost))
+        be = self._cache()
+        client = self._redis(be)
+        if client is not None:
+            return self._acquire_redis(be, client, limits, cost)
+        return self._acquire_counter(be, limits, cost)
+
+    def _acquire_redis(self, be, client, limits: List[Limit], cost: float) -> Decision:
+        script = self._scripts.get(id(client))
+        if script is None:
+            script = self._scripts[id(client)] = client.register_script(_LUA)
+        args: List[Any] = [cost]
+        for lim in limits:
+            args += [float(lim.capacity), float(lim.refill_rate), float(lim.reserve)]
+        allowed, remaining, wait = script(keys=[be.make_key(lim.key) for lim in limits], args=args)
+        return Decision(bool(int(allowed)), float(remaining), float(wait))
+
+    def _acquire_counter(self, be, limits: List[Limit], cost: float) -> Decision:
+        """窗口长度 = capacity / refill_rate（桶从空回填至满的时间），窗口内累计 cost 不超过 capacity。"""
+        now = time.time()
+        units = int(math.ceil(cost * _SCALE))
+        taken: List[str] = []
+        allowed, remaining, wait = True, float("inf"), 0.0
+        for lim in limits:
+            window = max(1.0, lim.capacity / lim.refill_rate)
+            slot = int(now // window)
+            key = f"{lim.key}:{slot}"
+            try:
+                used = be.incr(key, units)
+            except ValueError:
+                be.add(key, 0, timeout=int(window) + 1)
+                used = be.incr(key, units)
+            taken.append(key)
+            left = lim.capacity - used / _SCALE
+            if left < lim.reserve:
+                allowed = False
+                wait = max(wait, (slot + 1) * window - now)
+            remaining = min(remaining, left)
+        if not allowed:  # 未通过则退回本次计数，被拒请求不占额度
+            for key in taken:
+                try:
+                    be.decr(key, units)
+                except ValueError:
+                    pass
+            remaining += cost
+        return Decision(allowed, max(0.0, remaining), wait)
 
 
 class RateLimiter:
-    """按 tenant_id 管理的简单限速器。"""
+    """编排器按租户的 LLM 调用限流（共享令牌桶）；保留 is_allowed(tenant_id, cost) 接口。"""
+
+    def __init__(self, engine: Optional[SharedRateLimiter] = None):
+        self.engine = engine or SharedRateLimiter()
 
-    def __init__(self, capacity: int = 30, refill_rate: float = 0.5):
-        self.capacity = capacity
-        self.refill_rate = refill_rate
-        self.buckets: Dict[str, TokenBucket] = {}
+    @staticmethod
+    def cost_for(tokens: int) -> float:
+        """按估算 token 加权：不足 tokens_per_unit 的请求计 1。"""
+        return max(1.0, float(tokens or 0) / max(1.0, float(_conf()["tokens_per_unit"])))
 
-    def is_allowed(self, tenant_id: str, cost: float = 1.0) -> bool:
-        b = self.buckets.get(tenant_id)
-        if not b:
-            b = self.buckets[tenant_id] = TokenBucket(self.capacity, self.refill_rate)
-        return b.allow(cost)
+    def is_allowed(self, tenant_id: str, cost: float = 1.0, *, priority: str = "interactive") -> bool:
+        """priority="batch" 时只使用 batch_reserve 以上的额度（离线任务让位于交互请求）。"""
+        c = _conf()
+        cap = float(c["llm_capacity"])
+        reserve = cap * float(c["batch_reserve"]) if priority == "batch" else 0.0
+        lim = Limit(f"ai:rl:llm:{tenant_id}", cap, float(c["llm_refill_rate"]), reserve)
+        return self.engine.acquire([lim], cost).allowed
 
 
 # 单例（可直接导入使用）
-rate_limiter = RateLimiter()
+shared_limiter = SharedRateLimiter()
+rate_limiter = RateLimiter(shared_limiter)
@@ -0,0 +1,222 @@
+# file: core/utils/singleflight.py
+# purpose: 请求合并（singleflight）：同一 key 的并发计算只执行一次，其余调用方等待并共享结果。
+#          进程内：首个调用者（leader）执行，其余线程/协程等待同一结果（异常同样共享）；
+#          跨 worker：leader 以 cache.add 抢占锁（值为本次 flight id），结果按 flight id 短暂写入缓存，
+#          其他 worker 轮询该结果；等待超时或 leader 失败时调用方自行计算（不会因合并而失败）
+# 配置：settings.AI_SINGLEFLIGHT = {"enabled": True, "distributed": True, "timeout_s": 30, "lock_ttl_s": 60,
+#                                   "result_ttl_s": 10, "poll_ms": 50}
+
+from __future__ import annotations
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from core.observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_DEFAULTS: Dict[str, Any] = {"enabled": True, "distributed": True, "timeout_s": 30, "lock_ttl_s": 60,
+                             "result_ttl_s": 10, "poll_ms": 50}
+_MISSING = object()
+
+
+def _conf() -> Dict[str, Any]:
+    return {**_DEFAULTS, **(getattr(settings, "AI_SINGLEFLIGHT", None) or {})}
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+_lock = threading.Lock()
+_calls: Dict[str, _Call] = {}
+_tasks: Dict[Tuple[int, str], "asyncio.Future[Any]"] = {}  # (事件循环 id, key) → 进行中的协程
+
+
+def _lock_key(key: str) -> str:
+    return f"sf:lock:{key}"
+
+
+def _result_key(key: str, flight: str) -> str:
+    return f"sf:res:{key}:{flight}"
+
+
+def _count(outcome: str) -> None:
+    REGISTRY.counter_inc("singleflight_total", {"outcome": outcome})
+
+
+# -------- 跨 worker（缓存锁） --------
+
+def _claim(key: str, c: Dict[str, Any]) -> Tuple[bool, str]:
+    """抢占分布式锁：返回 (是否为 leader, flight id)。"""
+    flight = uuid.uuid4().hex
+    if cache.add(_lock_key(key), flight, timeout=int(c["lock_ttl_s"])):
+        return True, flight
+    return False, str(cache.get(_lock_key(key)) or "")
+
+
+def _publish(key: str, flight: str, value: Any, c: Dict[str, Any]) -> None:
+    try:
+        cache.set(_result_key(key, flight), {"v": value}, timeout=int(c["result_ttl_s"]))
+    except Exception:  # 结果不可序列化时其他 worker 超时后自行计算
+        logger.warning("singleflight publish failed", exc_info=True)
+
+
+def _release(key: str, flight: str) -> None:
+    if cache.get(_lock_key(key)) == flight:
+        cache.delete(_lock_key(key))
+
+
+def _poll(key: str, flight: str) -> Any:
+    """查看其他 worker 的 flight：已出结果返回 {"v": 结果}；锁已释放却无结果（leader 失败）返回 {}；仍在计算返回 _MISSING。"""
+    hit = cache.get(_result_key(key, flight))
+    if hit is not None:
+        return hit
+    if cache.get(_lock_key(key)) != flight:
+        return {}
+    return _MISSING
+
+
+def _compute_distributed(key: str, fn: Callable[[], T], c: Dict[str, Any]) -> Tuple[T, bool]:
+    leader, flight = _claim(key, c)
+    if not leader and flight:
+        deadline = time.monotonic() + float(c["timeout_s"])
+        while time.monotonic() < deadline:
+            got = _poll(key, flight)
+            if got is not _MISSING:
+                if "v" in got:
+                    _count("shared_remote")
+                    return got["v"], True
+                break  # leader 失败：自行计算
+            time.sleep(float(c["poll_ms"]) / 1000.0)
+        else:
+            _count("timeout")
+        leader, flight = _claim(key, c)
+    try:
+        value = fn()
+        if leader:
+            _publish(key, flight, value, c)
+        return value, False
+    finally:
+        if leader:
+            _release(key, flight)
+
+
+def do(key: str, fn: Callable[[], T], *, timeout: Optional[float] = None,
+       distributed: Optional[bool] = None) -> Tuple[T, bool]:
+    """执行或加入同 key 的计算：返回 (结果, 是否为共享结果)。
+    timeout 为跟随者最长等待秒数（默认 timeout_s），超时后自行计算。"""
+    c = _conf()
+    if not c["enabled"]:
+        return fn(), False
+    if timeout is not None:
+        c["timeout_s"] = timeout
+    dist = c["distributed"] if distributed is None else distributed
+    with _lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+    if not leader:
+        if call.done.wait(float(c["timeout_s"])):
+            _count("shared")
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+        _count("timeout")
+        return fn(), False
+    try:
+        if dist:
+            call.value, shared = _compute_distributed(key, fn, c)
+        else:
+            call.value, shared = fn(), False
+        return call.value, shared
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            _calls.pop(key, None)
+        call.done.set()
+
+
+async def ado(key: str, fn: Callable[[], Awaitable[T]], *, timeout: Optional[float] = None,
+              distributed: Optional[bool] = None) -> Tuple[T, bool]:
+    """do() 的协程版本：同一事件循环内的并发协程共享一次 await；跨 worker 同样经缓存锁合并。"""
+    c = _conf()
+    if not c["enabled"]:
+        return await fn(), False
+    if timeout is not None:
+        c["timeout_s"] = timeout
+    dist = c["distributed"] if distributed is None else distributed
+    loop = asyncio.get_running_loop()
+    slot = (id(loop), key)
+    fut = _tasks.get(slot)
+    if fut is not None:
+        try:
+            value = await asyncio.wait_for(asyncio.shield(fut), float(c["timeout_s"]))
+            _count("shared")
+            return value, True
+        except asyncio.TimeoutError:
+            _count("timeout")
+            return await fn(), False
+        except asyncio.CancelledError:
+            if not fut.cancelled():  # 自身被取消
+                raise
+            return await fn(), False  # leader 被取消：自行计算
+    fut = _tasks[slot] = loop.create_future()
+    try:
+        shared = False
+        if dist:
+            value, shared = await _acompute_distributed(key, fn, c)
+        else:
+            value = await fn()
+        fut.set_result(value)
+        return value, shared
+    except asyncio.CancelledError:
+        fut.cancel()
+        raise
+    except BaseException as e:
+        fut.set_exception(e)
+        fut.exception()  # 无跟随者时避免 "exception was never retrieved"
+        raise
+    finally:
+        _tasks.pop(slot, None)
+
+
+async def _acompute_distributed(key: str, fn: Callable[[], Awaitable[T]], c: Dict[str, Any]) -> Tuple[T, bool]:
+    leader, flight = await sync_to_async(_claim)(key, c)
+    if not leader and flight:
+        deadline = time.monotonic() + float(c["timeout_s"])
+        while time.monotonic() < deadline:
+            got = await sync_to_async(_poll)(key, flight)
+            if got is not _MISSING:
+                if "v" in got:
+                    _count("shared_remote")
+                    return got["v"], True
+                break
+            await asyncio.sleep(float(c["poll_ms"]) / 1000.0)
+        else:
+            _count("timeout")
+        leader, flight = await sync_to_async(_claim)(key, c)
+    try:
+        value = await fn()
+        if leader:
+            await sync_to_async(_publish)(key, flight, value, c)
+        return value, False
+    finally:
+        if leader:
+            await sync_to_async(_release)(key, flight)
@@ -0,0 +1,102 @@
+# file: core/views/ai/batch/job.py
+# purpose: 离线 LLM 批处理作业接口：提交（多条提示词一个作业）/列表/进度与结果/取消/重试失败条目；
+#          提交后由 `manage.py ai_batch_run` 调度进程消费（见 core.ai.batch）
+from __future__ import annotations
+from django.views import View
+from django.http import HttpRequest
+from core.views.utils import ok, fail, get_json, get_enterprise
+from core.ai import batch
+from core.models.ai_batch import AiBatchItem, AiBatchJob
+
+_MAX_PROMPTS = 10000
+
+
+class BatchJobView(View):
+    """/api/ai/batch/job/
+    GET  : 作业列表（按 tenant，支持 status 与分页）
+    POST : 提交作业 {prompts: [str | {id, prompt}], agent?, title?, priority?, max_attempts?}
+    """
+
+    def get(self, request: HttpRequest):
+        try:
+            ent = get_enterprise(request, required=True)
+            limit = max(1, min(int(request.GET.get("limit", 20)), 100))
+            offset = int(request.GET.get("offset", 0))
+            qs = AiBatchJob.objects.filter(tenant_id=ent["tenant_id"]).order_by("-created_at")
+            status = (request.GET.get("status") or "").strip()
+            if status:
+                qs = qs.filter(status=status)
+            items = [
+                {"job_id": j.id, "title": j.title, "agent": j.agent, "status": j.status, "priority": j.priority,
+                 "total": j.total, "done": j.done, "failed": j.failed, "created_at": j.created_at}
+                for j in qs[offset: offset + limit]
+            ]
+            return ok({"items": items, "total": qs.count(), "offset": offset, "limit": limit})
+        except Exception as e:
+            return fail(str(e))
+
+    def post(self, request: HttpRequest):
+        try:
+            ent = get_enterprise(request, required=True)
+            payload = get_json(request)
+            prompts = payload.get("prompts")
+            if not isinstance(prompts, list) or not prompts:
+                return fail("prompts must be a non-empty list", status=400)
+            if len(prompts) > _MAX_PROMPTS:
+                return fail(f"at most {_MAX_PROMPTS} prompts per job", status=400)
+            job = batch.submit(
+                tenant_id=ent["tenant_id"], prompts=prompts, agent=str(payload.get("agent") or "batch"),
+                title=str(payload.get("title") or ""), priority=int(payload.get("priority") or 0),
+                max_attempts=payload.get("max_attempts"), created_by=ent.get("user_id") or "",
+            )
+            return ok(batch.progress(job), status=201)
+        except ValueError as e:
+            return fail(str(e), status=400)
+        except Exception as e:
+            return fail(str(e))
+
+
+class BatchJobDetailView(View):
+    """/api/ai/batch/job/<id>/
+    GET  : 进度；?items=1 时附带条目结果（支持 status/offset/limit）
+    POST : {action: "cancel" | "retry"}
+    """
+
+    @staticmethod
+    def _job(request: HttpRequest, job_id: int):
+        ent = get_enterprise(request, required=True)
+        return AiBatchJob.objects.filter(id=job_id, tenant_id=ent["tenant_id"]).first()
+
+    def get(self, request: HttpRequest, job_id: int):
+        try:
+            job = self._job(request, job_id)
+            if not job:
+                return fail("Job not found", status=404)
+            data = batch.progress(job)
+            if request.GET.get("items"):
+                limit = max(1, min(int(request.GET.get("limit", 100)), 500))
+                offset = int(request.GET.get("offset", 0))
+                qs = AiBatchItem.objects.filter(job=job).order_by("idx")
+                if request.GET.get("status"):
+                    qs = qs.filter(status=request.GET["status"])
+                data["items"] = list(qs.values("idx", "custom_id", "status", "attempts", "result", "tokens", "error")
+                                     [offset: offset + limit])
+            return ok(data)
+        except Exception as e:
+            return fail(str(e))
+
+    def post(self, request: HttpRequest, job_id: int):
+        try:
+            job = self._job(request, job_id)
+            if not job:
+                return fail("Job not found", status=404)
+            action = (get_json(request).get("action") or "").strip()
+            if action == "cancel":
+                n = batch.cancel(job)
+            elif action == "retry":
+                n = batch.retry_failed(job)
+            else:
+                return fail("action must be cancel or retry", status=400)
+            return ok({**batch.progress(job), "affected": n})
+        except Exception as e:
+            return fail(str(e))
@@ -0,0 +1,10 @@
+# file: core/views/ai/batch/urls.py
+# purpose: 离线 LLM 批处理路由：作业提交/列表与详情/取消/重试
+from __future__ import annotations
+from django.urls import path
+from .job import BatchJobView, BatchJobDetailView
+
+urlpatterns = [
+    path("job/", BatchJobView.as_view(), name="ai_batch_job"),
+    path("job/<int:job_id>/", BatchJobDetailView.as_view(), name="ai_batch_job_detail"),
+]
@@ -1,13 +1,16 @@
 # file: core/views/ai/bi/nlp_query.py
 # purpose: 自然语言到 SQL 的安全查询接口（POST /api/ai/bi/query/）
-# - 输入：{question, view_key, filters?, order_by?, limit?, with_commentary?}
+# - 输入：{question, view_key, filters?, order_by?, limit?, with_commentary?, stream?}
 # - 过程：调用 LLM 仅生成结构化意图 → 本地拼接安全 SQL → 执行 → 返回 rows 与可选解读
+# - 视图为 async：LLM 走 achat_once，查询经 sync_to_async
 from __future__ import annotations
+from asgiref.sync import sync_to_async
 from typing import Any, Dict
 from django.views import View
 from django.http import HttpRequest
-from core.views.utils import ok, fail, get_json
+from core.views.utils import ok, fail, sse, llm_events, get_json
 from core.ai.orchestrator import Orchestrator
+from core.ai import prompt_data
 from core.ai.bi.schema import HELP_TEXT
 from core.ai.bi.nl2sql import QueryIntent, build_sql
 from core.ai.tools.sql_tool import run_readonly
@@ -16,7 +19,7 @@ from core.ai.tools.sql_tool import run_readonly
 class BiNlpQueryView(View):
     """自然语言问答到受控 SQL 的入口。"""
 
-    def post(self, request: HttpRequest):
+    async def post(self, request: HttpRequest):
         try:
             payload = get_json(request)
             tenant_id = request.headers.get("X-Tenant-Id") or payload.get("tenant_id")
@@ -32,7 +35,7 @@ class BiNlpQueryView(View):
             with_commentary = bool(payload.get("with_commentary", False))
 
             # 1) 让 LLM 输出结构化意图（不直接写 SQL）
-            o = Orchestrator(tenant_id=tenant_id, agent="bi-nl2sql")
+            o = Orchestrator(tenant_id=tenant_id, agent="bi-nl2sql", output="json")
             sys_help = HELP_TEXT.get(view_key, "")
             ask = (
                 "根据业务问题，给出一个受控查询意图 JSON，字段包含：\n"
@@ -43,7 +46,7 @@ class BiNlpQueryView(View):
                 f"业务问题：{question}\n"
                 "请仅输出 JSON，不要多余文字。"
             )
-            resp = o.chat_once(session=None, user_message=ask)
+            resp = await o.achat_once(session=None, user_message=ask)
             raw = resp.get("content") or "{}"
             try:
                 import json
@@ -75,14 +78,16 @@ class BiNlpQueryView(View):
                     params[k] = v
 
             # 4) 执行并返回
-            result = run_readonly(sql, params, tenant_id=tenant_id, limit=limit)
+            result = await sync_to_async(run_readonly)(sql, params, tenant_id=tenant_id, limit=limit)
             out = {"rows": result["rows"], "count": result["count"], "sql": sql}
 
             if with_commentary:
                 msg = (
-                    "你是 BI 分析师。用简洁中文总结 2-3 条洞察，不要复述 SQL，也不要虚构不存在的字段。数据预览：" + str(result["rows"][:20])
+                    "你是 BI 分析师。用简洁中文总结 2-3 条洞察，不要复述 SQL，也不要虚构不存在的字段。数据预览：\n" + prompt_data.encode_rows(result["rows"])
                 )
-                ans = o.chat_once(session=None, user_message=msg)
+                if payload.get("stream"):
+                    return sse(llm_events(request, o, session=None, user_message=msg), first={"type": "result", **out})
+                ans = await o.achat_once(session=None, user_message=msg)
                 out.update({"llm_commentary": ans.get("content"), "trace_id": ans.get("trace_id"), "tokens_spent": ans.get("spent")})
 
             return ok(out)
@@ -1,20 +1,39 @@
 # file: core/views/ai/chat/message.py
-# purpose: Chat 消息接口（POST）— 解析租户/用户与 session → Orchestrator.chat_once → 统一计费与日志
+# purpose: Chat 消息接口（POST）— 解析租户/用户与 session → Orchestrator.chat_once → 统一计费与日志；
+#          stream=true 时以 SSE 逐段返回（Orchestrator.stream_once）；视图为 async，ASGI 下等待 LLM 不占线程
+#          会话上下文与 AiMessage 落库由编排器经 core.ai.session_memory 完成
 from __future__ import annotations
+from asgiref.sync import sync_to_async
 from django.views import View
 from django.http import HttpRequest
 from django.utils import timezone
-from core.views.utils import ok, fail, get_json, get_enterprise
+from core.views.utils import ok, fail, sse, llm_events, get_json, get_enterprise
 from core.ai.orchestrator import Orchestrator
 from core.ai.billing import InsufficientBalance, InsufficientTokens, AccountSuspended
 from core.models.ai_logging import AiChatSession
 
 
+def _get_or_create_session(*, tenant_id: str, user_id, session_id, agent: str, message: str) -> AiChatSession:
+    session = None
+    if session_id:
+        session = AiChatSession.objects.filter(id=session_id, tenant_id=tenant_id).first()
+    if not session:
+        session = AiChatSession.objects.create(
+            tenant_id=tenant_id,
+            user_id=user_id or "",
+            agent=agent,
+            title=(message[:20] or "新会话"),
+            status="active",
+            updated_at=timezone.now(),
+        )
+    return session
+
+
 class ChatMessageView(View):
-    def post(self, request: HttpRequest):
+    async def post(self, request: HttpRequest):
         try:
             payload = get_json(request)
-            ent = get_enterprise(request, required=True)
+            ent = await sync_to_async(get_enterprise)(request, required=True)
             tenant_id = ent.get("tenant_id")
             user_id = ent.get("user_id")
             message = (payload.get("message") or payload.get("text") or "").strip()
@@ -22,23 +41,17 @@ class ChatMessageView(View):
                 return fail("Missing message", status=400)
 
             # 1) 解析/创建会话
-            session_id = payload.get("session_id") or request.GET.get("session_id")
-            session = None
-            if session_id:
-                session = AiChatSession.objects.filter(id=session_id, tenant_id=tenant_id).first()
-            if not session:
-                session = AiChatSession.objects.create(
-                    tenant_id=tenant_id,
-                    user_id=user_id or "",
-                    agent=str(payload.get("agent") or "chat"),
-                    title=(message[:20] or "新会话"),
-                    status="active",
-                    updated_at=timezone.now(),
-                )
+            session = await sync_to_async(_get_or_create_session)(
+                tenant_id=tenant_id, user_id=user_id, session_id=payload.get("session_id") or request.GET.get("session_id"),
+                agent=str(payload.get("agent") or "chat"), message=message,
+            )
 
             # 2) 调用编排器（内部已做预授权、审计与结算）
             o = Orchestrator(tenant_id=tenant_id, agent=session.agent)
-            result = o.chat_once(session=session, user_message=message)
+            if payload.get("stream"):
+                return sse(llm_events(request, o, session=session, user_message=message),
+                           first={"type": "meta", "session_id": str(session.id)})
+            result = await o.achat_once(session=session, user_message=message)
 
             # 3) 成功响应
             return ok({
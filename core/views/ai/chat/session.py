@@ -6,6 +6,7 @@ from django.http import HttpRequest
 from django.utils import timezone
 from core.views.utils import ok, fail, get_json, get_enterprise
 from core.models.ai_logging import AiChatSession, AiMessage
+from core.ai import session_memory
 
 
 class ChatSessionView(View):
@@ -136,6 +137,7 @@ class ChatSessionDetailView(View):
             obj = AiChatSession.objects.filter(id=session_id, tenant_id=tenant_id).first()
             if not obj:
                 return fail("Session not found", status=404)
+            sid = obj.id  # delete() 后实例主键被置空
             # 归档而非硬删除
             if hasattr(obj, "status"):
                 obj.status = "archived"
@@ -143,6 +145,7 @@ class ChatSessionDetailView(View):
                 obj.save(update_fields=["status", "updated_at"])
             else:
                 obj.delete()
-            return ok({"id": str(obj.id), "archived": True})
+            session_memory.forget(tenant_id=tenant_id, session=sid)
+            return ok({"id": str(sid), "archived": True})
         except Exception as e:
             return fail(str(e))
@@ -0,0 +1,38 @@
+# file: core/views/ai/kpi/org_plan.py
+# purpose: 组织级目标分解接口：企业目标按历史占比分到全部门店/员工（按星期权重拆日）并批量保存
+from __future__ import annotations
+from django.views import View
+from django.http import HttpRequest
+from core.views.utils import ok, fail, get_json
+from core.ai.kpi.targets import Period
+from core.ai.kpi.allocation import make_org_targets
+
+
+class KpiOrgPlanView(View):
+    """请求：{"period":{"start","end"},"lift_pct"?:10,"baseline_mode"?:"last_period|yoy","include_employees"?:true,
+    "persist"?:true,"with_daily"?:false}。默认只返回各层级汇总，with_daily=true 时附带按日拆分。"""
+
+    def post(self, request: HttpRequest):
+        try:
+            payload = get_json(request)
+            tenant_id = request.headers.get("X-Tenant-Id") or payload.get("tenant_id")
+            if not tenant_id:
+                return fail("Missing tenant_id", status=400)
+            period = Period.from_payload(payload.get("period") or {})
+            plan = make_org_targets(
+                tenant_id=tenant_id,
+                period=period,
+                goal_lift_pct=float(payload.get("lift_pct", 10)),
+                baseline_mode=payload.get("baseline_mode", "last_period"),
+                include_employees=bool(payload.get("include_employees", True)),
+                persist=bool(payload.get("persist", True)),
+            )
+            if not bool(payload.get("with_daily", False)):
+                for item in plan["stores"] + plan["employees"]:
+                    item.pop("daily", None)
+            plan.update({"store_count": len(plan["stores"]), "employee_count": len(plan["employees"])})
+            return ok(plan)
+        except ValueError as e:
+            return fail(str(e), status=400)
+        except Exception as e:
+            return fail(str(e))
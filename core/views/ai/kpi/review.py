@@ -7,6 +7,7 @@ from core.views.utils import ok, fail, get_json
 from core.ai.kpi.targets import Period
 from core.ai.kpi.review import review
 from core.ai.orchestrator import Orchestrator
+from core.ai import prompt_data
 
 
 class KpiReviewView(View):
@@ -38,7 +39,7 @@ class KpiReviewView(View):
                 msg = (
                     "请用中文总结复盘结论：\n"
                     "- 是否在轨（原因）\n- 2 条纠偏建议（短期/中期）\n"
-                    f"数据: {out}\n"
+                    f"数据:\n{prompt_data.encode(out)}\n"
                 )
                 ans = o.chat_once(session=None, user_message=msg)
                 out.update({"summary": ans.get("content"), "trace_id": ans.get("trace_id"), "tokens_spent": ans.get("spent")})
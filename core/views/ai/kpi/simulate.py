@@ -0,0 +1,35 @@
+# file: core/views/ai/kpi/simulate.py
+# purpose: 情景模拟接口：批量 what-if 情景（客流/客单/毛利率/品类）× 全部门店 → 目标达成概率
+from __future__ import annotations
+from django.views import View
+from django.http import HttpRequest
+from core.views.utils import ok, fail, get_json
+from core.ai.kpi.targets import Period
+from core.ai.kpi.simulate import run_simulation
+
+
+class KpiSimulateView(View):
+    """请求：{"period":{"start","end"},"scenarios":[{"name","traffic_pct","basket_pct","margin_pct","category_pct":{"感冒药":5}}],
+    "targets"?:{"<store_id>":amount},"lookback_days"?:56,"lift_pct"?:10,"with_stores"?:false}。"""
+
+    def post(self, request: HttpRequest):
+        try:
+            payload = get_json(request)
+            tenant_id = request.headers.get("X-Tenant-Id") or payload.get("tenant_id")
+            if not tenant_id:
+                return fail("Missing tenant_id", status=400)
+            period = Period.from_payload(payload.get("period") or {})
+            res = run_simulation(
+                tenant_id=tenant_id,
+                period=period,
+                scenarios=list(payload.get("scenarios") or []),
+                targets=payload.get("targets") or None,
+                lookback_days=int(payload.get("lookback_days", 56)),
+                lift_pct=float(payload.get("lift_pct", 10)),
+                with_stores=bool(payload.get("with_stores", False)),
+            )
+            return ok(res)
+        except ValueError as e:
+            return fail(str(e), status=400)
+        except Exception as e:
+            return fail(str(e))
@@ -6,6 +6,7 @@ from django.http import HttpRequest
 from core.views.utils import ok, fail, get_json
 from core.ai.kpi.targets import Period, make_targets
 from core.ai.orchestrator import Orchestrator
+from core.ai import prompt_data
 
 
 class KpiTargetPlanView(View):
@@ -33,7 +34,7 @@ class KpiTargetPlanView(View):
                 o = Orchestrator(tenant_id=tenant_id, agent="kpi")
                 msg = (
                     "你是经营分析顾问，请用简洁中文说明该目标拆分的依据（历史 vs 目标增幅），并给出 2 条执行建议。\n"
-                    f"计划: {plan}\n"
+                    f"计划:\n{prompt_data.encode(plan)}\n"
                 )
                 ans = o.chat_once(session=None, user_message=msg)
                 plan.update({"commentary": ans.get("content"), "trace_id": ans.get("trace_id"), "tokens_spent": ans.get("spent")})
@@ -1,11 +1,15 @@
 # file: core/views/ai/kpi/urls.py
-# purpose: KPI 路由聚合：target_plan / review
+# purpose: KPI 路由聚合：target_plan / org_plan / simulate / review
 from __future__ import annotations
 from django.urls import path
 from .target_plan import KpiTargetPlanView
+from .org_plan import KpiOrgPlanView
 from .review import KpiReviewView
+from .simulate import KpiSimulateView
 
 urlpatterns = [
     path("target_plan/", KpiTargetPlanView.as_view(), name="ai_kpi_target_plan"),
+    path("org_plan/", KpiOrgPlanView.as_view(), name="ai_kpi_org_plan"),
+    path("simulate/", KpiSimulateView.as_view(), name="ai_kpi_simulate"),
     path("review/", KpiReviewView.as_view(), name="ai_kpi_review"),
 ]
@@ -5,6 +5,7 @@ from django.http import HttpRequest
 from core.views.utils import ok, fail, get_json
 from core.ai.ops.daily_insight import compute_daily_metrics
 from core.ai.orchestrator import Orchestrator
+from core.ai import prompt_data
 
 
 class OpsDailyInsightView(View):
@@ -19,7 +20,7 @@ class OpsDailyInsightView(View):
             # 调 LLM 输出洞察
             prompt = (
                 "请基于以下指标给出 3 条可执行的运营洞察，并建议一张合适的可视化图表类型。\n" \
-                f"指标: {metrics}\n"
+                f"指标: {prompt_data.encode(metrics)}\n"
             )
             o = Orchestrator(tenant_id=tenant_id, agent="ops")
             ans = o.chat_once(session=None, user_message=prompt)
@@ -7,6 +7,7 @@ from django.http import HttpRequest
 from core.views.utils import ok, fail, get_json
 from core.ai.strategy.price import suggest_prices, PriceBound
 from core.ai.orchestrator import Orchestrator
+from core.ai import prompt_data
 
 
 class StrategyPriceView(View):
@@ -40,7 +41,7 @@ class StrategyPriceView(View):
             if with_explain:
                 o = Orchestrator(tenant_id=tenant_id, agent="strategy-price")
                 prompt = (
-                    "你是定价策略专家。根据如下建议价列表，给出 3 条面向运营的中文建议，不要复述明细：\n" + str(sugs[:20])
+                    "你是定价策略专家。根据如下建议价列表，给出 3 条面向运营的中文建议，不要复述明细：\n" + prompt_data.encode_rows(sugs)
                 )
                 ans = o.chat_once(session=None, user_message=prompt)
                 out.update({"explain": ans.get("content"), "trace_id": ans.get("trace_id"), "tokens_spent": ans.get("spent")})
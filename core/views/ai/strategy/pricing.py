@@ -6,6 +6,7 @@ from django.http import HttpRequest
 from core.views.utils import ok, fail, get_json
 from core.ai.strategy.pricing import suggest_price
 from core.ai.orchestrator import Orchestrator
+from core.ai import prompt_data
 
 
 class StrategyPricingView(View):
@@ -28,7 +29,7 @@ class StrategyPricingView(View):
                     "你是零售定价专家。请用简洁中文解释以下定价建议，列出：\n"
                     "1) 该价格如何满足毛利/竞品约束 \n"
                     "2) 可能的风险与监控指标 \n"
-                    f"定价数据: {res}\n"
+                    f"定价数据: {prompt_data.encode(res)}\n"
                 )
                 ans = o.chat_once(session=None, user_message=explain_prompt)
                 out.update({"commentary": ans.get("content"), "trace_id": ans.get("trace_id"), "tokens_spent": ans.get("spent")})
@@ -6,10 +6,11 @@ from django.http import HttpRequest
 from core.views.utils import ok, fail, get_json
 from core.ai.strategy.promo import suggest_promotions
 from core.ai.orchestrator import Orchestrator
+from core.ai import prompt_data
 
 
 class StrategyPromoView(View):
-    """返回促销候选 SKU。请求：{"top_k"?:20,"lookback"?:14,"with_explain"?:true}。"""
+    """返回促销候选 SKU。请求：{"top_k"?:20,"lookback"?:14,"store_id"?:1,"per_store"?:false,"rank_by"?:"drop|roi","with_explain"?:true}。"""
 
     def post(self, request: HttpRequest):
         try:
@@ -19,15 +20,19 @@ class StrategyPromoView(View):
                 return fail("Missing tenant_id", status=400)
             top_k = int(payload.get("top_k", 20))
             lookback = int(payload.get("lookback", 14))
+            store_id = payload.get("store_id")
+            per_store = bool(payload.get("per_store", False))
+            rank_by = str(payload.get("rank_by") or "drop")
             with_explain = bool(payload.get("with_explain", False))
 
-            items = suggest_promotions(tenant_id=tenant_id, top_k=top_k, lookback=lookback)
+            items = suggest_promotions(tenant_id=tenant_id, top_k=top_k, lookback=lookback, store_id=store_id,
+                                       per_store=per_store, rank_by=rank_by)
             out = {"items": items, "count": len(items)}
 
             if with_explain:
                 o = Orchestrator(tenant_id=tenant_id, agent="strategy-promo")
                 prompt = (
-                    "你是促销策划专家。请基于候选清单提供 3 条执行建议（时长/折扣/渠道），避免复述数据：\n" + str(items[:20])
+                    "你是促销策划专家。请基于候选清单提供 3 条执行建议（时长/折扣/渠道），避免复述数据：\n" + prompt_data.encode_rows(items)
                 )
                 ans = o.chat_once(session=None, user_message=prompt)
                 out.update({"explain": ans.get("content"), "trace_id": ans.get("trace_id"), "tokens_spent": ans.get("spent")})
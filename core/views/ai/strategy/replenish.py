@@ -7,6 +7,7 @@ from django.http import HttpRequest
 from core.views.utils import ok, fail, get_json
 from core.ai.strategy.replenish import suggest_replenishment
 from core.ai.orchestrator import Orchestrator
+from core.ai import prompt_data
 
 
 class StrategyReplenishView(View):
@@ -33,7 +34,7 @@ class StrategyReplenishView(View):
             if with_explain:
                 o = Orchestrator(tenant_id=tenant_id, agent="strategy-replenish")
                 prompt = (
-                    "你是库存补货专家。请基于以下结果，给门店/仓库提供 3 条落地建议（频率/批量/阈值），避免复述数据：\n" + str(items[:20])
+                    "你是库存补货专家。请基于以下结果，给门店/仓库提供 3 条落地建议（频率/批量/阈值），避免复述数据：\n" + prompt_data.encode_rows(items)
                 )
                 ans = o.chat_once(session=None, user_message=prompt)
                 out.update({"explain": ans.get("content"), "trace_id": ans.get("trace_id"), "tokens_spent": ans.get("spent")})
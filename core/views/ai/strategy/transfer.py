@@ -0,0 +1,47 @@
+# file: core/views/ai/strategy/transfer.py
+# purpose: 调拨策略接口：POST /api/ai/strategy/transfer/ → 返回门店间调拨建议与调拨后仍需采购的缺口
+from __future__ import annotations
+from django.views import View
+from django.http import HttpRequest
+from core.views.utils import ok, fail, get_json
+from core.ai.strategy.transfer import suggest_transfers
+from core.ai.orchestrator import Orchestrator
+from core.ai import prompt_data
+
+
+class StrategyTransferView(View):
+    """请求：{"product_ids"?:[...],"store_ids"?:[...],"lookback_days"?:28,"leadtime_days"?:7,"service_level"?:0.95,
+    "review_days"?:7,"costs"?:[{"from":1,"to":2,"cost":3.5}],"default_cost"?:1.0,"with_explain"?:true}。"""
+
+    def post(self, request: HttpRequest):
+        try:
+            payload = get_json(request)
+            tenant_id = request.headers.get("X-Tenant-Id") or payload.get("tenant_id")
+            if not tenant_id:
+                return fail("Missing tenant_id", status=400)
+            default_cost = payload.get("default_cost", 1.0)
+            with_explain = bool(payload.get("with_explain", False))
+
+            plan = suggest_transfers(
+                tenant_id=tenant_id,
+                product_ids=list(payload.get("product_ids") or []) or None,
+                store_ids=list(payload.get("store_ids") or []) or None,
+                lookback_days=int(payload.get("lookback_days", 28)),
+                leadtime_days=float(payload.get("leadtime_days", 7.0)),
+                service_level=float(payload.get("service_level", 0.95)),
+                review_days=float(payload.get("review_days", 7.0)),
+                costs=payload.get("costs") or None,
+                default_cost=None if default_cost is None else float(default_cost),
+            )
+            out = {**plan, "count": len(plan["transfers"])}
+
+            if with_explain:
+                o = Orchestrator(tenant_id=tenant_id, agent="strategy-transfer")
+                prompt = (
+                    "你是门店库存调拨专家。请基于调拨清单给出 3 条执行建议（批次/路线/时效），避免复述数据：\n" + prompt_data.encode_rows(plan["transfers"])
+                )
+                ans = o.chat_once(session=None, user_message=prompt)
+                out.update({"explain": ans.get("content"), "trace_id": ans.get("trace_id"), "tokens_spent": ans.get("spent")})
+            return ok(out)
+        except Exception as e:
+            return fail(str(e))
@@ -1,5 +1,5 @@
 # file: core/views/ai/system/model.py
-# purpose: 模型提供商与偏好设置 API（用户级与租户级）；配合 core/ai/model_prefs.py
+# purpose: 模型提供商与偏好设置 API（用户级与租户级）及租户路由覆盖；配合 core/ai/model_prefs.py、core/ai/llm/policy.py
 from __future__ import annotations
 from django.views import View
 from django.http import HttpRequest
@@ -11,8 +11,12 @@ from core.ai.model_prefs import (
     set_user_model,
     get_tenant_default_model,
     set_tenant_default_model,
+    list_tenant_routes,
+    set_tenant_route,
+    delete_tenant_route,
     InvalidProvider,
 )
+from core.ai.llm import policy as model_policy
 
 
 class ModelProviderListView(View):
@@ -96,3 +100,40 @@ class TenantDefaultModelView(View):
             return fail(str(e), status=400)
         except Exception as e:
             return fail(str(e))
+
+
+class ModelRouteView(View):
+    """GET/POST/DELETE /api/ai/system/model/routes/
+    GET   : 租户路由覆盖列表 + 各路由实测统计（p50/p90 延迟、平均 token）
+    POST  : 设置 {agent?="*", tier?(light/standard/flagship), provider?, model_name?, is_active?}
+    DELETE: ?agent=xxx 删除覆盖，回到全局规则
+    """
+    def get(self, request: HttpRequest):
+        try:
+            ent = get_enterprise(request, required=True)
+            return ok({"routes": list_tenant_routes(tenant_id=ent["tenant_id"]), "stats": model_policy.snapshot()})
+        except Exception as e:
+            return fail(str(e))
+
+    def post(self, request: HttpRequest):
+        try:
+            ent = get_enterprise(request, required=True)
+            payload = get_json(request)
+            data = set_tenant_route(tenant_id=ent["tenant_id"], agent=(payload.get("agent") or "*").strip(),
+                                    tier=payload.get("tier"), provider=payload.get("provider"),
+                                    model_name=payload.get("model_name"), is_active=bool(payload.get("is_active", True)))
+            return ok({"route": data})
+        except (InvalidProvider, ValueError) as e:
+            return fail(str(e), status=400)
+        except Exception as e:
+            return fail(str(e))
+
+    def delete(self, request: HttpRequest):
+        try:
+            ent = get_enterprise(request, required=True)
+            agent = (request.GET.get("agent") or "").strip()
+            if not agent:
+                return fail("Missing agent", status=400)
+            return ok({"deleted": delete_tenant_route(tenant_id=ent["tenant_id"], agent=agent)})
+        except Exception as e:
+            return fail(str(e))
@@ -4,7 +4,7 @@
 from __future__ import annotations
 from django.urls import path
 from .billing import TokenBalanceView, TokenTopupView
-from .model import ModelProviderListView, ModelPreferenceView, TenantDefaultModelView
+from .model import ModelProviderListView, ModelPreferenceView, TenantDefaultModelView, ModelRouteView
 from .usage import UsageSummaryView, RecentRunsView
 from .health import AiHealthView, AiSelfcheckView
 from .docs import AiOpenApiJsonView, AiDocsView, AiErrorCodesView
@@ -22,6 +22,7 @@ urlpatterns = [
     path("model/providers/", ModelProviderListView.as_view(), name="ai_model_providers"),
     path("model/preference/", ModelPreferenceView.as_view(), name="ai_model_preference"),
     path("model/tenant_default/", TenantDefaultModelView.as_view(), name="ai_model_tenant_default"),
+    path("model/routes/", ModelRouteView.as_view(), name="ai_model_routes"),
 
     # 用量
     path("usage/summary/", UsageSummaryView.as_view(), name="ai_usage_summary"),
@@ -12,4 +12,5 @@ urlpatterns = [
     path("strategy/", include("core.views.ai.strategy.urls")),
     path("kpi/", include("core.views.ai.kpi.urls")),
     path("mock/", include("core.views.ai.mock.urls")),
+    path("batch/", include("core.views.ai.batch.urls")),
 ]
@@ -6,6 +6,10 @@ from .base import BaseSyncView
 
 
 class BaseAppendOnlySyncView(BaseSyncView):
+    def _bulk_insert(self, enterprise, objects):
+        """在事务内批量插入（已存在的记录忽略）；子类可覆盖以附加同事务内的处理。"""
+        self.model.objects.bulk_create(objects, ignore_conflicts=True)
+
     def post(self, request, *args, **kwargs):
         enterprise = request.auth.enterprise
         data_list = request.data
@@ -19,7 +23,7 @@ class BaseAppendOnlySyncView(BaseSyncView):
             objects_to_create = [self.model(**data) for data in processed_data_list]
             
             with transaction.atomic():
-                self.model.objects.bulk_create(objects_to_create, ignore_conflicts=True)
+                self._bulk_insert(enterprise, objects_to_create)
         except Exception as e:
             return Response({"error": f"批量插入数据时出错: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
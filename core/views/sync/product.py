@@ -1,7 +1,15 @@
 from .base_batch import BaseBatchSyncView
 from ...models.product import Product
+from ...ai.catalog.knowledge import learn_after_sync
 
 class ProductBatchSyncView(BaseBatchSyncView):
     model = Product
     lookup_field = 'source_product_id'
-    unique_fields_for_error_handling = {'enterprise_id_product_code': 'product_code'}
\ No newline at end of file
+    unique_fields_for_error_handling = {'enterprise_id_product_code': 'product_code'}
+
+    def post(self, request, *args, **kwargs):
+        response = super().post(request, *args, **kwargs)
+        if response.status_code == 200:
+            # 企业自带的标准分类视为已确认，沉淀到跨租户分类知识库
+            learn_after_sync(request.auth.enterprise.id, request.data)
+        return response
\ No newline at end of file
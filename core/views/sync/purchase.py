@@ -1,10 +1,22 @@
 from .base_append_only import BaseAppendOnlySyncView
-from ...models import Purchase, Purchase, Supplier
+from ...models import Product, Purchase, Supplier
+from ...ai.strategy.leadtime import refresh_after_sync
 
 
 class PurchaseBatchSyncView(BaseAppendOnlySyncView):
     model = Purchase
     foreign_key_lookups = {
-        'product': ('product_id', Purchase, 'source_product_id'),
+        'product': ('product_id', Product, 'source_product_id'),
         'supplier': ('supplier_id', Supplier, 'source_supplier_id'),
-    }
\ No newline at end of file
+    }
+
+    def post(self, request, *args, **kwargs):
+        response = super().post(request, *args, **kwargs)
+        if response.status_code == 200:
+            # 同步成功后刷新本批 SKU 的供应商提前期/EOQ 缓存表
+            enterprise = request.auth.enterprise
+            source_ids = {str(item.get('product_id')) for item in request.data if item.get('product_id')}
+            product_ids = list(Product.objects.filter(enterprise=enterprise, source_product_id__in=source_ids)
+                               .values_list('id', flat=True))
+            refresh_after_sync(tenant_id=str(enterprise.id), product_ids=product_ids)
+        return response
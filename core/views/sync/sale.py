@@ -1,5 +1,7 @@
+from django.db import transaction
 from .base_append_only import BaseAppendOnlySyncView
 from ...models import Sale, Product, Store, Member, Employee
+from ...ai.kpi.counters import lock_tenant, record_sales
 
 
 class SaleBatchSyncView(BaseAppendOnlySyncView):
@@ -9,4 +11,27 @@ class SaleBatchSyncView(BaseAppendOnlySyncView):
         'store': ('store_id', Store, 'source_store_id'),
         'member': ('member_id', Member, 'source_member_id'),
         'employee': ('employee_id', Employee, 'source_employee_id'),
-    }
\ No newline at end of file
+    }
+
+    def _bulk_insert(self, enterprise, objects):
+        # 持租户计数器锁判定哪些明细是本次新增，并在同一事务内插入与累加：
+        # 并发重放同一批次时后到者等待锁，之后读到已插入的明细，不会重复累加
+        tenant_id = str(enterprise.id)
+        with transaction.atomic():
+            lock_tenant(tenant_id)
+            source_ids = {o.source_sale_id for o in objects}
+            existing = set(
+                Sale.objects.select_for_update()  # 加锁读：取最新已提交数据而非事务快照
+                .filter(enterprise=enterprise, source_sale_id__in=source_ids)
+                .values_list('source_sale_id', 'source_sale_detail_id')
+            )
+            seen = set()
+            new_objects = []
+            for o in objects:
+                key = (o.source_sale_id, o.source_sale_detail_id)
+                if key in existing or key in seen:
+                    continue
+                seen.add(key)
+                new_objects.append(o)
+            super()._bulk_insert(enterprise, objects)
+            record_sales(tenant_id, new_objects)
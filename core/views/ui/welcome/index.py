@@ -12,6 +12,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from core.models import Sale, Store
+from core.ai.kpi.counters import has_counters, store_totals
+from core.utils import singleflight
 from core.views.utils import (
     get_enterprise,
     get_date_range_from_request,
@@ -300,20 +302,29 @@ def kpi_stores_progress(request):
         today = timezone.localdate()
         sd, ed = today, today
 
-    q = Sale.objects.filter(enterprise=enterprise, sale_time__date__gte=sd, sale_time__date__lte=ed)
-    per_store = (
-        q.values("store_id", "store__name")
-        .annotate(current=Coalesce(Sum("total_amount"), Decimal(0)))
-    )
-
-    # 目标：使用「区间外的最近7天日均 * 区间天数 * 1.05」做基线
     days = (ed - sd).days + 1
-    last7_base = Sale.objects.filter(
-        enterprise=enterprise,
-        sale_time__date__gte=sd - timezone.timedelta(days=7),
-        sale_time__date__lt=sd,
-    ).values("store_id").annotate(hist=Coalesce(Sum("total_amount"), Decimal(0)))
-    last7_map = {r["store_id"]: float(r["hist"] or 0) for r in last7_base}
+    tenant_id = str(enterprise.id)
+    if has_counters(tenant_id):
+        # 门店×日 累计计数器：读取量与销售明细量无关
+        cur_map = store_totals(tenant_id, sd, ed)
+        hist_map = store_totals(tenant_id, sd - timezone.timedelta(days=7), sd - timezone.timedelta(days=1))
+        names = dict(Store.objects.filter(id__in=[int(k) for k in cur_map]).values_list("id", "name"))
+        per_store = [{"store_id": int(k), "store__name": names.get(int(k)), "current": v} for k, v in cur_map.items()]
+        last7_map = {int(k): v for k, v in hist_map.items()}
+    else:
+        q = Sale.objects.filter(enterprise=enterprise, sale_time__date__gte=sd, sale_time__date__lte=ed)
+        per_store = (
+            q.values("store_id", "store__name")
+            .annotate(current=Coalesce(Sum("total_amount"), Decimal(0)))
+        )
+
+        # 目标：使用「区间外的最近7天日均 * 区间天数 * 1.05」做基线
+        last7_base = Sale.objects.filter(
+            enterprise=enterprise,
+            sale_time__date__gte=sd - timezone.timedelta(days=7),
+            sale_time__date__lt=sd,
+        ).values("store_id").annotate(hist=Coalesce(Sum("total_amount"), Decimal(0)))
+        last7_map = {r["store_id"]: float(r["hist"] or 0) for r in last7_base}
 
     data = []
     for r in per_store:
@@ -363,7 +374,14 @@ def ai_dashboard_review(request):
 
     role = (request.data.get("role") or "director").lower()
     sd, ed = get_date_range_from_request(request, default="last7")
+    # 早高峰大量店长同时打开看板：相同企业/角色/区间的并发请求只计算一次
+    payload, _ = singleflight.do(f"ui:review:{enterprise.id}:{role}:{sd}:{ed}",
+                                 lambda: _dashboard_review(enterprise, role, sd, ed))
+    return ok(payload)
+
 
+def _dashboard_review(enterprise, role: str, sd, ed) -> Dict:
+    """AI 复盘数据计算。"""
     base = Sale.objects.filter(enterprise=enterprise, sale_time__date__gte=sd, sale_time__date__lte=ed)
 
     # 总销售额
@@ -446,7 +464,7 @@ def ai_dashboard_review(request):
         ]
 
     # 输出
-    return ok({
+    return {
         "summary": {
             "totalSales": f"¥{int(round(total_sales, 0)):,}",
             "peakHour": f"{int(peak_hour)}:00",
@@ -457,4 +475,4 @@ def ai_dashboard_review(request):
         "highlights": highlights,
         "risks": risks,
         "actions": actions,
-    })
+    }
@@ -1,9 +1,10 @@
 # file: core/views/utils.py
-# purpose: 统一 API/请求工具：ok()/fail()/bad_request()/get_json() +
+# purpose: 统一 API/请求工具：ok()/fail()/bad_request()/sse()/llm_events()/get_json() +
 #          get_enterprise()/get_date_range_from_request()/is_range_mode()/hour_labels()
 from __future__ import annotations
-from typing import Any, Dict, Optional, Tuple, List
-from django.http import JsonResponse, HttpRequest
+from typing import Any, AsyncIterable, Dict, Iterable, Optional, Tuple, List, Union
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, HttpRequest, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 from django.contrib.auth.models import AnonymousUser
@@ -44,6 +45,51 @@ def bad_request(message: str = "Bad request", *, data: Any = None) -> JsonRespon
     return fail(message, status=400, code="bad_request", data=data)
 
 
+def _sse_event(ev: Dict[str, Any]) -> str:
+    return f"event: {ev.get('type', 'message')}\ndata: {json.dumps(ev, ensure_ascii=False, default=str)}\n\n"
+
+
+def _sse_error(e: Exception) -> str:
+    return f"event: error\ndata: {json.dumps({'type': 'error', 'message': str(e)}, ensure_ascii=False)}\n\n"
+
+
+def sse(events: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]], *,
+        first: Optional[Dict[str, Any]] = None) -> StreamingHttpResponse:
+    """Server-Sent Events 响应：每个事件 `event: <type>` + `data: <json>`；first 为先行下发的事件（如检索结果），
+    迭代中的异常转为 error 事件。events 可为异步迭代器（ASGI 下逐块下发，见 llm_events()）。"""
+    def _gen():
+        try:
+            for ev in ([first] if first else []):
+                yield _sse_event(ev)
+            for ev in events:
+                yield _sse_event(ev)
+        except Exception as e:
+            yield _sse_error(e)
+
+    async def _agen():
+        try:
+            for ev in ([first] if first else []):
+                yield _sse_event(ev)
+            async for ev in events:
+                yield _sse_event(ev)
+        except Exception as e:
+            yield _sse_error(e)
+
+    body = _agen() if hasattr(events, "__aiter__") else _gen()
+    resp = StreamingHttpResponse(body, content_type="text/event-stream; charset=utf-8")
+    resp["Cache-Control"] = "no-cache"
+    resp["X-Accel-Buffering"] = "no"  # 关闭 Nginx 缓冲，逐块下发
+    return resp
+
+
+def llm_events(request: HttpRequest, o, **kwargs):
+    """为 sse() 选择编排器的流：ASGI 下用 astream_once（同步生成器会被 Django 整段缓冲）；
+    WSGI 下用 stream_once（异步迭代器在 WSGI 下同样会被整段缓冲）。"""
+    if isinstance(request, ASGIRequest):
+        return o.astream_once(**kwargs)
+    return o.stream_once(**kwargs)
+
+
 # ---- Request helpers --------------------------------------------------------
 
 def get_json(request: HttpRequest, default: Optional[dict] = None) -> dict:
@@ -0,0 +1,65 @@
+# file: scripts/dev/bench_prompt_data.py
+# purpose: 提示词数据编码基准：对比各解读路径原先的 str(rows[:20]) / str(dict) 与 core.ai.prompt_data 编码的估算 token 数
+# 用法：python scripts/dev/bench_prompt_data.py [行数=200]
+from __future__ import annotations
+import json
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+if not settings.configured:
+    settings.configure()
+    django.setup()
+
+from core.ai import prompt_data  # noqa: E402
+from core.ai.llm.providers.base import _estimate_tokens  # noqa: E402
+
+
+def _sales(n: int):
+    rnd = random.Random(7)
+    d0 = date(2025, 8, 1)
+    return [{"biz_date": d0 + timedelta(days=i % 31), "store_id": 1001 + i % 4, "store_name": f"第{i % 4 + 1}分店",
+             "product_id": 50000 + i, "product_name": f"阿莫西林胶囊 0.25g×{24 + i % 3}粒", "category": "OTC",
+             "qty": rnd.randint(1, 80), "amount": Decimal(rnd.randint(1000, 900000)) / 100,
+             "gross_margin": Decimal(rnd.randint(500, 4500)) / 10000, "updated_at": datetime(2025, 9, 1, 8, 30, 12)}
+            for i in range(n)]
+
+
+def _anomalies(n: int):
+    return [{"rule_id": "r_sales_drop", "type": "sales_drop", "store_id": 1001 + i % 4, "product_id": 50000 + i,
+             "drop_pct": 30 + (i * 7) % 50 + 0.123456, "window_sales": float(100 + i), "prev_sales": float(300 + 2 * i),
+             "detected_at": datetime(2025, 9, 2, 9, 0, 0)} for i in range(n)]
+
+
+def _kpi_review(days: int):
+    daily = [{"date": date(2025, 8, 1) + timedelta(days=i), "target": 12000.0 + i * 10.5, "actual": 11000.0 + i * 37.25,
+              "gap": -1000.0 + i * 26.75, "gap_pct": -0.0833 + i * 0.002} for i in range(days)]
+    return {"total_actual": 352123.456, "total_target": 380000.0, "gap": -27876.544, "gap_pct": -0.07336,
+            "on_track": False, "daily": daily}
+
+
+def _row(name: str, before: str, after: str):
+    b, a = _estimate_tokens(before), _estimate_tokens(after)
+    return {"case": name, "repr_tokens": b, "encoded_tokens": a, "saved_pct": round((1 - a / b) * 100, 1) if b else 0.0}
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    sales, anomalies, review = _sales(n), _anomalies(n), _kpi_review(31)
+    cases = [
+        _row("bi_exec rows[:20]", str(sales[:20]), prompt_data.encode_rows(sales)),
+        _row("ops_anomaly items[:20]", str(anomalies[:20]), prompt_data.encode_rows(anomalies)),
+        _row("kpi_review out", str(review), prompt_data.encode(review)),
+    ]
+    print(json.dumps({"rows": n, "cases": cases}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 # file: tests/conftest.py
-# purpose: 测试夹具：默认租户账户、禁用真实 LLM 调用、Django client headers
+# purpose: 测试夹具：默认租户账户、禁用真实 LLM 调用、Django client headers、运行日志不启后台线程
 from __future__ import annotations
 import pytest
 from django.test import Client
@@ -39,5 +39,20 @@ def _mock_orchestrator(monkeypatch):
     def _fake_chat_once(self, session, user_message: str):
         return {"content": f"OK: {user_message[:16]}", "spent": 123, "trace_id": "trace_test"}
 
+    async def _fake_achat_once(self, session, user_message: str):
+        return _fake_chat_once(self, session, user_message)
+
     monkeypatch.setattr(Orchestrator, "chat_once", _fake_chat_once)
-    yield
\ No newline at end of file
+    monkeypatch.setattr(Orchestrator, "achat_once", _fake_achat_once)
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _run_log_inline(settings):
+    """运行日志只入队不起后台线程（测试中由用例显式 flush）。"""
+    from core.ai import run_log
+
+    settings.AI_RUN_LOG = {"worker": False}
+    run_log.clear_local()
+    yield
+    run_log.clear_local()
@@ -0,0 +1,96 @@
+# file: tests/test_ai_batch.py
+# purpose: 离线批处理：提交→调度→结果与进度落库；限流紧张时批处理让位于交互请求（条目退回待处理）；取消与失败重试；接口
+from __future__ import annotations
+from datetime import timedelta
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+from core.ai import batch
+from core.ai.model_prefs import set_tenant_route
+from core.ai.orchestrator import Orchestrator
+from core.models.ai_batch import AiBatchItem
+from core.utils.rate_limit import rate_limiter
+
+_REAL_CHAT_ONCE = Orchestrator.chat_once  # conftest 会替换为假实现
+
+
+@pytest.fixture(autouse=True)
+def _real_llm(settings, monkeypatch):
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    monkeypatch.setattr(Orchestrator, "chat_once", _REAL_CHAT_ONCE)
+    settings.AI_BATCH = {"concurrency": {"*": 1}, "backoff_ms": 0}
+    cache.clear()
+
+
+def test_submit_run_and_collect_results(tenant_id):
+    job = batch.submit(tenant_id=tenant_id, prompts=["商品A 卖点", {"id": "sku-2", "prompt": "商品B 卖点"}, "  "])
+    assert job.total == 2
+    stats = batch.run(job_id=job.id)
+    assert stats["done"] == 2 and stats["failed"] == 0
+    job.refresh_from_db()
+    p = batch.progress(job)
+    assert p["status"] == "done" and p["progress"] == 1.0 and p["tokens_spent"] > 0
+    items = list(AiBatchItem.objects.filter(job=job).order_by("idx"))
+    assert items[1].custom_id == "sku-2" and "商品B 卖点" in items[1].result and items[1].provider
+
+
+def test_batch_yields_to_interactive_when_quota_is_tight(settings, tenant_id):
+    settings.AI_RATE_LIMIT = {"llm_capacity": 4, "llm_refill_rate": 0.001, "batch_reserve": 0.5}
+    job = batch.submit(tenant_id=tenant_id, prompts=[f"q{i}" for i in range(4)])
+    stats = batch.run(job_id=job.id, max_items=4)
+    assert stats["done"] == 2 and stats["deferred"] == 2  # 只用掉 reserve 以上的一半额度
+    assert AiBatchItem.objects.filter(job=job, status="pending", attempts=0).count() == 2
+    assert rate_limiter.is_allowed(tenant_id) and rate_limiter.is_allowed(tenant_id)  # 交互请求仍有余量
+
+
+def test_cancel_and_retry_failed(tenant_id, monkeypatch):
+    job = batch.submit(tenant_id=tenant_id, prompts=["a", "b"], max_attempts=1)
+    monkeypatch.setattr(Orchestrator, "chat_once", lambda self, **kw: (_ for _ in ()).throw(ValueError("boom")))
+    assert batch.run(job_id=job.id)["failed"] == 2
+    job.refresh_from_db()
+    assert job.status == "done" and job.failed == 2
+
+    monkeypatch.setattr(Orchestrator, "chat_once", _REAL_CHAT_ONCE)
+    assert batch.retry_failed(job) == 2 and job.status == "queued" and job.failed == 0
+    assert batch.run(job_id=job.id)["done"] == 2
+
+    other = batch.submit(tenant_id=tenant_id, prompts=["c", "d"])
+    assert batch.cancel(other) == 2 and other.status == "cancelled"
+    assert batch.run(job_id=other.id)["done"] == 0
+
+
+def test_batch_job_api(client_with_tenant):
+    r = client_with_tenant.post("/api/ai/batch/job/", {"prompts": ["x", "y"], "title": "周报"}, content_type="application/json")
+    assert r.status_code == 201
+    job_id = r.json()["data"]["job_id"]
+    batch.run(job_id=job_id)
+    d = client_with_tenant.get(f"/api/ai/batch/job/{job_id}/?items=1").json()["data"]
+    assert d["status"] == "done" and [i["idx"] for i in d["items"]] == [0, 1]
+    assert client_with_tenant.get("/api/ai/batch/job/").json()["data"]["total"] == 1
+    r = client_with_tenant.post(f"/api/ai/batch/job/{job_id}/", {"action": "pause"}, content_type="application/json")
+    assert r.status_code == 400
+
+
+def test_stale_running_items_are_requeued(settings, tenant_id):
+    settings.AI_BATCH = {"concurrency": {"*": 1}, "backoff_ms": 0, "lease_s": 60}
+    job = batch.submit(tenant_id=tenant_id, prompts=["a", "b"], max_attempts=2)
+    items = list(AiBatchItem.objects.filter(job=job).order_by("idx"))
+    # 调度进程在执行中崩溃：两条均超过租约，退回待处理并计一次尝试
+    old = timezone.now() - timedelta(seconds=120)
+    AiBatchItem.objects.filter(job=job).update(status="running", claimed_at=old)
+    assert batch.requeue_stale() == 2
+    assert set(AiBatchItem.objects.filter(job=job).values_list("status", "attempts")) == {("pending", 1)}
+
+    # 再次崩溃：a 的尝试用尽记为失败；b 仍在其他进程的租约内，不动
+    AiBatchItem.objects.filter(job=job).update(status="running", claimed_at=old)
+    AiBatchItem.objects.filter(id=items[1].id).update(claimed_at=timezone.now())
+    assert batch.requeue_stale() == 1
+    job.refresh_from_db()
+    assert job.failed == 1 and AiBatchItem.objects.get(id=items[0].id).status == "failed"
+    assert batch.run(job_id=job.id)["done"] == 0
+
+
+def test_concurrency_uses_routed_provider(tenant_id):
+    set_tenant_route(tenant_id=tenant_id, agent="batch", provider="zhipu")
+    assert batch._provider_for(tenant_id, "batch", {}) == "zhipu"
+    assert batch._provider_for(tenant_id, "chat", {}) != "zhipu"
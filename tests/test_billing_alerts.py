@@ -0,0 +1,32 @@
+# file: tests/test_billing_alerts.py
+# purpose: 低余额预警：热路径只入队不发信；去重窗口内不重复，跌破更低档位立即升级；发件箱投递
+from __future__ import annotations
+from django.core import mail
+from core.ai import billing_alerts
+from core.ai.billing import finalize_or_rollback, topup
+from core.models.ai_billing import AiAlertOutbox, AiTenantTokenAccount
+
+
+def test_dedupe_and_escalation(settings, tenant_id):
+    settings.AI_BILLING_ALERTS = {"worker": False, "dedupe_s": 3600}
+    settings.AI_BILLING_NOTIFY_EMAILS = {"*": ["ops@example.com"]}
+    billing_alerts.clear_local()
+    AiTenantTokenAccount.objects.filter(tenant_id=tenant_id).update(token_balance=1100, soft_limit=1000)
+
+    for _ in range(5):  # 1100 → 900：第 980 时跌破 soft_limit，此后同一档位
+        finalize_or_rollback(tenant_id=tenant_id, run_id=None, actual_tokens=40, success=True)
+    assert len(mail.outbox) == 0  # 热路径不发信
+    assert billing_alerts.drain() == 1
+    assert len(mail.outbox) == 1 and AiAlertOutbox.objects.get().status == "sent"
+
+    finalize_or_rollback(tenant_id=tenant_id, run_id=None, actual_tokens=450, success=True)  # 450 < 0.5 × soft_limit
+    finalize_or_rollback(tenant_id=tenant_id, run_id=None, actual_tokens=10, success=True)
+    assert billing_alerts.drain() == 1
+    assert [o.level for o in AiAlertOutbox.objects.order_by("id")] == [1, 2]
+
+    topup(tenant_id=tenant_id, tokens=5000)  # 恢复后重新跌破会再次告警
+    billing_alerts.clear_local()
+    AiTenantTokenAccount.objects.filter(tenant_id=tenant_id).update(token_balance=950)
+    finalize_or_rollback(tenant_id=tenant_id, run_id=None, actual_tokens=10, success=True)
+    assert billing_alerts.drain() == 1
+    assert len(mail.outbox) == 3
@@ -0,0 +1,116 @@
+# file: tests/test_catalog_categorize.py
+# purpose: 商品自动分类批处理：按预算切批、容错解析、bulk_update 写回、检查点续跑；分类知识库命中时跳过 LLM
+from __future__ import annotations
+import json
+import re
+from django.contrib.auth.models import User
+from django.utils import timezone
+from core.models import Enterprise, Product
+from core.models.ai_catalog import AiCategoryKnowledge
+from core.ai.catalog import knowledge
+from core.ai.catalog.categorize import create_job, pack_batches, parse_result, run_job
+from core.ai.orchestrator import Orchestrator
+
+
+def _products(n):
+    ent = Enterprise.objects.create(name="e", owner=User.objects.create(username="u"))
+    Product.objects.bulk_create([
+        Product(enterprise=ent, source_product_id=f"P{i}", product_code=f"P{i}", name=f"阿莫西林胶囊{i}", specification="0.25g*24粒",
+                retail_price=1, member_price=1, last_modified_at=timezone.now())
+        for i in range(n)
+    ])
+    return ent
+
+
+def test_parse_result_tolerates_noise():
+    text = '好的，结果如下：\n```json\n[{"id": 1, "l1": "化学药", "l2": "抗感染药", "l3": "青霉素类"}, {"id": 99, "l1": "x"}]\n```'
+    assert parse_result(text, [1, 2]) == {1: {"category_l1": "化学药", "category_l2": "抗感染药", "category_l3": "青霉素类"}}
+    broken = '{"id": 2, "category_l1": "中成药", "category_l2": "感冒", "category_l3": ""} {"id": 3, "l1": '
+    assert parse_result(broken, [2, 3]) == {2: {"category_l1": "中成药", "category_l2": "感冒", "category_l3": ""}}
+
+
+def test_job_batches_checkpoints_and_resumes(db, settings, monkeypatch):
+    settings.AI_CATEGORIZE = {"prompt_budget": 200, "max_items": 10, "concurrency": 1}
+    ent = _products(25)
+    prompts = []
+
+    def fake_chat_once(self, *, session, user_message, cache=None):
+        prompts.append(user_message)
+        ids = [int(x) for x in re.findall(r"^(\d+) \|", user_message, re.M)]
+        rows = [{"id": i, "l1": "化学药", "l2": "抗感染药", "l3": "青霉素类"} for i in ids if i % 5]  # 每 5 个漏答 1 个
+        return {"content": json.dumps(rows, ensure_ascii=False), "spent": 10}
+
+    monkeypatch.setattr(Orchestrator, "chat_once", fake_chat_once)
+    assert all(len(b) <= 10 for b in pack_batches(Product.objects.all(), budget=200, max_items=10))
+
+    job = create_job(ent.id)
+    assert job.total == 25
+    run_job(job, max_waves=2)  # 每波 concurrency × max_items = 10 个
+    assert (job.status, job.processed) == ("paused", 20)
+    job.refresh_from_db()
+    run_job(job)  # 从检查点续跑
+    assert job.status == "done" and job.processed == 25
+    assert job.updated == Product.objects.filter(enterprise=ent, category_l1="化学药").count() == 20
+    assert job.failed == 5 and job.tokens_spent == 10 * job.batches
+    assert all(len(re.findall(r"^\d+ \|", p, re.M)) <= 10 for p in prompts)
+
+
+def test_knowledge_short_circuits_llm(db, settings, monkeypatch):
+    settings.AI_CATEGORIZE = {"concurrency": 1}
+    knowledge.reset()
+    owner = User.objects.create(username="k")
+    a = Enterprise.objects.create(name="a", owner=owner)
+    b = Enterprise.objects.create(name="b", owner=owner)
+    common = dict(retail_price=1, member_price=1, last_modified_at=timezone.now())
+    known = [
+        Product(enterprise=a, source_product_id="A1", product_code="A1", name="阿莫西林胶囊", specification="0.25g×24粒",
+                manufacturer="华北制药股份有限公司", standard_product_code="86900001000011", category_l1="化学药",
+                category_l2="抗感染药", category_l3="青霉素类", **common),
+        Product(enterprise=a, source_product_id="A2", product_code="A2", name="布洛芬缓释胶囊", approval_number="国药准字H10900089",
+                category_l1="化学药", category_l2="解热镇痛", category_l3="非甾体抗炎药", **common),
+    ]
+    Product.objects.bulk_create(known)
+    assert knowledge.learn_after_sync(a.id, [{"source_product_id": "A1", "category_l1": "化学药"},
+                                             {"source_product_id": "A2", "category_l1": "化学药"}]) == 4
+
+    Product.objects.bulk_create([
+        Product(enterprise=b, source_product_id="B1", product_code="B1", name="阿莫西林", standard_product_code="86900001000011", **common),
+        Product(enterprise=b, source_product_id="B2", product_code="B2", name="芬必得", approval_number="国药准字 H10900089", **common),
+        Product(enterprise=b, source_product_id="B3", product_code="B3", name="阿莫西林胶囊（新包装）", specification="0.25g*24粒",
+                manufacturer="华北制药", **common),
+        Product(enterprise=b, source_product_id="B4", product_code="B4", name="维生素C片", **common),
+    ])
+    prompts = []
+
+    def fake_chat_once(self, *, session, user_message, cache=None):
+        prompts.append(user_message)
+        ids = [int(x) for x in re.findall(r"^(\d+) \|", user_message, re.M)]
+        return {"content": json.dumps([{"id": i, "l1": "保健食品"} for i in ids], ensure_ascii=False), "spent": 5}
+
+    monkeypatch.setattr(Orchestrator, "chat_once", fake_chat_once)
+    job = run_job(create_job(b.id))
+    assert (job.status, job.updated, job.from_knowledge) == ("done", 4, 3)
+    assert len(prompts) == 1 and "维生素C片" in prompts[0] and "阿莫西林" not in prompts[0]
+    cats = dict(Product.objects.filter(enterprise=b).values_list("source_product_id", "category_l3"))
+    assert cats == {"B1": "青霉素类", "B2": "非甾体抗炎药", "B3": "青霉素类", "B4": None}
+    knowledge.reset()
+
+
+def test_knowledge_override_needs_votes(db):
+    knowledge.reset()
+    owner = User.objects.create(username="v")
+    common = dict(retail_price=1, member_price=1, last_modified_at=timezone.now(), standard_product_code="86900001000011")
+
+    def confirm(i, l3):
+        ent = Enterprise.objects.create(name=f"v{i}", owner=owner)
+        p = Product.objects.create(enterprise=ent, source_product_id="X", product_code="X", name="阿莫西林胶囊",
+                                   category_l1="化学药", category_l2="抗感染药", category_l3=l3, **common)
+        knowledge.learn_from_products([p], tenant_id=str(ent.id))
+        o = AiCategoryKnowledge.objects.get(key_type="std", key="86900001000011")
+        return o.category_l3, o.votes
+
+    assert confirm(1, "青霉素类") == ("青霉素类", 1)
+    assert confirm(2, "青霉素类") == ("青霉素类", 2)
+    assert confirm(3, "头孢类") == ("青霉素类", 1)  # 单个不同确认不能推翻多数
+    assert confirm(4, "头孢类") == ("头孢类", 1)
+    knowledge.reset()
@@ -0,0 +1,37 @@
+# file: tests/test_kpi_allocation.py
+# purpose: KPI：组织级目标自上而下分配（门店/员工占比、星期权重、批量保存）
+from __future__ import annotations
+from datetime import date, timedelta
+import pytest
+from core.ai.kpi.targets import Period
+from core.ai.kpi.allocation import make_org_targets
+from core.models.ai_kpi import AiKpiTarget
+
+
+@pytest.mark.django_db
+def test_org_targets_allocate_and_persist():
+    period = Period(start=date(2024, 3, 4), end=date(2024, 3, 17))  # 两周，周一开始
+    base_start = period.start - timedelta(days=period.days)
+    rows = []
+    for i in range(period.days):
+        d = base_start + timedelta(days=i)
+        weekend = d.weekday() >= 5
+        rows.append(("S1", "E1", d, 200.0 if weekend else 100.0))
+        rows.append(("S1", "E2", d, 100.0 if weekend else 50.0))
+        rows.append(("S2", None, d, 50.0))
+    plan = make_org_targets(tenant_id="t_demo", period=period, goal_lift_pct=10.0, rows_override=rows)
+
+    assert plan["enterprise"]["target"] == round(plan["enterprise"]["baseline"] * 1.1, 2)
+    stores = {s["store_id"]: s for s in plan["stores"]}
+    assert sum(s["target"] for s in stores.values()) == pytest.approx(plan["enterprise"]["target"])
+    s1 = stores["S1"]
+    assert sum(r["target"] for r in s1["daily"]) == pytest.approx(s1["target"])
+    # S1 周末目标约为工作日的两倍
+    assert s1["daily"][5]["target"] == pytest.approx(2 * s1["daily"][0]["target"], rel=1e-3)
+    emps = {e["employee_id"]: e for e in plan["employees"]}
+    assert set(emps) == {"E1", "E2"} and emps["E1"]["target"] == pytest.approx(2 * emps["E2"]["target"], abs=0.01)
+
+    assert plan["saved"] == 1 + 2 + 2
+    assert AiKpiTarget.objects.filter(tenant_id="t_demo", level="employee").count() == 2
+    make_org_targets(tenant_id="t_demo", period=period, rows_override=rows)  # 重复保存为替换
+    assert AiKpiTarget.objects.filter(tenant_id="t_demo").count() == 5
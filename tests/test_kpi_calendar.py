@@ -0,0 +1,55 @@
+# file: tests/test_kpi_calendar.py
+# purpose: KPI：经营日历（2 月 29 日、春节/法定节假日对齐、星期一致）与节假日感知的销量骤降
+from __future__ import annotations
+from datetime import date, timedelta
+from core.ai.kpi import calendar as cal
+from core.ai.kpi.targets import Period, _yoy_period
+from core.ai.ops import anomaly_rules as ar
+
+
+def test_yoy_keeps_weekday_and_handles_feb29():
+    d = date(2024, 2, 29)
+    assert cal.align_yoy(d) == date(2023, 3, 2)
+    assert cal.align_yoy(d).weekday() == d.weekday()
+    p = _yoy_period(Period(start=date(2024, 2, 29), end=date(2024, 3, 6)))
+    assert p.start.weekday() == 3 and p.days == 7
+    plain = date(2024, 7, 10)
+    assert cal.align_yoy(plain) == plain - timedelta(days=364)
+
+
+def test_holidays_align_to_same_festival():
+    # 春节：正月初一对正月初一；节前窗口按相对天数
+    assert cal.align_yoy(date(2025, 1, 29)) == date(2024, 2, 10)
+    assert cal.align_yoy(date(2025, 1, 20)) == date(2024, 2, 1)
+    # 国庆第 3 天 → 去年国庆第 3 天
+    assert cal.align_yoy(date(2024, 10, 3)) == date(2023, 10, 1)
+    assert cal.is_special(date(2025, 2, 10)) and not cal.is_special(date(2025, 3, 20))
+    assert len(cal.yoy_map(2024)) == 366
+
+
+def test_last_period_skips_special_days():
+    m = cal.baseline_dates(date(2025, 3, 3), date(2025, 3, 9))
+    assert all(b == d - timedelta(days=7) for d, b in m.items())
+    # 2 月第二周的上一周落在春节窗口内 → 换成最近的同星期平日
+    m = cal.baseline_dates(date(2025, 2, 24), date(2025, 2, 24))
+    b = m[date(2025, 2, 24)]
+    assert b.weekday() == 0 and not cal.is_special(b)
+
+
+def test_sales_drop_uses_yoy_on_holiday(monkeypatch):
+    today = date(2024, 10, 3)
+    last_year = cal.align_yoy(today)
+
+    def fake_fetch_sales_daily(tenant_id, start, end, group_by):
+        if start == end == last_year:
+            return [{"biz_date": last_year, "store_id": 1, "product_id": 2, "amount": 300.0}]
+        rows = [{"biz_date": start + timedelta(days=i), "store_id": 1, "product_id": 2, "amount": 100.0}
+                for i in range((end - start).days)]
+        rows.append({"biz_date": end, "store_id": 1, "product_id": 2, "amount": 120.0})
+        return rows
+
+    monkeypatch.setattr(ar, "fetch_sales_daily", fake_fetch_sales_daily)
+    rule = ar.Rule(id="r1", type="sales_drop", threshold_pct=30, lookback=7)
+    res = ar.detect_sales_drop(tenant_id="t_demo", start=today - timedelta(days=7), end=today, rule=rule)
+    # 平日均值 100 → 无异常；去年国庆同日 300 → 降幅 60%
+    assert res and res[0]["baseline"] == "yoy" and res[0]["drop_pct"] == 60.0
@@ -0,0 +1,36 @@
+# file: tests/test_kpi_simulate.py
+# purpose: KPI：情景模拟（倍数叠加、品类结构、达成概率；numpy 与纯 Python 结果一致）
+from __future__ import annotations
+import pytest
+from core.ai.kpi.simulate import Baseline, Scenario, simulate, np
+
+
+def _baseline():
+    return Baseline(store_ids=[1, 2], mean=[100.0, 50.0], std=[10.0, 0.0], margin_rate=[0.3, 0.2],
+                    categories=["A", "B"], cat_share=[[0.5, 0.5], [1.0, 0.0]])
+
+
+def test_simulate_scenarios():
+    scs = [Scenario(name="flat"), Scenario(name="mix", traffic_pct=5, basket_pct=-2, category_pct={"B": 10})]
+    res = simulate(_baseline(), scs, targets={"1": 3000.0, "2": 1600.0}, remaining_days=30, use_numpy=False, with_stores=True)
+    flat, mix = res["scenarios"]
+    assert flat["projected_sales"] == 4500.0
+    # 门店 1 期望正好等于目标 → 50%；门店 2 无波动且低于目标 → 0
+    assert [s["attain_prob"] for s in flat["stores"]] == [0.5, 0.0]
+    m1 = 1.05 * 0.98 * (0.5 + 0.5 * 1.1)
+    assert mix["stores"][0]["projected"] == pytest.approx(3000 * m1, abs=0.01)
+    assert mix["stores"][1]["projected"] == pytest.approx(1500 * 1.05 * 0.98, abs=0.01)
+    assert mix["attain_prob"] > flat["attain_prob"]
+
+
+@pytest.mark.skipif(np is None, reason="numpy not installed")
+def test_simulate_numpy_matches_python():
+    scs = [Scenario(name=f"s{i}", traffic_pct=i - 5, basket_pct=1, margin_pct=2, category_pct={"A": i}) for i in range(10)]
+    kw = dict(targets={"1": 3100.0, "2": 1500.0}, remaining_days=20, actuals={"1": 1000.0}, with_stores=True)
+    a = simulate(_baseline(), scs, use_numpy=True, **kw)
+    b = simulate(_baseline(), scs, use_numpy=False, **kw)
+    assert a["engine"] == "numpy" and b["engine"] == "python"
+    for x, y in zip(a["scenarios"], b["scenarios"]):
+        assert x["projected_sales"] == pytest.approx(y["projected_sales"])
+        assert x["attain_prob"] == pytest.approx(y["attain_prob"], abs=1e-4)
+        assert x["projected_margin"] == pytest.approx(y["projected_margin"])
@@ -0,0 +1,68 @@
+# file: tests/test_llm_http.py
+# purpose: LLM 共享 HTTP 连接池：同一 provider 复用连接并记录复用指标
+from __future__ import annotations
+import asyncio
+import gc
+import threading
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from core.ai.llm import http as llm_http
+from core.observability.metrics import REGISTRY
+
+
+class _Stub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_pooled_session_reuses_connection(settings):
+    settings.AI_HTTP_POOL = {"providers": {"stub": {"pool_maxsize": 2, "read_timeout": 5}}}
+    llm_http.reset()
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{srv.server_address[1]}/v1/chat/completions"
+    try:
+        for _ in range(3):
+            assert llm_http.post("stub", url, json={"q": 1}).json() == {"ok": True}
+        assert llm_http.session_for("stub") is llm_http.session_for("stub")
+        assert llm_http.pool_stats()["stub"] == {"requests": 3, "connections": 1, "reused": 2}
+        text = REGISTRY.export_prometheus()
+        assert 'ai_llm_http_connections_total{kind="reused",provider="stub"} 2.0' in text
+    finally:
+        srv.shutdown()
+        llm_http.reset()
+
+
+class _FakeAsyncClient:
+    def __init__(self, **kw):
+        self.is_closed = False
+
+    async def aclose(self):
+        self.is_closed = True
+
+
+def test_async_client_scoped_to_event_loop(monkeypatch):
+    # 每个事件循环一个客户端；循环结束（asyncio.run / async_to_sync）即关闭，且不再被缓存引用
+    monkeypatch.setattr(llm_http, "httpx", SimpleNamespace(Limits=lambda **kw: kw, AsyncClient=_FakeAsyncClient))
+    llm_http.reset()
+
+    async def run():
+        a = await llm_http.async_client_for("stub")
+        assert await llm_http.async_client_for("stub") is a
+        return a
+
+    first, second = asyncio.run(run()), asyncio.run(run())
+    assert first is not second and first.is_closed and second.is_closed
+    gc.collect()
+    assert len(llm_http._async_clients) == 0
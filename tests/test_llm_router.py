@@ -0,0 +1,78 @@
+# file: tests/test_llm_router.py
+# purpose: 多供应商路由：超过 p90 发出对冲取先返回者、异步取消落后者、熔断跳过、仅按胜出调用计费
+from __future__ import annotations
+import asyncio
+import time
+from asgiref.sync import async_to_sync
+from core.ai.llm import router
+from core.ai.orchestrator import Orchestrator
+from core.models.ai_billing import AiTenantTokenAccount
+
+_REAL_CHAT_ONCE = Orchestrator.chat_once  # conftest 会替换为假实现
+
+_CONF = {"enabled": True, "secondary": {"gpt": "mock"}, "min_samples": 5,
+         "breaker": {"error_rate": 0.5, "min_calls": 4, "cooldown_s": 60}}
+
+
+def _warm(key, ms=10.0, n=20):
+    for _ in range(n):
+        router.record(key, ms, True)
+
+
+def test_hedge_when_primary_exceeds_p90(settings):
+    settings.AI_LLM_ROUTER = _CONF
+    router.reset()
+    _warm(("gpt", None))
+
+    def call(provider, model):
+        time.sleep(0.5 if provider == "gpt" else 0.01)
+        return provider
+
+    t0 = time.perf_counter()
+    won = router.chat(router.plan("gpt", None), call)
+    assert (won.provider, won.role, won.result) == ("mock", "hedge", "mock")
+    assert time.perf_counter() - t0 < 0.4
+    router.reset()
+
+
+def test_async_hedge_cancels_loser(settings):
+    settings.AI_LLM_ROUTER = _CONF
+    router.reset()
+    _warm(("gpt", None))
+    cancelled = []
+
+    async def call(provider, model):
+        try:
+            await asyncio.sleep(1.0 if provider == "gpt" else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(provider)
+            raise
+        return provider
+
+    won = async_to_sync(router.achat)(router.plan("gpt", None), call)
+    assert won.provider == "mock" and cancelled == ["gpt"]
+    router.reset()
+
+
+def test_breaker_skips_unhealthy_provider(settings):
+    settings.AI_LLM_ROUTER = _CONF
+    router.reset()
+    for _ in range(4):
+        router.record(("gpt", None), None, False)
+    assert router.is_open(("gpt", None))
+    assert router.plan("gpt", None) == [("mock", None)]
+    router.reset()
+
+
+def test_failover_bills_winner_only(settings, monkeypatch, tenant_id):
+    settings.AI_LLM_ROUTER = _CONF
+    router.reset()
+    monkeypatch.setenv("LLM_PROVIDER", "gpt")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)  # gpt 调用立即失败 → 转 mock
+    before = AiTenantTokenAccount.objects.get(tenant_id=tenant_id).token_balance
+    out = _REAL_CHAT_ONCE(Orchestrator(tenant_id=tenant_id, agent="chat"), session="s1", user_message="你好")
+    assert out["provider"] == "mock" and out["spent"] > 0
+    assert AiTenantTokenAccount.objects.get(tenant_id=tenant_id).token_balance == before - out["spent"]
+    stats = [v for k, v in router.snapshot().items() if k.startswith("gpt:")]
+    assert stats and stats[0]["error_rate"] == 1.0
+    router.reset()
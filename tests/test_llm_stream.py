@@ -0,0 +1,96 @@
+# file: tests/test_llm_stream.py
+# purpose: 流式输出：增量脱敏、Orchestrator.stream_once 结算、BI 解读 SSE 接口（含 ASGI 下逐块下发）
+from __future__ import annotations
+import asyncio
+import json
+import threading
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from core.ai.audit import StreamRedactor, redact
+from core.ai.bi import schema as bi_schema
+from core.ai.llm.providers.mock import MockAdapter
+from core.ai.orchestrator import Orchestrator
+from core.models.ai_billing import AiTenantTokenAccount
+
+
+def test_stream_redactor_matches_full_redaction():
+    text = "请联系 13812345678 或 wang.li@example.com，备用 +86 13900001111。"
+    for size in (1, 2, 3, 5, 7):
+        r = StreamRedactor()
+        out = "".join(r.feed(text[i:i + size]) for i in range(0, len(text), size)) + r.flush()
+        assert out == redact(text) == r.text
+        assert "138" not in out and "@" not in out
+
+
+def test_stream_once_settles_final_usage(monkeypatch, tenant_id):
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    before = AiTenantTokenAccount.objects.get(tenant_id=tenant_id).token_balance
+    events = list(Orchestrator(tenant_id=tenant_id, agent="chat").stream_once(session=None, user_message="电话 13812345678 的会员情况"))
+    deltas = [e["content"] for e in events if e["type"] == "delta"]
+    done = events[-1]
+    assert len(deltas) > 1 and done["type"] == "done" and done["spent"] > 0
+    assert "13812345678" not in "".join(deltas) and "[phone]" in "".join(deltas)
+    assert AiTenantTokenAccount.objects.get(tenant_id=tenant_id).token_balance == before - done["spent"]
+
+
+def test_bi_exec_commentary_sse(client_with_tenant, monkeypatch):
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    monkeypatch.setattr(bi_schema, "ALLOWED_VIEWS", {"migrations": "django_migrations"})
+    body = {"sql": "SELECT app, name FROM django_migrations", "limit": 3, "with_commentary": True, "stream": True}
+    res = client_with_tenant.post("/api/ai/bi/exec/", data=json.dumps(body), content_type="application/json")
+    assert res.status_code == 200 and res["Content-Type"].startswith("text/event-stream")
+    raw = b"".join(res.streaming_content).decode("utf-8")
+    events = [json.loads(line[5:]) for line in raw.splitlines() if line.startswith("data:")]
+    assert events[0]["type"] == "result" and isinstance(events[0]["rows"], list)
+    assert any(e["type"] == "delta" for e in events) and events[-1]["type"] == "done"
+
+
+def test_bi_exec_sse_streams_under_asgi(monkeypatch, settings, tenant_id):
+    """经 ASGIHandler 驱动视图：首个增量须在流结束前送达客户端（不能被整段缓冲）。"""
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    settings.MIDDLEWARE = [m for m in settings.MIDDLEWARE if not m.endswith("CsrfViewMiddleware")]  # 同测试客户端，不校验 CSRF
+    monkeypatch.setattr(bi_schema, "ALLOWED_VIEWS", {"migrations": "django_migrations"})
+    gate, seen = threading.Event(), {}
+
+    def _stream_impl(self, prompt):
+        yield {"delta": "第一条洞察：各门店销量平稳增长。"}
+        seen["released"] = gate.wait(5)  # 客户端收到首个增量后才放行后续内容
+        yield {"delta": "建议：提前补货畅销品。"}
+
+    monkeypatch.setattr(MockAdapter, "_stream_impl", _stream_impl)
+    body = {"sql": "SELECT app, name FROM django_migrations", "limit": 3, "with_commentary": True, "stream": True}
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "scheme": "http",
+        "method": "POST", "path": "/api/ai/bi/exec/", "raw_path": b"/api/ai/bi/exec/", "root_path": "",
+        "query_string": b"", "server": ("testserver", 80), "client": ("127.0.0.1", 50000),
+        "headers": [(b"host", b"testserver"), (b"content-type", b"application/json"),
+                    (b"x-tenant-id", tenant_id.encode())],
+    }
+    inbox = [{"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}]
+    chunks = []
+
+    async def receive():
+        if inbox:
+            return inbox.pop(0)
+        await asyncio.Event().wait()  # 客户端不主动断开
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            chunks.append(message["body"].decode("utf-8"))
+            if chunks[-1].startswith("event: delta"):
+                gate.set()
+
+    # 与 django.test.Client 相同：请求结束时不关闭测试事务中的连接
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    try:
+        async_to_sync(ASGIHandler())(scope, receive, send)
+    finally:
+        request_started.connect(close_old_connections)
+        request_finished.connect(close_old_connections)
+    assert seen["released"] is True
+    events = [json.loads(c.split("data:", 1)[1]) for c in chunks]
+    assert [e["type"] for e in events][:2] == ["result", "delta"] and events[-1]["type"] == "done"
+    assert "".join(e["content"] for e in events if e["type"] == "delta") == "第一条洞察：各门店销量平稳增长。建议：提前补货畅销品。"
@@ -0,0 +1,46 @@
+# file: tests/test_model_prefs.py
+# purpose: 模型偏好解析缓存：重复解析不查库；set_* 写入后立即失效；批量预热
+from __future__ import annotations
+from django.core.cache import cache
+from core.ai.model_prefs import (
+    clear_local_model_prefs,
+    get_effective_model,
+    preload_model_prefs,
+    set_tenant_default_model,
+    set_user_model,
+)
+
+
+def _fresh():
+    cache.clear()
+    clear_local_model_prefs()
+
+
+def test_resolution_cached_and_invalidated(db, tenant_id, django_assert_num_queries):
+    _fresh()
+    set_tenant_default_model(tenant_id=tenant_id, provider="deepseek")
+    assert get_effective_model(tenant_id=tenant_id, user_id="u1").source == "tenant"
+    with django_assert_num_queries(0):
+        assert get_effective_model(tenant_id=tenant_id, user_id="u1").provider == "deepseek"
+
+    set_user_model(tenant_id=tenant_id, user_id="u1", provider="zhipu", model_name="glm-4-flash")
+    em = get_effective_model(tenant_id=tenant_id, user_id="u1")
+    assert (em.provider, em.model_name, em.source) == ("zhipu", "glm-4-flash", "user")
+
+    # 租户级变更同样使该租户下用户条目失效
+    set_user_model(tenant_id=tenant_id, user_id="u1", provider="zhipu", is_active=False)
+    set_tenant_default_model(tenant_id=tenant_id, provider="gemini")
+    assert get_effective_model(tenant_id=tenant_id, user_id="u1").provider == "gemini"
+
+
+def test_preload_many_tenants(db, django_assert_num_queries):
+    _fresh()
+    set_tenant_default_model(tenant_id="t-a", provider="deepseek")
+    set_user_model(tenant_id="t-b", user_id="u9", provider="zhipu")
+    _fresh()
+    with django_assert_num_queries(2):
+        assert preload_model_prefs(["t-a", "t-b", "t-c"], ["u9"]) == 6
+    with django_assert_num_queries(0):
+        assert get_effective_model(tenant_id="t-a", user_id="u9").provider == "deepseek"
+        assert get_effective_model(tenant_id="t-b", user_id="u9").source == "user"
+        assert get_effective_model(tenant_id="t-c", env_provider="gpt").source == "env"
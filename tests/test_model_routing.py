@@ -0,0 +1,57 @@
+# file: tests/test_model_routing.py
+# purpose: 模型路由策略：按 agent/规模/输出结构选档位；用户偏好不被替换；租户覆盖优先且写入即生效；实测统计按路由记录
+from __future__ import annotations
+from django.core.cache import cache
+from core.ai.llm import policy
+from core.ai.model_prefs import clear_local_model_prefs, set_tenant_route, set_user_model
+from core.ai.orchestrator import Orchestrator
+
+_REAL_CHAT_ONCE = Orchestrator.chat_once  # conftest 会替换为假实现
+
+
+def _fresh(settings, **conf):
+    settings.AI_MODEL_ROUTING = {"enabled": True, **conf}
+    cache.clear()
+    clear_local_model_prefs()
+    policy.reset()
+
+
+def _route(tenant_id, agent, tokens=200, output="text", source="tenant"):
+    return policy.route(tenant_id=tenant_id, agent=agent, tokens=tokens, output=output, provider="gpt",
+                        model="gpt-4o", source=source)
+
+
+def test_rules_pick_tier_by_agent_size_and_output(settings, tenant_id):
+    _fresh(settings)
+    assert (_route(tenant_id, "bi-nl2sql").model, _route(tenant_id, "bi-nl2sql").tier) == ("gpt-4o-mini", "light")
+    assert _route(tenant_id, "bi-nl2sql", tokens=9000).tier == "standard"  # 意图抽取但上下文过长
+    assert _route(tenant_id, "ops", output="json").tier == "light"
+    assert _route(tenant_id, "chat").model == "gpt-4o"
+    assert _route(tenant_id, "rag", tokens=20000).tier == "flagship"
+    assert _route(tenant_id, "bi-nl2sql", source="user").model == "gpt-4o"  # 用户显式偏好不替换
+
+    settings.AI_MODEL_ROUTING = {"enabled": False}
+    assert _route(tenant_id, "bi-nl2sql").model == "gpt-4o"
+
+
+def test_tenant_override_wins_and_invalidates(settings, tenant_id):
+    _fresh(settings)
+    set_tenant_route(tenant_id=tenant_id, agent="bi-nl2sql", tier="standard")
+    assert _route(tenant_id, "bi-nl2sql").model == "gpt-4o"
+    set_tenant_route(tenant_id=tenant_id, agent="*", provider="zhipu")
+    r = _route(tenant_id, "ops")
+    assert (r.provider, r.model, r.source) == ("zhipu", "glm-4", "tenant")
+    assert _route("t_other", "ops").provider == "gpt"
+
+
+def test_orchestrator_routes_and_records_stats(settings, monkeypatch, tenant_id):
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    _fresh(settings, tiers={"light": {"mock": "mock-lite"}})
+    set_user_model(tenant_id=tenant_id, user_id="u1", provider="mock", model_name="mock-pinned")
+    o = Orchestrator(tenant_id=tenant_id, agent="bi-nl2sql", output="json")
+    assert _REAL_CHAT_ONCE(o, session=None, user_message="本周销量前十", cache=False)["model"] == "mock-lite"
+    pinned = Orchestrator(tenant_id=tenant_id, user_id="u1", agent="bi-nl2sql")
+    assert _REAL_CHAT_ONCE(pinned, session=None, user_message="本周销量前十", cache=False)["model"] == "mock-pinned"
+    stats = policy.snapshot()
+    assert stats["bi-nl2sql:light:mock-lite"]["calls"] == 1 and stats["bi-nl2sql:light:mock-lite"]["avg_tokens"] > 0
+    assert "bi-nl2sql:standard:mock-pinned" in stats
@@ -0,0 +1,32 @@
+# file: tests/test_orchestrator_async.py
+# purpose: 异步编排：achat_once 与 chat_once 结果一致；注入延迟的 mock 下大量并发调用不按串行累加耗时
+from __future__ import annotations
+import asyncio
+import time
+from asgiref.sync import async_to_sync
+from core.ai.orchestrator import Orchestrator
+from core.models.ai_billing import AiTenantTokenAccount
+
+_REAL_ACHAT_ONCE = Orchestrator.achat_once  # conftest 会替换为假实现
+
+
+def test_achat_once_many_in_flight(settings, monkeypatch, tenant_id):
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    settings.AI_MOCK_LATENCY_MS = 200
+    n = 200
+    before = AiTenantTokenAccount.objects.get(tenant_id=tenant_id).token_balance
+
+    async def run():
+        o = Orchestrator(tenant_id=tenant_id, agent="chat")
+        # 限流器按租户计数，压测时放宽
+        monkeypatch.setattr("core.ai.orchestrator.rate_limiter.is_allowed", lambda *a, **k: True)
+        return await asyncio.gather(*[_REAL_ACHAT_ONCE(o, session=None, user_message=f"问题 {i}") for i in range(n)])
+
+    t0 = time.perf_counter()
+    results = async_to_sync(run)()
+    elapsed = time.perf_counter() - t0
+    assert len(results) == n and all(r["content"].startswith("[mock] echo") for r in results)
+    # 串行需 n × 0.2s = 40s；并发等待应在数秒内完成
+    assert elapsed < 10, elapsed
+    spent = sum(r["spent"] for r in results)
+    assert AiTenantTokenAccount.objects.get(tenant_id=tenant_id).token_balance == before - spent
@@ -0,0 +1,47 @@
+# file: tests/test_prompt_data.py
+# purpose: 提示词数据编码：紧凑表格与数值/时间格式、空列与常量列剪枝、token 预算内先减行后删列、dict 混合渲染
+from __future__ import annotations
+from datetime import date, datetime
+from decimal import Decimal
+from core.ai import prompt_data
+from core.ai.llm.providers.base import _estimate_tokens
+
+
+def _rows(n):
+    return [{"biz_date": date(2025, 8, 1 + i % 28), "store_id": 7, "note": None, "store_name": f"门店|{i % 3}",
+             "amount": Decimal("12345.678") + i, "rate": Decimal("0.23456"), "ts": datetime(2025, 8, 1, 10, 5, 30)}
+            for i in range(n)]
+
+
+def test_compact_table_and_value_formats():
+    text = prompt_data.encode_rows(_rows(3))
+    lines = text.splitlines()
+    assert lines[0] == "共同值: store_id=7; rate=0.235; ts=2025-08-01 10:05"
+    assert lines[1] == "biz_date|store_name|amount"  # 全空列 note 被删除
+    assert lines[2] == "2025-08-01|门店/0|12346"
+    assert "Decimal" not in text and len(text) * 3 < len(str(_rows(3)))
+    assert prompt_data.fmt_value(datetime(2025, 8, 1)) == "2025-08-01" and prompt_data.fmt_value(True) == "是"
+    assert prompt_data.fmt_value(12.5) == "12.5" and prompt_data.fmt_value(-0.0001) == "0"
+    # 非有限值（除零得到的比率等）不抛异常
+    assert [prompt_data.fmt_value(v) for v in (float("nan"), float("inf"), -float("inf"), Decimal("NaN"))] == \
+        ["", "∞", "-∞", ""]
+    assert prompt_data.encode_rows([{"k": "a", "r": float("inf")}, {"k": "b", "r": float("nan")}]).splitlines()[1:] == \
+        ["a|∞", "b|"]
+
+
+def test_budget_trims_rows_then_columns():
+    rows = _rows(50)
+    full = prompt_data.encode_rows(rows, max_rows=50, budget_tokens=10_000)
+    assert len(full.splitlines()) == 2 + 50
+    text = prompt_data.encode_rows(rows, max_rows=50, budget_tokens=86)
+    assert _estimate_tokens(text) <= 86
+    assert text.splitlines()[-1].startswith("（共 50 行，展示 5 行；省略列: store_name")  # 文本列先于数值列省略
+    assert "amount" in text.splitlines()[1]
+
+
+def test_encode_dict_with_nested_tables():
+    text = prompt_data.encode({"total": 352123.456, "gap_pct": -0.07336, "on_track": False, "daily": _rows(2)})
+    head, *rest = text.splitlines()
+    assert head == "total=352123; gap_pct=-0.073; on_track=否"
+    assert rest[0] == "[daily]" and rest[-1].startswith("2025-08-02|")
+    assert prompt_data.encode_rows([]) == "（无数据）"
@@ -0,0 +1,44 @@
+# file: tests/test_rate_limit.py
+# purpose: 共享限流引擎：多个 worker（引擎实例）共用缓存中的额度、按 token 加权、被拒请求不占额度、中间件 429
+from __future__ import annotations
+from django.core.cache import cache
+from core.utils.rate_limit import Limit, RateLimiter, SharedRateLimiter, check_shared_cache
+
+
+def test_workers_share_quota_and_weight_by_tokens(settings):
+    settings.AI_RATE_LIMIT = {"llm_capacity": 10, "llm_refill_rate": 0.01, "tokens_per_unit": 1000}
+    cache.clear()
+    w1, w2 = RateLimiter(SharedRateLimiter()), RateLimiter(SharedRateLimiter())
+    assert w1.cost_for(200) == 1.0 and w1.cost_for(4000) == 4.0
+    assert [w.is_allowed("t1") for w in (w1, w2) * 3] == [True] * 6
+    assert not w2.is_allowed("t1", cost=w2.cost_for(5000))  # 剩余 4 < 5，且不扣减
+    assert w1.is_allowed("t1", cost=4.0) and not w2.is_allowed("t1")
+    assert w1.is_allowed("t2")  # 其他租户不受影响
+
+
+def test_multi_dimension_is_all_or_nothing():
+    cache.clear()
+    eng = SharedRateLimiter()
+    tenant, user_a, user_b = Limit("rl:t", 3, 0.01), Limit("rl:u:a", 2, 0.01), Limit("rl:u:b", 2, 0.01)
+    assert eng.acquire([tenant, user_a]).allowed and eng.acquire([tenant, user_a]).allowed
+    d = eng.acquire([tenant, user_a])
+    assert not d.allowed and d.retry_after > 0
+    assert eng.acquire([tenant, user_b]).remaining == 0  # 用户 a 被拒的请求未占用租户额度
+    assert not eng.acquire([tenant, user_b]).allowed
+
+
+def test_middleware_rejects_with_retry_after(settings, client_with_tenant):
+    settings.AI_RATE_LIMIT = {"tenant_limit": 2, "user_limit": 2, "window": 60}
+    cache.clear()
+    codes = [client_with_tenant.get("/api/ai/usage/").status_code for _ in range(3)]
+    assert codes[2] == 429 and 429 not in codes[:2]
+    resp = client_with_tenant.get("/api/ai/usage/")
+    assert resp.status_code == 429 and int(resp["Retry-After"]) > 0
+
+
+def test_warns_when_cache_is_not_shared(settings, tmp_path):
+    assert [w.id for w in check_shared_cache()] == ["core.W001"]  # 测试环境为 LocMem
+    settings.CACHES = {**settings.CACHES, "shared": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                                                      "LOCATION": str(tmp_path)}}
+    settings.AI_RATE_LIMIT = {"cache_alias": "shared"}
+    assert check_shared_cache() == []
@@ -0,0 +1,48 @@
+# file: tests/test_response_cache.py
+# purpose: Orchestrator 响应缓存：相同提示词命中缓存、跳过计费、按 agent TTL 开关
+from __future__ import annotations
+from core.ai import response_cache
+from core.ai.orchestrator import Orchestrator
+from core.models.ai_billing import AiTenantTokenAccount
+
+_REAL_CHAT_ONCE = Orchestrator.chat_once  # conftest 会把 chat_once 替换为假实现
+
+
+def _balance(tenant_id):
+    return AiTenantTokenAccount.objects.get(tenant_id=tenant_id).token_balance
+
+
+def test_cache_hit_skips_billing(settings, monkeypatch, tenant_id):
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    settings.AI_RESPONSE_CACHE = {"enabled": True, "ttl": {"bi": 60}}
+    response_cache.clear_local()
+    o = Orchestrator(tenant_id=tenant_id, agent="bi")
+
+    first = _REAL_CHAT_ONCE(o, session=None, user_message="解读本周销售")
+    after_first = _balance(tenant_id)
+    second = _REAL_CHAT_ONCE(o, session=None, user_message="解读本周销售")
+    assert first["cached"] is False and second["cached"] is True
+    assert second["content"] == first["content"] and second["spent"] == 0
+    assert _balance(tenant_id) == after_first
+
+    # 进程内 LRU 清空后仍可从 Django cache 命中
+    response_cache.clear_local()
+    assert _REAL_CHAT_ONCE(o, session=None, user_message="解读本周销售")["cached"] is True
+
+    # 按比例计费
+    settings.AI_RESPONSE_CACHE = {"enabled": True, "ttl": {"bi": 60}, "bill_fraction": 0.5}
+    third = _REAL_CHAT_ONCE(o, session=None, user_message="解读本周销售")
+    assert third["spent"] == round(first["spent"] * 0.5)
+    assert _balance(tenant_id) == after_first - third["spent"]
+
+
+def test_cache_is_opt_in_per_agent(settings, monkeypatch, tenant_id):
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    settings.AI_RESPONSE_CACHE = {"enabled": True, "ttl": {"bi": 60}}
+    response_cache.clear_local()
+    o = Orchestrator(tenant_id=tenant_id, agent="chat")
+    _REAL_CHAT_ONCE(o, session=None, user_message="你好")
+    assert _REAL_CHAT_ONCE(o, session=None, user_message="你好")["cached"] is False
+    bi = Orchestrator(tenant_id=tenant_id, agent="bi")
+    _REAL_CHAT_ONCE(bi, session=None, user_message="你好", cache=False)
+    assert _REAL_CHAT_ONCE(bi, session=None, user_message="你好", cache=False)["cached"] is False
@@ -0,0 +1,67 @@
+# file: tests/test_run_log.py
+# purpose: 运行日志写后落库：调用路径只入队不触库、flush 批量写入 AiRun/AiCallLog 供指标接口统计、队列满时丢弃计数
+from __future__ import annotations
+from asgiref.sync import async_to_sync
+from core.ai import run_log
+from core.ai.metrics import usage_by_provider, usage_summary
+from core.ai.orchestrator import Orchestrator
+from core.models.ai_logging import AiCallLog, AiRun
+from core.observability.metrics import REGISTRY
+
+_REAL_CHAT_ONCE = Orchestrator.chat_once  # conftest 会替换为假实现
+_REAL_ACHAT_ONCE = Orchestrator.achat_once
+
+
+def test_runs_are_written_behind(settings, tenant_id, monkeypatch):
+    settings.AI_RUN_LOG = {"worker": False, "batch": 2}
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    o = Orchestrator(tenant_id=tenant_id, agent="chat")
+    outs = [_REAL_CHAT_ONCE(o, session=None, user_message=f"问题{i}", cache=False) for i in range(3)]
+    assert not AiRun.objects.exists()
+
+    assert run_log.flush() == 3
+    assert set(AiRun.objects.values_list("trace_id", flat=True)) == {x["trace_id"] for x in outs}
+    call = AiCallLog.objects.select_related("run").get(run__trace_id=outs[0]["trace_id"])
+    assert (call.provider, call.tokens_in + call.tokens_out) == ("mock", outs[0]["spent"])
+    assert call.run.inputs["message"] == "问题0" and call.run.outputs["ok"] is True
+    assert usage_summary(tenant_id, None, None)["calls"] == 3
+    assert usage_by_provider(tenant_id, None, None)["by_provider"][0]["provider"] == "mock"
+
+
+def test_queue_full_drops_with_counter(settings, tenant_id):
+    settings.AI_RUN_LOG = {"worker": False, "max_queue": 2}
+    run_log.clear_local()
+    sent = [run_log.enqueue(trace_id=f"t{i}", tenant_id=tenant_id, agent="chat", provider="mock") for i in range(3)]
+    assert sent == [True, True, False]
+    assert 'ai_run_log_dropped_total{reason="queue_full"}' in REGISTRY.export_prometheus()
+    assert run_log.flush() == 2 and AiCallLog.objects.count() == 2
+    # 批内有坏记录（trace_id 重复）时逐条重试，其余照常落库
+    run_log.enqueue(trace_id="t0", tenant_id=tenant_id, agent="chat")
+    run_log.enqueue(trace_id="t9", tenant_id=tenant_id, agent="chat")
+    assert run_log.flush() == 1 and AiRun.objects.filter(tenant_id=tenant_id).count() == 3
+
+
+def test_insert_without_returned_pks(settings, tenant_id, monkeypatch):
+    """MySQL 的 bulk_create 不回填主键：调用日志仍应关联到各自的运行。"""
+    from django.db import connection
+
+    settings.AI_RUN_LOG = {"worker": False}
+    run_log.clear_local()
+    monkeypatch.setattr(type(connection.features), "can_return_rows_from_bulk_insert", False)
+    for i in range(3):
+        run_log.enqueue(trace_id=f"np{i}", tenant_id=tenant_id, agent="chat", provider="mock", tokens_in=i)
+    assert run_log.flush() == 3
+    assert dict(AiCallLog.objects.values_list("run__trace_id", "tokens_in")) == {"np0": 0, "np1": 1, "np2": 2}
+
+
+def test_logged_outputs_are_redacted(settings, tenant_id, monkeypatch):
+    settings.AI_RUN_LOG = {"worker": False}
+    run_log.clear_local()
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    o = Orchestrator(tenant_id=tenant_id, agent="chat")
+    a = async_to_sync(_REAL_ACHAT_ONCE)(o, session=None, user_message="联系 a.b@example.com", cache=False)
+    s = list(o.stream_once(session=None, user_message="联系 c.d@example.com", cache=False))[-1]
+    run_log.flush()
+    for trace_id in (a["trace_id"], s["trace_id"]):
+        content = AiRun.objects.get(trace_id=trace_id).outputs["content"]
+        assert "[email]" in content and "@example.com" not in content
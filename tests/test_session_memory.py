@@ -0,0 +1,56 @@
+# file: tests/test_session_memory.py
+# purpose: 会话记忆：带会话调用时提示词含历史、消息批量落库、缓存命中 0 查询、超出轮数后增量并入滚动摘要
+from __future__ import annotations
+from django.core.cache import cache
+from django.db import connection
+from core.ai import session_memory
+from core.ai.orchestrator import Orchestrator
+from core.models.ai_logging import AiChatSession, AiMessage
+
+_REAL_CHAT_ONCE = Orchestrator.chat_once  # conftest 会替换为假实现
+
+
+def test_chat_once_carries_history(tenant_id, monkeypatch):
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)  # mock 供应商回显提示词
+    cache.clear()
+    s = AiChatSession.objects.create(tenant_id=tenant_id, user_id="u1")
+    o = Orchestrator(tenant_id=tenant_id, agent="chat")
+    _REAL_CHAT_ONCE(o, session=s, user_message="我想了解布洛芬")
+    out = _REAL_CHAT_ONCE(o, session=str(s.id), user_message="它的禁忌是什么")
+    assert "用户：我想了解布洛芬" in out["content"] and "【当前问题】\n它的禁忌是什么" in out["content"]
+    assert list(AiMessage.objects.filter(session=s).order_by("id").values_list("role", flat=True)) == \
+        ["user", "assistant", "user", "assistant"]
+    # 未知会话 id（非主键）不启用记忆
+    assert _REAL_CHAT_ONCE(o, session="s1", user_message="你好")["content"] == "[mock] echo: 你好"
+
+
+def test_context_cached_and_summarized_on_overflow(settings, tenant_id, django_assert_num_queries):
+    settings.AI_SESSION_MEMORY = {"max_turns": 2, "keep_turns": 1, "budget_tokens": 10_000}
+    cache.clear()
+    s = AiChatSession.objects.create(tenant_id=tenant_id, user_id="u1")
+    for i in range(2):
+        session_memory.record_turn(tenant_id=tenant_id, session=s, user_message=f"问题{i}", reply=f"回答{i}")
+    with django_assert_num_queries(0):
+        prompt = session_memory.build_prompt(tenant_id=tenant_id, session=s, user_message="问题2")
+    assert "用户：问题0" in prompt and "【对话摘要】" not in prompt
+
+    session_memory.record_turn(tenant_id=tenant_id, session=s, user_message="问题2", reply="回答2")
+    s.refresh_from_db()
+    assert s.summary.startswith("OK: ")  # conftest 的假 chat_once 生成摘要
+    assert s.summary_upto == AiMessage.objects.get(session=s, content="回答1").id
+    cache.clear()  # 冷启动：从库中恢复摘要 + 未摘要轮次
+    prompt = session_memory.build_prompt(tenant_id=tenant_id, session=s, user_message="问题3")
+    assert "【对话摘要】" in prompt and "用户：问题2" in prompt and "问题1" not in prompt
+
+
+def test_summary_upto_without_returned_pks(settings, tenant_id, monkeypatch):
+    # MySQL：bulk_create 不回填主键，消息 id 需回查
+    monkeypatch.setattr(type(connection.features), "can_return_rows_from_bulk_insert", False)
+    settings.AI_SESSION_MEMORY = {"max_turns": 1, "keep_turns": 1, "budget_tokens": 10_000}
+    cache.clear()
+    s = AiChatSession.objects.create(tenant_id=tenant_id, user_id="u1")
+    session_memory.build_prompt(tenant_id=tenant_id, session=s, user_message="问题0")
+    for i in range(2):
+        session_memory.record_turn(tenant_id=tenant_id, session=s, user_message=f"问题{i}", reply=f"回答{i}")
+    s.refresh_from_db()
+    assert s.summary_upto == AiMessage.objects.get(session=s, content="回答0").id
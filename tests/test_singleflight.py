@@ -0,0 +1,60 @@
+# file: tests/test_singleflight.py
+# purpose: 请求合并：并发同 key 只计算一次并共享结果；跨 worker 经缓存锁等待对方结果；超时回退自行计算；
+#          编排器相同提示词的并发调用只请求并计费一次
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from core.ai.orchestrator import Orchestrator
+from core.models.ai_billing import AiTenantTokenAccount
+from core.utils import singleflight
+
+_REAL_ACHAT_ONCE = Orchestrator.achat_once  # conftest 会替换为假实现
+
+
+def test_concurrent_callers_share_one_computation():
+    cache.clear()
+    calls = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"rows": [1, 2]}
+
+    with ThreadPoolExecutor(8) as ex:
+        results = list(ex.map(lambda _: singleflight.do("q1", work), range(8)))
+    assert len(calls) == 1
+    assert all(v == {"rows": [1, 2]} for v, _ in results) and sum(shared for _, shared in results) == 7
+
+
+def test_waits_for_other_worker_then_falls_back():
+    cache.clear()
+    cache.add("sf:lock:q2", "other-flight", timeout=60)  # 另一个 worker 正在计算
+    threading.Timer(0.1, lambda: cache.set("sf:res:q2:other-flight", {"v": 42}, timeout=10)).start()
+    assert singleflight.do("q2", lambda: 0) == (42, True)
+
+    cache.add("sf:lock:q3", "stuck-flight", timeout=60)  # 对方迟迟不出结果：超时后自行计算
+    t0 = time.monotonic()
+    assert singleflight.do("q3", lambda: 7, timeout=0.2) == (7, False)
+    assert time.monotonic() - t0 < 1
+
+
+def test_identical_llm_calls_are_coalesced(settings, monkeypatch, tenant_id):
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    settings.AI_MOCK_LATENCY_MS = 100
+    cache.clear()
+    before = AiTenantTokenAccount.objects.get(tenant_id=tenant_id).token_balance
+
+    async def run():
+        o = Orchestrator(tenant_id=tenant_id, agent="bi")
+        return await asyncio.gather(*[_REAL_ACHAT_ONCE(o, session=None, user_message="今日销售复盘") for _ in range(5)])
+
+    results = async_to_sync(run)()
+    leaders = [r for r in results if not r.get("coalesced")]
+    assert len(leaders) == 1 and len({r["content"] for r in results}) == 1
+    assert len({r["trace_id"] for r in results}) == 5
+    after = AiTenantTokenAccount.objects.get(tenant_id=tenant_id).token_balance
+    assert before - after == leaders[0]["spent"]
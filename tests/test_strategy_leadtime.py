@@ -0,0 +1,55 @@
+# file: tests/test_strategy_leadtime.py
+# purpose: 策略：供应商提前期/下单节奏/EOQ 与提前期波动下的安全库存
+from __future__ import annotations
+from datetime import date
+from math import sqrt
+from django.db import connection
+from django.utils import timezone
+from core.ai.strategy import replenish
+from core.ai.strategy.common import enterprise_id
+from core.ai.strategy.leadtime import _upsert, compute_stats, calc_eoq
+from core.ai.tools.inventory_tool import calc_safety_stock
+from core.models.ai_supply import AiSupplierLeadTime
+
+
+def test_lead_time_stats_and_eoq():
+    orders = [(7, 1, date(2024, 1, 1), 100, 1000), (7, 1, date(2024, 1, 11), 100, 1000), (7, 1, date(2024, 1, 31), 200, 2000)]
+    batches = [(7, 1, date(2024, 1, 1), "B1"), (7, 1, date(2024, 1, 11), "B2"), (7, 1, date(2024, 1, 31), "B1")]
+    first_seen = {(1, "B1"): date(2024, 1, 4), (1, "B2"): date(2024, 1, 16)}
+    st = compute_stats(orders, batches, first_seen, window_days=365, order_cost=50, holding_rate=0.2)[(7, 1)]
+    # B1 复用：第二次采购早于首次入库 → 丢弃；样本为 3 天与 5 天
+    assert (st["samples"], st["lead_time_mean"], st["lead_time_std"]) == (2, 4.0, 1.0)
+    assert st["cadence_days"] == 15.0 and st["unit_price_avg"] == 10.0
+    assert st["eoq"] == round(calc_eoq(400, 10.0, order_cost=50, holding_rate=0.2), 2) == 141.42
+
+
+def test_safety_stock_with_lead_time_variance():
+    base = calc_safety_stock(2.0, 4.0, service_level=0.95)
+    assert abs(base - 1.6449 * 2.0 * 2.0) < 1e-9
+    ss = calc_safety_stock(2.0, 4.0, service_level=0.95, daily_demand_mean=10.0, leadtime_sigma=1.0)
+    assert abs(ss - 1.6449 * sqrt(4 * 4 + 100 * 1)) < 1e-9
+
+
+def test_upsert_updates_existing_rows(db, monkeypatch):
+    def row(eoq):
+        return AiSupplierLeadTime(tenant_id="1", supplier_id=7, product_id=1, orders=3, eoq=eoq, updated_at=timezone.now())
+
+    _upsert([row(10.0)])
+    _upsert([row(20.0)])
+    assert list(AiSupplierLeadTime.objects.values_list("eoq", flat=True)) == [20.0]
+
+    # MySQL（ON DUPLICATE KEY UPDATE）不支持冲突目标列：不传 unique_fields
+    calls = []
+    monkeypatch.setattr(type(connection.features), "supports_update_conflicts_with_target", False)
+    monkeypatch.setattr(AiSupplierLeadTime.objects, "bulk_create", lambda objs, **kw: calls.append(kw))
+    _upsert([row(30.0)])
+    assert calls and "unique_fields" not in calls[0] and calls[0]["update_conflicts"]
+
+
+def test_zero_day_lead_time_is_used(monkeypatch):
+    monkeypatch.setattr(replenish, "_daily_qty_series", lambda *a: {1: [2.0] * 7})
+    monkeypatch.setattr(replenish, "_latest_inventory", lambda *a: {1: 0.0})
+    monkeypatch.setattr(replenish, "get_lead_times", lambda **kw: {1: {"lead_time_mean": 0.0, "lead_time_std": 0.0}})
+    [row] = replenish.suggest_replenishment(tenant_id="1", product_ids=[1], leadtime_days=7.0)
+    assert row["leadtime_days"] == 0.0 and row["reorder_point"] == 0.0  # 实测当天到货，不回落到默认 7 天
+    assert enterprise_id("12") == 12 and enterprise_id("t_demo") is None
@@ -0,0 +1,67 @@
+# file: tests/test_strategy_promo.py
+# purpose: 策略：促销候选（降幅阈值、按门店 top_k、最新快照库存为 0 的商品不入选）
+from __future__ import annotations
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+import pytest
+from django.contrib.auth.models import User
+from django.utils import timezone
+from core.ai.strategy.promo import _candidate_queryset, suggest_promotions
+from core.models import Enterprise, InventorySnapshot, Product, Sale, Store
+
+
+@pytest.fixture()
+def ent():
+    ent = Enterprise.objects.create(name="e", owner=User.objects.create(username="u"))
+    today = date.today()
+    stores = {c: Store.objects.create(enterprise=ent, source_store_id=c, store_code=c, name=c) for c in ("S1", "S2")}
+    products = {c: Product.objects.create(enterprise=ent, source_product_id=c, product_code=c, name=c, retail_price=1,
+                                          member_price=1, last_modified_at=timezone.now()) for c in ("P1", "P2", "P3", "P4")}
+    n = 0
+
+    def sale(store, product, amount, days_ago):
+        nonlocal n
+        n += 1
+        amount = Decimal(amount)
+        Sale.objects.create(enterprise=ent, source_sale_id=str(n), store=stores[store], product=products[product],
+                            sale_time=datetime.combine(today - timedelta(days=days_ago), time(10)), quantity=Decimal(1),
+                            list_price=amount, actual_price=amount, total_amount=amount)
+
+    def stock(store, product, qty, days_ago=0, batch="B1"):
+        InventorySnapshot.objects.create(enterprise=ent, store=stores[store], product=products[product], batch_number=batch,
+                                         snapshot_date=today - timedelta(days=days_ago), quantity=Decimal(qty))
+
+    # 基线窗（10 天前）与近窗（2 天前）；降幅：S1 P1 80% / P2 40% / P3 10% / P4 100%，S2 P2 70%
+    for store, product, base, recent in [("S1", "P1", 100, 20), ("S1", "P2", 100, 60), ("S1", "P3", 100, 90),
+                                         ("S1", "P4", 100, 0), ("S2", "P2", 100, 30)]:
+        sale(store, product, base, 10)
+        if recent:
+            sale(store, product, recent, 2)
+    stock("S1", "P1", 5)
+    stock("S1", "P2", 6)
+    stock("S1", "P2", 4, batch="B2")  # 同日多批号合计
+    stock("S1", "P3", 10)
+    stock("S1", "P4", 50, days_ago=3)
+    stock("S1", "P4", 0)  # 最新快照已无库存
+    stock("S2", "P2", 3)
+    return ent, stores, products
+
+
+def test_candidates_by_drop_with_stock(ent):
+    e, stores, products = ent
+    items = suggest_promotions(tenant_id=str(e.id), top_k=5)
+    assert [(i["product_id"], i["drop_pct"], i["inventory"]) for i in items] == \
+        [(products["P1"].id, 80.0, 5.0), (products["P2"].id, 55.0, 13.0)]
+    assert items[0]["suggest_discount"] == 0.2 and items[1]["suggest_discount"] == 0.15
+    # 库存条件随降幅在聚合后判定
+    assert "HAVING" in str(_candidate_queryset(ent_id=e.id, lookback=14).query)
+
+
+def test_per_store_top_k(ent):
+    e, stores, products = ent
+    items = suggest_promotions(tenant_id=str(e.id), top_k=1, per_store=True)
+    assert [(i["store_id"], i["product_id"]) for i in items] == \
+        [(stores["S1"].id, products["P1"].id), (stores["S2"].id, products["P2"].id)]
+    items = suggest_promotions(tenant_id=str(e.id), top_k=5, store_id=stores["S1"].id)
+    assert [i["product_id"] for i in items] == [products["P1"].id, products["P2"].id]  # P4 降幅最大但无库存
+    assert suggest_promotions(tenant_id="t_demo") == []
@@ -0,0 +1,69 @@
+# file: tests/test_strategy_transfer.py
+# purpose: 策略：门店间调拨（富余/缺口贪心匹配）
+from __future__ import annotations
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.test import Client
+from django.utils import timezone
+from core.ai.strategy.transfer import StockPosition, _latest_inventory, plan_transfers, suggest_transfers
+from core.models import Enterprise, InventorySnapshot, Product, Sale, Store
+
+
+def _pos(store, on_hand, mean=1.0, rop=10.0, target=15.0):
+    return StockPosition(store_id=store, product_id=1, on_hand=on_hand, daily_mean=mean, reorder_point=rop, target=target)
+
+
+def test_transfer_prefers_cheapest_source_then_purchases_rest():
+    positions = [_pos("A", 40.0), _pos("B", 25.0), _pos("C", 2.0), _pos("D", 5.0, mean=5.0, rop=30.0, target=45.0)]
+    costs = [{"from": "A", "to": "C", "cost": 5}, {"from": "B", "to": "C", "cost": 1},
+             {"from": "A", "to": "D", "cost": 1}, {"from": "B", "to": "D", "cost": 1}]
+    plan = plan_transfers(positions, costs=costs, default_cost=None)
+    moves = {(t["from_store"], t["to_store"]): t["qty"] for t in plan["transfers"]}
+    # D 更紧急（1 天覆盖）先满足：先从富余更多的 A 调 25，再从 B 调 10
+    assert moves[("A", "D")] == 25.0 and moves[("B", "D")] == 10.0
+    # D 余下 5 与 C 的 13 均无富余可调 → 转采购
+    assert ("B", "C") not in moves
+    assert plan["to_purchase"] == [{"product_id": 1, "store_id": "D", "qty": 5.0}, {"product_id": 1, "store_id": "C", "qty": 13.0}]
+
+
+def test_default_source_after_explicit_partial_use():
+    # A 富余 20：C1 经显式低成本调走 10 后，堆中 A 的条目过期，C2（默认成本）仍应从 A 调入余下的 10
+    positions = [_pos("A", 35.0), _pos("C1", 5.0), _pos("C2", 5.0, mean=0.5)]
+    plan = plan_transfers(positions, costs=[{"from": "A", "to": "C1", "cost": 0.5}], default_cost=1.0)
+    moves = {(t["from_store"], t["to_store"]): t["qty"] for t in plan["transfers"]}
+    assert moves == {("A", "C1"): 10.0, ("A", "C2"): 10.0}
+    assert plan["to_purchase"] == []
+
+
+def test_suggest_transfers_from_db(db):
+    ent = Enterprise.objects.create(name="e", owner=User.objects.create(username="u"))
+    a, c = (Store.objects.create(enterprise=ent, source_store_id=x, store_code=x, name=x) for x in ("A", "C"))
+    p = Product.objects.create(enterprise=ent, source_product_id="P", product_code="P", name="p", retail_price=1,
+                               member_price=1, last_modified_at=timezone.now())
+    today = date.today()
+    Sale.objects.bulk_create([
+        Sale(enterprise=ent, source_sale_id=str(d), store=c, product=p, quantity=Decimal(2), list_price=Decimal(1),
+             actual_price=Decimal(1), total_amount=Decimal(2), sale_time=datetime.combine(today - timedelta(days=d), time(10)))
+        for d in range(1, 29)
+    ])
+
+    def stock(store, qty, days_ago=0, batch="B1"):
+        InventorySnapshot.objects.create(enterprise=ent, store=store, product=p, batch_number=batch, quantity=Decimal(qty),
+                                         snapshot_date=today - timedelta(days=days_ago))
+
+    stock(a, 999, days_ago=3)  # 较早快照不参与
+    stock(a, 60)
+    stock(a, 40, batch="B2")  # 最近快照日各批号合计
+    stock(c, 2)
+    tenant = str(ent.id)
+    assert _latest_inventory(tenant) == {(a.id, p.id): 100.0, (c.id, p.id): 2.0}
+
+    plan = suggest_transfers(tenant_id=tenant)
+    [move] = plan["transfers"]
+    assert (move["from_store"], move["to_store"]) == (a.id, c.id) and move["qty"] > 10
+    assert plan["positions"] == 2 and plan["to_purchase"] == []
+
+    r = Client(HTTP_X_TENANT_ID=tenant).post("/api/ai/strategy/transfer/", {}, content_type="application/json")
+    assert r.status_code == 200 and r.json()["data"]["count"] == 1
+    assert suggest_transfers(tenant_id="t_demo")["transfers"] == []
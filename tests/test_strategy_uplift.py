@@ -0,0 +1,71 @@
+# file: tests/test_strategy_uplift.py
+# purpose: 策略：历史促销效果（增量/毛利/光环蚕食）；按历史促销 ROI 排序促销候选
+from __future__ import annotations
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from core.ai.strategy.promo import suggest_promotions
+from core.ai.strategy.uplift import analyze_uplift, compute_uplift, summarize
+from core.models import Enterprise, InventorySnapshot, Product, Sale, Store
+
+
+def test_uplift_periods_and_roi():
+    start = date(2024, 3, 1)
+    rows = []
+    for i in range(10):
+        d = start + timedelta(days=i)
+        promo = i in (4, 5)
+        rows.append({"product_id": 1, "store_id": 9, "biz_date": d, "qty": 5.0 if promo else 1.0, "promo_qty": 5.0 if promo else 0.0,
+                     "amount": 0.0, "discount": 10.0 if promo else 0.0, "margin": 15.0 if promo else 5.0})
+        rows.append({"product_id": 2, "store_id": 9, "biz_date": d, "qty": 1.0 if promo else 2.0, "promo_qty": 0.0,
+                     "amount": 0.0, "discount": 0.0, "margin": 5.0 if promo else 10.0})
+    periods = compute_uplift(rows, {1: "c", 2: "c"}, start=start, end=start + timedelta(days=9))
+    assert len(periods) == 1
+    p = periods[0]
+    assert (p.days, p.incremental_units, p.margin_impact, p.halo_units) == (2, 8.0, 20.0, -2.0)
+    s = summarize(periods)[(1, 9)]
+    assert s["expected_roi"] == round((20.0 - 10.0) / 20.0, 4)
+
+
+def test_analyze_uplift_and_rank_by_roi(db):
+    cache.clear()
+    ent = Enterprise.objects.create(name="e", owner=User.objects.create(username="u"))
+    store = Store.objects.create(enterprise=ent, source_store_id="S", store_code="S", name="s")
+    p1, p2 = (Product.objects.create(enterprise=ent, source_product_id=c, product_code=c, name=c, retail_price=10,
+                                     member_price=10, last_modified_at=timezone.now()) for c in ("P1", "P2"))
+    today = date.today()
+    rows = []
+
+    def sale(product, days_ago, qty, price, profit, discount=0):
+        rows.append(Sale(enterprise=ent, source_sale_id=str(len(rows)), store=store, product=product,
+                         sale_time=datetime.combine(today - timedelta(days=days_ago), time(10)),
+                         quantity=Decimal(qty), list_price=Decimal(10), actual_price=Decimal(price),
+                         total_amount=Decimal(qty * price), discount_amount=Decimal(discount),
+                         gross_profit_amount=Decimal(profit)))
+
+    # P1：平日 1 件原价，10/9 天前促销（8 元卖 5 件）；P2：无促销，近期骤降
+    for d in range(1, 30):
+        if d in (10, 9):
+            sale(p1, d, 5, 8, 15, discount=10)
+        else:
+            sale(p1, d, 1, 10, 5)
+    sale(p2, 10, 10, 10, 50)
+    sale(p2, 2, 2, 10, 10)
+    Sale.objects.bulk_create(rows)
+    for p in (p1, p2):
+        InventorySnapshot.objects.create(enterprise=ent, store=store, product=p, snapshot_date=today, quantity=Decimal(5))
+
+    res = analyze_uplift(tenant_id=str(ent.id), lookback_days=90)
+    [period] = res["periods"]
+    assert (period["product_id"], period["days"], period["units"]) == (p1.id, 2, 10.0)
+    assert period["incremental_units"] > 8 and res["by_sku"][str(p1.id)]["expected_roi"] > 0
+    assert analyze_uplift(tenant_id=str(ent.id), lookback_days=90)["cached"]
+
+    items = suggest_promotions(tenant_id=str(ent.id), top_k=5, rank_by="roi")
+    # P2 降幅更大，但只有 P1 有历史促销 ROI → P1 在前
+    assert [i["product_id"] for i in items] == [p1.id, p2.id]
+    assert items[0]["expected_roi"] > 0 and items[1]["expected_roi"] is None
+    assert suggest_promotions(tenant_id="t_demo", rank_by="roi") == []
+    cache.clear()
@@ -0,0 +1,72 @@
+# file: tests/test_token_lease.py
+# purpose: 租约式额度预留：租约内授权/结算不触库、按批入账、hard_limit 不被突破、归还剩余额度
+from __future__ import annotations
+from datetime import timedelta
+from django.utils import timezone
+from core.ai import token_lease
+from core.ai.billing import begin_authorize, finalize_or_rollback
+from core.models.ai_billing import AiTenantTokenAccount, AiTokenLease, AiTokenTransaction
+
+
+def _balance(tenant_id):
+    return AiTenantTokenAccount.objects.get(tenant_id=tenant_id).token_balance
+
+
+def test_calls_settle_locally_in_batches(settings, tenant_id, django_assert_num_queries):
+    settings.AI_TOKEN_LEASE = {"enabled": True, "block": 1000, "settle_every": 100, "settle_interval_s": 3600}
+    token_lease.reset()
+    before = _balance(tenant_id)
+    assert begin_authorize(tenant_id=tenant_id, estimate_tokens=50, run_id="r0").allowed
+    finalize_or_rollback(tenant_id=tenant_id, run_id="r0", actual_tokens=10, success=True)
+    with django_assert_num_queries(0):
+        for i in range(1, 20):
+            assert begin_authorize(tenant_id=tenant_id, estimate_tokens=50, run_id=f"r{i}").allowed
+            finalize_or_rollback(tenant_id=tenant_id, run_id=f"r{i}", actual_tokens=10, success=True)
+    assert _balance(tenant_id) == before
+    assert AiTokenLease.objects.get(tenant_id=tenant_id).tokens == 1000
+
+    assert token_lease.flush(tenant_id, release=True) == 200
+    assert _balance(tenant_id) == before - 200
+    tx = AiTokenTransaction.objects.get(tenant_id=tenant_id, reason="llm_usage_batch")
+    assert tx.change == -200 and tx.meta["runs"] == 20
+    assert not AiTokenLease.objects.filter(tenant_id=tenant_id).exists()
+    token_lease.reset()
+
+
+def test_hard_limit_holds_across_leases(settings, tenant_id):
+    settings.AI_TOKEN_LEASE = {"enabled": True, "block": 1000}
+    AiTenantTokenAccount.objects.filter(tenant_id=tenant_id).update(token_balance=1300, hard_limit=100)
+    # 其他进程已持有 1000 的有效租约
+    AiTokenLease.objects.create(tenant_id=tenant_id, holder="other:1", tokens=1000,
+                                expires_at=timezone.now() + timedelta(seconds=60))
+    token_lease.reset()
+    assert begin_authorize(tenant_id=tenant_id, estimate_tokens=150, run_id="a").allowed
+    res = begin_authorize(tenant_id=tenant_id, estimate_tokens=100, run_id="b")
+    assert not res.allowed and res.snapshot["lease_remaining"] == 50
+    finalize_or_rollback(tenant_id=tenant_id, run_id="a", actual_tokens=120, success=True)
+    token_lease.flush(tenant_id, release=True)
+    assert _balance(tenant_id) == 1180
+    token_lease.reset()
+
+
+def test_idle_lease_flushes_usage_before_expiry(settings, tenant_id, monkeypatch):
+    settings.AI_TOKEN_LEASE = {"enabled": True, "block": 1000, "ttl_s": 60, "settle_every": 100, "settle_interval_s": 5}
+    timers = []
+    monkeypatch.setattr(token_lease, "_timer", lambda delay, fn: timers.append((delay, fn)) or object())
+    token_lease.reset()
+    before = _balance(tenant_id)
+    assert begin_authorize(tenant_id=tenant_id, estimate_tokens=50, run_id="r1").allowed
+    finalize_or_rollback(tenant_id=tenant_id, run_id="r1", actual_tokens=30, success=True)
+    finalize_or_rollback(tenant_id=tenant_id, run_id="r2", actual_tokens=20, success=True)
+    assert len(timers) == 1 and timers[0][0] <= 5
+    assert _balance(tenant_id) == before
+
+    # 进程随后空闲：定时器在租约过期前入账并续租，之后库内租约过期也不会丢失用量
+    timers[0][1]()
+    assert _balance(tenant_id) == before - 50
+    lease = AiTokenLease.objects.get(tenant_id=tenant_id)
+    assert lease.tokens == 950 and lease.expires_at > timezone.now()
+    AiTokenLease.objects.filter(tenant_id=tenant_id).update(expires_at=timezone.now() - timedelta(seconds=1))
+    assert token_lease.flush(tenant_id) == 0
+    assert _balance(tenant_id) == before - 50
+    token_lease.reset()